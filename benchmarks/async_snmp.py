@@ -0,0 +1,35 @@
+"""`python -m benchmarks.async_snmp [agents] [interfaces]` benchmarks walking the ifTable of
+simulated agents, in walked OIDs per second.
+"""
+
+import asyncio
+import sys
+import time
+
+from netsight.libs.netty.utils.async_snmp import SnmpClient, SnmpTarget
+from tests.libs.test_async_snmp import (
+    IF_DESCR,
+    IF_HC_IN_OCTETS,
+    IF_OPER_STATUS,
+    IF_SPEED,
+    IF_TYPE,
+    SimulatedAgent,
+    if_mib,
+    start_agents,
+)
+
+
+async def benchmark(count: int = 500, interfaces: int = 200) -> None:
+    agents = await start_agents(count, lambda: SimulatedAgent(if_mib(interfaces)))
+    targets = [SnmpTarget("127.0.0.1", port=port) for _, port in agents]
+    columns = [IF_DESCR, IF_TYPE, IF_SPEED, IF_OPER_STATUS, IF_HC_IN_OCTETS]
+    async with SnmpClient(timeout=2, max_repetitions=25) as client:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client.walk(target, columns) for target in targets))
+        elapsed = time.perf_counter() - started
+    walked = sum(len(column) for result in results for column in result.values())
+    print(f"{count} agents, {walked} OIDs in {elapsed:.2f}s, {walked / elapsed:,.0f} OIDs/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark(*map(int, sys.argv[1:3])))
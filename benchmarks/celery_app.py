@@ -0,0 +1,49 @@
+"""`python -m benchmarks.celery_app [tasks]` compares the tasks a second of a prefork child recycled
+per task with one keeping its event loop.
+"""
+
+import multiprocessing
+import sys
+import time
+
+from anyio.from_thread import start_blocking_portal
+from sqlalchemy import text
+
+from netsight.core.celery_app import WorkerLoop
+from netsight.core.database.session import async_engine
+
+
+async def count_devices() -> int:
+    async with async_engine.connect() as connection:
+        return await connection.scalar(text("SELECT count(*) FROM device"))
+
+
+def recycled_task() -> None:
+    # a prefork child living for one task: a new event loop, a new database connection
+    with start_blocking_portal() as portal:
+        portal.call(count_devices)
+
+
+def benchmark(tasks: int = 500) -> None:
+    context = multiprocessing.get_context("fork")
+    started = time.perf_counter()
+    for _ in range(tasks):
+        process = context.Process(target=recycled_task)
+        process.start()
+        process.join()
+    recycled = tasks / (time.perf_counter() - started)
+
+    worker_loop = WorkerLoop(async_engine)
+    started = time.perf_counter()
+    for _ in range(tasks):
+        worker_loop.portal.call(count_devices)
+    persistent = tasks / (time.perf_counter() - started)
+    worker_loop.close()
+
+    # broker round trips left out, they are the same in both modes
+    print(f"a process per task: {recycled:,.0f} tasks/s")
+    print(f"a loop per process: {persistent:,.0f} tasks/s, {persistent / recycled:.0f}x")
+
+
+if __name__ == "__main__":
+    benchmark(*map(int, sys.argv[1:2]))
@@ -0,0 +1,39 @@
+"""`python -m benchmarks.textfsm_parser [entries] [workers]` times compiling a TextFSM template and
+parsing a MAC table inline and in worker processes, in rows per second.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from netsight.libs.netty.parser import TextFsmParser, compile_template, parse_text
+from tests.libs.test_textfsm_parser import MAC_RECORD, MAC_TEMPLATE, mac_table
+
+
+async def benchmark(entries: int = 100_000, workers: int = 4) -> None:
+    output = mac_table(entries)
+    started = time.perf_counter()
+    compile_template(("mac", 1), MAC_TEMPLATE)
+    compiled = time.perf_counter()
+    parse_text(("mac", 1), MAC_TEMPLATE, output)
+    inline = time.perf_counter() - compiled
+    print(f"compiled in {(compiled - started) * 1000:.2f}ms, cached in", end=" ")
+    started = time.perf_counter()
+    compile_template(("mac", 1), MAC_TEMPLATE)
+    print(f"{(time.perf_counter() - started) * 1_000_000:.1f}us")
+    print(f"{entries} entries inline in {inline:.2f}s, {entries / inline:,.0f} rows/s")
+
+    mac_parser = TextFsmParser(workers=workers, chunk_lines=entries // workers // 4)
+    # the first parse starts the processes
+    await mac_parser.parse(("mac", 1), MAC_TEMPLATE, mac_table(workers * 10_000), split_at=MAC_RECORD)
+    started = time.perf_counter()
+    await mac_parser.parse(("mac", 1), MAC_TEMPLATE, output, split_at=MAC_RECORD)
+    pooled = time.perf_counter() - started
+    mac_parser.close()
+    processes = f"{workers} processes on {os.cpu_count()} CPUs"
+    print(f"{entries} entries in {processes} in {pooled:.2f}s, {entries / pooled:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark(*map(int, sys.argv[1:3])))
@@ -0,0 +1,55 @@
+"""`python -m benchmarks.topology_graph [nodes]` times building the topology graph of a generated
+campus and the queries run on it.
+"""
+
+import random
+import sys
+import time
+
+from netsight.libs.topology.graph import TopologyGraph
+
+DUAL_HOMED = 0.8  # access switches linked to both distribution switches, the others chained
+
+
+def benchmark(nodes: int = 50_000) -> None:
+    # a campus: 2 cores, distribution pairs of 40 access switches, access switches chained
+    rng = random.Random(0)  # noqa: S311
+    links = [(1, 2)]
+    access = []
+    node = 3
+    while node < nodes:
+        first, second = node, node + 1
+        links += [(first, 1), (first, 2), (second, 1), (second, 2)]
+        for switch in range(node + 2, min(node + 42, nodes)):
+            links += [(switch, first), (switch, second) if rng.random() < DUAL_HOMED else (switch, switch - 1)]
+            access.append(switch)
+        node += 42
+
+    started = time.perf_counter()
+    graph = TopologyGraph(range(1, nodes), links)
+    graph.csr  # noqa: B018
+    timings = [("built", time.perf_counter() - started)]
+    queries = [
+        ("bfs", lambda: graph.bfs(1)),
+        ("shortest path", lambda: graph.shortest_path(access[0], access[-1])),
+        ("blast radius", lambda: graph.blast_radius(3, [1, 2])),
+        ("components", graph.connected_components),
+        ("articulation points", graph.articulation_points),
+        ("articulation points cached", graph.articulation_points),
+    ]
+    for name, query in queries:
+        started = time.perf_counter()
+        query()
+        timings.append((name, time.perf_counter() - started))
+    graph.replace_links(access[0], [1])
+    started = time.perf_counter()
+    graph.csr  # noqa: B018
+    timings.append(("rebuilt after a change", time.perf_counter() - started))
+
+    print(f"{nodes} devices, {len(links)} links")
+    for name, seconds in timings:
+        print(f"{name}: {seconds * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    benchmark(*map(int, sys.argv[1:2]))
@@ -4,6 +4,7 @@ from fastapi import FastAPI
 
 from netsight.app import app
 from netsight.core.config import settings
+from netsight.core.metrics import mark_process_dead, reset_multiprocess_dir
 from netsight.core.utils.loggers import LOGGING, configure_logger
 
 
@@ -14,6 +15,12 @@ def gunicorn_options() -> dict[str, Any]:
         def setup(self, cfg: Any) -> None:  # noqa: ARG002
             configure_logger()
 
+    def on_starting(server: Any) -> None:  # noqa: ARG001
+        reset_multiprocess_dir()
+
+    def child_exit(server: Any, worker: Any) -> None:  # noqa: ARG001
+        mark_process_dead(worker.pid)
+
     return {
         "bind": f"{settings.LISTENING_HOST}:{settings.LISTENING_PORT}",
         "workers": settings.WORKERS,
@@ -23,6 +30,8 @@ def gunicorn_options() -> dict[str, Any]:
         "accesslog": "-",
         "errorlog": "-",
         "logger_class": GunicornLogger,
+        "on_starting": on_starting,
+        "child_exit": child_exit,
     }
 
 
@@ -4,14 +4,15 @@ from contextlib import asynccontextmanager
 import redis.asyncio as aioreids
 import sentry_sdk
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.errors import ServerErrorMiddleware
 
 from netsight.core.config import _Env, settings
 from netsight.core.errors.exception_handlers import default_exception_handler, exception_handlers, sentry_ignore_errors
+from netsight.core.metrics import CONTENT_TYPE_LATEST, generate_metrics
 from netsight.libs.redis import session
-from netsight.register.middlewares import RequestMiddleware
+from netsight.register.middlewares import AdmissionControlMiddleware, MetricsMiddleware, RequestMiddleware
 from netsight.register.openapi import get_open_api_intro, get_stoplight_elements_html
 from netsight.register.routers import router
 
@@ -41,6 +42,7 @@ def create_app() -> FastAPI:
         summary=settings.DESCRIPTION,
         description=get_open_api_intro(),
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
         docs_url="/api/docs",
         redoc_url="/api/redoc",
         openapi_url="/api/openapi.json",
@@ -54,10 +56,22 @@ def create_app() -> FastAPI:
             openapi_url="/api/openapi.json", title=settings.PROJECT_NAME, base_path="/api/elements"
         )
 
+    @app.get(
+        "/metrics", tags=["Monitoring"], include_in_schema=False, operation_id="c0f1b6a4-2a59-4f6e-9d8e-5b7c3e1a9f20"
+    )
+    def get_metrics() -> Response:
+        return Response(content=generate_metrics(), media_type=CONTENT_TYPE_LATEST)
+
     app.include_router(router, prefix="/api")
     for handler in exception_handlers:
         app.add_exception_handler(exc_class_or_status_code=handler["exception"], handler=handler["handler"])
     app.add_middleware(RequestMiddleware)
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        max_concurrency=settings.MAX_CONCURRENT_REQUESTS,
+        pool_wait_threshold=settings.DB_POOL_WAIT_THRESHOLD,
+    )
+    app.add_middleware(MetricsMiddleware)
     app.add_middleware(ServerErrorMiddleware, handler=default_exception_handler)
     app.add_middleware(
         CORSMiddleware,
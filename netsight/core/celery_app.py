@@ -1,16 +1,31 @@
 import logging
+import os
+import threading
+import time
 from collections.abc import Callable, Coroutine
+from contextlib import ExitStack
 from logging.config import dictConfig
 from typing import Any, TypeVar
 
-from anyio.from_thread import start_blocking_portal
+from anyio.from_thread import BlockingPortal, start_blocking_portal
 from celery import Celery
-from celery.signals import setup_logging
+from celery.signals import (
+    setup_logging,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 from netsight.core.config import settings
+from netsight.core.database.session import async_engine
+from netsight.core.metrics import CELERY_TASK_RUNTIME
 from netsight.core.utils.loggers import LOGGING
 
 _R = TypeVar("_R")
+_task_started: dict[str, float] = {}
 
 celery_app = Celery(
     __name__,
@@ -20,24 +35,134 @@ celery_app = Celery(
     task_acks_late=True,
     task_reject_on_worker_lost=True,
     worker_prefetch_multiplier=1,
-    worker_max_tasks_per_child=1,
+    # a task running on a new event loop can't reuse connections pooled on the last one
+    worker_max_tasks_per_child=None if settings.CELERY_ASYNC_WORKER else 1,
+    worker_max_memory_per_child=settings.CELERY_WORKER_MAX_MEMORY_PER_CHILD if settings.CELERY_ASYNC_WORKER else None,
     task_track_started=True,
     task_serializer="json",
     result_serializer="json",
     result_persistence=True,
-    imports=(),
+    imports=(
+        "netsight.core.tasks",
+        "netsight.features.dashboard.tasks",
+        "netsight.features.dcim.tasks",
+        "netsight.features.ipam.tasks",
+        "netsight.features.monitor.tasks",
+    ),
+    beat_schedule={
+        "reconcile-counters": {
+            "task": "netsight.reconcile_counters",
+            "schedule": settings.COUNTER_RECONCILE_INTERVAL,
+        },
+        "refresh-dashboard": {
+            "task": "netsight.refresh_dashboard",
+            "schedule": settings.DASHBOARD_REFRESH_INTERVAL,
+        },
+        "rebuild-prefix-hierarchy": {
+            "task": "netsight.rebuild_prefix_hierarchy",
+            "schedule": settings.PREFIX_HIERARCHY_REBUILD_INTERVAL,
+        },
+        "refresh-prefix-utilization": {
+            "task": "netsight.refresh_prefix_utilization",
+            "schedule": settings.PREFIX_UTILIZATION_REFRESH_INTERVAL,
+        },
+        "refresh-prefix-index": {
+            "task": "netsight.refresh_prefix_index",
+            "schedule": settings.PREFIX_INDEX_REFRESH_INTERVAL,
+        },
+        "prune-route-history": {
+            "task": "netsight.prune_route_history",
+            "schedule": settings.ROUTE_HISTORY_PRUNE_INTERVAL,
+        },
+        "sweep-reachability": {
+            "task": "netsight.sweep_reachability",
+            "schedule": settings.REACHABILITY_SWEEP_INTERVAL,
+            # a sweep outlasting the interval is not followed by a backlog of sweeps
+            "options": {"expires": settings.REACHABILITY_SWEEP_INTERVAL},
+        },
+    },
 )
 
 
+class WorkerLoop:
+    """The event loop of a worker process, started on its first use and kept until the process exits.
+
+    Async tasks run on it one after another, the connections `engine` pools stay bound to it and
+    are reused by the next tasks. A forked process starts its own loop and drops the pool it
+    inherited, those connections belong to its parent.
+    """
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+        self._portal: BlockingPortal | None = None
+        self._stack = ExitStack()
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def portal(self) -> BlockingPortal:
+        with self._lock:
+            if self._portal is None or self._pid != os.getpid():
+                self.engine.sync_engine.dispose(close=False)
+                self._stack = ExitStack()
+                self._portal = self._stack.enter_context(start_blocking_portal())
+                self._pid = os.getpid()
+            return self._portal
+
+    def close(self) -> None:
+        with self._lock:
+            if self._portal is not None and self._pid == os.getpid():
+                self._portal.call(self.engine.dispose)
+                self._stack.close()
+            self._portal = None
+
+
+worker_loop = WorkerLoop(async_engine)
+
+
 def async_task(func: Callable[..., Coroutine[Any, Any, _R]]) -> _R:
     def wrapper(*args: Any) -> _R:
+        if settings.CELERY_ASYNC_WORKER:
+            return worker_loop.portal.call(func, *args)
         with start_blocking_portal() as portal:
             return portal.call(func, *args)
 
     return wrapper  # type: ignore  # noqa: PGH003
 
 
+@worker_init.connect
+def _worker_init(sender: Any, **kwargs: Any) -> None:  # noqa: ARG001
+    # the lowest prefetch of the consumed queues, a worker reserves tasks from all of them alike
+    prefetch = settings.CELERY_QUEUE_PREFETCH
+    consumed = [prefetch[queue] for queue in sender.app.amqp.queues.consume_from if queue in prefetch]
+    if consumed:
+        sender.prefetch_multiplier = min(consumed)
+
+
+@worker_process_init.connect
+def _worker_process_init(**kwargs: Any) -> None:  # noqa: ARG001
+    if settings.CELERY_ASYNC_WORKER:
+        worker_loop.portal  # noqa: B018
+
+
+@worker_process_shutdown.connect
+def _worker_process_shutdown(**kwargs: Any) -> None:  # noqa: ARG001
+    worker_loop.close()
+
+
 @setup_logging.connect
 def _setup_logging(**kwargs: Any) -> None:  # noqa: ARG001
     dictConfig(LOGGING)
     logging.getLogger("child").propagate = False
+
+
+@task_prerun.connect
+def _task_prerun(task_id: str, **kwargs: Any) -> None:  # noqa: ARG001
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _task_postrun(task_id: str, task: Any, state: str | None = None, **kwargs: Any) -> None:  # noqa: ARG001
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_RUNTIME.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
@@ -2,6 +2,7 @@ from netsight.core.database.base import Base
 from netsight.features.admin.models import *
 from netsight.features.alert.models import *
 from netsight.features.circuit.models import *
+from netsight.features.dashboard.models import *
 from netsight.features.dcim.models import *
 from netsight.features.intend.models import *
 from netsight.features.ipam.models import *
@@ -0,0 +1,173 @@
+"""Counter cache columns maintained by Postgres triggers.
+
+A counter is a plain integer column on the owner table, e.g. `site.device_count`, declared with
+`counter_column("device", "site_id")`. Statement level triggers on the counted table apply the net
+change of every INSERT/UPDATE/DELETE with one `UPDATE` per statement, so listing owners reads a column
+instead of running a `count(*)` subquery per row, and bulk writes don't update the owner once per row.
+
+A row referencing the same owner through several foreign keys (a circuit with both ends in one site)
+counts once. TRUNCATE, `session_replication_role = replica` restores and manual edits bypass the
+triggers, `reconcile_counter` recomputes a counter and fixes the drift.
+
+The triggers are installed by `Base.metadata.create_all`, run `install_counter_triggers` from a migration
+for an existing database.
+"""
+
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from sqlalchemy import Column, Connection, Integer, MetaData, Table, event
+from sqlalchemy.orm import MappedColumn, mapped_column
+
+from netsight.core.database.base import Base
+from netsight.core.database.sql import compose, quote
+
+__all__ = ("counter_column", "install_counter_triggers", "iter_counters", "reconcile_counter")
+
+
+class CounterSource(NamedTuple):
+    table: str
+    foreign_keys: tuple[str, ...]
+
+
+class Counter(NamedTuple):
+    owner: Table
+    column: Column[int]
+    source: Table
+    foreign_keys: tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        return f"{self.owner.name}.{self.column.name}"
+
+    @property
+    def function_name(self) -> str:
+        return f"{self.owner.name}_{self.column.name}_counter"
+
+
+def counter_column(table: str, *foreign_keys: str) -> MappedColumn[int]:
+    """Count the rows of `table` referencing the owner through any of `foreign_keys`."""
+    return mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+        info={"counter": CounterSource(table, foreign_keys)},
+    )
+
+
+def iter_counters(metadata: MetaData = Base.metadata) -> Iterator[Counter]:
+    for table in metadata.sorted_tables:
+        for column in table.columns:
+            source: CounterSource | None = column.info.get("counter")
+            if source is not None:
+                yield Counter(table, column, metadata.tables[source.table], source.foreign_keys)
+
+
+def _owner_keys(counter: Counter, rows: str) -> str:
+    """Select the distinct owner ids `k` referenced by each row of `rows`."""
+    if len(counter.foreign_keys) == 1:
+        return compose(
+            "SELECT r.{fk} AS k FROM {rows} AS r WHERE r.{fk} IS NOT NULL", fk=quote(counter.foreign_keys[0]), rows=rows
+        )
+    return compose(
+        "SELECT u.k FROM {rows} AS r CROSS JOIN LATERAL "
+        "(SELECT DISTINCT k FROM unnest(ARRAY[{values}]) AS a(k) WHERE k IS NOT NULL) AS u",
+        rows=rows,
+        values=", ".join(compose("r.{fk}", fk=quote(fk)) for fk in counter.foreign_keys),
+    )
+
+
+def _apply_delta(counter: Counter, *, new: bool, old: bool) -> str:
+    parts = []
+    if new:
+        parts.append(compose("SELECT k, 1 AS n FROM ({keys}) AS i", keys=_owner_keys(counter, "new_rows")))
+    if old:
+        parts.append(compose("SELECT k, -1 AS n FROM ({keys}) AS d", keys=_owner_keys(counter, "old_rows")))
+    return compose(
+        "UPDATE {owner} AS o SET {column} = o.{column} + delta.n "
+        "FROM (SELECT k, sum(n) AS n FROM ({changes}) AS c GROUP BY k HAVING sum(n) <> 0) AS delta "
+        "WHERE o.{pk} = delta.k",
+        owner=quote(counter.owner.name),
+        column=quote(counter.column.name),
+        pk=quote(next(iter(counter.owner.primary_key)).name),
+        changes=" UNION ALL ".join(parts),
+    )
+
+
+def _trigger_ddl(counter: Counter) -> list[str]:
+    fn, source = counter.function_name, quote(counter.source.name)
+    function = compose(
+        """
+CREATE OR REPLACE FUNCTION {fn}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {inserted};
+    ELSIF TG_OP = 'UPDATE' THEN
+        {updated};
+    ELSE
+        {deleted};
+    END IF;
+    RETURN NULL;
+END
+$$""",
+        fn=fn,
+        inserted=_apply_delta(counter, new=True, old=False),
+        updated=_apply_delta(counter, new=True, old=True),
+        deleted=_apply_delta(counter, new=False, old=True),
+    )
+    # transition tables can't be combined with several events or an `UPDATE OF` column list
+    triggers = {
+        "insert": "AFTER INSERT ON {t} REFERENCING NEW TABLE AS new_rows",
+        "update": "AFTER UPDATE ON {t} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+        "delete": "AFTER DELETE ON {t} REFERENCING OLD TABLE AS old_rows",
+    }
+    statements = [function]
+    for event_name, timing in triggers.items():
+        trigger = f"{fn}_{event_name}"
+        statements.append(compose("DROP TRIGGER IF EXISTS {trigger} ON {t}", trigger=trigger, t=source))
+        statements.append(
+            compose(
+                "CREATE TRIGGER {trigger} {timing} FOR EACH STATEMENT EXECUTE FUNCTION {fn}()",
+                trigger=trigger,
+                timing=compose(timing, t=source),
+                fn=fn,
+            )
+        )
+    return statements
+
+
+def _reconcile_sql(counter: Counter) -> str:
+    owner = quote(counter.owner.name)
+    return compose(
+        "UPDATE {owner} AS o SET {column} = t.n "
+        "FROM (SELECT p.{pk} AS k, count(s.k) AS n FROM {owner} AS p "
+        "LEFT JOIN ({keys}) AS s ON s.k = p.{pk} GROUP BY p.{pk}) AS t "
+        "WHERE o.{pk} = t.k AND o.{column} <> t.n",
+        owner=owner,
+        column=quote(counter.column.name),
+        pk=quote(next(iter(counter.owner.primary_key)).name),
+        keys=_owner_keys(counter, quote(counter.source.name)),
+    )
+
+
+def install_counter_triggers(connection: Connection, metadata: MetaData = Base.metadata) -> None:
+    """Create or replace the trigger functions and triggers of every counter, idempotent."""
+    for counter in iter_counters(metadata):
+        for statement in _trigger_ddl(counter):
+            connection.exec_driver_sql(statement)
+
+
+def reconcile_counter(connection: Connection, counter: Counter) -> int:
+    """Recompute `counter` from the counted rows, return the number of owners fixed.
+
+    Writes to the counted table are blocked (SHARE lock) until the transaction ends so that no increment
+    lands between the recount and the update, run each counter in its own transaction.
+    """
+    connection.exec_driver_sql(compose("LOCK TABLE {t} IN SHARE MODE", t=quote(counter.source.name)))
+    return connection.exec_driver_sql(_reconcile_sql(counter)).rowcount
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target: MetaData, connection: Connection, **kwargs: object) -> None:  # noqa: ARG001
+    install_counter_triggers(connection, target)
@@ -0,0 +1,151 @@
+"""Columns copied from a referenced row and kept in sync by Postgres triggers.
+
+Constraints and partial indexes can't look through a foreign key, `mirror_column("vrf", "vrf_id",
+"enforce_unique", default=True)` gives the table a copy of `vrf.enforce_unique` they can use. A row
+trigger sets the copy when the row is inserted or its foreign key changes (`default` without a
+referenced row), another one pushes every change of the source column to the referencing rows, so a
+change of the source fails when the copies it updates violate a constraint.
+
+The triggers are installed by `Base.metadata.create_all`, run `install_mirror_triggers` from a migration
+for an existing database, it also fills the copies.
+"""
+
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from sqlalchemy import Boolean, Column, Connection, MetaData, Table, event
+from sqlalchemy.orm import MappedColumn, mapped_column
+
+from netsight.core.database.base import Base
+from netsight.core.database.sql import compose, quote
+
+__all__ = ("install_mirror_triggers", "iter_mirrors", "mirror_column")
+
+
+class MirrorSource(NamedTuple):
+    table: str
+    foreign_key: str
+    column: str
+    default: bool
+
+
+class Mirror(NamedTuple):
+    table: Table
+    column: Column[bool]
+    source: Table
+    foreign_key: str
+    source_column: str
+    default: bool
+
+    @property
+    def function_name(self) -> str:
+        return f"{self.table.name}_{self.column.name}_mirror"
+
+
+def mirror_column(table: str, foreign_key: str, column: str, *, default: bool) -> MappedColumn[bool]:
+    """Copy of the boolean `column` of the `table` row referenced by `foreign_key`."""
+    return mapped_column(
+        Boolean,
+        nullable=False,
+        server_default="true" if default else "false",
+        info={"mirror": MirrorSource(table, foreign_key, column, default)},
+    )
+
+
+def iter_mirrors(metadata: MetaData = Base.metadata) -> Iterator[Mirror]:
+    for table in metadata.sorted_tables:
+        for column in table.columns:
+            source: MirrorSource | None = column.info.get("mirror")
+            if source is not None:
+                yield Mirror(
+                    table, column, metadata.tables[source.table], source.foreign_key, source.column, source.default
+                )
+
+
+def _lookup(mirror: Mirror, key: str) -> str:
+    return compose(
+        "coalesce((SELECT s.{column} FROM {source} AS s WHERE s.{pk} = {key}), {default})",
+        column=quote(mirror.source_column),
+        source=quote(mirror.source.name),
+        pk=quote(next(iter(mirror.source.primary_key)).name),
+        key=key,
+        default="true" if mirror.default else "false",
+    )
+
+
+def _trigger_ddl(mirror: Mirror) -> list[str]:
+    fn, table, source = mirror.function_name, quote(mirror.table.name), quote(mirror.source.name)
+    column, fk = quote(mirror.column.name), quote(mirror.foreign_key)
+    source_column = quote(mirror.source_column)
+    pk = quote(next(iter(mirror.source.primary_key)).name)
+    triggers = (
+        # (name, table, timing, function body)
+        (
+            f"{fn}_set",
+            table,
+            compose("BEFORE INSERT OR UPDATE OF {fk}", fk=fk),
+            compose(
+                "NEW.{column} := {lookup};\n    RETURN NEW;",
+                column=column,
+                lookup=_lookup(mirror, compose("NEW.{fk}", fk=fk)),
+            ),
+        ),
+        (
+            f"{fn}_push",
+            source,
+            compose("AFTER UPDATE OF {source_column}", source_column=source_column),
+            compose(
+                "UPDATE {table} SET {column} = NEW.{source_column} WHERE {fk} = NEW.{pk};\n    RETURN NULL;",
+                table=table,
+                column=column,
+                source_column=source_column,
+                fk=fk,
+                pk=pk,
+            ),
+        ),
+    )
+    statements = []
+    for name, on, timing, body in triggers:
+        statements.append(
+            compose(
+                """
+CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    {body}
+END
+$$""",
+                name=name,
+                body=body,
+            )
+        )
+        statements.append(compose("DROP TRIGGER IF EXISTS {name} ON {on}", name=name, on=on))
+        statements.append(
+            compose(
+                "CREATE TRIGGER {name} {timing} ON {on} FOR EACH ROW EXECUTE FUNCTION {name}()",
+                name=name,
+                timing=timing,
+                on=on,
+            )
+        )
+    return statements
+
+
+def install_mirror_triggers(connection: Connection, metadata: MetaData = Base.metadata) -> None:
+    """Create or replace the triggers of every mirror column and fill the copies, idempotent."""
+    for mirror in iter_mirrors(metadata):
+        for statement in _trigger_ddl(mirror):
+            connection.exec_driver_sql(statement)
+        lookup = _lookup(mirror, compose("t.{fk}", fk=quote(mirror.foreign_key)))
+        connection.exec_driver_sql(
+            compose(
+                "UPDATE {table} AS t SET {column} = {lookup} WHERE t.{column} IS DISTINCT FROM {lookup}",
+                table=quote(mirror.table.name),
+                column=quote(mirror.column.name),
+                lookup=lookup,
+            )
+        )
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(target: MetaData, connection: Connection, **kwargs: object) -> None:  # noqa: ARG001
+    install_mirror_triggers(connection, target)
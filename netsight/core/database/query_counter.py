@@ -0,0 +1,99 @@
+import re
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from netsight.core.database.session import async_engine
+
+__all__ = ("QueryCounter", "QueryBudgetExceededError", "count_queries", "assert_query_budget")
+
+_PARAM_RE = re.compile(r"\$\d+|%\(\w+\)s|\?")
+_PARAM_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a statement to its shape so that executions differing only by bound values compare equal.
+
+    `WHERE id = $1` and `WHERE id IN ($1, $2, $3)` are normalized to `WHERE id = ?` and `WHERE id IN (?)`.
+    """
+    shape = _PARAM_RE.sub("?", statement)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _PARAM_LIST_RE.sub("(?)", shape)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryCounter:
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def record(self, statement: str) -> None:
+        self.statements.append(statement)
+
+    def repeated(self, threshold: int = 3) -> dict[str, int]:
+        """Statement shapes executed at least `threshold` times, the signature of an N+1 pattern."""
+        shapes = Counter(normalize_statement(s) for s in self.statements)
+        return {shape: times for shape, times in shapes.items() if times >= threshold}
+
+    def report(self) -> str:
+        return "\n".join(f"{i}: {_WHITESPACE_RE.sub(' ', s).strip()}" for i, s in enumerate(self.statements, 1))
+
+
+class QueryBudgetExceededError(AssertionError):
+    pass
+
+
+@contextmanager
+def count_queries(engine: AsyncEngine = async_engine) -> Iterator[QueryCounter]:
+    """Count every statement sent to the database by `engine` inside the block.
+
+    with count_queries() as counter:
+        await client.get("/api/dcim/devices")
+    assert counter.count <= 10
+    """
+    counter = QueryCounter()
+
+    def before_cursor_execute(
+        conn: Any,  # noqa: ARG001
+        cursor: Any,  # noqa: ARG001
+        statement: str,
+        parameters: Any,  # noqa: ARG001
+        context: Any,  # noqa: ARG001
+        executemany: bool,  # noqa: ARG001
+    ) -> None:
+        counter.record(statement)
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@contextmanager
+def assert_query_budget(
+    max_queries: int, n_plus_one_threshold: int | None = 3, engine: AsyncEngine = async_engine
+) -> Iterator[QueryCounter]:
+    """Fail when the block runs more than `max_queries` statements or repeats one statement shape
+    `n_plus_one_threshold` times, pass `n_plus_one_threshold=None` to disable the N+1 check.
+    """
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > max_queries:
+        msg = f"Query budget exceeded: {counter.count} queries executed, budget is {max_queries}\n{counter.report()}"
+        raise QueryBudgetExceededError(msg)
+    if n_plus_one_threshold is not None and (repeated := counter.repeated(n_plus_one_threshold)):
+        details = "\n".join(f"{times}x: {shape}" for shape, times in repeated.items())
+        msg = f"Possible N+1 query pattern detected:\n{details}"
+        raise QueryBudgetExceededError(msg)
@@ -0,0 +1,147 @@
+"""Make the stored components of devices match the collected ones with a few set based statements.
+
+Deleting and inserting the components of a device on every sync churns ids other tables point at:
+IP addresses, circuits and LLDP neighbors reference interfaces. `Reconciler` keys stored and
+collected rows by a natural key, keeps the rows whose key is collected, updates only the ones
+whose values changed and deletes the ones no longer collected. Whatever the number of devices
+in a batch, that is one SELECT, then at most one DELETE, one UPDATE and one INSERT, each sending
+its rows as arrays unnested by Postgres.
+"""
+
+import logging
+from collections.abc import Collection, Iterable, Mapping, Sequence
+from typing import Any, NamedTuple
+
+from sqlalchemy import ARRAY, Integer, Select, Table, any_, delete, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import FromClause
+
+from netsight.core.database.base import Base
+
+__all__ = ("ReconcileResult", "Reconciler")
+
+logger = logging.getLogger(__name__)
+
+Identity = tuple[int, tuple[Any, ...]]
+
+
+class ReconcileResult(NamedTuple):
+    inserted: int
+    updated: int
+    deleted: int
+
+
+class Reconciler:
+    """Reconcile the rows of `model` owned by `scope`, the device id column, with collected rows.
+
+    `keys` are the natural keys of a row, the first without a null value identifies it: modules are
+    `[("serial_number",), ("device_id", "name")]`, by serial number when they have one. A key
+    without `scope` is global, a row found under another device is moved rather than deleted and
+    inserted again. `fields` are compared and written, with `scope` and the keys' columns.
+    """
+
+    def __init__(self, model: type[Base], scope: str, keys: Sequence[Sequence[str]], fields: Sequence[str]) -> None:
+        self.table: Table = model.__table__  # type: ignore[assignment]
+        self.scope = scope
+        self.keys = [tuple(key) for key in keys]
+        self.columns = tuple(dict.fromkeys([scope, *(column for key in self.keys for column in key), *fields]))
+        self._positions = {column: position for position, column in enumerate(self.columns)}
+
+    def identity(self, values: Sequence[Any]) -> Identity | None:
+        for index, key in enumerate(self.keys):
+            key_values = tuple(values[self._positions[column]] for column in key)
+            if None not in key_values:
+                return index, key_values
+        return None
+
+    def _array(self, column: str, values: Sequence[Any]) -> Any:
+        column_type = Integer() if column == "id" else self.table.c[column].type
+        return literal(list(values), ARRAY(column_type))
+
+    def _unnest(self, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> FromClause:
+        arrays = [self._array(column, values) for column, values in zip(columns, zip(*rows, strict=True), strict=True)]
+        return func.unnest(*arrays).table_valued(*columns).render_derived()
+
+    def _wanted(self, collected: Mapping[Any, Iterable[Mapping[str, Any]]]) -> dict[Identity, tuple[Any, ...]]:
+        """The collected rows by identity, as values of `columns`."""
+        wanted: dict[Identity, tuple[Any, ...]] = {}
+        for owner, rows in collected.items():
+            for row in rows:
+                values = tuple(owner if column == self.scope else row.get(column) for column in self.columns)
+                identity = self.identity(values)
+                if identity is None:
+                    logger.warning("Skipping a %s row of %s %s without a key", self.table.name, self.scope, owner)
+                    continue
+                wanted[identity] = values
+        return wanted
+
+    def _lookup(self, owners: Sequence[Any], wanted: Mapping[Identity, tuple[Any, ...]]) -> Select:
+        """The stored rows of `owners` and, by their global keys, those of the wanted rows elsewhere."""
+        table = self.table
+        found = [table.c[self.scope] == any_(self._array(self.scope, owners))]
+        for index, key in enumerate(self.keys):
+            if self.scope not in key:
+                key_values = [identity[1] for identity in wanted if identity[0] == index]
+                if len(key) == 1:
+                    # one array parameter, a list of serial numbers can go past the parameter limit
+                    found.append(table.c[key[0]] == any_(self._array(key[0], [values[0] for values in key_values])))
+                elif key_values:
+                    found.append(tuple_(*(table.c[column] for column in key)).in_(key_values))
+        return select(table.c.id, *(table.c[column] for column in self.columns)).where(or_(*found))
+
+    def _diff(
+        self, stored_rows: Iterable[Sequence[Any]], owners: Collection[Any], wanted: Mapping[Identity, tuple[Any, ...]]
+    ) -> tuple[list[tuple[Any, ...]], list[tuple[Any, ...]], list[int]]:
+        """The rows to insert, to update with their id first and the ids to delete."""
+        stored: dict[Identity, int] = {}
+        updates: list[tuple[Any, ...]] = []
+        deletes: list[int] = []
+        for row_id, *values in stored_rows:
+            identity = self.identity(values)
+            if identity is None or identity not in wanted or identity in stored:
+                # only the devices being reconciled lose rows, not the ones a global key found
+                if values[self._positions[self.scope]] in owners:
+                    deletes.append(row_id)
+                continue
+            stored[identity] = row_id
+            if wanted[identity] != tuple(values):
+                updates.append((row_id, *wanted[identity]))
+        inserts = [values for identity, values in wanted.items() if identity not in stored]
+        return inserts, updates, deletes
+
+    async def _apply(
+        self,
+        session: AsyncSession,
+        inserts: Sequence[tuple[Any, ...]],
+        updates: Sequence[tuple[Any, ...]],
+        deletes: Sequence[int],
+    ) -> None:
+        table = self.table
+        if deletes:
+            await session.execute(delete(table).where(table.c.id == any_(self._array("id", deletes))))
+        if updates:
+            rows = self._unnest(("id", *self.columns), updates)
+            await session.execute(
+                update(table).where(table.c.id == rows.c.id).values({column: rows.c[column] for column in self.columns})
+            )
+        if inserts:
+            rows = self._unnest(self.columns, inserts)
+            await session.execute(
+                insert(table).from_select(self.columns, select(*(rows.c[column] for column in self.columns)))
+            )
+
+    async def reconcile(
+        self, session: AsyncSession, collected: Mapping[Any, Iterable[Mapping[str, Any]]], commit: bool = True
+    ) -> ReconcileResult:
+        """Reconcile the devices of `collected`, the rows collected by device id, in one transaction.
+
+        A device collected with no rows has all of its rows deleted, a device missing from
+        `collected` is left as is.
+        """
+        wanted = self._wanted(collected)
+        stored_rows = (await session.execute(self._lookup(list(collected), wanted))).all()
+        inserts, updates, deletes = self._diff(stored_rows, collected.keys(), wanted)
+        await self._apply(session, inserts, updates, deletes)
+        if commit:
+            await session.commit()
+        return ReconcileResult(len(inserts), len(updates), len(deletes))
@@ -1,13 +1,50 @@
 import logging
+import time
 
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+from sqlalchemy.pool.base import ConnectionPoolEntry
 
 from netsight.core.config import settings
+from netsight.core.metrics import DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_WAIT
 
 logger = logging.getLogger(__name__)
 
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool exporting checkout wait time and pool occupancy.
+
+    It also keeps an exponentially weighted average of the checkout wait for admission control.
+    """
+
+    wait_smoothing: float = 0.2
+    wait_average: float = 0.0
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        connection = super().connect()
+        wait = time.perf_counter() - start
+        self.wait_average += self.wait_smoothing * (wait - self.wait_average)
+        DB_POOL_WAIT.observe(wait)
+        self._report_usage()
+        return connection
+
+    def is_exhausted(self) -> bool:
+        """All connections, overflow included, are checked out, new checkouts have to wait."""
+        return self.checkedout() >= self.size() + max(self._max_overflow, 0)
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        super()._do_return_conn(record)
+        self._report_usage()
+
+    def _report_usage(self) -> None:
+        DB_POOL_CHECKED_OUT.set(self.checkedout())
+        DB_POOL_OVERFLOW.set(max(self.overflow(), 0))
+
+
 async_engine = create_async_engine(
     url=settings.SQLALCHEMY_DATABASE_URI,
+    poolclass=InstrumentedAsyncQueuePool,
     pool_pre_ping=True,
     future=True,
     pool_size=settings.DATABASE_POOL_SIZE,
@@ -15,3 +52,15 @@ async_engine = create_async_engine(
     max_overflow=settings.DATABASE_POOL_MAX_OVERFLOW,
 )
 async_session = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def is_pool_saturated(wait_threshold: float) -> bool:
+    """The pool is exhausted and recent checkouts waited longer than `wait_threshold` seconds.
+
+    Both conditions are required: the wait average is only refreshed by successful checkouts,
+    so it alone would keep reporting saturation long after the pool has drained.
+    """
+    pool = async_engine.pool
+    if not isinstance(pool, InstrumentedAsyncQueuePool):
+        return False
+    return pool.is_exhausted() and pool.wait_average > wait_threshold
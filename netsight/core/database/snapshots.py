@@ -0,0 +1,134 @@
+"""Replace the table rows of devices with collected snapshots, writing only what changed.
+
+MAC and ARP tables hold millions of rows that mostly stay the same from one collection to the
+next. `SnapshotStore` streams a snapshot into a temporary staging table with `COPY`, then one
+DELETE removes the stored rows missing from it and one INSERT adds the rows not stored yet: both
+are hash joins inside Postgres, unchanged rows are not written and keep when they were first seen.
+Rows are identified by all their columns, which are not null so the joins are plain equalities.
+With a history model, removed rows are moved there with when they were removed: the stored rows
+and the history are the deltas any earlier snapshot can be rebuilt from.
+"""
+
+import csv
+import io
+import logging
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Mapping, Sequence
+from typing import Any, NamedTuple
+
+from sqlalchemy import ARRAY, Table, and_, any_, column, delete, exists, func, insert, literal, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from netsight.core.database.base import Base
+from netsight.core.database.sql import compose, quote
+
+__all__ = ("SnapshotDiff", "SnapshotStore")
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_ROWS = 10_000
+
+Rows = Iterable[Mapping[str, Any]] | AsyncIterable[Mapping[str, Any]]
+
+
+class SnapshotDiff(NamedTuple):
+    added: int
+    removed: int
+
+
+async def _iterate(rows: Rows) -> AsyncIterator[Mapping[str, Any]]:
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+class SnapshotStore:
+    """The rows of `model` owned by `scope`, the device id column, replaced per device by snapshots.
+
+    `columns` are the other columns of a row, collected rows are dicts with them as keys. The rows
+    of a snapshot can be an async iterable, they are copied as they come. `history` has the columns
+    of `model` with `removed_at`, both have `first_seen`.
+    """
+
+    def __init__(
+        self, model: type[Base], scope: str, columns: Sequence[str], history: type[Base] | None = None
+    ) -> None:
+        self.table: Table = model.__table__  # type: ignore[assignment]
+        self.history: Table | None = history.__table__ if history is not None else None  # type: ignore[assignment]
+        self.scope = scope
+        self.columns = (scope, *columns)
+
+    async def _records(self, snapshots: Mapping[Any, Rows]) -> AsyncIterator[bytes]:
+        # COPY in CSV, Postgres parses every column from its text form and quoted strings aren't nulls
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n")
+        columns = self.columns[1:]
+        pending = 0
+        for owner, rows in snapshots.items():
+            async for row in _iterate(rows):
+                try:
+                    record = (owner, *map(row.__getitem__, columns))
+                except KeyError:
+                    record = (None,)
+                if None in record:
+                    logger.warning("Skipping a %s row of %s %s with a null value", self.table.name, self.scope, owner)
+                    continue
+                writer.writerow(record)
+                pending += 1
+                if pending == COPY_CHUNK_ROWS:
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+                    pending = 0
+        if pending:
+            yield buffer.getvalue().encode()
+
+    async def load(self, session: AsyncSession, snapshots: Mapping[Any, Rows], commit: bool = True) -> SnapshotDiff:
+        """Make the stored rows of the devices of `snapshots`, rows by device id, those collected.
+
+        A device with an empty snapshot loses all its rows, a device missing from `snapshots` is
+        left as is. Loads of the same device wait for each other until the transaction ends, otherwise
+        both would add the rows missing when they started.
+        """
+        stored = self.table
+        staging = f"{stored.name}_snapshot"
+        # (table, device) keys, taken in order so loads of several devices don't deadlock
+        owner = func.unnest(literal(sorted(snapshots), ARRAY(stored.c[self.scope].type))).column_valued("owner")
+        await session.execute(select(func.pg_advisory_xact_lock(func.hashtext(stored.name), owner)))
+        await session.execute(
+            text(
+                compose(
+                    "CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS SELECT {columns} FROM {stored} WITH NO DATA",
+                    staging=quote(staging),
+                    columns=", ".join(map(quote, self.columns)),
+                    stored=quote(stored.name),
+                )
+            )
+        )
+        connection = await (await session.connection()).get_raw_connection()
+        await connection.driver_connection.copy_to_table(  # type: ignore[union-attr]
+            staging, source=self._records(snapshots), columns=self.columns, format="csv"
+        )
+        await session.execute(text(compose("ANALYZE {staging}", staging=quote(staging))))
+
+        staged = table(staging, *(column(name, stored.c[name].type) for name in self.columns))
+        owners = stored.c[self.scope] == any_(literal(list(snapshots), ARRAY(stored.c[self.scope].type)))
+        same = and_(*(staged.c[column] == stored.c[column] for column in self.columns))
+        removed_rows = delete(stored).where(owners, ~exists().where(same))
+        if self.history is None:
+            removed = await session.execute(removed_rows)
+        else:
+            moved = removed_rows.returning(*(stored.c[column] for column in self.columns), stored.c.first_seen).cte()
+            removed = await session.execute(
+                insert(self.history).from_select(
+                    [*self.columns, "first_seen", "removed_at"], select(*moved.c, func.now())
+                )
+            )
+        current = select(*(stored.c[column] for column in self.columns)).where(owners)
+        added = await session.execute(insert(stored).from_select(self.columns, select(*staged.c).except_(current)))
+        await session.execute(text(compose("DROP TABLE {staging}", staging=quote(staging))))
+        if commit:
+            await session.commit()
+        return SnapshotDiff(added.rowcount, removed.rowcount)
@@ -0,0 +1,18 @@
+"""Statements composed as text, for the triggers and staging tables SQLAlchemy has no construct for.
+
+`compose` fills a statement template with the parts of it that vary. A part is a table, column or
+function name of the metadata quoted by `quote`, a record or transition table of a trigger (`NEW`,
+`new_rows`) or a fragment composed the same way, never a value a user or a device sent: those are
+bound parameters or `COPY` data. That is what keeps these statements safe from injection.
+"""
+
+from sqlalchemy.dialects import postgresql
+
+__all__ = ("compose", "quote")
+
+quote = postgresql.dialect().identifier_preparer.quote
+
+
+def compose(template: str, /, **parts: str) -> str:
+    """`template` with its `{name}` fields replaced by `parts`, quoted names and fragments only."""
+    return template.format(**parts)
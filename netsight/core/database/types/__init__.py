@@ -17,6 +17,7 @@ from netsight.core.database.types.ipaddress import (
     PgCIDR,
     PgIpAddress,
     PgIpInterface,
+    PgMacAddress,
 )
 
 __all__ = (
@@ -36,4 +37,5 @@ __all__ = (
     "PgIpAddress",
     "PgIpInterface",
     "PgCIDR",
+    "PgMacAddress",
 )
@@ -1,7 +1,7 @@
 from ipaddress import IPv4Network, IPv6Network, ip_address, ip_interface, ip_network
 
-from sqlalchemy import Dialect
-from sqlalchemy.dialects.postgresql import CIDR, INET
+from sqlalchemy import BindParameter, ColumnElement, Dialect, cast
+from sqlalchemy.dialects.postgresql import CIDR, INET, MACADDR
 from sqlalchemy.types import TypeDecorator
 
 from netsight.features._types import IPvAnyAddress, IPvAnyInterface, IPvAnyNetwork
@@ -58,7 +58,7 @@ class PgCIDR(TypeDecorator):
             value = ip_network(value)
 
         if not isinstance(value, (IPv4Network | IPv6Network)):
-            msg = "PgCIDR field values must be of type ip_network! " f"You gave me {value!r}"
+            msg = f"PgCIDR field values must be of type ip_network! You gave me {value!r}"
             raise TypeError(msg)
 
         return str(value) if value else None
@@ -71,3 +71,16 @@ class PgCIDR(TypeDecorator):
 
     def process_literal_param(self, value: str | None, dialect: Dialect) -> str:
         raise NotImplementedError("Not yet implemented")
+
+
+class PgMacAddress(TypeDecorator):
+    """
+    MAC addresses as colon separated strings, Postgres parses the other notations.
+    """
+
+    impl = MACADDR
+    cache_ok = True
+
+    def bind_expression(self, bindvalue: BindParameter) -> ColumnElement:
+        # asyncpg binds macaddr parameters as varchar, which has no comparison with macaddr
+        return cast(bindvalue, MACADDR)
@@ -0,0 +1,64 @@
+"""Materialized views declared next to the models they aggregate.
+
+`MaterializedView(name, select(...), unique=(...))` registers a view created by `Base.metadata.create_all`
+(dropped before the tables by `drop_all`) and exposes it as a lightweight `table()` to query with Core.
+The unique index over the group keys is what allows `REFRESH MATERIALIZED VIEW CONCURRENTLY`, readers
+keep seeing the previous content while the view is rebuilt.
+"""
+
+from typing import Any, ClassVar
+
+from sqlalchemy import Connection, MetaData, TableClause, column, event, table
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.selectable import Select
+
+from netsight.core.database.base import Base
+
+__all__ = ("MaterializedView",)
+
+_quote = postgresql.dialect().identifier_preparer.quote
+
+
+class MaterializedView:
+    registry: ClassVar[dict[str, "MaterializedView"]] = {}
+
+    def __init__(self, name: str, selectable: Select[Any], unique: tuple[str, ...]) -> None:
+        self.name = name
+        self.selectable = selectable
+        self.unique = unique
+        self.table: TableClause = table(name, *(column(c.key) for c in selectable.selected_columns))
+        self.registry[name] = self
+
+    @property
+    def c(self) -> Any:
+        return self.table.c
+
+    def create(self, connection: Connection) -> None:
+        query = self.selectable.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+        keys = ", ".join(_quote(k) for k in self.unique)
+        connection.exec_driver_sql(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {_quote(self.name)} AS {query}")
+        connection.exec_driver_sql(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {_quote(f'uq_{self.name}')} ON {_quote(self.name)} ({keys})"
+        )
+
+    def drop(self, connection: Connection) -> None:
+        connection.exec_driver_sql(f"DROP MATERIALIZED VIEW IF EXISTS {_quote(self.name)}")
+
+    def refresh(self, connection: Connection, *, concurrently: bool = True) -> None:
+        """Concurrent refresh diffs the new content against the old one, slower than a plain refresh
+        but it only blocks other refreshes, not readers.
+        """
+        mode = " CONCURRENTLY" if concurrently else ""
+        connection.exec_driver_sql(f"REFRESH MATERIALIZED VIEW{mode} {_quote(self.name)}")
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_views(target: MetaData, connection: Connection, **kwargs: object) -> None:  # noqa: ARG001
+    for view in MaterializedView.registry.values():
+        view.create(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_views(target: MetaData, connection: Connection, **kwargs: object) -> None:  # noqa: ARG001
+    for view in MaterializedView.registry.values():
+        view.drop(connection)
@@ -15,7 +15,9 @@ class ErrorCode(NamedTuple):
 
 ERR_404 = ErrorCode(404, "app.not_found")
 ERR_409 = ErrorCode(409, "app.already_exist")
+ERR_429 = ErrorCode(429, "app.too_many_requests")
 ERR_500 = ErrorCode(500, "app.internal_server_error")
+ERR_503 = ErrorCode(503, "app.service_unavailable")
 
 
 ERR_10001 = ErrorCode(10001, "admin.user_password_can_not_be_null")
@@ -23,3 +25,21 @@ ERR_10002 = ErrorCode(10002, "admin.token_invalid")
 ERR_10003 = ErrorCode(10003, "admin.token_expired")
 ERR_10004 = ErrorCode(10004, "admin.token_invalid_for_refresh")
 ERR_10005 = ErrorCode(10005, "admin.permission_deny")
+
+
+ERR_20001 = ErrorCode(20001, "org.location_depth_exceeded")
+ERR_20002 = ErrorCode(20002, "org.location_parent_invalid")
+
+
+ERR_30001 = ErrorCode(30001, "ipam.not_enough_space")
+ERR_30002 = ErrorCode(30002, "ipam.prefix_length_invalid")
+ERR_30003 = ErrorCode(30003, "ipam.address_space_conflict")
+ERR_30004 = ErrorCode(30004, "ipam.pool_exhausted")
+
+
+ERR_40001 = ErrorCode(40001, "dcim.device_credential_missing")
+ERR_40002 = ErrorCode(40002, "dcim.device_unreachable")
+ERR_40003 = ErrorCode(40003, "dcim.device_output_invalid")
+ERR_40004 = ErrorCode(40004, "dcim.device_output_empty")
+ERR_40005 = ErrorCode(40005, "dcim.device_credential_invalid")
+ERR_40006 = ErrorCode(40006, "dcim.device_not_active")
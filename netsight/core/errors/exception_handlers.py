@@ -1,4 +1,5 @@
 import logging
+import math
 import traceback
 from ipaddress import IPv4Address, IPv4Interface, IPv4Network, IPv6Address, IPv6Interface, IPv6Network
 from typing import Any, NewType
@@ -58,6 +59,14 @@ class ExistError(Exception):
         return f"Object:{self.name} with field:{self.field}-value:{self.value} already exist."
 
 
+class TooManyRequestsError(Exception):
+    def __init__(self, retry_after: float) -> None:
+        self.retry_after = retry_after
+
+    def __repr__(self) -> str:
+        return f"Rate limit exceeded, retry after {self.retry_after}s."
+
+
 class GenerError(Exception):
     def __init__(
         self,
@@ -128,6 +137,16 @@ async def resource_exist_handler(request: Request, exc: ExistError) -> JSONRespo
     return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content=content)
 
 
+async def too_many_requests_handler(request: Request, exc: TooManyRequestsError) -> JSONResponse:  # noqa: ARG001
+    log_exception(exc, False)
+    content = {"error": err_codes.ERR_429.error, "message": _(err_codes.ERR_429.message)}
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content=content,
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 def gener_error_handler(request: Request, exc: GenerError) -> JSONResponse:  # noqa: ARG001
     log_exception(exc, True)
     return JSONResponse(
@@ -157,6 +176,7 @@ exception_handlers = [
     {"exception": PermissionDenyError, "handler": permission_deny_handler},
     {"exception": NotFoundError, "handler": resource_not_found_handler},
     {"exception": ExistError, "handler": resource_exist_handler},
+    {"exception": TooManyRequestsError, "handler": too_many_requests_handler},
     {"exception": GenerError, "handler": gener_error_handler},
 ]
 
@@ -168,4 +188,5 @@ sentry_ignore_errors = [
     PermissionDenyError,
     NotFoundError,
     ExistError,
+    TooManyRequestsError,
 ]
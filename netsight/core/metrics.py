@@ -0,0 +1,194 @@
+import logging
+import os
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+
+from netsight.core.config import settings
+
+# prometheus_client picks its value backend at import time, so the multiprocess
+# directory has to be exported before the first import below.
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+__all__ = (
+    "CONTENT_TYPE_LATEST",
+    "REQUEST_LATENCY",
+    "REQUESTS_IN_FLIGHT",
+    "REQUESTS_SHED",
+    "DB_POOL_CHECKED_OUT",
+    "DB_POOL_OVERFLOW",
+    "DB_POOL_WAIT",
+    "REDIS_COMMAND_LATENCY",
+    "CACHE_REQUESTS",
+    "CELERY_TASK_RUNTIME",
+    "DEVICE_PROBE_LATENCY",
+    "DEVICE_PROBE_LOSS",
+    "DEVICES_UNREACHABLE",
+    "generate_metrics",
+    "is_multiprocess_mode",
+    "mark_process_dead",
+    "reset_multiprocess_dir",
+)
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TASK_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+REQUEST_LATENCY = Histogram(
+    "netsight_http_request_duration_seconds",
+    "HTTP request latency by route operation_id",
+    ["operation_id", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "netsight_http_requests_in_flight",
+    "HTTP requests currently being processed",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+REQUESTS_SHED = Counter(
+    "netsight_http_requests_shed",
+    "Requests rejected with 503 by admission control",
+    ["reason"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "netsight_db_pool_checked_out",
+    "Database connections currently checked out from the async_engine pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "netsight_db_pool_overflow",
+    "Database connections opened beyond pool_size",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "netsight_db_pool_wait_seconds",
+    "Time spent waiting for a connection from the async_engine pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+REDIS_COMMAND_LATENCY = Histogram(
+    "netsight_redis_command_duration_seconds",
+    "Redis command latency",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+CACHE_REQUESTS = Counter(
+    "netsight_cache_requests",
+    "Cache lookups by namespace and result, hit ratio is hit / (hit + miss)",
+    ["namespace", "result"],
+)
+CELERY_TASK_RUNTIME = Histogram(
+    "netsight_celery_task_duration_seconds",
+    "Celery task runtime by task name and final state",
+    ["task", "state"],
+    buckets=TASK_BUCKETS,
+)
+# per device values of the reachability sweep are kept on the device, not as a label per device
+DEVICE_PROBE_LATENCY = Histogram(
+    "netsight_device_probe_latency_seconds",
+    "Average round trip time of the devices answering a reachability sweep by site and device role",
+    ["site_id", "role"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+DEVICE_PROBE_LOSS = Histogram(
+    "netsight_device_probe_loss_ratio",
+    "Packet loss of the devices probed by a reachability sweep by site and device role",
+    ["site_id", "role"],
+    buckets=(0.0, 0.1, 0.25, 0.5, 0.75, 0.99),
+)
+DEVICES_UNREACHABLE = Gauge(
+    "netsight_devices_unreachable",
+    "Devices the latest reachability sweep found unreachable by site and device role",
+    ["site_id", "role"],
+    multiprocess_mode="mostrecent",
+)
+
+
+class CeleryQueueCollector(Collector):
+    """Collect broker queue depth at scrape time.
+
+    Queue depth is a property of the broker rather than of a process, so it is read
+    on demand instead of being written into the multiprocess directory.
+    """
+
+    def describe(self) -> Iterator[GaugeMetricFamily]:
+        yield GaugeMetricFamily("netsight_celery_queue_depth", "Messages waiting in a Celery queue", labels=["queue"])
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        from netsight.core.celery_app import celery_app
+
+        gauge = GaugeMetricFamily("netsight_celery_queue_depth", "Messages waiting in a Celery queue", labels=["queue"])
+        queues = {celery_app.conf.task_default_queue}
+        if celery_app.conf.task_queues:
+            queues.update(q.name for q in celery_app.conf.task_queues)
+        try:
+            with celery_app.connection_for_read(connect_timeout=1) as conn:
+                conn.ensure_connection(max_retries=0)
+                channel = conn.default_channel
+                for queue in sorted(queues):
+                    try:
+                        _, message_count, _ = channel.queue_declare(queue=queue, passive=True)
+                    except Exception as e:  # noqa: BLE001
+                        logger.debug("Unable to read depth of celery queue %s: %s", queue, e)
+                        continue
+                    gauge.add_metric([queue], message_count)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Unable to collect celery queue depth: %s", e)
+        yield gauge
+
+
+_queue_collector = CeleryQueueCollector()
+
+
+def is_multiprocess_mode() -> bool:
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+if not is_multiprocess_mode():
+    REGISTRY.register(_queue_collector)
+
+
+def generate_metrics() -> bytes:
+    """Render all metrics in the prometheus text format.
+
+    In multiprocess mode (gunicorn `WORKERS > 1`), every worker writes its samples
+    into `PROMETHEUS_MULTIPROC_DIR` and the scraped worker aggregates all of them,
+    so totals are correct whichever worker answers the scrape.
+    """
+    if is_multiprocess_mode():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_queue_collector)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop live gauges of an exited worker, called from gunicorn `child_exit` hook."""
+    if is_multiprocess_mode():
+        multiprocess.mark_process_dead(pid)
+
+
+def reset_multiprocess_dir() -> None:
+    """Remove samples left by a previous run, called once from gunicorn `on_starting` hook."""
+    if not is_multiprocess_mode():
+        return
+    path = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True, exist_ok=True)
@@ -3,7 +3,23 @@ from typing import TYPE_CHECKING, Any, Generic, TypedDict, TypeVar, overload
 from uuid import UUID
 
 from pydantic import BaseModel
-from sqlalchemy import Row, Select, Text, cast, delete, desc, func, inspect, not_, or_, select, text, types
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    Text,
+    cast,
+    delete,
+    desc,
+    func,
+    inspect,
+    literal,
+    not_,
+    or_,
+    select,
+    text,
+    types,
+)
 from sqlalchemy.dialects.postgresql import ARRAY, HSTORE, INET, JSON, JSONB, MACADDR
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.mutable import Mutable
@@ -13,6 +29,7 @@ from sqlalchemy.sql.base import ExecutableOption
 from netsight.core.database import Base
 from netsight.core.database.session import async_engine
 from netsight.core.errors.exception_handlers import ExistError, NotFoundError
+from netsight.core.repositories.json_render import render_select
 from netsight.core.utils.context import locale_ctx
 from netsight.features._types import Order, QueryParams
 
@@ -31,6 +48,11 @@ QuerySchemaType = TypeVar("QuerySchemaType", bound=QueryParams)
 TABLE_PARAMS: dict[str, "InspectorTableConstraint"] = {}
 
 
+def _inet(value: Any) -> Any:
+    """Bind a network or address as plain `inet`, the column type decorators only accept their own kind."""
+    return literal(str(value), INET)
+
+
 class InspectorTableConstraint(TypedDict, total=False):
     foreign_keys: dict[str, tuple[str, str]]
     unique_constraints: list[list[str]]
@@ -177,7 +199,7 @@ class BaseRepository(Generic[ModelT, CreateSchemaType, UpdateSchemaType, QuerySc
         """
         return (
             stmt.order_by(desc(getattr(self.model, order_by)))
-            if order == "ascend"
+            if order == "descend"
             else stmt.order_by(getattr(self.model, order_by))
         )
 
@@ -218,6 +240,11 @@ class BaseRepository(Generic[ModelT, CreateSchemaType, UpdateSchemaType, QuerySc
                 nsw: not starts with
                 ew: ends with
                 new: not ends with
+                within: network strictly inside the value, `<<`
+                within_or_eq: network inside or equal to the value, `<<=`
+                contains: network strictly containing the value, `>>`
+                overlaps: network overlapping the value, `&&`
+                family: ip family, 4 or 6
 
         Returns:
             Select[tuple[ModelT]]: The filtered statement.
@@ -235,10 +262,16 @@ class BaseRepository(Generic[ModelT, CreateSchemaType, UpdateSchemaType, QuerySc
             "nsw": lambda col, value: not_(col.like(f"{value}%")),
             "ew": lambda col, value: col.like(f"%{value}"),
             "new": lambda col, value: not_(col.like(f"%{value}%")),
+            # inet/cidr operators, served by the `inet_ops` GiST indexes
+            "within": lambda col, value: col.op("<<")(_inet(value)),
+            "within_or_eq": lambda col, value: col.op("<<=")(_inet(value)),
+            "contains": lambda col, value: col.op(">>")(_inet(value)),
+            "overlaps": lambda col, value: col.op("&&")(_inet(value)),
+            "family": lambda col, value: func.family(col) == value,
         }
 
         field_name, operator = key.split("__")
-        if not hasattr(self.model, field_name):
+        if not hasattr(self.model, field_name) or value is None:
             return stmt
 
         operator_func = operators.get(operator)
@@ -306,7 +339,8 @@ class BaseRepository(Generic[ModelT, CreateSchemaType, UpdateSchemaType, QuerySc
         _excludes = {"limit", "offset", "q", "order", "order_by"}
         if excludes:
             _excludes.update(excludes)
-        filters = query.model_dump(exclude=_excludes, exclude_unset=True)
+        # FastAPI sets every field of a `Depends()` query, a parameter left out is None and not a filter
+        filters = query.model_dump(exclude=_excludes, exclude_unset=True, exclude_none=True)
         if filters:
             stmt = self._apply_filter(stmt, filters)
         return stmt
@@ -586,11 +620,10 @@ class BaseRepository(Generic[ModelT, CreateSchemaType, UpdateSchemaType, QuerySc
         )
         if m2m:
             for key, value in m2m.items():
-                if hasattr(obj_in, key) and getattr(obj_in, key) is not None:
+                if getattr(obj_in, key, None) is not None:
                     service_m2m = BaseRepository(value)
                     db_m2m = await service_m2m.get_multi_by_pks_or_404(session, getattr(obj_in, key))
                     setattr(new_obj, key, db_m2m)
-                setattr(obj_in, key, value)
         if commit:
             return await self.commit(session, new_obj)
         return new_obj
@@ -693,19 +726,50 @@ class BaseRepository(Generic[ModelT, CreateSchemaType, UpdateSchemaType, QuerySc
         Returns:
             tuple[int, Sequence[ModelT]]: A tuple containing the count of items and the list of results.
         """
-        stmt = self._get_base_stmt()
+        stmt, c_stmt = self._get_list_stmts(query)
+        stmt = self._apply_selectinload(stmt, *options, undefer_load=undefer_load)
+        _count = await session.scalar(c_stmt)
+        results = (await session.scalars(stmt)).all()
+        return _count if _count is not None else 0, results
+
+    async def list_and_count_json(
+        self, session: AsyncSession, query: QuerySchemaType, schema: type[BaseModel], *where: ColumnElement[bool]
+    ) -> tuple[int, Sequence[str]]:
+        """
+        Same as `list_and_count`, but each row is rendered by Postgres as the JSON text of `schema`.
+
+        Nested schemas are resolved with lateral subqueries instead of selectinload round trips and
+        no ORM objects or pydantic models are built, use it for large read-only list endpoints.
+
+        Args:
+            session (AsyncSession): The async session object for the database connection.
+            query (QuerySchemaType): The query schema object containing the query parameters.
+            schema (type[BaseModel]): The response schema of one item, fields are matched by name
+                with columns, column_property and relationships of the model.
+            where (ColumnElement[bool]): Extra filters which can't be expressed with the query schema.
+        Returns:
+            tuple[int, Sequence[str]]: A tuple containing the count of items and the JSON text of each item.
+        """
+        stmt, c_stmt = self._get_list_stmts(query, *where)
+        stmt = render_select(stmt, self.model, schema)
+        _count = await session.scalar(c_stmt)
+        results = (await session.scalars(stmt)).all()
+        return _count if _count is not None else 0, results
+
+    def _get_list_stmts(
+        self, query: QuerySchemaType, *where: ColumnElement[bool]
+    ) -> tuple[Select[tuple[ModelT]], Select[tuple[int]]]:
+        stmt = self._get_base_stmt().where(*where)
         stmt = self._apply_list(stmt, query)
         if query.q:
             stmt = self._apply_search(stmt, query.q)
-        c_stmt = stmt.with_only_columns(func.count()).order_by(None)
+        # without a filter the model is only in the FROM through its columns, keep it
+        c_stmt = stmt.with_only_columns(func.count(), maintain_column_froms=True).order_by(None)
         if query.limit is not None and query.offset is not None:
             stmt = self._apply_pagination(stmt, query.limit, query.offset)
         if query.order_by and query.order:
             stmt = self._apply_order_by(stmt, query.order_by, query.order)
-        stmt = self._apply_selectinload(stmt, *options, undefer_load=undefer_load)
-        _count = await session.scalar(c_stmt)
-        results = (await session.scalars(stmt)).all()
-        return _count if _count is not None else 0, results
+        return stmt, c_stmt
 
     async def get_all(self, session: AsyncSession) -> Sequence[ModelT]:
         return (await session.scalars(self._get_base_stmt())).all()
@@ -846,6 +910,8 @@ class BaseRepository(Generic[ModelT, CreateSchemaType, UpdateSchemaType, QuerySc
         Raises:
             NotFoundError: If no records are found with the given primary key IDs.
         """
+        if not pk_ids:
+            return []
         results = await self.get_multi_by_ids(session, pk_ids, *options, undefer_load=undefer_load)
         if not results:
             raise NotFoundError(self.model.__visible_name__[locale_ctx.get()], self.id_attribute, pk_ids)
@@ -0,0 +1,23 @@
+import logging
+
+from netsight.core.celery_app import async_task, celery_app
+from netsight.core.database.counters import iter_counters, reconcile_counter
+from netsight.core.database.session import async_engine
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile_counters() -> dict[str, int]:
+    """Recompute every counter cache column, one transaction per counter to keep the table locks short."""
+    fixed: dict[str, int] = {}
+    for counter in iter_counters():
+        async with async_engine.begin() as connection:
+            fixed[counter.name] = await connection.run_sync(reconcile_counter, counter)
+        if fixed[counter.name]:
+            logger.warning("Counter %s drifted on %d rows, reconciled", counter.name, fixed[counter.name])
+    return fixed
+
+
+@celery_app.task(name="netsight.reconcile_counters")
+def reconcile_counters_task() -> dict[str, int]:
+    return async_task(reconcile_counters)()
@@ -1,5 +1,7 @@
+from collections.abc import Sequence
 from datetime import datetime
 from enum import Enum
+from functools import cache
 from ipaddress import (
     IPv4Address,
     IPv4Interface,
@@ -8,11 +10,12 @@ from ipaddress import (
     IPv6Interface,
     IPv6Network,
 )
-from typing import Annotated, Generic, Literal, ParamSpec, TypeVar
+from typing import Annotated, Any, Generic, Literal, ParamSpec, TypeVar
 
 import pydantic
 from fastapi import Query
-from pydantic import ConfigDict, Field, StringConstraints
+from fastapi.responses import Response
+from pydantic import ConfigDict, Field, StringConstraints, TypeAdapter
 from pydantic.functional_validators import BeforeValidator
 
 from netsight.core.utils.validators import items_to_list, mac_address_validator
@@ -26,8 +29,8 @@ type Order = Literal["descend", "ascend"]
 StrList = Annotated[str | list[str], BeforeValidator(items_to_list)]
 IntList = Annotated[int | list[int], BeforeValidator(items_to_list)]
 MacAddress = Annotated[str, BeforeValidator(mac_address_validator)]
-NameStr = Annotated[str, StringConstraints(pattern="^[a-zA-Z0-9_-].$", max_length=50)]
-NameChineseStr = Annotated[str, StringConstraints(pattern="^[\u4e00-\u9fa5a-zA-Z0-9_-].$", max_length=50)]
+NameStr = Annotated[str, StringConstraints(pattern="^[a-zA-Z0-9_-]+$", max_length=50)]
+NameChineseStr = Annotated[str, StringConstraints(pattern="^[\u4e00-\u9fa5a-zA-Z0-9_-]+$", max_length=50)]
 
 type IPvAnyInterface = IPv4Interface | IPv6Interface
 type IPvAnyAddress = IPv4Address | IPv6Address
@@ -69,6 +72,30 @@ class ListT(BaseModel, Generic[T]):
     results: list[T] | None = None
 
 
+@cache
+def _list_adapter(schema: type[T]) -> TypeAdapter[list[T]]:
+    return TypeAdapter(list[schema])  # type: ignore[valid-type]
+
+
+def list_response(count: int, results: Sequence[Any], schema: type[pydantic.BaseModel]) -> Response:
+    """Validate ORM rows into `schema` in one pass and render a `ListT` body as JSON.
+
+    The adapter is built once per schema and serialization stays in pydantic-core, so neither a
+    per-row `model_validate` nor FastAPI's second validation against `response_model` is paid.
+    Declare `response_model=ListT[schema]` on the route to keep the OpenAPI schema.
+    """
+    adapter = _list_adapter(schema)
+    items = adapter.validate_python(results, from_attributes=True)
+    body = b'{"count":%d,"results":%b}' % (count, adapter.dump_json(items))
+    return Response(content=body, media_type="application/json")
+
+
+def json_list_response(count: int, results: Sequence[str]) -> Response:
+    """Render a `ListT` body from items already serialized to JSON text, see `list_and_count_json`."""
+    body = '{"count":%d,"results":[%s]}' % (count, ",".join(results))  # noqa: UP031
+    return Response(content=body.encode(), media_type="application/json")
+
+
 class AppStrEnum(str, Enum):
     def __str__(self) -> str:
         return str.__str__(self)
@@ -79,10 +106,10 @@ class AppStrEnum(str, Enum):
 
 
 class AuditTimeQuery(BaseModel):
-    created_at__lte: datetime
-    created_at__gte: datetime
-    updated_at__lte: datetime
-    updated_at__gte: datetime
+    created_at__lte: datetime | None = None
+    created_at__gte: datetime | None = None
+    updated_at__lte: datetime | None = None
+    updated_at__gte: datetime | None = None
 
 
 class AuidtUserQuery(BaseModel):
@@ -1,6 +1,6 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -10,7 +10,7 @@ from netsight.core.errors.err_codes import ERR_10005
 from netsight.core.errors.exception_handlers import GenerError
 from netsight.core.utils.cbv import cbv
 from netsight.core.utils.validators import list_to_tree
-from netsight.features._types import IdResponse, ListT
+from netsight.features._types import IdResponse, ListT, list_response
 from netsight.features.admin import schemas, services
 from netsight.features.admin.models import Group, Permission, Role, User
 from netsight.features.admin.security import generate_access_token_response
@@ -54,15 +54,15 @@ class UserAPI:
         )
         return schemas.User.model_validate(db_user)
 
-    @router.get("/users", operation_id="2485e2a2-4d81-4601-a6fd-c633b23ce5fc")
-    async def get_users(self, query: schemas.UserQuery = Depends()) -> ListT[schemas.User]:
+    @router.get("/users", operation_id="2485e2a2-4d81-4601-a6fd-c633b23ce5fc", response_model=ListT[schemas.User])
+    async def get_users(self, query: schemas.UserQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(
             self.session,
             query,
             selectinload(User.role).load_only(Role.id, Role.name),
             selectinload(User.group).load_only(Group.id, Group.name),
         )
-        return ListT(count=count, results=[schemas.User.model_validate(r) for r in results])
+        return list_response(count, results, schemas.User)
 
     @router.put("/users/{id}", operation_id="ea0078b9-7f16-4b55-9264-fa7ba48737a9")
     async def update_user(self, id: int, user: schemas.UserUpdate) -> IdResponse:
@@ -96,10 +96,10 @@ class GroupAPI:
         db_group = await self.service.get_one_or_404(self.session, id, undefer_load=True)
         return schemas.Group.model_validate(db_group)
 
-    @router.get("/groups", operation_id="a1d1f8f1-4d4d-4fab-868b-3f977df26e05")
-    async def get_groups(self, query: schemas.GroupQuery = Depends()) -> ListT[schemas.Group]:
+    @router.get("/groups", operation_id="a1d1f8f1-4d4d-4fab-868b-3f977df26e05", response_model=ListT[schemas.Group])
+    async def get_groups(self, query: schemas.GroupQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, query)
-        return ListT(count=count, results=[schemas.Group.model_validate(r) for r in results])
+        return list_response(count, results, schemas.Group)
 
     @router.put("/groups/{id}", operation_id="3d5badd1-665c-49f8-85c4-6f6d7f3a1b2a")
     async def update_group(self, id: int, group: schemas.GroupUpdate) -> IdResponse:
@@ -130,10 +130,10 @@ class RoleAPI:
         db_role = await self.service.get_one_or_404(self.session, id, selectinload(Role.permission), undefer_load=True)
         return schemas.Role.model_validate(db_role)
 
-    @router.get("/roles", operation_id="c5f793b1-7adf-4b4e-a498-732b0fa7d758")
-    async def get_roles(self, query: schemas.RoleQuery = Depends()) -> ListT[schemas.RoleList]:
+    @router.get("/roles", operation_id="c5f793b1-7adf-4b4e-a498-732b0fa7d758", response_model=ListT[schemas.RoleList])
+    async def get_roles(self, query: schemas.RoleQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, query)
-        return ListT(count=count, results=[schemas.RoleList.model_validate(r) for r in results])
+        return list_response(count, results, schemas.RoleList)
 
     @router.put("/roles/{id}", operation_id="2fda2e00-ad86-4296-a1d4-c7f02366b52e")
     async def update_role(self, id: int, role: schemas.RoleUpdate) -> IdResponse:
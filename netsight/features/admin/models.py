@@ -2,13 +2,14 @@ from datetime import datetime
 from typing import ClassVar
 from uuid import UUID
 
-from sqlalchemy import DateTime, ForeignKey, Integer, and_, func, select
+from sqlalchemy import DateTime, ForeignKey, Integer
 from sqlalchemy.dialects.postgresql import ARRAY, JSON
 from sqlalchemy.ext.mutable import MutableDict
-from sqlalchemy.orm import Mapped, backref, column_property, mapped_column, relationship
+from sqlalchemy.orm import Mapped, backref, mapped_column, relationship
 from sqlalchemy.orm.collections import attribute_mapped_collection
 
 from netsight.core.database import Base
+from netsight.core.database.counters import counter_column
 from netsight.core.database.mixins import AuditTimeMixin
 from netsight.core.database.types import bool_false, bool_true, int_pk, uuid_pk
 
@@ -55,10 +56,7 @@ class Group(Base, AuditTimeMixin):
     role_id: Mapped[int] = mapped_column(ForeignKey("role.id", ondelete="CASCADE"))
     role: Mapped["Role"] = relationship(backref="group", passive_deletes=True)
     user: Mapped[list["User"]] = relationship(back_populates="group")
-    user_count: Mapped[int] = column_property(
-        select(func.count(User.id)).where(User.group_id == id).scalar_subquery(),
-        deferred=True,
-    )
+    user_count: Mapped[int] = counter_column("user", "group_id")
 
 
 class Permission(Base):
@@ -83,16 +81,8 @@ class Role(Base, AuditTimeMixin):
     permission: Mapped[list["Permission"]] = relationship(secondary="role_permission", back_populates="role")
     menu: Mapped[list["Menu"]] = relationship(secondary="role_menu", back_populates="role")
 
-    permission_count: Mapped[int] = column_property(
-        select(func.count(Permission.id))
-        .where(and_(RolePermission.role_id == id, RolePermission.permission_id == Permission.id))
-        .scalar_subquery(),
-        deferred=True,
-    )
-    user_count: Mapped[int] = column_property(
-        select(func.count(User.id)).where(User.role_id == id).scalar_subquery(),
-        deferred=True,
-    )
+    permission_count: Mapped[int] = counter_column("role_permission", "role_id")
+    user_count: Mapped[int] = counter_column("user", "role_id")
 
 
 class Menu(Base):
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from netsight.core.utils.cbv import cbv
+from netsight.features.admin.models import User
+from netsight.features.assurance.topology import schemas
+from netsight.features.assurance.topology.services import topology_service
+from netsight.features.deps import auth, get_session
+
+router = APIRouter()
+
+
+@cbv(router)
+class TopologyAPI:
+    session: AsyncSession = Depends(get_session)
+    user: User = Depends(auth)
+    service = topology_service
+
+    @router.get("/topology/devices/{id}/neighborhood", operation_id="561ed573-410b-4e7b-b038-1c1e8ed3659c")
+    async def get_device_neighborhood(self, id: int, q: schemas.NeighborhoodQuery = Depends()) -> list[schemas.Hop]:
+        hops = await self.service.neighborhood(self.session, id, q.max_depth)
+        return [schemas.Hop(device_id=device_id, hops=count) for device_id, count in hops.items()]
+
+    @router.get("/topology/paths/{source_id}/{target_id}", operation_id="98bd95d0-aed4-496d-b8ac-bba7a2536036")
+    async def get_shortest_path(self, source_id: int, target_id: int) -> schemas.Path:
+        return schemas.Path(device_ids=await self.service.shortest_path(self.session, source_id, target_id))
+
+    @router.get("/topology/devices/{id}/blast-radius", operation_id="1b19347e-0914-4033-824e-b7914719b028")
+    async def get_device_blast_radius(self, id: int, q: schemas.BlastRadiusQuery = Depends()) -> schemas.DeviceIds:
+        return schemas.DeviceIds(device_ids=await self.service.blast_radius(self.session, id, q.root_id))
+
+    @router.get("/topology/articulation-points", operation_id="c896f785-7634-4c39-9acc-6055b0f12b40")
+    async def get_articulation_points(self) -> schemas.DeviceIds:
+        return schemas.DeviceIds(device_ids=await self.service.articulation_points(self.session))
+
+    @router.get("/topology/components", operation_id="90ffe138-32e6-48cb-9476-d1b9100a268a")
+    async def get_connected_components(self) -> schemas.Components:
+        return schemas.Components(results=await self.service.connected_components(self.session))
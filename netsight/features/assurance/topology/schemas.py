@@ -0,0 +1,29 @@
+from fastapi import Query
+from pydantic import Field
+
+from netsight.features._types import BaseModel
+
+
+class NeighborhoodQuery(BaseModel):
+    max_depth: int | None = Field(default=None, ge=0, description="Hops from the device, all reachable when empty.")
+
+
+class BlastRadiusQuery(BaseModel):
+    root_id: list[int] | None = Field(Query(default=[], description="Devices upstream, the core switches when empty."))
+
+
+class Hop(BaseModel):
+    device_id: int
+    hops: int
+
+
+class Path(BaseModel):
+    device_ids: list[int] | None = Field(description="Devices from source to target, empty when not connected.")
+
+
+class DeviceIds(BaseModel):
+    device_ids: list[int]
+
+
+class Components(BaseModel):
+    results: list[list[int]] = Field(description="Device ids of every connected component, largest first.")
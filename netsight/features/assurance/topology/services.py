@@ -0,0 +1,102 @@
+import time
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from sqlalchemy import cast, func, select
+from sqlalchemy.dialects.postgresql import REGCLASS
+
+from netsight.core.config import settings
+from netsight.core.errors.exception_handlers import NotFoundError
+from netsight.core.utils.context import locale_ctx
+from netsight.features.consts import DeviceRoleSlug
+from netsight.features.dcim.models import Device, LldpNeighbor, lldp_topology_version
+from netsight.features.intend.models import DeviceRole
+from netsight.libs.topology.graph import TopologyGraph
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+__all__ = ("topology_service",)
+
+
+class TopologyService:
+    """The LLDP topology of all devices, loaded once per process and kept up to date by discovery.
+
+    Neighbors collected from a device replace its links in the loaded graph right away. Every sync
+    bumps the `lldp_topology_version` sequence, a process finding a version it didn't apply loads
+    the graph again, as it does every `reload_interval` seconds for devices added or deleted.
+    """
+
+    def __init__(self, reload_interval: int) -> None:
+        self.reload_interval = reload_interval
+        self._graph: TopologyGraph | None = None
+        self._core_ids: list[int] = []
+        self._loaded_at = 0.0
+        self._version = 0
+
+    @staticmethod
+    async def version(session: "AsyncSession") -> int:
+        """The number of LLDP syncs of all processes, 0 before the first."""
+        last_value = func.pg_sequence_last_value(cast(lldp_topology_version.name, REGCLASS))
+        return await session.scalar(select(func.coalesce(last_value, 0)))
+
+    async def load(self, session: "AsyncSession") -> TopologyGraph:
+        # read before the links, a sync committed in between is loaded again rather than missed
+        version = await self.version(session)
+        device_ids = await session.scalars(select(Device.id))
+        links = await session.execute(select(LldpNeighbor.source_device_id, LldpNeighbor.target_device_id))
+        graph = TopologyGraph(device_ids, links.tuples())
+        stmt = select(Device.id).join(DeviceRole, Device.device_role_id == DeviceRole.id)
+        self._core_ids = list(await session.scalars(stmt.where(DeviceRole.slug == DeviceRoleSlug.csw)))
+        self._graph, self._loaded_at, self._version = graph, time.monotonic(), version
+        return graph
+
+    async def graph(self, session: "AsyncSession") -> TopologyGraph:
+        if (
+            self._graph is None
+            or time.monotonic() - self._loaded_at > self.reload_interval
+            or await self.version(session) != self._version
+        ):
+            return await self.load(session)
+        return self._graph
+
+    async def replace_neighbors(self, session: "AsyncSession", device_id: int, neighbor_ids: Iterable[int]) -> None:
+        """Apply the neighbors just stored for `device_id` and have the other processes load them.
+
+        Only a graph holding every earlier sync takes them in place, one that missed a sync of
+        another process is loaded again by the next `graph()`.
+        """
+        version = await session.scalar(select(lldp_topology_version.next_value()))
+        if self._graph is not None and version == self._version + 1:
+            self._graph.replace_links(device_id, neighbor_ids)
+            self._version = version
+
+    async def _device_graph(self, session: "AsyncSession", *device_ids: int) -> TopologyGraph:
+        graph = await self.graph(session)
+        for device_id in device_ids:
+            if device_id not in graph:
+                raise NotFoundError(Device.__visible_name__[locale_ctx.get()], "id", device_id)
+        return graph
+
+    async def neighborhood(self, session: "AsyncSession", device_id: int, max_depth: int | None) -> dict[int, int]:
+        return (await self._device_graph(session, device_id)).bfs(device_id, max_depth)
+
+    async def shortest_path(self, session: "AsyncSession", source_id: int, target_id: int) -> list[int] | None:
+        return (await self._device_graph(session, source_id, target_id)).shortest_path(source_id, target_id)
+
+    async def blast_radius(
+        self, session: "AsyncSession", device_id: int, root_ids: list[int] | None = None
+    ) -> list[int]:
+        """The devices `device_id` failing cuts off from the roots, by default the core switches."""
+        root_ids = root_ids or []
+        graph = await self._device_graph(session, device_id, *root_ids)
+        return graph.blast_radius(device_id, root_ids or self._core_ids)
+
+    async def articulation_points(self, session: "AsyncSession") -> list[int]:
+        return (await self.graph(session)).articulation_points()
+
+    async def connected_components(self, session: "AsyncSession") -> list[list[int]]:
+        return (await self.graph(session)).connected_components()
+
+
+topology_service = TopologyService(settings.TOPOLOGY_RELOAD_INTERVAL)
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from netsight.core.utils.cbv import cbv
-from netsight.features._types import AuditLog, IdResponse, ListT
+from netsight.features._types import AuditLog, IdResponse, ListT, list_response
 from netsight.features.admin.models import User
 from netsight.features.circuit import schemas
 from netsight.features.circuit.models import ISP, Circuit
@@ -17,6 +17,7 @@ from netsight.features.org.models import Site
 router = APIRouter()
 
 
+@cbv(router)
 class IspAPI:
     session: AsyncSession = Depends(get_session)
     user: User = Depends(auth)
@@ -38,10 +39,10 @@ class IspAPI:
         db_isp = await self.service.get_one_or_404(self.session, id, selectinload(ISP.asn).load_only(ASN.id, ASN.asn))
         return schemas.ISP.model_validate(db_isp)
 
-    @router.get("/isps", operation_id="a0f9b45c-868a-4b55-9632-977648011e35")
-    async def get_isps(self, q: schemas.ISPQuery = Depends()) -> ListT[schemas.ISPList]:
+    @router.get("/isps", operation_id="a0f9b45c-868a-4b55-9632-977648011e35", response_model=ListT[schemas.ISPList])
+    async def get_isps(self, q: schemas.ISPQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.ISPList.model_validate(r) for r in results])
+        return list_response(count, results, schemas.ISPList)
 
     @router.delete("/isp/{id}", operation_id="45e468e9-c04c-4d13-999c-36c48265fe0d")
     async def delete_isp(self, id: int) -> IdResponse:
@@ -99,17 +100,17 @@ class CircuitAPI:
             selectinload(Circuit.isp).load_only(ISP.id, ISP.name),
             selectinload(Circuit.site_a).load_only(Site.id, Site.name, Site.site_code),
             selectinload(Circuit.device_a).load_only(Device.id, Device.name, Device.management_ip),
-            selectinload(Circuit.interface_a).load_only(Interface.id, Interface.name),
+            selectinload(Circuit.interface_a).load_only(Interface.id, Interface.name, Interface.description),
             selectinload(Circuit.site_z).load_only(Site.id, Site.name, Site.site_code),
             selectinload(Circuit.device_z).load_only(Device.id, Device.name, Device.management_ip),
-            selectinload(Circuit.interface_z).load_only(Interface.id, Interface.name),
+            selectinload(Circuit.interface_z).load_only(Interface.id, Interface.name, Interface.description),
             selectinload(Circuit.created_by).load_only(User.id, User.name, User.email, User.avatar),
             selectinload(Circuit.updated_by).load_only(User.id, User.name, User.email, User.avatar),
         )
         return schemas.Circuit.model_validate(db_circuit)
 
-    @router.get("/circuits", operation_id="6eb35cf7-ec59-4bb3-8a6d-dd1d07375aca")
-    async def get_circuits(self, q: schemas.CircuitQuery = Depends()) -> ListT[schemas.Circuit]:
+    @router.get("/circuits", operation_id="6eb35cf7-ec59-4bb3-8a6d-dd1d07375aca", response_model=ListT[schemas.Circuit])
+    async def get_circuits(self, q: schemas.CircuitQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(
             self.session,
             q,
@@ -121,8 +122,10 @@ class CircuitAPI:
             selectinload(Circuit.site_z).load_only(Site.id, Site.name, Site.site_code),
             selectinload(Circuit.device_z).load_only(Device.id, Device.name, Device.management_ip),
             selectinload(Circuit.interface_z).load_only(Interface.id, Interface.name, Interface.description),
+            selectinload(Circuit.created_by).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(Circuit.updated_by).load_only(User.id, User.name, User.email, User.avatar),
         )
-        return ListT(count=count, results=[schemas.Circuit.model_validate(r) for r in results])
+        return list_response(count, results, schemas.Circuit)
 
     @router.delete("/circuits/{id}", operation_id="58ff4f23-f533-4eb7-bfa4-2c97d6e4be17")
     async def delete_circuit(self, id: int) -> IdResponse:
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy_utils.types import ChoiceType
 
 from netsight.core.database import Base
+from netsight.core.database.counters import counter_column
 from netsight.core.database.mixins import AuditLogMixin, AuditUserMixin
 from netsight.core.database.types import (
     PgIpAddress,
@@ -32,6 +33,7 @@ class Circuit(Base, AuditUserMixin, AuditLogMixin):
     __search_fields__ = {"name", "slug", "cid"}
     id: Mapped[int_pk]
     name: Mapped[str] = mapped_column(unique=True)
+    slug: Mapped[str] = mapped_column(unique=True)
     cid: Mapped[str | None] = mapped_column(unique=True)
     status: Mapped[CircuitStatus] = mapped_column(ChoiceType(CircuitStatus, impl=String()))
     install_date: Mapped[date_optional]
@@ -67,6 +69,9 @@ class ISP(Base, AuditUserMixin, AuditLogMixin):
     __search_fields__ = {"name", "slug"}
     id: Mapped[int_pk]
     name: Mapped[i18n_name]
+    slug: Mapped[str] = mapped_column(unique=True)
+    description: Mapped[str | None]
+    account: Mapped[str | None]
     portal: Mapped[str | None] = mapped_column(String, nullable=True)
     noc_contact: Mapped[list[str | None] | None] = mapped_column(ARRAY(String), nullable=True)
     admin_contact: Mapped[list[str | None]] = mapped_column(ARRAY(String), nullable=True)
@@ -75,6 +80,7 @@ class ISP(Base, AuditUserMixin, AuditLogMixin):
         back_populates="isp",
     )
     asn: Mapped[list["ASN"]] = relationship(secondary="isp_asn", back_populates="isp")
+    asn_count: Mapped[int] = counter_column("isp_asn", "isp_id")
 
 
 class ISPASN(Base):
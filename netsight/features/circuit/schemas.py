@@ -57,7 +57,7 @@ class ISPQuery(QueryParams):
 class CircuitBase(BaseModel):
     name: str
     slug: str
-    cid: str
+    cid: str | None = None
     status: CircuitStatus
     install_date: date | None = None
     purchase_term: str | None = None
@@ -98,7 +98,7 @@ class CircuitQuery(QueryParams, AuditTimeQuery):
     name: list[NameChineseStr] | None = Field(Query(default=[]))
     slug: list[NameStr] | None = Field(Query(default=[]))
     cid: list[str] | None = Field(Query(default=[]))
-    status: CircuitStatus | None = Field(Query(default=[]))
+    status: list[CircuitStatus] | None = Field(Query(default=[]))
     install_date__lte: date | None = None
     install_date__gte: date | None = None
     bandwidth__lte: int | None = None
@@ -114,10 +114,10 @@ class Circuit(CircuitBase, AuditUser):
     isp: schemas.ISPBrief
     circuit_type: schemas.CircuitTypeBrief
     site_a: schemas.SiteBrief
-    devie_a: schemas.DeviceBrief
+    device_a: schemas.DeviceBrief
     interface_a: schemas.InterfaceBrief
     site_z: schemas.SiteBrief | None = None
-    devie_z: schemas.DeviceBrief | None = None
+    device_z: schemas.DeviceBrief | None = None
     interface_z: schemas.InterfaceBrief | None = None
 
 
@@ -126,8 +126,8 @@ class CirctuiList(CircuitBase, AuditTime):
     isp: schemas.ISPBrief
     circuit_type: schemas.CircuitTypeBrief
     site_a: schemas.SiteBrief
-    devie_a: schemas.DeviceBrief
+    device_a: schemas.DeviceBrief
     interface_a: schemas.InterfaceBrief
     site_z: schemas.SiteBrief | None = None
-    devie_z: schemas.DeviceBrief | None = None
+    device_z: schemas.DeviceBrief | None = None
     interface_z: schemas.InterfaceBrief | None = None
@@ -24,6 +24,9 @@ class LocationType(StrEnum):
     ServerRoom = "ServerRoom"
 
 
+LOCATION_MAX_DEPTH = 3  # Building > Floor > ServerRoom
+
+
 class LocationStatus(StrEnum):
     Planning = "Planning"
     Vlidating = "Validating"
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from netsight.core.utils.cbv import cbv
+from netsight.features.admin.models import User
+from netsight.features.dashboard import schemas, services
+from netsight.features.dashboard.models import circuit_stats, device_stats, prefix_stats
+from netsight.features.deps import auth, get_session
+
+router = APIRouter()
+
+
+@cbv(router)
+class DashboardAPI:
+    session: AsyncSession = Depends(get_session)
+    user: User = Depends(auth)
+
+    @router.get("/stats/devices", operation_id="3f0c2d9e-6a71-4b8e-9d25-8e4f1b7a6c30")
+    async def get_device_stats(self, q: schemas.DeviceStatsQuery = Depends()) -> schemas.Stats:
+        return await services.get_stats(self.session, device_stats, q.group_by, site_id=q.site_id)
+
+    @router.get("/stats/circuits", operation_id="a8d51e47-2c93-4f06-b1e8-57c9d03f2a14")
+    async def get_circuit_stats(self, q: schemas.CircuitStatsQuery = Depends()) -> schemas.Stats:
+        return await services.get_stats(self.session, circuit_stats, q.group_by, "bandwidth")
+
+    @router.get("/stats/prefixes", operation_id="5b7e9a02-d4c6-4e1f-8a3b-c26f0d9e4b87")
+    async def get_prefix_stats(self, q: schemas.PrefixStatsQuery = Depends()) -> schemas.Stats:
+        return await services.get_stats(self.session, prefix_stats, q.group_by, site_id=q.site_id)
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Mapped, mapped_column
+
+from netsight.core.database import Base
+from netsight.core.database.types import DateTimeTZ
+from netsight.core.database.views import MaterializedView
+from netsight.features.circuit.models import Circuit
+from netsight.features.dcim.models import Device
+from netsight.features.ipam.models import Prefix
+
+__all__ = ("DashboardRefresh", "device_stats", "circuit_stats", "prefix_stats")
+
+
+class DashboardRefresh(Base):
+    """Last successful refresh of each dashboard materialized view."""
+
+    __tablename__ = "dashboard_refresh"
+    view_name: Mapped[str] = mapped_column(primary_key=True)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTimeTZ)
+
+
+# one row per combination of the group keys, widgets sum the counts over the keys they need
+device_stats = MaterializedView(
+    "dashboard_device_stats",
+    select(Device.site_id, Device.device_role_id, Device.status, func.count().label("count")).group_by(
+        Device.site_id, Device.device_role_id, Device.status
+    ),
+    unique=("site_id", "device_role_id", "status"),
+)
+circuit_stats = MaterializedView(
+    "dashboard_circuit_stats",
+    select(
+        Circuit.isp_id,
+        Circuit.status,
+        func.count().label("count"),
+        func.sum(Circuit.bandwidth).label("bandwidth"),
+    ).group_by(Circuit.isp_id, Circuit.status),
+    unique=("isp_id", "status"),
+)
+prefix_stats = MaterializedView(
+    "dashboard_prefix_stats",
+    select(Prefix.site_id, Prefix.status, func.count().label("count")).group_by(Prefix.site_id, Prefix.status),
+    unique=("site_id", "status"),
+)
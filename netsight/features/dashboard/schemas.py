@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Literal
+
+from fastapi import Query
+from pydantic import Field
+
+from netsight.features._types import BaseModel
+
+
+class StatsQuery(BaseModel):
+    site_id: list[int] | None = Field(Query(default=[]))
+
+
+class DeviceStatsQuery(StatsQuery):
+    group_by: Literal["status", "site_id", "device_role_id"] = "status"
+
+
+class CircuitStatsQuery(BaseModel):
+    group_by: Literal["status", "isp_id"] = "status"
+
+
+class PrefixStatsQuery(StatsQuery):
+    group_by: Literal["status", "site_id"] = "status"
+
+
+class StatsItem(BaseModel):
+    key: int | str | None = Field(description="Value of the group_by field.")
+    count: int
+    bandwidth: int | None = Field(default=None, description="Total bandwidth in Mbps, circuits only.")
+
+
+class Stats(BaseModel):
+    refreshed_at: datetime | None = Field(description="Aggregates are up to date as of this time.")
+    results: list[StatsItem]
@@ -0,0 +1,56 @@
+import logging
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from netsight.core.database.session import async_engine
+from netsight.core.database.views import MaterializedView
+from netsight.features.dashboard import schemas
+from netsight.features.dashboard.models import DashboardRefresh, circuit_stats, device_stats, prefix_stats
+
+__all__ = ("DASHBOARD_VIEWS", "get_stats", "refresh_views")
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_VIEWS = (device_stats, circuit_stats, prefix_stats)
+
+
+async def get_stats(
+    session: AsyncSession,
+    view: MaterializedView,
+    group_by: str,
+    *measures: str,
+    site_id: list[int] | None = None,
+) -> schemas.Stats:
+    """Sum the pre-aggregated `count` (and `measures`) of `view` per `group_by` value."""
+    key = view.c[group_by]
+    columns: list[Any] = [key.label("key"), func.sum(view.c.count).label("count")]
+    columns.extend(func.sum(view.c[m]).label(m) for m in measures)
+    stmt = select(*columns).group_by(key).order_by(key)
+    if site_id:
+        stmt = stmt.where(view.c.site_id.in_(site_id))
+    rows = (await session.execute(stmt)).mappings().all()
+    refreshed_at = await session.scalar(
+        select(DashboardRefresh.refreshed_at).where(DashboardRefresh.view_name == view.name)
+    )
+    return schemas.Stats(refreshed_at=refreshed_at, results=[schemas.StatsItem.model_validate(r) for r in rows])
+
+
+async def refresh_views(*, concurrently: bool = True) -> dict[str, datetime]:
+    """Refresh every dashboard view, each in its own transaction together with its refresh time."""
+    refreshed: dict[str, datetime] = {}
+    for view in DASHBOARD_VIEWS:
+        async with async_engine.begin() as connection:
+            await connection.run_sync(view.refresh, concurrently=concurrently)
+            refreshed_at = datetime.now(tz=UTC)
+            await connection.execute(
+                insert(DashboardRefresh)
+                .values(view_name=view.name, refreshed_at=refreshed_at)
+                .on_conflict_do_update(index_elements=["view_name"], set_={"refreshed_at": refreshed_at})
+            )
+        refreshed[view.name] = refreshed_at
+        logger.debug("Refreshed materialized view %s", view.name)
+    return refreshed
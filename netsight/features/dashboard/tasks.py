@@ -0,0 +1,8 @@
+from netsight.core.celery_app import async_task, celery_app
+from netsight.features.dashboard.services import refresh_views
+
+
+@celery_app.task(name="netsight.refresh_dashboard")
+def refresh_dashboard_task() -> dict[str, str]:
+    refreshed = async_task(refresh_views)()
+    return {name: refreshed_at.isoformat() for name, refreshed_at in refreshed.items()}
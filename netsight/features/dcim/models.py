@@ -1,29 +1,50 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import TEXT, ForeignKey, String, UniqueConstraint, func
+from sqlalchemy import TEXT, ForeignKey, Index, Sequence, String, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy_utils.types import ChoiceType
 
 from netsight.core.database import Base
 from netsight.core.database.mixins import AuditLogMixin, AuditTimeMixin, AuditUserMixin
-from netsight.core.database.types import DateTimeTZ, PgIpAddress, int_pk
-from netsight.features._types import IPvAnyAddress
+from netsight.core.database.types import DateTimeTZ, PgCIDR, PgIpAddress, PgMacAddress, int_pk
+from netsight.features._types import IPvAnyAddress, IPvAnyNetwork
 from netsight.features.consts import APMode, DeviceEquipmentType, DeviceStatus, InterfaceAdminStatus
+from netsight.features.monitor.consts import DeviceOperationalStatus
 
 if TYPE_CHECKING:
     from netsight.features.intend.models import DeviceRole, DeviceType, Manufacturer, Platform
     from netsight.features.ipam.models import VLAN, IPAddress
     from netsight.features.org.models import Location, Site
 
-__all__ = ("Device", "DeviceModule", "DeviceStack", "DeviceConfig", "Interface", "LldpNeighbor")
+__all__ = (
+    "Device",
+    "DeviceModule",
+    "DeviceStack",
+    "DeviceConfig",
+    "Interface",
+    "LldpNeighbor",
+    "lldp_topology_version",
+    "MacAddressEntry",
+    "ArpEntry",
+    "Route",
+    "RouteHistory",
+)
 
 
 class Device(Base, AuditUserMixin, AuditLogMixin):
     # make sure device is management by logic in dcim.views. if device is stacked
     #  members should be added and treated as stacked for this master device
     __tablename__ = "device"
+    __table_args__ = (
+        Index(
+            "ix_device_management_ip_gist",
+            "management_ip",
+            postgresql_using="gist",
+            postgresql_ops={"management_ip": "inet_ops"},
+        ),
+    )
     __visible_name__ = {"en": "Device", "zh": "设备"}
     __search_fields__ = {"name", "management_ipv4", "management_ipv6", "serial_num", "oob_ip"}
     id: Mapped[int_pk]
@@ -31,6 +52,15 @@ class Device(Base, AuditUserMixin, AuditLogMixin):
     management_ip: Mapped[IPvAnyAddress] = mapped_column(PgIpAddress, index=True)
     oob_ip: Mapped[IPvAnyAddress | None] = mapped_column(PgIpAddress, nullable=True)
     status: Mapped[DeviceStatus] = mapped_column(ChoiceType(DeviceStatus, impl=String()))
+    operational_status: Mapped[DeviceOperationalStatus] = mapped_column(
+        ChoiceType(DeviceOperationalStatus, impl=String()),
+        default=DeviceOperationalStatus.UNKNOWN,
+        server_default=DeviceOperationalStatus.UNKNOWN.value,
+        comment="management IP reachability from the latest sweep",
+    )
+    latency: Mapped[float | None] = mapped_column(comment="average round trip time in ms of the latest sweep")
+    jitter: Mapped[float | None] = mapped_column(comment="mean round trip time variation in ms of the latest sweep")
+    packet_loss: Mapped[float | None] = mapped_column(comment="ratio of probes unanswered in the latest sweep")
     software_version: Mapped[str | None]
     software_patch: Mapped[str | None]
     comments: Mapped[str | None]
@@ -155,3 +185,66 @@ class LldpNeighbor(Base, AuditTimeMixin):
     target_device_id: Mapped[int] = mapped_column(ForeignKey("device.id", ondelete="CASCADE"))
     target_device: Mapped["Device"] = relationship(backref="target_device", foreign_keys=[target_device_id])
     link_status: Mapped[str | None]
+
+
+# bumped by every LLDP sync, a process holding the topology graph compares it to the one it loaded
+lldp_topology_version = Sequence("lldp_topology_version", metadata=Base.metadata)
+
+
+class MacAddressEntry(Base):
+    # loaded by SnapshotStore, only the changes of a collection are written
+    __tablename__ = "mac_address_entry"
+    __visible_name__ = {"en": "MAC Address Entry", "zh": "MAC地址表项"}
+    # the primary key is the (device, interface) index
+    device_id: Mapped[int] = mapped_column(ForeignKey("device.id", ondelete="CASCADE"), primary_key=True)
+    interface: Mapped[str] = mapped_column(primary_key=True)
+    vlan: Mapped[int] = mapped_column(primary_key=True)
+    mac_address: Mapped[str] = mapped_column(PgMacAddress, primary_key=True, index=True)
+    first_seen: Mapped[datetime] = mapped_column(DateTimeTZ, server_default=func.now())
+
+
+class ArpEntry(Base):
+    __tablename__ = "arp_entry"
+    __visible_name__ = {"en": "ARP Entry", "zh": "ARP表项"}
+    device_id: Mapped[int] = mapped_column(ForeignKey("device.id", ondelete="CASCADE"), primary_key=True)
+    interface: Mapped[str] = mapped_column(primary_key=True)
+    ip_address: Mapped[IPvAnyAddress] = mapped_column(PgIpAddress, primary_key=True, index=True)
+    mac_address: Mapped[str] = mapped_column(PgMacAddress, primary_key=True, index=True)
+    first_seen: Mapped[datetime] = mapped_column(DateTimeTZ, server_default=func.now())
+
+
+class RouteMixin:
+    device_id: Mapped[int] = mapped_column(ForeignKey("device.id", ondelete="CASCADE"))
+    vrf: Mapped[str] = mapped_column(server_default="")  # empty for the global table
+    prefix: Mapped[IPvAnyNetwork] = mapped_column(PgCIDR)
+    protocol: Mapped[str]
+    next_hop: Mapped[IPvAnyAddress] = mapped_column(PgIpAddress)  # the unspecified address when connected
+    interface: Mapped[str] = mapped_column(server_default="")
+    distance: Mapped[int] = mapped_column(server_default="0")
+    metric: Mapped[int] = mapped_column(server_default="0")
+    first_seen: Mapped[datetime] = mapped_column(DateTimeTZ, server_default=func.now())
+
+
+class Route(RouteMixin, Base):
+    # a full table is over a million rows per router, no key index to maintain besides the lookups one
+    __tablename__ = "route"
+    __table_args__ = (
+        Index(
+            "ix_route_device_id_prefix_gist",
+            "device_id",
+            "prefix",
+            postgresql_using="gist",
+            postgresql_ops={"prefix": "inet_ops"},
+        ),
+    )
+    __visible_name__ = {"en": "Route", "zh": "路由"}
+    __mapper_args__ = {"primary_key": ["device_id", "vrf", "prefix", "next_hop", "interface"]}
+
+
+class RouteHistory(RouteMixin, Base):
+    # routes removed from the table, with the current ones the routes of a device at any time
+    __tablename__ = "route_history"
+    __table_args__ = (Index("ix_route_history_device_id_removed_at", "device_id", "removed_at"),)
+    __visible_name__ = {"en": "Route History", "zh": "路由历史"}
+    __mapper_args__ = {"primary_key": ["device_id", "vrf", "prefix", "next_hop", "interface", "removed_at"]}
+    removed_at: Mapped[datetime] = mapped_column(DateTimeTZ)
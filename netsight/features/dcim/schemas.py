@@ -1,17 +1,19 @@
 from datetime import datetime
 
 from fastapi import Query
-from pydantic import Field, IPvAnyAddress, model_validator
+from pydantic import Field, IPvAnyAddress, IPvAnyNetwork, model_validator
 
 from netsight.features import schemas
 from netsight.features._types import (
     AuditTime,
     AuditUser,
     BaseModel,
+    MacAddress,
     NameStr,
     QueryParams,
 )
-from netsight.features.consts import APMode, DeviceEquipmentType, DeviceStatus, InterfaceAdminStatus
+from netsight.features.consts import APMode, DeviceEquipmentType, DeviceStatus, InterfaceAdminStatus, IPVersion
+from netsight.features.monitor.consts import DeviceOperationalStatus
 
 
 class DeviceBase(BaseModel):
@@ -67,13 +69,17 @@ class DeviceUpdate(DeviceBase):
 class DeviceQuery(QueryParams):
     name: list[NameStr] | None = Field(Query(default=[]))
     status: list[DeviceStatus] | None = Field(Query(default=[]))
+    operational_status: list[DeviceOperationalStatus] | None = Field(Query(default=[]))
     site_id: list[int] | None = Field(Query(default=[]))
     location_id: list[int] | None = Field(Query(default=[]))
+    location_subtree: int | None = Query(default=None, description="Devices in the location or any location under it")
     device_role_id: list[int] | None = Field(Query(default=[]))
     platform_id: list[int] | None = Field(Query(default=[]))
     manufacturer_id: list[int] | None = Field(Query(default=[]))
     device_type_id: list[int] | None = Field(Query(default=[]))
     management_ip: list[IPvAnyAddress] | None = Field(Query(default=[]))
+    management_ip__within: IPvAnyNetwork | None = None
+    management_ip__family: IPVersion | None = None
     associated_wac_ip: list[IPvAnyAddress] | None = Field(Query(default=[]))
     ap_group: list[str] | None = Field(Query(default=[]))
     ap_mode: APMode | None = Field(Query(default=None))
@@ -81,6 +87,10 @@ class DeviceQuery(QueryParams):
 
 class Device(DeviceBase, AuditUser):
     id: int
+    operational_status: DeviceOperationalStatus
+    latency: float | None = None
+    jitter: float | None = None
+    packet_loss: float | None = None
     device_type: schemas.DeviceTypeBrief
     device_role: schemas.DeviceRoleBrief
     platform: schemas.PlatformBrief
@@ -91,6 +101,10 @@ class Device(DeviceBase, AuditUser):
 
 class DeviceList(DeviceBase, AuditTime):
     id: int
+    operational_status: DeviceOperationalStatus
+    latency: float | None = None
+    jitter: float | None = None
+    packet_loss: float | None = None
     device_type: schemas.DeviceTypeBrief
     device_role: schemas.DeviceRoleBrief
     platform: schemas.PlatformBrief
@@ -164,7 +178,61 @@ class Topology(BaseModel):
     links: list[Link]
 
 
-class MacAddress(BaseModel): ...
+class MacAddressTableQuery(BaseModel):
+    interface: list[str] | None = Field(Query(default=[]))
+    vlan: list[int] | None = Field(Query(default=[]))
 
 
-class Route(BaseModel): ...
+class MacAddressEntry(BaseModel):
+    interface: str
+    vlan: int
+    mac_address: str
+    first_seen: datetime
+
+
+class EndpointQuery(BaseModel):
+    mac_address: MacAddress | None = None
+    ip_address: IPvAnyAddress | None = None
+
+    @model_validator(mode="after")
+    def validate_address(self):
+        if (self.mac_address is None) == (self.ip_address is None):
+            raise ValueError("one of mac_address and ip_address is required")
+        return self
+
+
+class EndpointLocation(BaseModel):
+    device_id: int
+    device_name: str
+    interface: str
+    vlan: int
+    port_mac_count: int = Field(description="MACs learned on the port up to 100, the edge port has the fewest.")
+    first_seen: datetime
+
+
+class Endpoint(BaseModel):
+    mac_address: str
+    ip_addresses: list[IPvAnyAddress]
+    locations: list[EndpointLocation] = Field(description="Where the MAC is learned, the likely edge port first.")
+
+
+class RouteQuery(BaseModel):
+    limit: int = Query(default=100, ge=0, le=10000, description="Number of results to return per request.")
+    offset: int = Query(default=0, ge=0, description="The initial index from which return the results.")
+    vrf: str | None = Query(default=None, description="Only the routes of the VRF, empty for the global table.")
+    protocol: list[str] | None = Field(Query(default=[]))
+    prefix: IPvAnyNetwork | None = None
+    within: IPvAnyNetwork | None = Query(default=None, description="Routes to the prefix or its subnets.")
+    address: IPvAnyAddress | None = Query(default=None, description="The longest prefix matches of the address.")
+    at: datetime | None = Query(default=None, description="The routes of the device at that time.")
+
+
+class Route(BaseModel):
+    vrf: str
+    prefix: IPvAnyNetwork
+    protocol: str
+    next_hop: IPvAnyAddress
+    interface: str
+    distance: int
+    metric: int
+    first_seen: datetime
@@ -1,19 +1,82 @@
-from typing import TYPE_CHECKING
+import asyncio
+import threading
+from collections import defaultdict
+from collections.abc import AsyncIterable, AsyncIterator, Sequence
+from datetime import datetime
+from itertools import zip_longest
+from typing import TYPE_CHECKING, Any
 
+from fastapi import status
+from pydantic import ValidationError
+from sqlalchemy import Row, Select, case, cast, delete, func, literal, or_, select, tuple_, union_all
+from sqlalchemy.dialects.postgresql import INET
+from sqlalchemy.orm import aliased, selectinload
+
+from netsight.core.config import settings
+from netsight.core.database.reconcile import Reconciler, ReconcileResult
+from netsight.core.database.snapshots import SnapshotDiff, SnapshotStore
+from netsight.core.errors import err_codes
+from netsight.core.errors.exception_handlers import GenerError
 from netsight.core.repositories import BaseRepository
+from netsight.features.assurance.topology.services import topology_service
 from netsight.features.consts import DeviceRoleSlug, DeviceStatus
 from netsight.features.dcim import schemas
-from netsight.features.dcim.models import Device
+from netsight.features.dcim.models import (
+    ArpEntry,
+    Device,
+    DeviceEquipment,
+    DeviceModule,
+    DeviceStack,
+    Interface,
+    LldpNeighbor,
+    MacAddressEntry,
+    Route,
+    RouteHistory,
+)
 from netsight.features.intend.services import device_role_service
+from netsight.features.netconfig.models import AuthCredential
+from netsight.features.netconfig.schemas import CliCredential
+from netsight.features.netconfig.services import textfsm_service
+from netsight.features.org.models import Location, Site
 from netsight.features.org.services import location_service
+from netsight.libs.netty.engine import CollectionTarget
+from netsight.libs.netty.exceptions import NettyAuthenticationError, NettyConnectionError, NettyTimeoutError
+from netsight.libs.netty.parser import ParsedTable
+from netsight.libs.netty.pool import SshSessionPool
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
-__all__ = ("device_service",)
+__all__ = ("device_service", "endpoint_service", "route_service")
+
+PORT_MAC_COUNT_LIMIT = 100
+STREAM_QUEUE_SIZE = 64
+ROUTE_TEMPLATE = "routes"
+# a route starts on a line with its codes then its prefix, next hops of ECMP routes follow indented
+ROUTE_RECORD = r"^\S+(?:\s\S+)?\s+[0-9A-Fa-f.:]+/\d+"
+# template values and the defaults of the route columns
+ROUTE_VALUES = {
+    "vrf": "",
+    "prefix": "",
+    "protocol": "",
+    "next_hop": "",
+    "interface": "",
+    "distance": 0,
+    "metric": 0,
+}
 
 
 class DeviceService(BaseRepository[Device, schemas.DeviceCreate, schemas.DeviceUpdate, schemas.DeviceQuery]):
+    def _apply_list(
+        self, stmt: Select[tuple[Device]], query: schemas.DeviceQuery, excludes: set[str] | None = None
+    ) -> Select[tuple[Device]]:
+        stmt = super()._apply_list(stmt, query, {"location_subtree"} | (excludes or set()))
+        if query.location_subtree is not None:
+            stmt = stmt.where(
+                Device.location_id.in_(select(Location.id).where(Location.in_subtree(query.location_subtree)))
+            )
+        return stmt
+
     async def validate_location_and_site(self, session: "AsyncSession", location_id: int, site_id: int) -> None:
         location_site_id = await location_service.get_location_site_id(session, location_id)
         if location_site_id != site_id:
@@ -83,11 +146,195 @@ class DeviceScrapeService:
         self.session = session
 
     async def validate_device(self) -> "Device":
-        device = await device_service.get_one_or_404(self.session, self.device_id)
+        device = await device_service.get_one_or_404(self.session, self.device_id, selectinload(Device.platform))
         if device.status != DeviceStatus.Active:
-            raise ValueError("device is not active")
+            raise GenerError(
+                err_codes.ERR_40006, {"device_id": device.id, "status": str(device.status)}, status.HTTP_409_CONFLICT
+            )
         return device
 
+    async def cli_target(self, device: Device) -> CollectionTarget:
+        """How to log in to the device, with the most specific CLI credential of device, site or site group."""
+        stmt = (
+            select(AuthCredential.cli)
+            .where(
+                AuthCredential.cli.is_not(None),
+                or_(
+                    AuthCredential.device_id == device.id,
+                    AuthCredential.site_id == device.site_id,
+                    AuthCredential.site_group_id
+                    == select(Site.site_group_id).where(Site.id == device.site_id).scalar_subquery(),
+                ),
+            )
+            .order_by(
+                case((AuthCredential.device_id.is_not(None), 0), (AuthCredential.site_id.is_not(None), 1), else_=2)
+            )
+            .limit(1)
+        )
+        cli = await self.session.scalar(stmt)
+        if cli is None or not device.platform.netmiko_driver:
+            raise GenerError(err_codes.ERR_40001, {"device_id": device.id}, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        try:
+            credential = CliCredential.model_validate_json(cli)
+        except ValidationError:
+            # stored before the format was checked on write, the errors would echo the password
+            raise GenerError(
+                err_codes.ERR_40005, {"device_id": device.id}, status.HTTP_422_UNPROCESSABLE_ENTITY
+            ) from None
+        return CollectionTarget(
+            device.id,
+            str(device.management_ip),
+            device.platform.netmiko_driver,
+            credential.username,
+            credential.password,
+            secret=credential.secret,
+            site_id=device.site_id,
+        )
+
+    async def collect(self, getters: Sequence[str]) -> dict[str, Any]:
+        """Run the getters over the device's pooled SSH session, logging in only when it has none."""
+        target = await self.cli_target(await self.validate_device())
+
+        def run() -> dict[str, Any]:
+            with ssh_sessions.session(target, settings.SSH_TIMEOUT) as device:
+                return {getter: getattr(device, getter)() for getter in getters}
+
+        try:
+            return await asyncio.to_thread(run)
+        except (NettyConnectionError, NettyAuthenticationError, OSError, EOFError) as e:
+            raise GenerError(
+                err_codes.ERR_40002, {"device_id": self.device_id, "detail": str(e)}, status.HTTP_502_BAD_GATEWAY
+            ) from e
+
+    async def stream(self, target: CollectionTarget, getter: str) -> AsyncIterator[str]:
+        """Run a getter yielding output over the device's pooled SSH session, its pieces as they are read.
+
+        The session isn't used while streaming, `target` is looked up before.
+        """
+        loop = asyncio.get_running_loop()
+        pieces: asyncio.Queue[str | None] = asyncio.Queue(STREAM_QUEUE_SIZE)
+        stopped = threading.Event()
+
+        def put(piece: str | None) -> None:
+            asyncio.run_coroutine_threadsafe(pieces.put(piece), loop).result()
+
+        def run() -> None:
+            try:
+                with ssh_sessions.session(target, settings.SSH_TIMEOUT) as device:
+                    for piece in getattr(device, getter)():
+                        if stopped.is_set():
+                            break
+                        put(piece)
+            finally:
+                put(None)
+
+        reading = asyncio.ensure_future(asyncio.to_thread(run))
+        try:
+            while (piece := await pieces.get()) is not None:
+                yield piece
+            await reading
+        except (NettyConnectionError, NettyAuthenticationError, NettyTimeoutError, OSError, EOFError) as e:
+            raise GenerError(
+                err_codes.ERR_40002, {"device_id": self.device_id, "detail": str(e)}, status.HTTP_502_BAD_GATEWAY
+            ) from e
+        finally:
+            # a consumer gone early, unblock the reading thread so it logs out
+            stopped.set()
+            while not pieces.empty():
+                pieces.get_nowait()
+
+    def checked_rows(self, getter: str, rows: Any, allow_empty: bool = False) -> list[dict[str, Any]]:
+        """The rows `getter` collected, refused when they can't stand for everything the device has.
+
+        Stored rows missing from the collected ones are deleted: a getter not implemented for the
+        platform or an output that wasn't parsed would empty the table. No row at all is taken as
+        such a failure unless `allow_empty` says the device really has none.
+        """
+        if not isinstance(rows, list):
+            raise GenerError(
+                err_codes.ERR_40003, {"device_id": self.device_id, "getter": getter}, status.HTTP_502_BAD_GATEWAY
+            )
+        if not rows and not allow_empty:
+            raise GenerError(
+                err_codes.ERR_40004, {"device_id": self.device_id, "getter": getter}, status.HTTP_409_CONFLICT
+            )
+        return rows
+
+    async def sync(self, getter: str, allow_empty: bool = False) -> ReconcileResult:
+        """Collect the device's components with `getter` and reconcile the stored ones with them."""
+        collected = await self.collect([getter])
+        rows = self.checked_rows(getter, collected[getter], allow_empty)
+        return await component_reconcilers[getter].reconcile(self.session, {self.device_id: rows})
+
+    async def neighbor_rows(self, neighbors: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """The LLDP neighbors as links between interfaces, those of devices not known by name left out."""
+        remote_names = {(neighbor["neighbor"], neighbor["neighbor_interface"]) for neighbor in neighbors}
+        stmt = (
+            select(Interface.id, Interface.device_id, Device.name, Interface.name)
+            .join(Device, Interface.device_id == Device.id)
+            .where(
+                or_(
+                    (Interface.device_id == self.device_id)
+                    & Interface.name.in_({neighbor["interface"] for neighbor in neighbors}),
+                    tuple_(Device.name, Interface.name).in_(remote_names),
+                )
+            )
+        )
+        local: dict[str, int] = {}
+        remote: dict[tuple[str, str], tuple[int, int]] = {}
+        for interface_id, device_id, device_name, name in await self.session.execute(stmt):
+            if device_id == self.device_id:
+                local[name] = interface_id
+            remote[device_name, name] = (device_id, interface_id)
+        rows = []
+        for neighbor in neighbors:
+            source_interface_id = local.get(neighbor["interface"])
+            target = remote.get((neighbor["neighbor"], neighbor["neighbor_interface"]))
+            if source_interface_id is not None and target is not None:
+                rows.append(
+                    {
+                        "source_interface_id": source_interface_id,
+                        "target_device_id": target[0],
+                        "target_interface_id": target[1],
+                    }
+                )
+        return rows
+
+    async def sync_topology(self, allow_empty: bool = False) -> ReconcileResult:
+        """Collect the device's LLDP neighbors, reconcile its stored links and apply them to the topology."""
+        collected = await self.collect(["get_lldp_neighbors"])
+        neighbors = self.checked_rows("get_lldp_neighbors", collected["get_lldp_neighbors"], allow_empty)
+        rows = await self.neighbor_rows(neighbors)
+        result = await neighbor_reconciler.reconcile(self.session, {self.device_id: rows})
+        await topology_service.replace_neighbors(
+            self.session, self.device_id, {row["target_device_id"] for row in rows}
+        )
+        return result
+
+    async def load_tables(
+        self, getters: Sequence[str] = ("get_mac_table", "get_arp_table"), allow_empty: bool = False
+    ) -> dict[str, SnapshotDiff]:
+        """Collect the device's tables with `getters` and store what changed since the last collection."""
+        collected = await self.collect(getters)
+        # all checked before any is loaded, a refused table leaves the others as they were too
+        snapshots = {getter: self.checked_rows(getter, collected[getter], allow_empty) for getter in getters}
+        diffs = {
+            getter: await table_stores[getter].load(self.session, {self.device_id: rows}, commit=False)
+            for getter, rows in snapshots.items()
+        }
+        await self.session.commit()
+        return diffs
+
+    async def load_routes(self) -> SnapshotDiff:
+        """Stream the device's routing table into its stored routes, parsed and copied while it is read."""
+        device = await self.validate_device()
+        output = self.stream(await self.cli_target(device), "get_routing_table")
+        # the template is looked up before the session is busy copying
+        tables = await textfsm_service.parse_stream(
+            self.session, device.platform_id, ROUTE_TEMPLATE, output, ROUTE_RECORD
+        )
+        return await route_store.load(self.session, {self.device_id: route_rows(tables)})
+
     async def device_icmp_reachable(self) -> bool:
         return True
 
@@ -98,4 +345,193 @@ class DeviceScrapeService:
         return True
 
 
+class EndpointService:
+    """Where MAC and IP addresses are connected, from the collected MAC and ARP tables."""
+
+    async def mac_table(
+        self, session: "AsyncSession", device_id: int, query: schemas.MacAddressTableQuery
+    ) -> Sequence[Row[tuple[str, int, str, Any]]]:
+        entry = MacAddressEntry
+        stmt = select(entry.interface, entry.vlan, entry.mac_address, entry.first_seen).where(
+            entry.device_id == device_id
+        )
+        if query.interface:
+            stmt = stmt.where(entry.interface.in_(query.interface))
+        if query.vlan:
+            stmt = stmt.where(entry.vlan.in_(query.vlan))
+        return (await session.execute(stmt.order_by(entry.interface, entry.vlan, entry.mac_address))).all()
+
+    async def locate(self, session: "AsyncSession", query: schemas.EndpointQuery) -> list[schemas.Endpoint]:
+        """The ports the MAC, or the MACs the ARP tables resolve the IP to, are learned on.
+
+        A MAC is learned on every trunk between its edge port and where it is looked up from, the
+        locations are ordered by how many MACs their port has learned, up to `PORT_MAC_COUNT_LIMIT`.
+        """
+        if query.ip_address is not None:
+            address = ArpEntry.ip_address == query.ip_address
+        else:
+            address = ArpEntry.mac_address == query.mac_address
+        ip_addresses: defaultdict[str, set[Any]] = defaultdict(set)
+        for mac_address, ip_address in await session.execute(
+            select(ArpEntry.mac_address, ArpEntry.ip_address).where(address).distinct()
+        ):
+            ip_addresses[mac_address].add(ip_address)
+        mac_addresses = list(ip_addresses) if query.mac_address is None else [query.mac_address]
+        if not mac_addresses:
+            return []
+
+        entry, port = MacAddressEntry, aliased(MacAddressEntry)
+        learned = (
+            select(literal(1))
+            .where(port.device_id == entry.device_id, port.interface == entry.interface)
+            .limit(PORT_MAC_COUNT_LIMIT)
+            .correlate(entry)
+            .subquery()
+        )
+        port_mac_count = select(func.count()).select_from(learned).scalar_subquery().label("port_mac_count")
+        stmt = (
+            select(
+                entry.mac_address,
+                entry.device_id,
+                Device.name.label("device_name"),
+                entry.interface,
+                entry.vlan,
+                port_mac_count,
+                entry.first_seen,
+            )
+            .join(Device, Device.id == entry.device_id)
+            .where(entry.mac_address.in_(mac_addresses))
+            .order_by(port_mac_count, entry.device_id, entry.interface)
+        )
+        locations: defaultdict[str, list[schemas.EndpointLocation]] = defaultdict(list)
+        for row in await session.execute(stmt):
+            locations[row.mac_address].append(schemas.EndpointLocation.model_validate(row))
+        return [
+            schemas.Endpoint(
+                mac_address=mac_address,
+                ip_addresses=sorted(ip_addresses[mac_address]),
+                locations=locations[mac_address],
+            )
+            for mac_address in mac_addresses
+            if ip_addresses[mac_address] or locations[mac_address]
+        ]
+
+
+async def route_rows(tables: AsyncIterable[ParsedTable]) -> AsyncIterator[dict[str, Any]]:
+    """Routes from tables parsed by a template with the upper case `ROUTE_VALUES` as values.
+
+    `NEXT_HOP` and `INTERFACE` can be `List` values, the paths of an ECMP route, a route per path.
+    """
+    async for table in tables:
+        positions = [
+            (column, table.header.index(column.upper())) for column in ROUTE_VALUES if column.upper() in table.header
+        ]
+        for values in table.rows:
+            route = ROUTE_VALUES | {column: values[position] for column, position in positions if values[position]}
+            unspecified = "::" if ":" in route["prefix"] else "0.0.0.0"  # noqa: S104
+            next_hops, interfaces = route["next_hop"], route["interface"]
+            if not isinstance(next_hops, list) and not isinstance(interfaces, list):
+                yield route | {"next_hop": next_hops or unspecified}
+                continue
+            next_hops = next_hops if isinstance(next_hops, list) else [next_hops]
+            interfaces = interfaces if isinstance(interfaces, list) else [interfaces]
+            for next_hop, interface in zip_longest(next_hops or [""], interfaces):
+                yield route | {"next_hop": next_hop or unspecified, "interface": interface or ""}
+
+
+class RouteService:
+    async def routes(
+        self, session: "AsyncSession", device_id: int, query: schemas.RouteQuery
+    ) -> Sequence[Row[tuple[Any, ...]]]:
+        """The stored routes of the device, those of `query.at` rebuilt from the history.
+
+        Routes matching `query.address` come longest prefix first.
+        """
+        columns = [*ROUTE_VALUES, "first_seen"]
+        stmt = select(*(Route.__table__.c[column] for column in columns)).where(*self._where(Route, device_id, query))
+        if query.at is not None:
+            removed = select(*(RouteHistory.__table__.c[column] for column in columns)).where(
+                *self._where(RouteHistory, device_id, query), RouteHistory.removed_at > query.at
+            )
+            stmt = union_all(stmt, removed)
+        routes = stmt.subquery()
+        order = [routes.c.vrf, routes.c.prefix, routes.c.next_hop]
+        if query.address is not None:
+            order.insert(0, func.masklen(routes.c.prefix).desc())
+        stmt = select(routes).order_by(*order).offset(query.offset).limit(query.limit)
+        return (await session.execute(stmt)).all()
+
+    async def prune_history(self, session: "AsyncSession", before: datetime) -> int:
+        """Delete the routes removed before `before`, return their number.
+
+        Device by device, each delete a range of the `(device_id, removed_at)` index.
+        """
+        pruned = 0
+        for device_id in (await session.scalars(select(Device.id).order_by(Device.id))).all():
+            stmt = delete(RouteHistory).where(RouteHistory.device_id == device_id, RouteHistory.removed_at < before)
+            pruned += (await session.execute(stmt)).rowcount
+            await session.commit()
+        return pruned
+
+    @staticmethod
+    def _where(model: type[Route | RouteHistory], device_id: int, query: schemas.RouteQuery) -> list[Any]:
+        conditions = [model.device_id == device_id]
+        if query.vrf is not None:
+            conditions.append(model.vrf == query.vrf)
+        if query.protocol:
+            conditions.append(model.protocol.in_(query.protocol))
+        if query.prefix is not None:
+            conditions.append(model.prefix == query.prefix)
+        if query.within is not None:
+            conditions.append(model.prefix.op("<<=")(query.within))
+        if query.address is not None:
+            conditions.append(model.prefix.op(">>=")(cast(str(query.address), INET)))
+        if query.at is not None:
+            conditions.append(model.first_seen <= query.at)
+        return conditions
+
+
 device_service = DeviceService(Device)
+endpoint_service = EndpointService()
+route_service = RouteService()
+# component getters and how their rows are keyed
+component_reconcilers = {
+    "get_interfaces": Reconciler(
+        Interface,
+        "device_id",
+        [("device_id", "name")],
+        ["description", "if_index", "speed", "mode", "interface_type", "mtu", "admin_status"],
+    ),
+    "get_modules": Reconciler(
+        DeviceModule,
+        "device_id",
+        [("serial_number",), ("device_id", "name")],
+        ["description", "part_number", "hardware_version", "physical_index", "replaceable"],
+    ),
+    "get_stacks": Reconciler(
+        DeviceStack, "device_id", [("device_id", "mac_address")], ["role", "priority", "device_type"]
+    ),
+    "get_equipments": Reconciler(
+        DeviceEquipment,
+        "device_id",
+        [("serial_number",), ("device_id", "eq_type", "name")],
+        ["description", "device_type"],
+    ),
+}
+# the links of a device to its LLDP neighbors, several on an interface facing a hub
+neighbor_reconciler = Reconciler(
+    LldpNeighbor,
+    "source_device_id",
+    [("source_device_id", "source_interface_id", "target_interface_id")],
+    ["target_device_id"],
+)
+# table getters and where their entries are kept
+table_stores = {
+    "get_mac_table": SnapshotStore(MacAddressEntry, "device_id", ["interface", "vlan", "mac_address"]),
+    "get_arp_table": SnapshotStore(ArpEntry, "device_id", ["interface", "ip_address", "mac_address"]),
+}
+route_store = SnapshotStore(
+    Route, "device_id", ["vrf", "prefix", "protocol", "next_hop", "interface", "distance", "metric"], RouteHistory
+)
+# logins of the devices being synced, reused by the sync_device_* calls of a sync cycle
+ssh_sessions = SshSessionPool(idle=settings.SSH_SESSION_IDLE_TIMEOUT, keepalive=settings.SSH_KEEPALIVE_INTERVAL)
@@ -0,0 +1,17 @@
+from datetime import UTC, datetime, timedelta
+
+from netsight.core.celery_app import async_task, celery_app
+from netsight.core.config import settings
+from netsight.core.database.session import async_session
+from netsight.features.dcim.services import route_service
+
+
+async def prune_route_history() -> int:
+    before = datetime.now(tz=UTC) - timedelta(seconds=settings.ROUTE_HISTORY_RETENTION)
+    async with async_session() as session:
+        return await route_service.prune_history(session, before)
+
+
+@celery_app.task(name="netsight.prune_route_history")
+def prune_route_history_task() -> int:
+    return async_task(prune_route_history)()
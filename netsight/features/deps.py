@@ -13,16 +13,23 @@ from sqlalchemy.orm import selectinload
 
 from netsight.core.config import settings
 from netsight.core.database.session import async_session
-from netsight.core.errors.exception_handlers import PermissionDenyError, TokenExpireError, TokenInvalidError
+from netsight.core.errors.exception_handlers import (
+    PermissionDenyError,
+    TokenExpireError,
+    TokenInvalidError,
+    TooManyRequestsError,
+)
 from netsight.features.admin.models import RolePermission, User
 from netsight.features.admin.security import API_WHITE_LISTS, JWT_ALGORITHM, JwtTokenPayload
 from netsight.features.admin.services import user_service
 from netsight.features.consts import ReservedRoleSlug
+from netsight.libs.redis.limiter import SlidingWindowLimiter
 from netsight.libs.redis.session import CacheNamespace, redis_client
 
 logger = logging.getLogger(__name__)
 
 token = HTTPBearer()
+rate_limiter = SlidingWindowLimiter(*settings.LIMITED_RATE)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -58,6 +65,8 @@ async def auth(
     operation_id = request.scope["route"].operation_id
     if operation_id and not check_privileged_role(user.role.slug, operation_id):
         await check_role_permissions(user.role_id, session, operation_id)
+    if settings.ENABLE_LIMIT:
+        await check_rate_limit(user.id, operation_id)
     return user
 
 
@@ -105,5 +114,11 @@ async def check_role_permissions(role_id: int, session: AsyncSession, operation_
         raise PermissionDenyError
 
 
+async def check_rate_limit(user_id: int, operation_id: str | None) -> None:
+    result = await rate_limiter.hit(f"{user_id}:{operation_id}")
+    if not result.allowed:
+        raise TooManyRequestsError(result.retry_after)
+
+
 SqlaSession = Annotated[AsyncSession, Depends(get_session)]
 AuthUser = Annotated[User, Depends(auth)]
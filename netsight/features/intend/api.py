@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from netsight.core.utils.cbv import cbv
-from netsight.features._types import IdResponse, ListT
+from netsight.features._types import IdResponse, ListT, list_response
 from netsight.features.admin.models import User
 from netsight.features.deps import auth, get_session
 from netsight.features.intend import schemas, services
@@ -34,10 +34,12 @@ class CircuitTypeAPI:
         db_obj = await self.service.get_one_or_404(self.session, id, undefer_load=True)
         return schemas.CircuitType.model_validate(db_obj)
 
-    @router.get("/circuit-types", operation_id="da40d788-6220-4159-bfdc-4c9371e9c18e")
-    async def get_circuit_types(self, q: schemas.CircuitTypeQuery = Depends()) -> ListT[schemas.CircuitType]:
+    @router.get(
+        "/circuit-types", operation_id="da40d788-6220-4159-bfdc-4c9371e9c18e", response_model=ListT[schemas.CircuitType]
+    )
+    async def get_circuit_types(self, q: schemas.CircuitTypeQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.CircuitType.model_validate(r) for r in results])
+        return list_response(count, results, schemas.CircuitType)
 
     @router.delete("/circuit-types/{id}", operation_id="2648dce5-b9dd-4275-9cb8-de6619e3bcf2")
     async def delete_circuit_type(self, id: int) -> IdResponse:
@@ -68,10 +70,12 @@ class DeviceRoleAPI:
         db_obj = await self.service.get_one_or_404(self.session, id, undefer_load=True)
         return schemas.DeviceRole.model_validate(db_obj)
 
-    @router.get("/device-roles", operation_id="5f670dd6-eba5-49f4-b00e-05ee430625b5")
-    async def get_device_roles(self, q: schemas.DeviceRoleQuery = Depends()) -> ListT[schemas.DeviceRole]:
+    @router.get(
+        "/device-roles", operation_id="5f670dd6-eba5-49f4-b00e-05ee430625b5", response_model=ListT[schemas.DeviceRole]
+    )
+    async def get_device_roles(self, q: schemas.DeviceRoleQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.DeviceRole.model_validate(r) for r in results])
+        return list_response(count, results, schemas.DeviceRole)
 
     @router.delete("/device-roles/{id}", operation_id="a2d82d5f-0c8a-472a-b0eb-1bafe955ccd5")
     async def delete_device_role(self, id: int) -> IdResponse:
@@ -102,10 +106,10 @@ class IPRoleAPI:
         db_obj = await self.service.get_one_or_404(self.session, id, undefer_load=True)
         return schemas.IPRole.model_validate(db_obj)
 
-    @router.get("/ip-roles", operation_id="333be12d-5f84-46ca-af12-2790708d9ef9")
-    async def get_ip_roles(self, q: schemas.IPRoleQuery = Depends()) -> ListT[schemas.IPRole]:
+    @router.get("/ip-roles", operation_id="333be12d-5f84-46ca-af12-2790708d9ef9", response_model=ListT[schemas.IPRole])
+    async def get_ip_roles(self, q: schemas.IPRoleQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.IPRole.model_validate(r) for r in results])
+        return list_response(count, results, schemas.IPRole)
 
     @router.delete("/ip-roles/{id}", operation_id="188cb57e-1218-47c8-bd0d-fbe7a3b951ec")
     async def delete_ip_role(self, id: int) -> IdResponse:
@@ -136,10 +140,12 @@ class PlatformAPI:
         db_platform = await self.service.get_one_or_404(self.session, id, undefer_load=True)
         return schemas.Platform.model_validate(db_platform)
 
-    @router.get("/platforms", operation_id="d47d8d64-f8cc-4ddc-9db9-51d6a1f3b9e3")
-    async def get_platforms(self, q: schemas.PlatformQuery = Depends()) -> ListT[schemas.Platform]:
+    @router.get(
+        "/platforms", operation_id="d47d8d64-f8cc-4ddc-9db9-51d6a1f3b9e3", response_model=ListT[schemas.Platform]
+    )
+    async def get_platforms(self, q: schemas.PlatformQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.Platform.model_validate(r) for r in results])
+        return list_response(count, results, schemas.Platform)
 
     @router.delete("/platforms/{id}", operation_id="73a00be4-be83-4d24-a034-d36926bae8e1")
     async def delete_platform(self, id: int) -> IdResponse:
@@ -170,10 +176,14 @@ class ManufacturerAPI:
         db_manufacturer = await self.service.get_one_or_404(self.session, id, undefer_load=True)
         return schemas.Manufacturer.model_validate(db_manufacturer)
 
-    @router.get("/manufacturers", operation_id="a30fb40d-04b3-41fd-a7ba-3040270a191b")
-    async def get_manufacturers(self, q: schemas.ManufacturerQuery = Depends()) -> ListT[schemas.Manufacturer]:
+    @router.get(
+        "/manufacturers",
+        operation_id="a30fb40d-04b3-41fd-a7ba-3040270a191b",
+        response_model=ListT[schemas.Manufacturer],
+    )
+    async def get_manufacturers(self, q: schemas.ManufacturerQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.Manufacturer.model_validate(r) for r in results])
+        return list_response(count, results, schemas.Manufacturer)
 
     @router.delete("/manufacturers/{id}", operation_id="f9b8b6d9-6b7a-4c0e-8b6a-4b0e8b6d9f9b")
     async def delete_manufacturer(self, id: int) -> IdResponse:
@@ -210,15 +220,17 @@ class DeviceTypeAPI:
         )
         return schemas.DeviceType.model_validate(db_device_type)
 
-    @router.get("/device-types", operation_id="e67dcd2d-7b9c-4701-856c-55f95d2925a5")
-    async def get_device_types(self, q: schemas.DeviceTypeQuery = Depends()) -> ListT[schemas.DeviceType]:
+    @router.get(
+        "/device-types", operation_id="e67dcd2d-7b9c-4701-856c-55f95d2925a5", response_model=ListT[schemas.DeviceType]
+    )
+    async def get_device_types(self, q: schemas.DeviceTypeQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(
             self.session,
             q,
             selectinload(DeviceType.manufacturer).load_only(Manufacturer.id, Manufacturer.name),
             selectinload(DeviceType.platform).load_only(Platform.id, Platform.name, Platform.netmiko_driver),
         )
-        return ListT(count=count, results=[schemas.DeviceType.model_validate(r) for r in results])
+        return list_response(count, results, schemas.DeviceType)
 
     @router.delete("/device-types/{id}", operation_id="551aef93-9346-4db6-803c-14d88c2b69c7")
     async def delete_device_type(self, id: int) -> IdResponse:
@@ -1,10 +1,11 @@
 from typing import TYPE_CHECKING
 
 from sqlalchemy import Float, ForeignKey, String, UniqueConstraint
-from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy_utils.types import ChoiceType
 
 from netsight.core.database import Base
+from netsight.core.database.counters import counter_column
 from netsight.core.database.mixins import AuditUserMixin
 from netsight.core.database.types import i18n_name, int_pk
 from netsight.features.consts import CircuitConnectionType
@@ -25,18 +26,7 @@ class DeviceRole(Base, AuditUserMixin):
     abbreviation: Mapped[str | None]
     description: Mapped[str | None]
 
-    if TYPE_CHECKING:
-        device_count: Mapped[int]
-
-    @classmethod
-    def __declare_last__(cls) -> None:
-        from sqlalchemy import func, select
-
-        from netsight.features.dcim.models import Device
-
-        cls.device_count = column_property(
-            select(func.count(Device.id)).where(Device.device_role_id == cls.id).label("device_count")
-        )
+    device_count: Mapped[int] = counter_column("device", "device_role_id")
 
 
 class IPRole(Base, AuditUserMixin):
@@ -49,6 +39,9 @@ class IPRole(Base, AuditUserMixin):
     vlan: Mapped[list["VLAN"]] = relationship(back_populates="role")
     prefix: Mapped[list["Prefix"]] = relationship(back_populates="role")
 
+    prefix_count: Mapped[int] = counter_column("prefix", "role_id")
+    vlan_count: Mapped[int] = counter_column("vlan", "role_id")
+
 
 class CircuitType(Base, AuditUserMixin):
     __tablename__ = "circuit_type"
@@ -59,19 +52,7 @@ class CircuitType(Base, AuditUserMixin):
     connection_type: Mapped[CircuitConnectionType] = mapped_column(ChoiceType(CircuitConnectionType, impl=String()))
     description: Mapped[str | None]
 
-    if TYPE_CHECKING:
-        circuit_count: Mapped[int]
-
-    @classmethod
-    def __declare_last__(cls) -> None:
-        from sqlalchemy import func, select
-
-        from netsight.features.circuit.models import Circuit
-
-        cls.circuit_count = column_property(
-            select(func.count(Circuit.id)).where(Circuit.circuit_type_id == cls.id).scalar_subquery(),
-            deferred=True,
-        )
+    circuit_count: Mapped[int] = counter_column("circuit", "circuit_type_id")
 
 
 class Platform(Base, AuditUserMixin):
@@ -82,25 +63,9 @@ class Platform(Base, AuditUserMixin):
     description: Mapped[str | None]
     netmiko_driver: Mapped[str | None]
 
-    if TYPE_CHECKING:
-        device_count: Mapped[int]
-        device_type_count: Mapped[int]
-
-    @classmethod
-    def __declare_last__(cls) -> None:
-        from sqlalchemy import func, select
-
-        from netsight.features.dcim.models import Device
-        from netsight.features.intend.models import DeviceType
-
-        cls.device_count = column_property(
-            select(func.count(Device.id)).where(Device.platform_id == cls.id).scalar_subquery(),
-            deferred=True,
-        )
-        cls.device_type_count = column_property(
-            select(func.count(DeviceType.id)).where(DeviceType.platform_id == cls.id).scalar_subquery(),
-            deferred=True,
-        )
+    device_count: Mapped[int] = counter_column("device", "platform_id")
+    device_type_count: Mapped[int] = counter_column("device_type", "platform_id")
+    textfsm_template_count: Mapped[int] = counter_column("textfsm_template", "platform_id")
 
 
 class DeviceType(Base, AuditUserMixin):
@@ -118,19 +83,7 @@ class DeviceType(Base, AuditUserMixin):
     platform_id: Mapped[int] = mapped_column(ForeignKey("platform.id", ondelete="RESTRICT"))
     platform: Mapped["Platform"] = relationship(backref="device_type")
 
-    if TYPE_CHECKING:
-        device_count: Mapped[int]
-
-    @classmethod
-    def __declare_last__(cls) -> None:
-        from sqlalchemy import func, select
-
-        from netsight.features.dcim.models import Device
-
-        cls.device_count = column_property(
-            select(func.count(Device.id)).where(Device.device_type_id == cls.id).scalar_subquery(),
-            deferred=True,
-        )
+    device_count: Mapped[int] = counter_column("device", "device_type_id")
 
 
 class Manufacturer(Base, AuditUserMixin):
@@ -141,21 +94,5 @@ class Manufacturer(Base, AuditUserMixin):
     name: Mapped[i18n_name]
     slug: Mapped[str] = mapped_column(unique=True)
 
-    if TYPE_CHECKING:
-        device_type_count: Mapped[int]
-        device_count: Mapped[int]
-
-    @classmethod
-    def __declare_last__(cls) -> None:
-        from sqlalchemy import func, select
-
-        from netsight.features.dcim.models import Device
-
-        cls.device_count = column_property(
-            select(func.count(Device.id)).where(Device.manufacturer_id == cls.id).scalar_subquery(),
-            deferred=True,
-        )
-        cls.device_type_count = column_property(
-            select(func.count(DeviceType.id)).where(DeviceType.manufacturer_id == Manufacturer.id).scalar_subquery(),
-            deferred=True,
-        )
+    device_type_count: Mapped[int] = counter_column("device_type", "manufacturer_id")
+    device_count: Mapped[int] = counter_column("device", "manufacturer_id")
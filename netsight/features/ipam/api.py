@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from netsight.core.utils.cbv import cbv
-from netsight.features._types import AuditLog, IdResponse, ListT
+from netsight.features._types import (
+    AuditLog,
+    IdResponse,
+    IPvAnyInterface,
+    IPvAnyNetwork,
+    ListT,
+    QueryParams,
+    json_list_response,
+    list_response,
+)
 from netsight.features.admin.models import User
+from netsight.features.circuit.models import ISP
+from netsight.features.dcim.models import Device, Interface
 from netsight.features.deps import auth, get_session
 from netsight.features.intend.models import IPRole
 from netsight.features.ipam import schemas, services
-from netsight.features.ipam.models import VLAN, VRF, Prefix
+from netsight.features.ipam.models import ASN, VLAN, VRF, IPAddress, IPRange, Prefix
 from netsight.features.org.models import Site
+from netsight.features.org.services import site_service
+from netsight.features.schemas import ASNBrief, IPAddressBrief, PrefixBrief, VLANBrief
 
 router = APIRouter()
 
@@ -36,10 +49,10 @@ class BlockAPI:
         local_block = await self.service.get_one_or_404(self.session, id)
         return schemas.Block.model_validate(local_block)
 
-    @router.get("/blocks", operation_id="7c3c68e7-de01-4b15-9a0c-90fc328a759a")
-    async def get_blocks(self, q: schemas.BlockQuery = Depends()) -> ListT[schemas.Block]:
+    @router.get("/blocks", operation_id="7c3c68e7-de01-4b15-9a0c-90fc328a759a", response_model=ListT[schemas.Block])
+    async def get_blocks(self, q: schemas.BlockQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.Block.model_validate(r) for r in results])
+        return list_response(count, results, schemas.Block)
 
     @router.delete("/blocks/{id}", operation_id="c55f28df-9fe8-4ab7-92c7-aa98de2a53ef")
     async def delete_block(self, id: int) -> IdResponse:
@@ -47,6 +60,23 @@ class BlockAPI:
         await self.service.delete(self.session, local_block)
         return IdResponse(id=id)
 
+    @router.get("/blocks/{id}/available-prefixes", operation_id="6e2d9b14-58a3-4f0c-9d7e-2b1a8c5f3e90")
+    async def get_block_available_prefixes(
+        self, id: int, prefix_length: int = Query(ge=0, le=128), count: int = Query(default=1, ge=1, le=1024)
+    ) -> list[IPvAnyNetwork]:
+        local_block = await self.service.get_one_or_404(self.session, id)
+        return await services.prefix_service.available_prefixes(self.session, local_block.block, prefix_length, count)
+
+    @router.post("/blocks/{id}/available-prefixes", operation_id="c0a5e7f2-3b19-4d86-a2e4-91f6d0b7c853")
+    async def allocate_block_prefixes(self, id: int, prefix: schemas.PrefixAllocate) -> list[PrefixBrief]:
+        local_block = await self.service.get_one_or_404(self.session, id)
+        created = await self.service.allocate_prefixes(self.session, local_block, prefix)
+        return [PrefixBrief.model_validate(p) for p in created]
+
+    @router.get("/block-utilization", operation_id="3f8a1d6c-e2b5-47c9-9a04-6b7e1c5d2f83")
+    async def get_block_utilization(self) -> list[schemas.BlockUtilization]:
+        return await self.service.utilization(self.session)
+
     @router.get("/blocks/{id}/auditlogs", operation_id="b81b96bf-dd24-4114-b57e-71fc835a0e76")
     async def get_block_auditlogs(self, id: int) -> ListT[AuditLog]:
         count, results = await self.service.get_audit_log(self.session, id)
@@ -81,20 +111,75 @@ class PrefixAPI:
             selectinload(Prefix.vrf).load_only(VRF.id, VRF.name, VRF.rd),
             selectinload(Prefix.role).load_only(IPRole.id, IPRole.name),
             selectinload(Prefix.vlan).load_only(VLAN.id, VLAN.name, VLAN.vid),
+            undefer_load=True,
         )
         return schemas.Prefix.model_validate(local_prefix)
 
-    @router.get("/prefixes", operation_id="9e8f9325-3aac-4b6f-9585-2abc03e1ed9c")
-    async def get_prefixes(self, q: schemas.PrefixQuery = Depends()) -> ListT[schemas.Prefix]:
-        count, results = await self.service.list_and_count(
+    @router.get("/prefixes", operation_id="9e8f9325-3aac-4b6f-9585-2abc03e1ed9c", response_model=ListT[schemas.Prefix])
+    async def get_prefixes(self, q: schemas.PrefixQuery = Depends()) -> Response:
+        count, results = await self.service.list_and_count_json(self.session, q, schemas.Prefix)
+        return json_list_response(count, results)
+
+    @router.get(
+        "/prefixes/{id}/children",
+        operation_id="3b6f0a2e-94d1-4c7e-8a5b-e1d2c9f7b604",
+        response_model=ListT[schemas.Prefix],
+    )
+    async def get_prefix_children(
+        self,
+        id: int,
+        limit: int = Query(default=20, ge=0, le=1000, description="Number of results to return per request."),
+        offset: int = Query(default=0, ge=0, description="The initial index from which return the results."),
+    ) -> Response:
+        await self.service.get_one_or_404(self.session, id)
+        # QueryParams can't be a dependency here, its `id` filter clashes with the path parameter
+        q = QueryParams.model_construct(limit=limit, offset=offset, order_by="prefix", order="ascend")
+        count, results = await self.service.list_and_count_json(self.session, q, schemas.Prefix, Prefix.parent_id == id)
+        return json_list_response(count, results)
+
+    @router.get("/prefixes/{id}/tree", operation_id="a4c81e57-2f3d-4b96-b0e8-7d5f1c3a9e27")
+    async def get_prefix_tree(
+        self, id: int, levels: int = Query(default=2, ge=1, le=5, description="Levels of subnets to include")
+    ) -> schemas.PrefixTree:
+        local_prefix = await self.service.get_one_or_404(self.session, id)
+        tree = await self.service.get_tree(self.session, local_prefix, levels)
+        return schemas.PrefixTree.model_validate(tree)
+
+    @router.get("/prefixes/{id}/available-prefixes", operation_id="f7b3c1d8-6a2e-4e95-8c0d-5d9e2a4b7f16")
+    async def get_prefix_available_prefixes(
+        self, id: int, prefix_length: int = Query(ge=0, le=128), count: int = Query(default=1, ge=1, le=1024)
+    ) -> list[IPvAnyNetwork]:
+        local_prefix = await self.service.get_one_or_404(self.session, id)
+        return await self.service.available_prefixes(
             self.session,
-            q,
-            selectinload(Prefix.site).load_only(Site.id, Site.name, Site.site_code),
-            selectinload(Prefix.vrf).load_only(VRF.id, VRF.name, VRF.rd),
-            selectinload(Prefix.role).load_only(IPRole.id, IPRole.name),
-            selectinload(Prefix.vlan).load_only(VLAN.id, VLAN.name, VLAN.vid),
+            local_prefix.prefix,
+            prefix_length,
+            count,
+            Prefix.vrf_id.is_not_distinct_from(local_prefix.vrf_id),
         )
-        return ListT(count=count, results=[schemas.Prefix.model_validate(r) for r in results])
+
+    @router.post("/prefixes/{id}/available-prefixes", operation_id="2d8e6f0a-c4b7-4a13-b59e-7e0c3f1a9d24")
+    async def allocate_prefix_prefixes(self, id: int, prefix: schemas.PrefixAllocate) -> list[PrefixBrief]:
+        local_prefix = await self.service.get_one_or_404(self.session, id)
+        created = await self.service.allocate_child_prefixes(self.session, local_prefix, prefix)
+        return [PrefixBrief.model_validate(p) for p in created]
+
+    @router.get("/prefixes/{id}/available-ips", operation_id="9a1f4c6e-2b8d-4d07-8e3a-c5b0f9e2d718")
+    async def get_prefix_available_ips(
+        self, id: int, count: int = Query(default=1, ge=1, le=1024)
+    ) -> list[IPvAnyInterface]:
+        local_prefix = await self.service.get_one_or_404(self.session, id)
+        return await services.ip_address_service.available_ips(self.session, local_prefix, count)
+
+    @router.post("/prefixes/{id}/available-ips", operation_id="4e7c2a9b-d1f5-4b68-a0c3-8f2e6d9b1a57")
+    async def allocate_prefix_ips(self, id: int, ip_address: schemas.IPAddressAllocate) -> list[IPAddressBrief]:
+        local_prefix = await self.service.get_one_or_404(self.session, id)
+        created = await services.ip_address_service.allocate_ips(self.session, local_prefix, ip_address)
+        return [IPAddressBrief.model_validate(a) for a in created]
+
+    @router.get("/prefix-utilization", operation_id="b5c2e9a7-1d4f-4e83-8f60-a3d7c1b9e542")
+    async def get_prefix_utilization(self, vrf_id: int | None = None) -> list[schemas.PrefixUtilization]:
+        return await self.service.utilization(self.session, vrf_id)
 
     @router.delete("/prefixes/{id}", operation_id="18c5ce9e-97ce-427c-9cf1-fd5a34f9c9f8")
     async def delete_prefix(self, id: int) -> IdResponse:
@@ -129,13 +214,18 @@ class ASNAPI:
 
     @router.get("/asn/{id}", operation_id="9d1deb3d-3ec8-419f-a05a-5f60a39b60e6")
     async def get_asn(self, id: int) -> schemas.ASN:
-        local_asn = await self.service.get_one_or_404(self.session, id)
+        local_asn = await self.service.get_one_or_404(
+            self.session,
+            id,
+            selectinload(ASN.site).load_only(Site.id, Site.name, Site.site_code),
+            selectinload(ASN.isp).load_only(ISP.id, ISP.name),
+        )
         return schemas.ASN.model_validate(local_asn)
 
-    @router.get("/asn", operation_id="c90a4645-c1d6-4e6d-afd5-fa89a2e38e5c")
-    async def get_asns(self, q: schemas.ASNQuery = Depends()) -> ListT[schemas.ASNList]:
+    @router.get("/asn", operation_id="c90a4645-c1d6-4e6d-afd5-fa89a2e38e5c", response_model=ListT[schemas.ASNList])
+    async def get_asns(self, q: schemas.ASNQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.ASNList.model_validate(r) for r in results])
+        return list_response(count, results, schemas.ASNList)
 
     @router.delete("/asn/{id}", operation_id="bea2daf9-5a92-44e6-b52b-5f724f6924da")
     async def delete_asn(self, id: int) -> IdResponse:
@@ -151,6 +241,55 @@ class ASNAPI:
         return ListT(count=count, results=[AuditLog.model_validate(r) for r in results])
 
 
+@cbv(router)
+class ASNPoolAPI:
+    session: AsyncSession = Depends(get_session)
+    user: User = Depends(auth)
+    service = services.asn_pool_service
+
+    @router.post("/asn-pools", operation_id="c40090ab-39c0-485f-92d1-d7991572040f")
+    async def create_asn_pool(self, asn_pool: schemas.ASNPoolCreate) -> IdResponse:
+        new_asn_pool = await self.service.create(self.session, asn_pool)
+        return IdResponse(id=new_asn_pool.id)
+
+    @router.put("/asn-pools/{id}", operation_id="483a79b7-56e8-4bdb-8b4a-ef09ecb706c3")
+    async def update_asn_pool(self, id: int, asn_pool: schemas.ASNPoolUpdate) -> IdResponse:
+        local_asn_pool = await self.service.get_one_or_404(self.session, id)
+        await self.service.update(self.session, local_asn_pool, asn_pool)
+        return IdResponse(id=id)
+
+    @router.get("/asn-pools/{id}", operation_id="ec12c8ce-fe18-4e26-b900-0107fb033823")
+    async def get_asn_pool(self, id: int) -> schemas.ASNPool:
+        local_asn_pool = await self.service.get_one_or_404(self.session, id)
+        return schemas.ASNPool.model_validate(local_asn_pool)
+
+    @router.get(
+        "/asn-pools", operation_id="32cb7d08-29c5-4e3e-851d-dd7f626e09cc", response_model=ListT[schemas.ASNPool]
+    )
+    async def get_asn_pools(self, q: schemas.ASNPoolQuery = Depends()) -> Response:
+        count, results = await self.service.list_and_count(self.session, q)
+        return list_response(count, results, schemas.ASNPool)
+
+    @router.delete("/asn-pools/{id}", operation_id="b92f06e5-1119-4774-b118-0eea4f57cfe9")
+    async def delete_asn_pool(self, id: int) -> IdResponse:
+        local_asn_pool = await self.service.get_one_or_404(self.session, id)
+        await self.service.delete(self.session, local_asn_pool)
+        return IdResponse(id=id)
+
+    @router.get("/asn-pools/{id}/available-asns", operation_id="470bb030-cc3e-4774-9dc0-42bd3e7000aa")
+    async def get_available_asns(
+        self, id: int, count: int = Query(default=1, ge=1, le=1024), contiguous: bool = False
+    ) -> list[int]:
+        local_asn_pool = await self.service.get_one_or_404(self.session, id)
+        return await self.service.available_asns(self.session, local_asn_pool, count, contiguous)
+
+    @router.post("/asn-pools/{id}/available-asns", operation_id="6b109dc6-f039-4980-b176-31691aaac222")
+    async def allocate_asns(self, id: int, asn: schemas.ASNAllocate) -> list[ASNBrief]:
+        local_asn_pool = await self.service.get_one_or_404(self.session, id)
+        created = await self.service.allocate_asns(self.session, local_asn_pool, asn)
+        return [ASNBrief.model_validate(a) for a in created]
+
+
 @cbv(router)
 class IPRangeAPI:
     session: AsyncSession = Depends(get_session)
@@ -170,13 +309,19 @@ class IPRangeAPI:
 
     @router.get("/ip-ranges/{id}", operation_id="6761156d-0328-47d0-8f3d-793ea5e16dd6")
     async def get_ip_range(self, id: int) -> schemas.IPRange:
-        local_ip_range = await self.service.get_one_or_404(self.session, id)
+        local_ip_range = await self.service.get_one_or_404(
+            self.session, id, selectinload(IPRange.vrf).load_only(VRF.id, VRF.name, VRF.rd)
+        )
         return schemas.IPRange.model_validate(local_ip_range)
 
-    @router.get("/ip-ranges", operation_id="79b4955b-3253-401e-92cd-2ad41f1306f2")
-    async def get_ip_ranges(self, q: schemas.IPRangeQuery = Depends()) -> ListT[schemas.IPRange]:
-        count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.IPRange.model_validate(r) for r in results])
+    @router.get(
+        "/ip-ranges", operation_id="79b4955b-3253-401e-92cd-2ad41f1306f2", response_model=ListT[schemas.IPRange]
+    )
+    async def get_ip_ranges(self, q: schemas.IPRangeQuery = Depends()) -> Response:
+        count, results = await self.service.list_and_count(
+            self.session, q, selectinload(IPRange.vrf).load_only(VRF.id, VRF.name, VRF.rd)
+        )
+        return list_response(count, results, schemas.IPRange)
 
     @router.delete("/ip-ranges/{id}", operation_id="cf398770-377c-4435-b30e-ec019d92c05d")
     async def delete_ip_range(self, id: int) -> IdResponse:
@@ -211,13 +356,33 @@ class IPAddressAPI:
 
     @router.get("/ip-addresses/{id}", operation_id="4bf79652-8e21-41ff-bbdb-87ad5537506c")
     async def get_ip_address(self, id: int) -> schemas.IPAddress:
-        local_ip_address = await self.service.get_one_or_404(self.session, id)
+        local_ip_address = await self.service.get_one_or_404(
+            self.session,
+            id,
+            selectinload(IPAddress.vrf).load_only(VRF.id, VRF.name, VRF.rd),
+            selectinload(IPAddress.owner).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(IPAddress.interface)
+            .load_only(Interface.id, Interface.name, Interface.description)
+            .selectinload(Interface.device)
+            .load_only(Device.id, Device.name, Device.management_ip),
+        )
         return schemas.IPAddress.model_validate(local_ip_address)
 
-    @router.get("/ip-addresses", operation_id="06b038a0-7568-4ace-b090-295dd150afe1")
-    async def get_ip_addresses(self, q: schemas.IPAddressQuery = Depends()) -> ListT[schemas.IPAddress]:
-        count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.IPAddress.model_validate(r) for r in results])
+    @router.get(
+        "/ip-addresses", operation_id="06b038a0-7568-4ace-b090-295dd150afe1", response_model=ListT[schemas.IPAddress]
+    )
+    async def get_ip_addresses(self, q: schemas.IPAddressQuery = Depends()) -> Response:
+        count, results = await self.service.list_and_count(
+            self.session,
+            q,
+            selectinload(IPAddress.vrf).load_only(VRF.id, VRF.name, VRF.rd),
+            selectinload(IPAddress.owner).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(IPAddress.interface)
+            .load_only(Interface.id, Interface.name, Interface.description)
+            .selectinload(Interface.device)
+            .load_only(Device.id, Device.name, Device.management_ip),
+        )
+        return list_response(count, results, schemas.IPAddress)
 
     @router.delete("/ip-addresses/{id}", operation_id="c2b70972-c9b0-404d-b433-42cedcc812d9")
     async def delete_ip_address(self, id: int) -> IdResponse:
@@ -252,13 +417,23 @@ class VLANAPI:
 
     @router.get("/vlans/{id}", operation_id="1dc5abd9-e591-418d-bc64-440e1b406ccf")
     async def get_vlan(self, id: int) -> schemas.VLAN:
-        local_vlan = await self.service.get_one_or_404(self.session, id)
+        local_vlan = await self.service.get_one_or_404(
+            self.session,
+            id,
+            selectinload(VLAN.site).load_only(Site.id, Site.name, Site.site_code),
+            selectinload(VLAN.role).load_only(IPRole.id, IPRole.name),
+        )
         return schemas.VLAN.model_validate(local_vlan)
 
-    @router.get("/vlans", operation_id="0e713497-6230-4cdb-bfdd-1b3016664c61")
-    async def get_vlans(self, q: schemas.VLANQuery = Depends()) -> ListT[schemas.VLAN]:
-        count, results = await self.service.list_and_count(self.session, q)
-        return ListT(count=count, results=[schemas.VLAN.model_validate(r) for r in results])
+    @router.get("/vlans", operation_id="0e713497-6230-4cdb-bfdd-1b3016664c61", response_model=ListT[schemas.VLAN])
+    async def get_vlans(self, q: schemas.VLANQuery = Depends()) -> Response:
+        count, results = await self.service.list_and_count(
+            self.session,
+            q,
+            selectinload(VLAN.site).load_only(Site.id, Site.name, Site.site_code),
+            selectinload(VLAN.role).load_only(IPRole.id, IPRole.name),
+        )
+        return list_response(count, results, schemas.VLAN)
 
     @router.delete("/vlans/{id}", operation_id="b2878bc9-500f-4990-84b4-f67faed952ae")
     async def delete_vlan(self, id: int) -> IdResponse:
@@ -272,3 +447,63 @@ class VLANAPI:
         if not results:
             return ListT(count=0, results=None)
         return ListT(count=count, results=[AuditLog.model_validate(r) for r in results])
+
+
+@cbv(router)
+class VLANPoolAPI:
+    session: AsyncSession = Depends(get_session)
+    user: User = Depends(auth)
+    service = services.vlan_pool_service
+
+    @router.post("/vlan-pools", operation_id="019c2ef1-47f3-43c1-9687-67684ebed5a8")
+    async def create_vlan_pool(self, vlan_pool: schemas.VLANPoolCreate) -> IdResponse:
+        new_vlan_pool = await self.service.create(self.session, vlan_pool)
+        return IdResponse(id=new_vlan_pool.id)
+
+    @router.put("/vlan-pools/{id}", operation_id="621e1dab-760a-430a-adf6-933d5e3493ee")
+    async def update_vlan_pool(self, id: int, vlan_pool: schemas.VLANPoolUpdate) -> IdResponse:
+        local_vlan_pool = await self.service.get_one_or_404(self.session, id)
+        await self.service.update(self.session, local_vlan_pool, vlan_pool)
+        return IdResponse(id=id)
+
+    @router.get("/vlan-pools/{id}", operation_id="5b5a3a44-754f-4b08-a684-c6e15e010b97")
+    async def get_vlan_pool(self, id: int) -> schemas.VLANPool:
+        local_vlan_pool = await self.service.get_one_or_404(self.session, id)
+        return schemas.VLANPool.model_validate(local_vlan_pool)
+
+    @router.get(
+        "/vlan-pools", operation_id="655c941f-1b60-412a-86cf-6df07adc2c07", response_model=ListT[schemas.VLANPool]
+    )
+    async def get_vlan_pools(self, q: schemas.VLANPoolQuery = Depends()) -> Response:
+        count, results = await self.service.list_and_count(self.session, q)
+        return list_response(count, results, schemas.VLANPool)
+
+    @router.delete("/vlan-pools/{id}", operation_id="e22dce6b-2d08-4987-b9a7-68bebe37dc5c")
+    async def delete_vlan_pool(self, id: int) -> IdResponse:
+        local_vlan_pool = await self.service.get_one_or_404(self.session, id)
+        await self.service.delete(self.session, local_vlan_pool)
+        return IdResponse(id=id)
+
+    @router.get("/sites/{id}/available-vlans", operation_id="0757fed4-c25a-4f65-ab18-dbabf45a3a52")
+    async def get_available_vlans(
+        self, id: int, count: int = Query(default=1, ge=1, le=4094), contiguous: bool = False
+    ) -> list[int]:
+        local_site = await site_service.get_one_or_404(self.session, id)
+        return await self.service.available_vlans(self.session, local_site.id, count, contiguous)
+
+    @router.post("/sites/{id}/available-vlans", operation_id="ed7c69f0-6b0c-4cdd-834c-4f29ce4144e2")
+    async def allocate_vlans(self, id: int, vlan: schemas.VLANAllocate) -> list[VLANBrief]:
+        local_site = await site_service.get_one_or_404(self.session, id)
+        created = await self.service.allocate_vlans(self.session, local_site.id, vlan)
+        return [VLANBrief.model_validate(v) for v in created]
+
+
+@cbv(router)
+class VRFAPI:
+    session: AsyncSession = Depends(get_session)
+    user: User = Depends(auth)
+    service = services.vrf_service
+
+    @router.get("/address-conflicts", operation_id="e7d4b1a9-6c3f-4a58-b2e0-9f1c8d5a7e36")
+    async def get_address_conflicts(self) -> list[schemas.AddressConflict]:
+        return await self.service.conflicts(self.session)
@@ -1,11 +1,24 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, Integer, String, UniqueConstraint
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    CheckConstraint,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, ExcludeConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy_utils.types import ChoiceType
 
 from netsight.core.database import Base
+from netsight.core.database.counters import counter_column
+from netsight.core.database.mirrors import mirror_column
 from netsight.core.database.mixins import AuditLogMixin, AuditUserMixin
 from netsight.core.database.types import PgCIDR, PgIpInterface, bool_false, bool_true, int_pk
 from netsight.features._types import IPvAnyInterface, IPvAnyNetwork
@@ -16,7 +29,7 @@ if TYPE_CHECKING:
     from netsight.features.circuit.models import ISP
     from netsight.features.dcim.models import Interface
     from netsight.features.intend.models import IPRole
-    from netsight.features.org.models import Site
+    from netsight.features.org.models import Site, SiteGroup
 
 __all__ = (
     "IPAddress",
@@ -30,6 +43,25 @@ __all__ = (
     "ASN",
     "VLAN",
     "VRFRouteTarget",
+    "VLANPool",
+    "ASNPool",
+)
+
+# Unique address space: in a VRF with enforce_unique (and in the global table) addresses and prefixes
+# are unique and ranges don't overlap. The indexes and the exclusion constraint are partial on a copy of
+# VRF.enforce_unique, every write is checked with one index probe.
+UNIQUE_SPACE_CONSTRAINTS = ("uq_prefix_vrf_prefix", "uq_ip_address_vrf_address", "ex_ip_range_vrf_overlap")
+
+# the inet ordering puts the mask before the host bits, compare host addresses
+_START, _END = "inet(host(start_address))", "inet(host(end_address))"
+
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL(
+        "DO $$ BEGIN CREATE TYPE inetrange AS RANGE (subtype = inet); EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+    ),
 )
 
 
@@ -60,10 +92,20 @@ class Block(Base, AuditUserMixin, AuditLogMixin):
 
 class Prefix(Base, AuditUserMixin, AuditLogMixin):
     __tablename__ = "prefix"
+    __table_args__ = (
+        Index("ix_prefix_prefix_gist", "prefix", postgresql_using="gist", postgresql_ops={"prefix": "inet_ops"}),
+        Index(
+            "uq_prefix_vrf_prefix",
+            text("coalesce(vrf_id, 0)"),
+            "prefix",
+            unique=True,
+            postgresql_where=text("enforce_unique"),
+        ),
+    )
     __visible_name__ = {"en": "IP Prefix", "zh": "IP子网段"}
     __search_fields__ = {"prefix"}
     id: Mapped[int_pk]
-    prefix: Mapped[IPvAnyNetwork] = mapped_column(PgCIDR, unique=True, index=True)
+    prefix: Mapped[IPvAnyNetwork] = mapped_column(PgCIDR, index=True)
     status: Mapped[PrefixStatus] = mapped_column(ChoiceType(PrefixStatus, impl=String()))
     is_dhcp_pool: Mapped[bool_true]
     is_full: Mapped[bool_false]
@@ -75,6 +117,11 @@ class Prefix(Base, AuditUserMixin, AuditLogMixin):
     role: Mapped["IPRole"] = relationship(back_populates="prefix", passive_deletes=True)
     vrf_id: Mapped[int | None] = mapped_column(ForeignKey("vrf.id", ondelete="SET NULL"))
     vrf: Mapped["VRF"] = relationship(backref="prefix")
+    enforce_unique: Mapped[bool] = mirror_column("vrf", "vrf_id", "enforce_unique", default=True)
+    # maintained by PrefixService, see netsight.libs.ipam.hierarchy
+    parent_id: Mapped[int | None] = mapped_column(ForeignKey("prefix.id", ondelete="SET NULL"), index=True)
+    depth: Mapped[int] = mapped_column(default=0, server_default="0")
+    children_count: Mapped[int] = mapped_column(default=0, server_default="0")
 
 
 class ASN(Base, AuditUserMixin, AuditLogMixin):
@@ -82,14 +129,25 @@ class ASN(Base, AuditUserMixin, AuditLogMixin):
     __visible_name__ = {"en": "AS Number", "zh": "AS号"}
     __search_fields__ = {"asn"}
     id: Mapped[int_pk]
-    asn: Mapped[int] = mapped_column(unique=True)
+    asn: Mapped[int] = mapped_column(BigInteger, unique=True)
     description: Mapped[str | None]
     site: Mapped[list["Site"]] = relationship(secondary="site_asn", back_populates="asn")
     isp: Mapped[list["ISP"]] = relationship(secondary="isp_asn", back_populates="asn")
+    site_count: Mapped[int] = counter_column("site_asn", "asn_id")
+    isp_count: Mapped[int] = counter_column("isp_asn", "asn_id")
 
 
 class IPRange(Base, AuditUserMixin, AuditLogMixin):
     __tablename__ = "ip_range"
+    __table_args__ = (
+        ExcludeConstraint(
+            (text("coalesce(vrf_id, 0)"), "="),
+            (text(f"inetrange({_START}, {_END}, '[]')"), "&&"),
+            name="ex_ip_range_vrf_overlap",
+            using="gist",
+            where=text("enforce_unique"),
+        ),
+    )
     __visible_name__ = {"en": "IP Range", "zh": "IP地址串"}
     id: Mapped[int_pk]
     start_address: Mapped[IPvAnyInterface] = mapped_column(PgIpInterface)
@@ -98,6 +156,7 @@ class IPRange(Base, AuditUserMixin, AuditLogMixin):
     description: Mapped[str | None]
     vrf_id: Mapped[int | None] = mapped_column(Integer, ForeignKey("vrf.id", ondelete="SET NULL"))
     vrf: Mapped["VRF"] = relationship(backref="ip_range")
+    enforce_unique: Mapped[bool] = mirror_column("vrf", "vrf_id", "enforce_unique", default=True)
 
     @property
     def size(self) -> int:
@@ -106,12 +165,25 @@ class IPRange(Base, AuditUserMixin, AuditLogMixin):
 
 class IPAddress(Base, AuditUserMixin, AuditLogMixin):
     __tablename__ = "ip_address"
+    __table_args__ = (
+        Index("ix_ip_address_address_gist", "address", postgresql_using="gist", postgresql_ops={"address": "inet_ops"}),
+        # addresses in address order whatever their mask, for scans stopping at the first free ones
+        Index("ix_ip_address_vrf_host", text("coalesce(vrf_id, 0)"), text("inet(host(address))")),
+        Index(
+            "uq_ip_address_vrf_address",
+            text("coalesce(vrf_id, 0)"),
+            text("host(address)"),
+            unique=True,
+            postgresql_where=text("enforce_unique"),
+        ),
+    )
     __visible_name__ = {"en": "IP Address", "zh": "IP地址"}
     __search_fields__ = {"address"}
     id: Mapped[int_pk]
     address: Mapped[IPvAnyInterface] = mapped_column(PgIpInterface)
     vrf_id: Mapped[int | None] = mapped_column(ForeignKey("vrf.id", ondelete="SET NULL"))
     vrf: Mapped["VRF"] = relationship(backref="ip_address")
+    enforce_unique: Mapped[bool] = mirror_column("vrf", "vrf_id", "enforce_unique", default=True)
     version: Mapped[int]
     status: Mapped[IPAddressStatus] = mapped_column(ChoiceType(IPAddressStatus, impl=String()))
     dns_name: Mapped[str | None]
@@ -130,7 +202,7 @@ class VLAN(Base, AuditUserMixin, AuditLogMixin):
     vid: Mapped[int]
     description: Mapped[str | None]
     status: Mapped[VLANStatus] = mapped_column(ChoiceType(VLANStatus, impl=String()))
-    ip_address: Mapped[str]
+    ip_address: Mapped[str | None]
     associated_interfaces: Mapped[list[str]] = mapped_column(ARRAY(String, dimensions=1), nullable=True)
     site_id: Mapped[int] = mapped_column(ForeignKey("site.id", ondelete="CASCADE"))
     site: Mapped["Site"] = relationship(backref="vlan", passive_deletes=True)
@@ -138,6 +210,41 @@ class VLAN(Base, AuditUserMixin, AuditLogMixin):
     role: Mapped["IPRole"] = relationship(back_populates="vlan")
 
 
+class VLANPool(Base, AuditUserMixin):
+    """VLAN IDs a site, or every site of a site group, allocates from."""
+
+    __tablename__ = "vlan_pool"
+    __table_args__ = (
+        CheckConstraint("min_vid <= max_vid", name="ck_vlan_pool_range"),
+        CheckConstraint("(site_id IS NULL) <> (site_group_id IS NULL)", name="ck_vlan_pool_scope"),
+    )
+    __visible_name__ = {"en": "VLAN Pool", "zh": "VLAN池"}
+    __search_fields__ = {"name"}
+    id: Mapped[int_pk]
+    name: Mapped[str]
+    min_vid: Mapped[int]
+    max_vid: Mapped[int]
+    description: Mapped[str | None]
+    site_id: Mapped[int | None] = mapped_column(ForeignKey("site.id", ondelete="CASCADE"), index=True)
+    site: Mapped["Site"] = relationship(backref="vlan_pool", passive_deletes=True)
+    site_group_id: Mapped[int | None] = mapped_column(ForeignKey("site_group.id", ondelete="CASCADE"), index=True)
+    site_group: Mapped["SiteGroup"] = relationship(backref="vlan_pool", passive_deletes=True)
+
+
+class ASNPool(Base, AuditUserMixin):
+    """AS numbers new sites allocate from, usually private ranges."""
+
+    __tablename__ = "asn_pool"
+    __table_args__ = (CheckConstraint("min_asn <= max_asn", name="ck_asn_pool_range"),)
+    __visible_name__ = {"en": "ASN Pool", "zh": "AS号池"}
+    __search_fields__ = {"name"}
+    id: Mapped[int_pk]
+    name: Mapped[str] = mapped_column(unique=True)
+    min_asn: Mapped[int] = mapped_column(BigInteger)
+    max_asn: Mapped[int] = mapped_column(BigInteger)
+    description: Mapped[str | None]
+
+
 class VRFRouteTarget(Base):
     __tablename__ = "vrf_route_target"
     id: Mapped[int_pk]
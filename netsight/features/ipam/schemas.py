@@ -1,10 +1,12 @@
+from typing import Literal
+
 from fastapi import Query
 from pydantic import Field, IPvAnyInterface, IPvAnyNetwork, model_validator
 
 from netsight.features import schemas
 from netsight.features._types import AuditTime, BaseModel, NameChineseStr, NameStr, QueryParams
 from netsight.features.admin.schemas import UserBrief
-from netsight.features.consts import IPRangeStatus, PrefixStatus, VLANStatus
+from netsight.features.consts import IPAddressStatus, IPRangeStatus, IPVersion, PrefixStatus, VLANStatus
 
 
 class BlockBase(BaseModel):
@@ -33,6 +35,13 @@ class Block(BlockBase, AuditTime):
     id: int
 
 
+class BlockUtilization(BaseModel):
+    id: int
+    block: IPvAnyNetwork
+    used: int
+    utilization: float
+
+
 class PrefixBase(BaseModel):
     prefix: IPvAnyNetwork
     status: PrefixStatus
@@ -56,9 +65,16 @@ class PrefixUpdate(PrefixCreate):
 
 class PrefixQuery(QueryParams):
     prefix: list[IPvAnyNetwork] | None = Field(Query(default=[]))
+    prefix__within: IPvAnyNetwork | None = None
+    prefix__within_or_eq: IPvAnyNetwork | None = None
+    prefix__contains: IPvAnyInterface | None = None
+    prefix__overlaps: IPvAnyNetwork | None = None
+    prefix__family: IPVersion | None = None
     status: PrefixStatus | None = None
-    id_dhcp_pool: bool | None = None
+    is_dhcp_pool: bool | None = None
     is_full: bool | None = None
+    parent_id: list[int] | None = Field(Query(default=[]))
+    depth: list[int] | None = Field(Query(default=[]))
     vlan_id: list[int] | None = Field(Query(default=[]))
     site_id: list[int] | None = Field(Query(default=[]))
     role_id: list[int] | None = Field(Query(default=[]))
@@ -67,11 +83,42 @@ class PrefixQuery(QueryParams):
 
 class Prefix(PrefixBase, AuditTime):
     id: int
-    site: schemas.SiteBrief
-    role: schemas.IPRoleBrief
-    vrf: schemas.VRFBrief
-    vlan: schemas.VLANBrief
+    site: schemas.SiteBrief | None = None
+    role: schemas.IPRoleBrief | None = None
+    vrf: schemas.VRFBrief | None = None
+    vlan: schemas.VLANBrief | None = None
+    parent_id: int | None = None
+    depth: int
+    children_count: int
+
+
+class PrefixTree(BaseModel):
+    id: int
+    prefix: IPvAnyNetwork
+    status: PrefixStatus
+    depth: int
     children_count: int
+    children: list["PrefixTree"] | None = None
+
+
+class PrefixAllocate(BaseModel):
+    prefix_length: int = Field(ge=0, le=128)
+    count: int = Field(default=1, ge=1, le=1024)
+    status: PrefixStatus = PrefixStatus.Reserved
+    is_dhcp_pool: bool = False
+    is_full: bool = False
+    vlan_id: int | None = None
+    site_id: int | None = None
+    role_id: int | None = None
+    vrf_id: int | None = None
+
+
+class PrefixUtilization(BaseModel):
+    id: int
+    prefix: IPvAnyNetwork
+    used: int
+    utilization: float
+    is_full: bool
 
 
 class ASNBase(BaseModel):
@@ -127,13 +174,13 @@ class IPRangeQuery(QueryParams): ...
 
 class IPRange(IPRangeBase, AuditTime):
     id: int
-    vrf: schemas.VRFBrief
+    vrf: schemas.VRFBrief | None = None
 
 
 class IPAddressBase(BaseModel):
     address: IPvAnyInterface
     version: int | None = None
-    status: IPRangeStatus
+    status: IPAddressStatus
     dns_name: str | None = None
     description: str | None = None
 
@@ -151,21 +198,31 @@ class IPAddressCreate(IPAddressBase):
 
 class IPAddressUpdate(IPAddressCreate):
     address: IPvAnyInterface | None = None
-    status: IPRangeStatus | None = None
+    status: IPAddressStatus | None = None
+
+
+class IPAddressAllocate(BaseModel):
+    count: int = Field(default=1, ge=1, le=1024)
+    status: IPAddressStatus = IPAddressStatus.Reserved
+    dns_name: str | None = None
+    description: str | None = None
 
 
 class IPAddressQuery(QueryParams):
     address: list[IPvAnyInterface] | None = Field(Query(default=[]))
-    status: list[IPRangeStatus] | None = Field(Query(default=[]))
+    address__within: IPvAnyNetwork | None = None
+    address__within_or_eq: IPvAnyNetwork | None = None
+    address__family: IPVersion | None = None
+    status: list[IPAddressStatus] | None = Field(Query(default=[]))
     vrf_id: list[int] | None = Field(Query(default=[]))
     interface_id: list[int] | None = Field(Query(default=[]))
 
 
 class IPAddress(IPAddressBase, AuditTime):
     id: int
-    vrf: schemas.VRFBrief
+    vrf: schemas.VRFBrief | None = None
     owner: list[UserBrief]
-    interface: schemas.InterfaceToDevice
+    interface: schemas.InterfaceToDevice | None = None
 
 
 class VLANBase(BaseModel):
@@ -199,7 +256,97 @@ class VLANQuery(QueryParams):
 class VLAN(VLANBase, AuditTime):
     id: int
     site: schemas.SiteBrief
-    role: schemas.IPRoleBrief
+    role: schemas.IPRoleBrief | None = None
+
+
+class VLANAllocate(BaseModel):
+    count: int = Field(default=1, ge=1, le=4094)
+    contiguous: bool = False
+    name_prefix: str = "VLAN"
+    status: VLANStatus = VLANStatus.Reserved
+    role_id: int | None = None
+    description: str | None = None
+
+
+class VLANPoolBase(BaseModel):
+    name: str
+    min_vid: int
+    max_vid: int
+    description: str | None = None
+
+
+class VLANPoolCreate(VLANPoolBase):
+    name: NameChineseStr
+    min_vid: int = Field(ge=1, le=4094)
+    max_vid: int = Field(ge=1, le=4094)
+    site_id: int | None = None
+    site_group_id: int | None = None
+
+    @model_validator(mode="after")
+    def check_pool(self):
+        if self.min_vid > self.max_vid:
+            raise ValueError("min_vid should not be greater than max_vid")
+        if (self.site_id is None) == (self.site_group_id is None):
+            raise ValueError("one of site_id and site_group_id is required")
+        return self
+
+
+class VLANPoolUpdate(VLANPoolBase):
+    name: NameChineseStr | None = None
+    min_vid: int | None = Field(default=None, ge=1, le=4094)
+    max_vid: int | None = Field(default=None, ge=1, le=4094)
+
+
+class VLANPoolQuery(QueryParams):
+    name: list[str] | None = Field(Query(default=[]))
+    site_id: list[int] | None = Field(Query(default=[]))
+    site_group_id: list[int] | None = Field(Query(default=[]))
+
+
+class VLANPool(VLANPoolBase, AuditTime):
+    id: int
+    site: schemas.SiteBrief | None = None
+    site_group: schemas.SiteGroupBrief | None = None
+
+
+class ASNAllocate(BaseModel):
+    count: int = Field(default=1, ge=1, le=1024)
+    contiguous: bool = False
+    description: str | None = None
+    site: list[int] | None = None
+
+
+class ASNPoolBase(BaseModel):
+    name: str
+    min_asn: int
+    max_asn: int
+    description: str | None = None
+
+
+class ASNPoolCreate(ASNPoolBase):
+    name: NameChineseStr
+    min_asn: int = Field(ge=1, le=4294967294)
+    max_asn: int = Field(ge=1, le=4294967294)
+
+    @model_validator(mode="after")
+    def check_pool(self):
+        if self.min_asn > self.max_asn:
+            raise ValueError("min_asn should not be greater than max_asn")
+        return self
+
+
+class ASNPoolUpdate(ASNPoolBase):
+    name: NameChineseStr | None = None
+    min_asn: int | None = Field(default=None, ge=1, le=4294967294)
+    max_asn: int | None = Field(default=None, ge=1, le=4294967294)
+
+
+class ASNPoolQuery(QueryParams):
+    name: list[str] | None = Field(Query(default=[]))
+
+
+class ASNPool(ASNPoolBase, AuditTime):
+    id: int
 
 
 class VRFBase(BaseModel):
@@ -228,6 +375,14 @@ class VRF(VRFBase, AuditTime):
     route_target: list[schemas.RouteTargetBrief]
 
 
+class AddressConflict(BaseModel):
+    object_type: Literal["Prefix", "IPAddress", "IPRange"]
+    vrf_id: int | None
+    enforced: bool
+    value: str
+    ids: list[int]
+
+
 class RouteTargetBase(BaseModel):
     name: str
     description: str | None = None
@@ -1,30 +1,979 @@
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Collection
+from contextlib import asynccontextmanager
+from ipaddress import IPv4Address, IPv4Interface, IPv4Network, IPv6Address, IPv6Interface, IPv6Network
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from fastapi import status
+from sqlalchemy import (
+    ColumnElement,
+    Integer,
+    Select,
+    and_,
+    any_,
+    bindparam,
+    case,
+    cast,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, INET, aggregate_order_by
+from sqlalchemy.exc import IntegrityError
+
+from netsight.core.config import settings
+from netsight.core.errors import err_codes
+from netsight.core.errors.exception_handlers import GenerError
 from netsight.core.repositories import BaseRepository
+from netsight.core.utils.validators import list_to_tree
+from netsight.features._types import IPvAnyInterface, IPvAnyNetwork
+from netsight.features.consts import IPVersion
 from netsight.features.ipam import models, schemas
+from netsight.features.org.models import Site
+from netsight.features.org.services import site_service
+from netsight.libs.ipam.allocator import allocate_addresses, allocate_blocks
+from netsight.libs.ipam.hierarchy import PrefixNode, build_hierarchy
+from netsight.libs.ipam.lpm import PrefixGroup, PrefixIndex, PrefixIndexStore
+from netsight.libs.ipam.pools import BitmapPool, find_free, to_bitmap
+from netsight.libs.ipam.utilization import (
+    count_in_ranges,
+    covered_size,
+    from_keys,
+    from_packed,
+    outermost,
+    to_keys,
+    usable_sizes,
+)
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# pg_advisory_xact_lock(class, id) keys
+PREFIX_HIERARCHY_LOCK = 0x50465831  # (class, vrf_id) serializing hierarchy changes inside one VRF
+ADDRESS_ALLOCATION_LOCK = 0x50465833  # (class, vrf_id) serializing address allocations inside one VRF
+VLAN_ALLOCATION_LOCK = 0x50465834  # (class, site_id) serializing VLAN allocations of a site without redis
+ASN_ALLOCATION_LOCK = 0x50465835  # (class, asn_pool_id) serializing ASN allocations of a pool without redis
+
+VLAN_IDS = 4096  # bits of the VLAN bitset of a site, one per 12 bits VLAN ID
+resource_pools = BitmapPool(settings.RESOURCE_POOL_CACHE_TTL)
+
+
+@asynccontextmanager
+async def unique_space(session: "AsyncSession") -> AsyncIterator[None]:
+    """Report a write duplicating an address or a prefix, or overlapping a range, in a VRF enforcing
+    unique space as a conflict instead of an internal error."""
+    try:
+        yield
+    except IntegrityError as e:
+        violation = e.orig.__cause__ if e.orig is not None else None
+        if getattr(violation, "constraint_name", None) not in models.UNIQUE_SPACE_CONSTRAINTS:
+            raise
+        await session.rollback()
+        raise GenerError(err_codes.ERR_30003, {"detail": violation.detail}, status.HTTP_409_CONFLICT) from e
+
+
+class UniqueSpaceMixin:
+    async def create(self, session: "AsyncSession", obj_in: Any, *args: Any, **kwargs: Any) -> Any:
+        async with unique_space(session):
+            return await super().create(session, obj_in, *args, **kwargs)  # type: ignore[misc]
+
+    async def update(self, session: "AsyncSession", db_obj: Any, obj_in: Any, *args: Any, **kwargs: Any) -> Any:
+        async with unique_space(session):
+            return await super().update(session, db_obj, obj_in, *args, **kwargs)  # type: ignore[misc]
+
+
+async def lock_allocation(session: "AsyncSession", lock: int, parent_id: int) -> None:
+    """Serialize allocations in one parent until the transaction ends, reads are not blocked."""
+    await session.execute(select(func.pg_advisory_xact_lock(lock, parent_id)))
+
+
+async def _prefix_ranges(
+    session: "AsyncSession", parent: IPvAnyNetwork, *where: ColumnElement[bool]
+) -> AsyncIterator[tuple[int, int]]:
+    """Stream the prefixes inside `parent` in address order, as (first, last) integers.
+
+    Subnets sort right after their supernet, so `> parent` keeps the scan on the ordered btree index
+    and the allocator stops reading once it has found enough space.
+    """
+    stmt = (
+        select(models.Prefix.prefix)
+        .where(models.Prefix.prefix > parent, models.Prefix.prefix.op("<<")(parent), *where)
+        .order_by(models.Prefix.prefix)
+        .execution_options(yield_per=500)
+    )
+    result = await session.stream_scalars(stmt)
+    try:
+        async for network in result:
+            yield int(network.network_address), int(network.broadcast_address)
+    finally:
+        await result.close()
+
+
+async def _address_ranges(
+    session: "AsyncSession", vrf_id: int | None, first: int, last: int, version: IPVersion
+) -> AsyncIterator[tuple[int, int]]:
+    """Stream the runs of consecutive addresses of a VRF from `first` to `last`, as (first, last) integers.
+
+    The range is a scan of the address btree index and Postgres only sends the ends of the runs, the
+    allocator stops reading once it has found enough free addresses.
+    """
+    address_type = IPv4Address if version == IPVersion.IPv4 else IPv6Address
+    host = func.inet(func.host(models.IPAddress.address))
+    previous, following = func.lag(host).over(order_by=host), func.lead(host).over(order_by=host)
+    # duplicates of unenforced VRFs are checked first: only a smaller neighbor is incremented and a
+    # larger one decremented, which can't go out of the address range
+    addresses = (
+        select(
+            host.label("address"),
+            func.coalesce(case((previous == host, True), else_=previous + 1 == host), False).label("joined_before"),
+            func.coalesce(case((following == host, True), else_=following - 1 == host), False).label("joined_after"),
+        )
+        .where(
+            func.coalesce(models.IPAddress.vrf_id, 0) == (vrf_id or 0),
+            host.between(*(cast(str(address_type(bound)), INET) for bound in (first, last))),
+        )
+        .subquery()
+    )
+    stmt = (
+        select(addresses.c.address, addresses.c.joined_before, addresses.c.joined_after)
+        .where(~(addresses.c.joined_before & addresses.c.joined_after))
+        .order_by(addresses.c.address)
+        .execution_options(yield_per=500)
+    )
+    result = await session.stream(stmt)
+    try:
+        async for address, joined_before, joined_after in result:
+            if not joined_before:
+                low = int(address)
+            if not joined_after:
+                yield low, int(address)
+    finally:
+        await result.close()
+
+
+async def _free_numbers(
+    session: "AsyncSession",
+    key: str,
+    *,
+    lock: tuple[int, int],
+    size: int,
+    count: int,
+    load: Callable[[], Awaitable[np.ndarray]],
+    contiguous: bool,
+    take: bool,
+) -> list[int]:
+    """Free offsets of a pool bitset, from redis or, without it, from the database under `lock`."""
+    offsets = await resource_pools.reserve(key, size, count, load, contiguous=contiguous, take=take)
+    if offsets is None:
+        if take:
+            await lock_allocation(session, *lock)
+        offsets = find_free(await load(), count, contiguous)
+    return offsets
+
+
+async def _allocate_numbers(
+    session: "AsyncSession",
+    key: str,
+    *,
+    lock: tuple[int, int],
+    size: int,
+    count: int,
+    load: Callable[[], Awaitable[np.ndarray]],
+    contiguous: bool,
+    build: Callable[[list[int]], Awaitable[list[Any]]],
+) -> list[Any]:
+    """Take `count` free offsets of a pool and create the rows `build` makes of them, all or none.
+
+    A number created since the bitset was built fails on its unique constraint, the bitset is
+    rebuilt and the allocation retried once, a second conflict is reported as an exhausted pool.
+    Numbers taken but not created are given back by rebuilding the bitset too. The rollback
+    expires every loaded instance: `load` and `build` must not read attributes of the ones
+    loaded before, `build` loads again what it links the rows to.
+    """
+    for attempt in range(2):
+        offsets = await _free_numbers(
+            session, key, lock=lock, size=size, count=count, load=load, contiguous=contiguous, take=True
+        )
+        if len(offsets) < count:
+            raise GenerError(err_codes.ERR_30004, {"count": count}, status.HTTP_409_CONFLICT)
+        try:
+            created = await build(offsets)
+            session.add_all(created)
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            await resource_pools.invalidate(key)
+            if attempt:
+                raise GenerError(err_codes.ERR_30004, {"count": count}, status.HTTP_409_CONFLICT) from e
+        except BaseException:
+            await resource_pools.invalidate(key)
+            raise
+        else:
+            return created
+    return []
+
+
+def _packed(column: ColumnElement[Any], order: ColumnElement[Any] | None = None) -> ColumnElement[bytes]:
+    """The addresses of `column` in network byte order, concatenated sorted by `order` or their host address.
+
+    inet_send() minus its 4 bytes header is the raw address, one bytea per family decodes with
+    np.frombuffer instead of a row and an ipaddress object per address. inet values compare their
+    network part and mask length before their host bits, addresses with different masks are only
+    in address order once their mask is dropped.
+    """
+    if order is None:
+        order = cast(func.host(column), INET)
+    return func.string_agg(
+        func.substring(func.inet_send(column), 5), aggregate_order_by(literal_column("''::bytea"), order)
+    )
+
+
+class BlockService(BaseRepository[models.Block, schemas.BlockCreate, schemas.BlockUpdate, schemas.BlockQuery]):
+    async def allocate_prefixes(
+        self, session: "AsyncSession", block: models.Block, obj_in: schemas.PrefixAllocate
+    ) -> list[models.Prefix]:
+        """Create `obj_in.count` prefixes in the lowest free space of `block`, in any VRF."""
+        return await prefix_service.allocate_prefixes(session, block.block, obj_in)
+
+    async def utilization(self, session: "AsyncSession") -> list[schemas.BlockUtilization]:
+        """Addresses of every block covered by prefixes, of any VRF."""
+        blocks = (await session.execute(select(models.Block.id, models.Block.block).order_by(models.Block.id))).all()
+        prefix = select(models.Prefix.prefix).distinct().subquery().c.prefix
+        families = {
+            version: (from_packed(None, version),) * 2 + (np.empty(0, dtype=np.int64),) for version in IPVersion
+        }
+        for version, firsts, lasts, lengths in await session.execute(
+            select(
+                func.family(prefix),
+                _packed(prefix, prefix),
+                _packed(func.broadcast(prefix), prefix),
+                func.array_agg(aggregate_order_by(func.masklen(prefix), prefix)),
+            ).group_by(func.family(prefix))
+        ):
+            families[version] = from_packed(firsts, version), from_packed(lasts, version), np.array(lengths)
+
+        results = []
+        for row in blocks:
+            block = row.block
+            firsts, lasts, lengths = families[block.version]
+            start, end = (
+                np.searchsorted(firsts, to_keys([int(address)], block.version), side=side)[0]
+                for address, side in ((block.network_address, "left"), (block.broadcast_address, "right"))
+            )
+            # prefixes starting in the block are inside it unless they are wider than it
+            inside = slice(start, end)
+            narrower = lengths[inside] >= block.prefixlen
+            first, last, length = firsts[inside][narrower], lasts[inside][narrower], lengths[inside][narrower]
+            used = covered_size(length[outermost(first, last)], block.max_prefixlen)
+            results.append(
+                schemas.BlockUtilization(
+                    id=row.id, block=block, used=used, utilization=round(used / block.num_addresses * 100, 2)
+                )
+            )
+        return results
+
+
+class PrefixService(BaseRepository[models.Prefix, schemas.PrefixCreate, schemas.PrefixUpdate, schemas.PrefixQuery]):
+    """Keeps `parent_id`, `depth` and `children_count` of the prefixes of a VRF in sync on every write.
+
+    A write only touches the prefixes inside the changed one and its parent, `rebuild_hierarchy`
+    recomputes everything with one sweep and fixes rows written around the service (bulk deletes).
+    Like the sweep, a prefix contains its duplicates created after it: they nest by id.
+    """
+
+    @staticmethod
+    async def _lock_vrf(session: "AsyncSession", vrf_id: int | None) -> None:
+        await session.execute(select(func.pg_advisory_xact_lock(PREFIX_HIERARCHY_LOCK, func.coalesce(vrf_id, 0))))
+
+    @staticmethod
+    def _outside(prefix: models.Prefix) -> ColumnElement[bool]:
+        """The prefixes of its VRF containing `prefix`."""
+        return and_(
+            models.Prefix.vrf_id.is_not_distinct_from(prefix.vrf_id),
+            or_(
+                models.Prefix.prefix.op(">>")(prefix.prefix),
+                and_(models.Prefix.prefix == prefix.prefix, models.Prefix.id < prefix.id),
+            ),
+        )
+
+    @staticmethod
+    def _inside(prefix: models.Prefix) -> ColumnElement[bool]:
+        """The prefixes of its VRF `prefix` contains."""
+        return and_(
+            models.Prefix.vrf_id.is_not_distinct_from(prefix.vrf_id),
+            or_(
+                models.Prefix.prefix.op("<<")(prefix.prefix),
+                and_(models.Prefix.prefix == prefix.prefix, models.Prefix.id > prefix.id),
+            ),
+        )
+
+    @staticmethod
+    async def _set(session: "AsyncSession", *where: ColumnElement[bool], **values: Any) -> int:
+        # hierarchy bookkeeping is not an edit of the prefix, keep updated_at as is
+        stmt = (
+            update(models.Prefix)
+            .where(*where)
+            .values(updated_at=models.Prefix.updated_at, **values)
+            .execution_options(synchronize_session=False)
+        )
+        return (await session.execute(stmt)).rowcount
+
+    async def _attach(self, session: "AsyncSession", prefix: models.Prefix) -> None:
+        """Insert a flushed, detached `prefix` under its closest supernet and adopt the subnets it covers."""
+        parent = (
+            await session.execute(
+                select(models.Prefix.id, models.Prefix.depth)
+                .where(self._outside(prefix))
+                .order_by(func.masklen(models.Prefix.prefix).desc(), models.Prefix.id.desc())
+                .limit(1)
+            )
+        ).first()
+        parent_id = parent.id if parent else None
+        inside = self._inside(prefix)
+        adopted = await self._set(
+            session, inside, models.Prefix.parent_id.is_not_distinct_from(parent_id), parent_id=prefix.id
+        )
+        await self._set(session, inside, depth=models.Prefix.depth + 1)
+        if parent_id is not None:
+            await self._set(
+                session,
+                models.Prefix.id == parent_id,
+                children_count=models.Prefix.children_count + 1 - adopted,
+            )
+        prefix.parent_id = parent_id
+        prefix.depth = parent.depth + 1 if parent else 0
+        prefix.children_count = adopted
+
+    async def _detach(self, session: "AsyncSession", prefix: models.Prefix) -> None:
+        """Hand the children of `prefix` over to its parent, as if it was deleted.
+
+        The hierarchy of a loaded prefix goes stale when another write adopts it, `_set` doesn't
+        synchronize the session: it is read again once the VRF is locked.
+        """
+        await session.refresh(prefix, ["parent_id", "depth", "children_count"])
+        released = await self._set(session, models.Prefix.parent_id == prefix.id, parent_id=prefix.parent_id)
+        await self._set(session, self._inside(prefix), depth=models.Prefix.depth - 1)
+        if prefix.parent_id is not None:
+            await self._set(
+                session,
+                models.Prefix.id == prefix.parent_id,
+                children_count=models.Prefix.children_count + released - 1,
+            )
+        prefix.parent_id = None
+        prefix.depth = 0
+        prefix.children_count = 0
+
+    async def create(
+        self,
+        session: "AsyncSession",
+        obj_in: schemas.PrefixCreate,
+        excludes: set[str] | None = None,
+        exclude_unset: bool = False,
+        exclude_none: bool = False,
+        commit: bool | None = True,
+    ) -> models.Prefix:
+        new_prefix = await super().create(session, obj_in, excludes, exclude_unset, exclude_none, commit=False)
+        await self._lock_vrf(session, new_prefix.vrf_id)
+        session.add(new_prefix)
+        async with unique_space(session):
+            await session.flush()
+        await self._attach(session, new_prefix)
+        if commit:
+            return await self.commit(session, new_prefix)
+        return new_prefix
+
+    async def update(
+        self,
+        session: "AsyncSession",
+        db_obj: models.Prefix,
+        obj_in: schemas.PrefixUpdate,
+        excludes: set[str] | None = None,
+        commit: bool | None = True,
+    ) -> models.Prefix:
+        changes = obj_in.model_dump(exclude_unset=True, include={"prefix", "vrf_id"})
+        moved = any(changes[key] != getattr(db_obj, key) for key in changes)
+        if moved:
+            for vrf_id in sorted({db_obj.vrf_id, changes.get("vrf_id", db_obj.vrf_id)}, key=lambda v: v or 0):
+                await self._lock_vrf(session, vrf_id)
+            await self._detach(session, db_obj)
+        db_obj = await super().update(session, db_obj, obj_in, excludes, commit=False)
+        if moved:
+            async with unique_space(session):
+                await session.flush()
+            await self._attach(session, db_obj)
+        if commit:
+            return await self.commit(session, db_obj)
+        return db_obj
 
+    async def delete(self, session: "AsyncSession", db_obj: models.Prefix) -> None:
+        await self._lock_vrf(session, db_obj.vrf_id)
+        await self._detach(session, db_obj)
+        await super().delete(session, db_obj)
 
-class BlockService(BaseRepository[models.Block, schemas.BlockCreate, schemas.BlockUpdate, schemas.BlockQuery]): ...
+    async def available_prefixes(
+        self,
+        session: "AsyncSession",
+        parent: IPvAnyNetwork,
+        prefix_length: int,
+        count: int,
+        *where: ColumnElement[bool],
+    ) -> list[IPvAnyNetwork]:
+        """The lowest `count` free subnets of `parent` with `prefix_length`, not allocated."""
+        if not parent.prefixlen < prefix_length <= parent.max_prefixlen:
+            raise GenerError(err_codes.ERR_30002, {"prefix_length": prefix_length})
+        size = 1 << (parent.max_prefixlen - prefix_length)
+        first, last = int(parent.network_address), int(parent.broadcast_address)
+        starts = await allocate_blocks(first, last, _prefix_ranges(session, parent, *where), size, count)
+        return [type(parent)((start, prefix_length)) for start in starts]
 
+    async def allocate_prefixes(
+        self,
+        session: "AsyncSession",
+        parent: IPvAnyNetwork,
+        obj_in: schemas.PrefixAllocate,
+        *where: ColumnElement[bool],
+    ) -> list[models.Prefix]:
+        """Create all the requested prefixes or none.
 
-class PrefixService(BaseRepository[models.Prefix, schemas.PrefixCreate, schemas.PrefixUpdate, schemas.PrefixQuery]): ...
+        Allocations in a block and in a prefix can cover the same space, both hold the hierarchy
+        lock of the VRF they create prefixes in from the search to the commit.
+        """
+        await self._lock_vrf(session, obj_in.vrf_id)
+        networks = await self.available_prefixes(session, parent, obj_in.prefix_length, obj_in.count, *where)
+        if len(networks) < obj_in.count:
+            raise GenerError(
+                err_codes.ERR_30001, {"parent": str(parent), "count": obj_in.count}, status.HTTP_409_CONFLICT
+            )
+        values = obj_in.model_dump(exclude={"prefix_length", "count"})
+        created = [
+            await self.create(session, schemas.PrefixCreate(prefix=network, **values), commit=False)
+            for network in networks
+        ]
+        await session.commit()
+        return created
 
+    async def allocate_child_prefixes(
+        self, session: "AsyncSession", prefix: models.Prefix, obj_in: schemas.PrefixAllocate
+    ) -> list[models.Prefix]:
+        """Create subnets of `prefix` in the lowest free space, in the VRF of `prefix`."""
+        obj_in.vrf_id = prefix.vrf_id
+        return await self.allocate_prefixes(
+            session, prefix.prefix, obj_in, models.Prefix.vrf_id.is_not_distinct_from(prefix.vrf_id)
+        )
 
-class ASNService(BaseRepository[models.ASN, schemas.ASNCreate, schemas.ASNUpdate, schemas.ASNQuery]): ...
+    @staticmethod
+    async def _usage(
+        session: "AsyncSession", vrf_id: int | None
+    ) -> list[tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Per family the ids, first addresses, lengths, used and usable addresses of the prefixes of a VRF.
+
+        An address counts in all the prefixes containing it.
+        """
+        prefix, address = models.Prefix.prefix, models.IPAddress.address
+        addresses = dict(
+            (
+                await session.execute(
+                    select(func.family(address), _packed(address))
+                    .where(models.IPAddress.vrf_id.is_not_distinct_from(vrf_id))
+                    .group_by(func.family(address))
+                )
+            )
+            .tuples()
+            .all()
+        )
+        usage = []
+        for version, ids, firsts, lasts, lengths in await session.execute(
+            select(
+                func.family(prefix),
+                func.array_agg(aggregate_order_by(models.Prefix.id, prefix)),
+                _packed(prefix, prefix),
+                _packed(func.broadcast(prefix), prefix),
+                func.array_agg(aggregate_order_by(func.masklen(prefix), prefix)),
+            )
+            .where(models.Prefix.vrf_id.is_not_distinct_from(vrf_id))
+            .group_by(func.family(prefix))
+        ):
+            first_keys, lengths_array = from_packed(firsts, version), np.array(lengths)
+            # aggregated in address order, the addresses are already sorted
+            used = count_in_ranges(
+                from_packed(addresses.get(version), version), first_keys, from_packed(lasts, version)
+            )
+            usage.append(
+                (version, np.array(ids), first_keys, lengths_array, used, usable_sizes(lengths_array, version))
+            )
+        return usage
+
+    async def utilization(self, session: "AsyncSession", vrf_id: int | None) -> list[dict[str, Any]]:
+        """Used addresses of every prefix of a VRF, as `PrefixUtilization` dicts."""
+        results = []
+        for version, ids, firsts, lengths, used, usable in await self._usage(session, vrf_id):
+            network = IPv4Network if version == IPVersion.IPv4 else IPv6Network
+            # the network or broadcast address may be assigned anyway, never report more than full
+            percents = np.minimum(np.round(used / usable * 100, 2), 100)
+            results.extend(
+                {
+                    "id": prefix_id,
+                    "prefix": network((first, length)),
+                    "used": count,
+                    "utilization": percent,
+                    "is_full": is_full,
+                }
+                for prefix_id, first, length, count, percent, is_full in zip(
+                    ids.tolist(),
+                    from_keys(firsts),
+                    lengths.tolist(),
+                    used.tolist(),
+                    percents.tolist(),
+                    (used >= usable).tolist(),
+                    strict=True,
+                )
+            )
+        return results
+
+    async def refresh_utilization(self, session: "AsyncSession") -> int:
+        """Set `is_full` of every prefix from its used addresses, return the number of prefixes changed."""
+        changed = 0
+        for vrf_id in (await session.scalars(select(models.Prefix.vrf_id).distinct())).all():
+            full = [
+                prefix_id
+                for _, ids, _, _, used, usable in await self._usage(session, vrf_id)
+                for prefix_id in ids[used >= usable].tolist()
+            ]
+            is_full = models.Prefix.id == any_(literal(full, ARRAY(Integer)))
+            changed += await self._set(
+                session,
+                models.Prefix.vrf_id.is_not_distinct_from(vrf_id),
+                models.Prefix.is_full.is_distinct_from(is_full),
+                is_full=is_full,
+            )
+        await session.commit()
+        return changed
+
+    async def get_tree(self, session: "AsyncSession", prefix: models.Prefix, levels: int) -> dict[str, Any]:
+        """`prefix` with its subnets down to `levels` below it, nested, in one query."""
+        stmt = (
+            select(
+                models.Prefix.id,
+                models.Prefix.prefix,
+                models.Prefix.status,
+                models.Prefix.parent_id,
+                models.Prefix.depth,
+                models.Prefix.children_count,
+            )
+            .where(
+                or_(models.Prefix.id == prefix.id, self._inside(prefix)),
+                models.Prefix.depth <= prefix.depth + levels,
+            )
+            .order_by(models.Prefix.prefix)
+        )
+        nodes = [dict(row) for row in (await session.execute(stmt)).mappings()]
+        for node in nodes:
+            if node["id"] == prefix.id:
+                node["parent_id"] = None
+        return list_to_tree(nodes)[0]
+
+    async def rebuild_hierarchy(self, session: "AsyncSession") -> int:
+        """Recompute the hierarchy of every VRF with one sweep, return the number of prefixes fixed.
+
+        Writes to the prefix table wait until the transaction ends, readers are not blocked.
+        """
+        await session.execute(text("LOCK TABLE prefix IN SHARE ROW EXCLUSIVE MODE"))
+        rows = (
+            await session.execute(
+                select(
+                    models.Prefix.id,
+                    models.Prefix.vrf_id,
+                    models.Prefix.prefix,
+                    models.Prefix.parent_id,
+                    models.Prefix.depth,
+                    models.Prefix.children_count,
+                )
+            )
+        ).all()
+        placements = build_hierarchy(PrefixNode(row.id, row.vrf_id, row.prefix) for row in rows)
+        changed = [
+            {"id": row.id, **placements[row.id]._asdict()}
+            for row in rows
+            if placements[row.id] != (row.parent_id, row.depth, row.children_count)
+        ]
+        if changed:
+            table = models.Prefix.__table__
+            await session.execute(
+                update(table)
+                .where(table.c.id == bindparam("_id"))
+                .values(
+                    parent_id=bindparam("_parent_id"),
+                    depth=bindparam("_depth"),
+                    children_count=bindparam("_children_count"),
+                    updated_at=table.c.updated_at,
+                ),
+                [{f"_{key}": value for key, value in row.items()} for row in changed],
+            )
+        await session.commit()
+        return len(changed)
+
+    async def index_groups(self, session: "AsyncSession", vrf_ids: Collection[int] | None = None) -> list[PrefixGroup]:
+        """The prefixes of `vrf_ids`, 0 for the global table, or of every VRF, per VRF and family."""
+        prefix, vrf_id = models.Prefix.prefix, func.coalesce(models.Prefix.vrf_id, 0)
+
+        def ids(column: ColumnElement[int | None]) -> ColumnElement[list[int]]:
+            return func.array_agg(aggregate_order_by(func.coalesce(column, 0), prefix, models.Prefix.id))
+
+        stmt = select(
+            vrf_id,
+            func.family(prefix),
+            ids(models.Prefix.id),
+            _packed(prefix, prefix),
+            _packed(func.broadcast(prefix), prefix),
+            ids(models.Prefix.vlan_id),
+            ids(models.Prefix.site_id),
+            ids(models.Prefix.role_id),
+        ).group_by(vrf_id, func.family(prefix))
+        if vrf_ids is not None:
+            stmt = stmt.where(vrf_id == any_(literal(list(vrf_ids), ARRAY(Integer))))
+        return [
+            PrefixGroup(
+                vrf,
+                version,
+                np.array(prefix_ids),
+                from_packed(firsts, version),
+                from_packed(lasts, version),
+                np.array(vlan_ids),
+                np.array(site_ids),
+                np.array(role_ids),
+            )
+            for vrf, version, prefix_ids, firsts, lasts, vlan_ids, site_ids, role_ids in await session.execute(stmt)
+        ]
+
+    async def index_changes(self, session: "AsyncSession", since: int) -> tuple[int, set[int]]:
+        """The last audit log id of the prefixes and the VRFs with prefixes changed after `since`.
+
+        Only changes made through the repository are logged, `refresh_index` rebuilds everything
+        from time to time for the others.
+        """
+        log = self.model.AuditLog
+        rows = (await session.execute(select(log.id, log.parent_id, log.diff).where(log.id > since))).all()
+        vrf_ids: set[int | None] = set()
+        for _, _, diff in rows:
+            if "vrf_id" not in diff:
+                continue
+            # created and deleted prefixes log all their columns, updates the changed ones
+            value = diff["vrf_id"]
+            if isinstance(value, dict):
+                before = value["before"]
+                vrf_ids.update(before if isinstance(before, list) else [before])
+                vrf_ids.add(value["after"])
+            else:
+                vrf_ids.add(value)
+        prefix_ids = {prefix_id for _, prefix_id, _ in rows if prefix_id is not None}
+        if prefix_ids:
+            vrf_ids.update(
+                await session.scalars(select(models.Prefix.vrf_id).distinct().where(models.Prefix.id.in_(prefix_ids)))
+            )
+        return max((row.id for row in rows), default=since), {vrf_id or 0 for vrf_id in vrf_ids}
+
+    async def refresh_index(self, session: "AsyncSession", store: PrefixIndexStore) -> int:
+        """Bring the shared prefix index up to date, return the number of VRFs rebuilt, -1 for all."""
+        index = store.current()
+        if index is None or time.time() - index.built_at > settings.PREFIX_INDEX_REBUILD_INTERVAL:
+            mark = await session.scalar(select(func.coalesce(func.max(self.model.AuditLog.id), 0)))
+            store.publish(PrefixIndex.build(await self.index_groups(session), mark))
+            return -1
+        mark, vrf_ids = await self.index_changes(session, index.mark)
+        if mark != index.mark:
+            store.publish(index.replace(await self.index_groups(session, vrf_ids), vrf_ids, mark))
+        return len(vrf_ids)
+
+
+class ASNService(BaseRepository[models.ASN, schemas.ASNCreate, schemas.ASNUpdate, schemas.ASNQuery]):
+    async def delete(self, session: "AsyncSession", db_obj: models.ASN) -> None:
+        pool_ids = await session.scalars(
+            select(models.ASNPool.id).where(models.ASNPool.min_asn <= db_obj.asn, models.ASNPool.max_asn >= db_obj.asn)
+        )
+        await super().delete(session, db_obj)
+        await resource_pools.invalidate(*(f"asn:{pool_id}" for pool_id in pool_ids))
+
+
+class ASNPoolService(
+    BaseRepository[models.ASNPool, schemas.ASNPoolCreate, schemas.ASNPoolUpdate, schemas.ASNPoolQuery]
+):
+    @staticmethod
+    async def _taken(session: "AsyncSession", min_asn: int, max_asn: int) -> np.ndarray:
+        asns = await session.scalars(select(models.ASN.asn).where(models.ASN.asn.between(min_asn, max_asn)))
+        return to_bitmap((asn - min_asn for asn in asns), max_asn - min_asn + 1)
+
+    async def available_asns(
+        self, session: "AsyncSession", pool: models.ASNPool, count: int, contiguous: bool = False
+    ) -> list[int]:
+        """The lowest `count` free AS numbers of `pool`, not allocated."""
+        pool_id, min_asn, max_asn = pool.id, pool.min_asn, pool.max_asn
+        offsets = await _free_numbers(
+            session,
+            f"asn:{pool_id}",
+            lock=(ASN_ALLOCATION_LOCK, pool_id),
+            size=max_asn - min_asn + 1,
+            count=count,
+            load=lambda: self._taken(session, min_asn, max_asn),
+            contiguous=contiguous,
+            take=False,
+        )
+        return [min_asn + offset for offset in offsets]
+
+    async def allocate_asns(
+        self, session: "AsyncSession", pool: models.ASNPool, obj_in: schemas.ASNAllocate
+    ) -> list[models.ASN]:
+        """Create the lowest free AS numbers of `pool`, linked to the sites of `obj_in`."""
+        pool_id, min_asn, max_asn = pool.id, pool.min_asn, pool.max_asn
+
+        async def build(offsets: list[int]) -> list[models.ASN]:
+            sites = list(await site_service.get_multi_by_pks_or_404(session, obj_in.site)) if obj_in.site else []
+            return [models.ASN(asn=min_asn + offset, description=obj_in.description, site=sites) for offset in offsets]
+
+        return await _allocate_numbers(
+            session,
+            f"asn:{pool_id}",
+            lock=(ASN_ALLOCATION_LOCK, pool_id),
+            size=max_asn - min_asn + 1,
+            count=obj_in.count,
+            load=lambda: self._taken(session, min_asn, max_asn),
+            contiguous=obj_in.contiguous,
+            build=build,
+        )
+
+    async def update(
+        self, session: "AsyncSession", db_obj: models.ASNPool, obj_in: schemas.ASNPoolUpdate
+    ) -> models.ASNPool:
+        db_obj = await super().update(session, db_obj, obj_in)
+        await resource_pools.invalidate(f"asn:{db_obj.id}")
+        return db_obj
+
+    async def delete(self, session: "AsyncSession", db_obj: models.ASNPool) -> None:
+        pool_id = db_obj.id
+        await super().delete(session, db_obj)
+        await resource_pools.invalidate(f"asn:{pool_id}")
 
 
 class IPRangeService(
-    BaseRepository[models.IPRange, schemas.IPRangeCreate, schemas.IPRangeUpdate, schemas.IPRangeQuery]
+    UniqueSpaceMixin,
+    BaseRepository[models.IPRange, schemas.IPRangeCreate, schemas.IPRangeUpdate, schemas.IPRangeQuery],
 ): ...
 
 
 class IPAddressService(
-    BaseRepository[models.IPAddress, schemas.IPAddressCreate, schemas.IPAddressUpdate, schemas.IPAddressQuery]
-): ...
+    UniqueSpaceMixin,
+    BaseRepository[models.IPAddress, schemas.IPAddressCreate, schemas.IPAddressUpdate, schemas.IPAddressQuery],
+):
+    async def available_ips(self, session: "AsyncSession", prefix: models.Prefix, count: int) -> list[IPvAnyInterface]:
+        """The lowest `count` unassigned addresses of `prefix`, with the prefix length of `prefix`.
+
+        The network and broadcast addresses of IPv4 prefixes and the subnet-router anycast address
+        of IPv6 prefixes are never handed out, except in point to point /31 and /127.
+        """
+        network = prefix.prefix
+        first, last = int(network.network_address), int(network.broadcast_address)
+        if network.prefixlen < network.max_prefixlen - 1:
+            first += 1
+            if network.version == IPVersion.IPv4:
+                last -= 1
+        used = _address_ranges(session, prefix.vrf_id, first, last, network.version)
+        addresses = await allocate_addresses(first, last, used, count)
+        interface = IPv4Interface if network.version == IPVersion.IPv4 else IPv6Interface
+        return [interface((address, network.prefixlen)) for address in addresses]
+
+    async def allocate_ips(
+        self, session: "AsyncSession", prefix: models.Prefix, obj_in: schemas.IPAddressAllocate
+    ) -> list[models.IPAddress]:
+        """Create all the requested addresses in `prefix` or none.
+
+        Nested prefixes share their addresses, allocations are serialized by VRF rather than by prefix.
+        """
+        await lock_allocation(session, ADDRESS_ALLOCATION_LOCK, prefix.vrf_id or 0)
+        addresses = await self.available_ips(session, prefix, obj_in.count)
+        if len(addresses) < obj_in.count:
+            raise GenerError(
+                err_codes.ERR_30001, {"parent": str(prefix.prefix), "count": obj_in.count}, status.HTTP_409_CONFLICT
+            )
+        values = obj_in.model_dump(exclude={"count"})
+        created = []
+        for address in addresses:
+            new_address = await self.create(
+                session,
+                schemas.IPAddressCreate(address=address, vrf_id=prefix.vrf_id, **values),
+                commit=False,
+            )
+            session.add(new_address)
+            created.append(new_address)
+        # an address written around the allocator, by a create or an import, conflicts here
+        async with unique_space(session):
+            await session.commit()
+        return created
+
+
+class VLANService(BaseRepository[models.VLAN, schemas.VLANCreate, schemas.VLANUpdate, schemas.VLANQuery]):
+    async def update(self, session: "AsyncSession", db_obj: models.VLAN, obj_in: schemas.VLANUpdate) -> models.VLAN:
+        site_id = db_obj.site_id
+        db_obj = await super().update(session, db_obj, obj_in)
+        await resource_pools.invalidate(f"vlan:{site_id}", f"vlan:{db_obj.site_id}")
+        return db_obj
+
+    async def delete(self, session: "AsyncSession", db_obj: models.VLAN) -> None:
+        site_id = db_obj.site_id
+        await super().delete(session, db_obj)
+        await resource_pools.invalidate(f"vlan:{site_id}")
+
+
+class VLANPoolService(
+    BaseRepository[models.VLANPool, schemas.VLANPoolCreate, schemas.VLANPoolUpdate, schemas.VLANPoolQuery]
+):
+    @staticmethod
+    async def _taken(session: "AsyncSession", site_id: int) -> np.ndarray:
+        """VLAN IDs of a site outside of the pools of the site and of its site group, or used."""
+        site_group_id = select(Site.site_group_id).where(Site.id == site_id).scalar_subquery()
+        pools = await session.execute(
+            select(models.VLANPool.min_vid, models.VLANPool.max_vid).where(
+                or_(models.VLANPool.site_id == site_id, models.VLANPool.site_group_id == site_group_id)
+            )
+        )
+        bits = np.ones(VLAN_IDS, dtype=bool)
+        for min_vid, max_vid in pools:
+            bits[min_vid : max_vid + 1] = False
+        vids = await session.scalars(select(models.VLAN.vid).where(models.VLAN.site_id == site_id))
+        return bits | to_bitmap(vids, VLAN_IDS)
+
+    async def available_vlans(
+        self, session: "AsyncSession", site_id: int, count: int, contiguous: bool = False
+    ) -> list[int]:
+        """The lowest `count` free VLAN IDs of the pools of a site, not allocated."""
+        return await _free_numbers(
+            session,
+            f"vlan:{site_id}",
+            lock=(VLAN_ALLOCATION_LOCK, site_id),
+            size=VLAN_IDS,
+            count=count,
+            load=lambda: self._taken(session, site_id),
+            contiguous=contiguous,
+            take=False,
+        )
+
+    async def allocate_vlans(
+        self, session: "AsyncSession", site_id: int, obj_in: schemas.VLANAllocate
+    ) -> list[models.VLAN]:
+        """Create VLANs with the lowest free VLAN IDs of the pools of a site, named after their ID."""
+        values = obj_in.model_dump(include={"status", "role_id", "description"})
+
+        async def build(vids: list[int]) -> list[models.VLAN]:
+            return [models.VLAN(name=f"{obj_in.name_prefix}{vid}", vid=vid, site_id=site_id, **values) for vid in vids]
+
+        return await _allocate_numbers(
+            session,
+            f"vlan:{site_id}",
+            lock=(VLAN_ALLOCATION_LOCK, site_id),
+            size=VLAN_IDS,
+            count=obj_in.count,
+            load=lambda: self._taken(session, site_id),
+            contiguous=obj_in.contiguous,
+            build=build,
+        )
+
+    async def _site_keys(self, session: "AsyncSession", pool: models.VLANPool) -> list[str]:
+        if pool.site_id is not None:
+            return [f"vlan:{pool.site_id}"]
+        site_ids = await session.scalars(select(Site.id).where(Site.site_group_id == pool.site_group_id))
+        return [f"vlan:{site_id}" for site_id in site_ids]
+
+    async def create(self, session: "AsyncSession", obj_in: schemas.VLANPoolCreate) -> models.VLANPool:
+        db_obj = await super().create(session, obj_in)
+        await resource_pools.invalidate(*await self._site_keys(session, db_obj))
+        return db_obj
+
+    async def update(
+        self, session: "AsyncSession", db_obj: models.VLANPool, obj_in: schemas.VLANPoolUpdate
+    ) -> models.VLANPool:
+        keys = await self._site_keys(session, db_obj)
+        db_obj = await super().update(session, db_obj, obj_in)
+        await resource_pools.invalidate(*keys, *await self._site_keys(session, db_obj))
+        return db_obj
+
+    async def delete(self, session: "AsyncSession", db_obj: models.VLANPool) -> None:
+        keys = await self._site_keys(session, db_obj)
+        await super().delete(session, db_obj)
+        await resource_pools.invalidate(*keys)
+
+
+class VRFService(UniqueSpaceMixin, BaseRepository[models.VRF, schemas.VRFCreate, schemas.VRFUpdate, schemas.VRFQuery]):
+    """Turning `enforce_unique` on fails with a conflict while the VRF holds duplicates, see `conflicts`."""
 
+    @staticmethod
+    def _duplicates(
+        model: type[models.Prefix | models.IPAddress], value: ColumnElement[Any]
+    ) -> Select[tuple[Any, ...]]:
+        return (
+            select(
+                literal(model.__name__).label("object_type"),
+                model.vrf_id,
+                func.bool_and(model.enforce_unique).label("enforced"),
+                func.text(value).label("value"),
+                func.array_agg(aggregate_order_by(model.id, model.id)).label("ids"),
+            )
+            .group_by(model.vrf_id, value)
+            .having(func.count() > 1)
+        )
 
-class VLANService(BaseRepository[models.VLAN, schemas.VLANCreate, schemas.VLANUpdate, schemas.VLANQuery]): ...
+    @staticmethod
+    def _overlaps() -> Select[tuple[Any, ...]]:
+        """Groups of ranges chained by overlaps, one sort of the ranges of every VRF."""
+        start = func.inet(func.host(models.IPRange.start_address))
+        end = func.inet(func.host(models.IPRange.end_address))
+        ordered = select(
+            models.IPRange.id,
+            models.IPRange.vrf_id,
+            models.IPRange.enforce_unique,
+            start.label("start"),
+            end.label("end"),
+            # the furthest end of the ranges starting before this one
+            func.max(end)
+            .over(partition_by=models.IPRange.vrf_id, order_by=(start, models.IPRange.id), rows=(None, -1))
+            .label("reach"),
+        ).subquery()
+        starts_group = case((or_(ordered.c.reach.is_(None), ordered.c.start > ordered.c.reach), 1), else_=0)
+        grouped = select(
+            ordered,
+            func.sum(starts_group)
+            .over(partition_by=ordered.c.vrf_id, order_by=(ordered.c.start, ordered.c.id))
+            .label("group"),
+        ).subquery()
+        return (
+            select(
+                literal(models.IPRange.__name__).label("object_type"),
+                grouped.c.vrf_id,
+                func.bool_and(grouped.c.enforce_unique).label("enforced"),
+                func.concat(func.host(func.min(grouped.c.start)), "-", func.host(func.max(grouped.c.end))).label(
+                    "value"
+                ),
+                func.array_agg(aggregate_order_by(grouped.c.id, grouped.c.start)).label("ids"),
+            )
+            .group_by(grouped.c.vrf_id, grouped.c.group)
+            .having(func.count() > 1)
+        )
 
+    async def conflicts(self, session: "AsyncSession") -> list[dict[str, Any]]:
+        """Every duplicate address, duplicate prefix and overlapping ranges group of every VRF.
 
-class VRFService(BaseRepository[models.VRF, schemas.VRFCreate, schemas.VRFUpdate, schemas.VRFQuery]): ...
+        `enforced` groups can only exist in data written before the constraints, the others block
+        turning `enforce_unique` on.
+        """
+        stmt = union_all(
+            self._duplicates(models.Prefix, models.Prefix.prefix),
+            self._duplicates(models.IPAddress, func.host(models.IPAddress.address)),
+            self._overlaps(),
+        )
+        return [dict(row) for row in (await session.execute(stmt)).mappings()]
 
 
 class RouteTargetService(
@@ -35,8 +984,11 @@ class RouteTargetService(
 block_service = BlockService(models.Block)
 prefix_service = PrefixService(models.Prefix)
 asn_service = ASNService(models.ASN)
+asn_pool_service = ASNPoolService(models.ASNPool)
 ip_range_service = IPRangeService(models.IPRange)
 ip_address_service = IPAddressService(models.IPAddress)
 vlan_service = VLANService(models.VLAN)
+vlan_pool_service = VLANPoolService(models.VLANPool)
 vrf_service = VRFService(models.VRF)
 route_target_service = RouteTargetService(models.RouteTarget)
+prefix_index_store = PrefixIndexStore(settings.PREFIX_INDEX_DIR)
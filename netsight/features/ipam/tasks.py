@@ -0,0 +1,40 @@
+import logging
+
+from netsight.core.celery_app import async_task, celery_app
+from netsight.core.database.session import async_session
+from netsight.features.ipam.services import prefix_index_store, prefix_service
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_prefix_hierarchy() -> int:
+    async with async_session() as session:
+        fixed = await prefix_service.rebuild_hierarchy(session)
+    if fixed:
+        logger.warning("Prefix hierarchy drifted on %d prefixes, rebuilt", fixed)
+    return fixed
+
+
+@celery_app.task(name="netsight.rebuild_prefix_hierarchy")
+def rebuild_prefix_hierarchy_task() -> int:
+    return async_task(rebuild_prefix_hierarchy)()
+
+
+async def refresh_prefix_utilization() -> int:
+    async with async_session() as session:
+        return await prefix_service.refresh_utilization(session)
+
+
+@celery_app.task(name="netsight.refresh_prefix_utilization")
+def refresh_prefix_utilization_task() -> int:
+    return async_task(refresh_prefix_utilization)()
+
+
+async def refresh_prefix_index() -> int:
+    async with async_session() as session:
+        return await prefix_service.refresh_index(session, prefix_index_store)
+
+
+@celery_app.task(name="netsight.refresh_prefix_index")
+def refresh_prefix_index_task() -> int:
+    return async_task(refresh_prefix_index)()
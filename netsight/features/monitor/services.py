@@ -0,0 +1,106 @@
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Float, Integer, any_, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from netsight.core.config import settings
+from netsight.core.metrics import DEVICE_PROBE_LATENCY, DEVICE_PROBE_LOSS, DEVICES_UNREACHABLE
+from netsight.features.consts import DeviceStatus
+from netsight.features.dcim.models import Device
+from netsight.features.intend.models import DeviceRole
+from netsight.features.monitor.consts import DeviceOperationalStatus
+from netsight.libs.netty.sweeper import ProbeResult, Sweeper
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+__all__ = ("reachability_service",)
+
+# the site id and device role slug a device is counted under in the metrics
+Group = tuple[str, str]
+# the ProbeResult values stored on the device
+PROBE_COLUMNS = ("latency", "jitter", "packet_loss")
+
+
+class ReachabilityService:
+    async def sweep(self, session: "AsyncSession", sweeper: Sweeper | None = None, batch_size: int = 1000) -> int:
+        """Probe the management IP of every active device, return the number of devices whose operational status changed.
+
+        Statuses and probe results are written and committed every `batch_size` devices while the
+        sweep goes on, a sweep of thousands of devices shows up in the API as it progresses.
+        """
+        sweeper = sweeper or Sweeper(
+            packets_per_second=settings.REACHABILITY_PACKETS_PER_SECOND,
+            max_concurrency=settings.REACHABILITY_MAX_CONCURRENCY,
+        )
+        devices: defaultdict[str, list[tuple[int, Group]]] = defaultdict(list)
+        stmt = (
+            select(Device.id, Device.management_ip, Device.site_id, DeviceRole.slug)
+            .join(DeviceRole, Device.device_role_id == DeviceRole.id)
+            .where(Device.status == DeviceStatus.Active)
+        )
+        for device_id, address, site_id, role in (await session.execute(stmt)).all():
+            devices[str(address)].append((device_id, (str(site_id), role)))
+        # end the transaction of the read, it isn't held open while probing
+        await session.commit()
+
+        unreachable = dict.fromkeys((group for probed in devices.values() for _, group in probed), 0)
+        changed = 0
+        batch: list[tuple[int, ProbeResult]] = []
+        async for result in sweeper.sweep(list(devices)):
+            for device_id, group in devices[result.address]:
+                batch.append((device_id, result))
+                self._observe(group, result)
+                unreachable[group] += not result.is_alive
+            if len(batch) >= batch_size:
+                changed += await self._write(session, batch)
+                batch.clear()
+        if batch:
+            changed += await self._write(session, batch)
+        for (site_id, role), count in unreachable.items():
+            DEVICES_UNREACHABLE.labels(site_id, role).set(count)
+        return changed
+
+    @staticmethod
+    async def _write(session: "AsyncSession", batch: list[tuple[int, ProbeResult]]) -> int:
+        # reachability is not an edit of the device, keep updated_at as is
+        arrays = (
+            literal([device_id for device_id, _ in batch], ARRAY(Integer)),
+            *(literal([getattr(result, name) for _, result in batch], ARRAY(Float)) for name in PROBE_COLUMNS),
+        )
+        rows = func.unnest(*arrays).table_valued("id", *PROBE_COLUMNS).render_derived()
+        await session.execute(
+            update(Device)
+            .where(Device.id == rows.c.id)
+            .values({**{name: rows.c[name] for name in PROBE_COLUMNS}, "updated_at": Device.updated_at})
+            .execution_options(synchronize_session=False)
+        )
+        statuses: defaultdict[DeviceOperationalStatus, list[int]] = defaultdict(list)
+        for device_id, result in batch:
+            statuses[DeviceOperationalStatus.ONLINE if result.is_alive else DeviceOperationalStatus.OFFLINE].append(
+                device_id
+            )
+        changed = 0
+        for status, device_ids in statuses.items():
+            stmt = (
+                update(Device)
+                .where(
+                    Device.id == any_(literal(device_ids, ARRAY(Integer))),
+                    Device.operational_status.is_distinct_from(status),
+                )
+                .values(operational_status=status, updated_at=Device.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            changed += (await session.execute(stmt)).rowcount
+        await session.commit()
+        return changed
+
+    @staticmethod
+    def _observe(group: Group, result: ProbeResult) -> None:
+        if result.latency is not None:
+            DEVICE_PROBE_LATENCY.labels(*group).observe(result.latency / 1000)
+        DEVICE_PROBE_LOSS.labels(*group).observe(result.packet_loss)
+
+
+reachability_service = ReachabilityService()
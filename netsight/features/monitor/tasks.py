@@ -0,0 +1,13 @@
+from netsight.core.celery_app import async_task, celery_app
+from netsight.core.database.session import async_session
+from netsight.features.monitor.services import reachability_service
+
+
+async def sweep_reachability() -> int:
+    async with async_session() as session:
+        return await reachability_service.sweep(session)
+
+
+@celery_app.task(name="netsight.sweep_reachability")
+def sweep_reachability_task() -> int:
+    return async_task(sweep_reachability)()
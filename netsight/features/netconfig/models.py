@@ -2,11 +2,12 @@ from typing import TYPE_CHECKING
 
 from sqlalchemy import ForeignKey, String
 from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from netsight.core.database import Base
 from netsight.core.database.mixins import AuditLogMixin, AuditUserMixin
 from netsight.core.database.types import EncryptedString, int_pk
+from netsight.features.netconfig.schemas import CliCredential
 
 if TYPE_CHECKING:
     from netsight.features.dcim.models import Platform
@@ -33,13 +34,20 @@ class AuthCredential(Base, AuditUserMixin, AuditLogMixin):
     __tablename__ = "auth_credential"
     __visible_name__ = {"en": "Auth Crendential", "zh": "认证凭证"}
     id: Mapped[int_pk]
-    cli: Mapped[str | None] = mapped_column(EncryptedString())
+    cli: Mapped[str | None] = mapped_column(EncryptedString())  # JSON of CliCredential
     snmpv2_community: Mapped[str | None] = mapped_column(EncryptedString())
     snmpv3: Mapped[str | None] = mapped_column(EncryptedString())
     site_group_id: Mapped[int | None] = mapped_column(ForeignKey("site_group.id", ondelete="CASCADE"))
     site_id: Mapped[int | None] = mapped_column(ForeignKey("site.id", ondelete="CASCADE"))
     device_id: Mapped[int | None] = mapped_column(ForeignKey("device.id", ondelete="CASCADE"))
 
+    @validates("cli")
+    def validate_cli(self, key: str, cli: str | None) -> str | None:  # noqa: ARG002
+        # refused when written, a credential the collectors can't log in with is never stored
+        if cli is not None:
+            CliCredential.model_validate_json(cli)
+        return cli
+
 
 class TextFsmTemplate(Base, AuditUserMixin):
     __tablename__ = "textfsm_template"
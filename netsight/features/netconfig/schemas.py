@@ -0,0 +1,9 @@
+from netsight.features._types import BaseModel
+
+
+class CliCredential(BaseModel):
+    """The JSON object kept encrypted in `AuthCredential.cli`."""
+
+    username: str
+    password: str
+    secret: str | None = None
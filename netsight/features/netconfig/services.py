@@ -0,0 +1,66 @@
+import re
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import select
+
+from netsight.core.config import settings
+from netsight.core.errors.exception_handlers import NotFoundError
+from netsight.core.utils.context import locale_ctx
+from netsight.features.netconfig.models import TextFsmTemplate
+from netsight.libs.netty.parser import ParsedTable, TextFsmParser
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+__all__ = ("textfsm_service",)
+
+
+class TextFsmService:
+    def __init__(self, parser: TextFsmParser) -> None:
+        self.parser = parser
+
+    async def parse(
+        self,
+        session: "AsyncSession",
+        platform_id: int,
+        name: str,
+        output: str,
+        split_at: str | re.Pattern[str] | None = None,
+    ) -> ParsedTable:
+        """Parse `output` with the platform's template `name`.
+
+        Compiled templates are cached by `(platform_id, name, updated_at)`, an edited template is
+        compiled again on its next use. `split_at` matches the first line of a record, see
+        `TextFsmParser`.
+        """
+        key, template = await self.template(session, platform_id, name)
+        return await self.parser.parse(key, template, output, split_at)
+
+    async def parse_stream(
+        self,
+        session: "AsyncSession",
+        platform_id: int,
+        name: str,
+        output: AsyncIterable[str],
+        split_at: str | re.Pattern[str],
+    ) -> AsyncIterator[ParsedTable]:
+        """Parse `output` with the platform's template `name` while it is read, see `parse`.
+
+        The template is looked up when awaited, the session is free while the tables are iterated.
+        """
+        key, template = await self.template(session, platform_id, name)
+        return self.parser.parse_stream(key, template, output, split_at)
+
+    @staticmethod
+    async def template(session: "AsyncSession", platform_id: int, name: str) -> tuple[tuple[int, str, Any], str]:
+        stmt = select(TextFsmTemplate.template, TextFsmTemplate.updated_at).where(
+            TextFsmTemplate.platform_id == platform_id, TextFsmTemplate.name == name
+        )
+        row = (await session.execute(stmt)).first()
+        if row is None:
+            raise NotFoundError(TextFsmTemplate.__visible_name__[locale_ctx.get()], "name", name)
+        return (platform_id, name, row.updated_at), row.template
+
+
+textfsm_service = TextFsmService(TextFsmParser(settings.TEXTFSM_PARSER_WORKERS))
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from netsight.core.errors.exception_handlers import NotFoundError
 from netsight.core.utils.cbv import cbv
-from netsight.core.utils.validators import list_to_tree
-from netsight.features._types import AuditLog, IdResponse, ListT
+from netsight.core.utils.context import locale_ctx
+from netsight.features._types import AuditLog, IdResponse, ListT, list_response
 from netsight.features.admin.models import User
 from netsight.features.deps import auth, get_session
+from netsight.features.ipam.models import ASN
 from netsight.features.org import schemas, services
 from netsight.features.org.models import Location, Site, SiteGroup
 
@@ -37,18 +39,21 @@ class SiteGroupAPI:
             id,
             selectinload(SiteGroup.created_by).load_only(User.id, User.name, User.email, User.avatar),
             selectinload(SiteGroup.updated_by).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(SiteGroup.site).load_only(Site.id, Site.name, Site.site_code),
         )
         return schemas.SiteGroup.model_validate(db_group)
 
-    @router.get("/site-groups", operation_id="150588da-6075-408c-8d63-9661e8fcd097")
-    async def get_site_groups(self, q: schemas.SiteGroupQuery = Depends()) -> ListT[schemas.SiteGroupList]:
+    @router.get(
+        "/site-groups", operation_id="150588da-6075-408c-8d63-9661e8fcd097", response_model=ListT[schemas.SiteGroupList]
+    )
+    async def get_site_groups(self, q: schemas.SiteGroupQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(
             self.session,
             q,
             selectinload(SiteGroup.created_by).load_only(User.id, User.name, User.email, User.avatar),
             selectinload(SiteGroup.updated_by).load_only(User.id, User.name, User.email, User.avatar),
         )
-        return ListT(count=count, results=[schemas.SiteGroupList.model_validate(r) for r in results])
+        return list_response(count, results, schemas.SiteGroupList)
 
     @router.delete("/site-groups/{id}", operation_id="506e84a1-5256-420d-bae1-7bb1f1676175")
     async def delete_site_groups(self, id: int) -> IdResponse:
@@ -79,26 +84,28 @@ class SiteAPI:
         db_site = await self.service.get_one_or_404(
             self.session,
             id,
-            selectinload(SiteGroup.created_by).load_only(User.id, User.name, User.email, User.avatar),
-            selectinload(SiteGroup.updated_by).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(Site.created_by).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(Site.updated_by).load_only(User.id, User.name, User.email, User.avatar),
             selectinload(Site.site_group).load_only(SiteGroup.id, SiteGroup.name),
             selectinload(Site.network_contact).load_only(User.id, User.name, User.email, User.avatar),
             selectinload(Site.it_contact).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(Site.asn).load_only(ASN.id, ASN.asn),
         )
         return schemas.Site.model_validate(db_site)
 
-    @router.get("/sites", operation_id="8528d436-f475-4dfb-9a35-f408fac650ff")
-    async def get_sites(self, q: schemas.SiteQuery = Depends()) -> ListT[schemas.Site]:
+    @router.get("/sites", operation_id="8528d436-f475-4dfb-9a35-f408fac650ff", response_model=ListT[schemas.Site])
+    async def get_sites(self, q: schemas.SiteQuery = Depends()) -> Response:
         count, results = await self.service.list_and_count(
             self.session,
             q,
-            selectinload(SiteGroup.created_by).load_only(User.id, User.name, User.email, User.avatar),
-            selectinload(SiteGroup.updated_by).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(Site.created_by).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(Site.updated_by).load_only(User.id, User.name, User.email, User.avatar),
             selectinload(Site.site_group).load_only(SiteGroup.id, SiteGroup.name),
             selectinload(Site.network_contact).load_only(User.id, User.name, User.email, User.avatar),
             selectinload(Site.it_contact).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(Site.asn).load_only(ASN.id, ASN.asn),
         )
-        return ListT(count=count, results=[schemas.Site.model_validate(r) for r in results])
+        return list_response(count, results, schemas.Site)
 
     @router.delete("/sites/{id}", operation_id="1b349641-8fd1-42aa-b206-a6bb1bfa7de1")
     async def delete_sites(self, id: int) -> IdResponse:
@@ -114,12 +121,12 @@ class SiteAPI:
         return ListT(count=count, results=[AuditLog.model_validate(r) for r in results])
 
     @router.get("/sites/{id}/locations", operation_id="6062a33d-e699-42b8-a775-1b48f6a30209")
-    async def get_site_locations(self, id: int) -> schemas.LocationTree:
-        locations = await self.service.get_site_locations(self.session, id)
-        tree = list_to_tree([location.dict() for location in locations])
-        return schemas.LocationTree.model_validate(tree)
+    async def get_site_locations(self, id: int) -> list[schemas.LocationTree]:
+        tree = await self.service.get_site_locations(self.session, id)
+        return [schemas.LocationTree.model_validate(node) for node in tree]
 
 
+@cbv(router)
 class LocationAPI:
     session: AsyncSession = Depends(get_session)
     user: User = Depends(auth)
@@ -147,6 +154,26 @@ class LocationAPI:
         )
         return schemas.Location.model_validate(db_location)
 
+    @router.get(
+        "/locations", operation_id="5b0e7d41-8c2f-4a93-b6e1-3f9d2a7c0e58", response_model=ListT[schemas.Location]
+    )
+    async def get_locations(self, q: schemas.LocationQuery = Depends()) -> Response:
+        count, results = await self.service.list_and_count(
+            self.session,
+            q,
+            selectinload(Location.site).load_only(Site.id, Site.name, Site.site_code),
+            selectinload(Location.created_by).load_only(User.id, User.name, User.email, User.avatar),
+            selectinload(Location.updated_by).load_only(User.id, User.name, User.email, User.avatar),
+        )
+        return list_response(count, results, schemas.Location)
+
+    @router.get("/locations/{id}/tree", operation_id="d2a6f3c8-41b7-4e59-9c0a-7f85e1b3d624")
+    async def get_location_tree(self, id: int) -> schemas.LocationTree:
+        tree = await self.service.get_tree(self.session, Location.in_subtree(id))
+        if not tree:
+            raise NotFoundError(Location.__visible_name__[locale_ctx.get()], "id", id)
+        return schemas.LocationTree.model_validate(tree[0])
+
     @router.delete("/locations/{id}", operation_id="7bf1bc42-4f89-4333-af8c-053977e91f27")
     async def delete_locations(self, id: int) -> IdResponse:
         db_location = await self.service.get_one_or_404(self.session, id)
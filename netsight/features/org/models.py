@@ -1,11 +1,14 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, Integer, String, UniqueConstraint, func, select
-from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
+from sqlalchemy import ColumnElement, ForeignKey, Index, Integer, String, UniqueConstraint, func, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Mapped, aliased, mapped_column, relationship
 from sqlalchemy.orm.collections import attribute_mapped_collection
 from sqlalchemy_utils.types import ChoiceType
 
 from netsight.core.database import Base
+from netsight.core.database.counters import counter_column
 from netsight.core.database.mixins import AuditLogMixin, AuditUserMixin
 from netsight.core.database.types import int_pk
 from netsight.features.consts import LocationStatus, LocationType, SiteStatus
@@ -44,27 +47,8 @@ class Site(Base, AuditUserMixin, AuditLogMixin):
     network_contact: Mapped["User"] = relationship(backref="site_network_contact", foreign_keys=[network_contact_id])
     it_contact: Mapped["User"] = relationship(backref="site_it_contact", foreign_keys=[it_contact_id])
 
-    if TYPE_CHECKING:
-        device_count: Mapped[int]
-        circuit_count: Mapped[int]
-
-    @classmethod
-    def __declare_last__(cls) -> None:
-        from sqlalchemy import func, or_, select
-
-        from netsight.features.circuit.models import Circuit
-        from netsight.features.dcim.models import Device
-
-        cls.device_count = column_property(
-            select(func.count(Device.id)).where(Device.site_id == cls.id).scalar_subquery(),
-            deferred=True,
-        )
-        cls.circuit_count = column_property(
-            select(func.count(Circuit.id))
-            .where(or_(Circuit.site_a_id == cls.id, Circuit.site_z_id == cls.id))
-            .scalar_subquery(),
-            deferred=True,
-        )
+    device_count: Mapped[int] = counter_column("device", "site_id")
+    circuit_count: Mapped[int] = counter_column("circuit", "site_a_id", "site_z_id")
 
 
 class SiteGroup(Base, AuditUserMixin):
@@ -80,17 +64,17 @@ class SiteGroup(Base, AuditUserMixin):
     name: Mapped[str] = mapped_column(unique=True)
     description: Mapped[str | None]
     site: Mapped[list["Site"]] = relationship(back_populates="site_group")
-    site_count: Mapped[int] = column_property(
-        select(func.count(Site.id)).where(Site.site_group_id == id).scalar_subquery(),
-        deferred=True,
-    )
+    site_count: Mapped[int] = counter_column("site", "site_group_id")
 
 
 class Location(Base, AuditUserMixin, AuditLogMixin):
     """a sub location of site, like building, floor, idf, mdf and etc"""
 
     __tablename__ = "location"
-    __table_args__ = (UniqueConstraint("site_id", "name"),)
+    __table_args__ = (
+        UniqueConstraint("site_id", "name"),
+        Index("ix_location_ancestors", "ancestors", postgresql_using="gin"),
+    )
     __visible_name__ = {"en": "Location", "zh": "位置"}
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str]
@@ -103,8 +87,29 @@ class Location(Base, AuditUserMixin, AuditLogMixin):
     children: Mapped[list["Location"]] = relationship(
         cascade="all, delete-orphan",
         back_populates="parent",
-        remote_side=[id],
         collection_class=attribute_mapped_collection("name"),
         single_parent=True,
     )
-    parent: Mapped["Location"] = relationship(back_populates="children", remote_side=[parent_id])
+    parent: Mapped["Location"] = relationship(back_populates="children", remote_side=[id])
+    ancestors: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer), default=list, server_default="{}", comment="ids from the root down to the parent"
+    )
+
+    @hybrid_property
+    def depth(self) -> int:
+        return len(self.ancestors) + 1
+
+    @depth.inplace.expression
+    @classmethod
+    def _depth_expression(cls) -> ColumnElement[int]:
+        return func.cardinality(cls.ancestors) + 1
+
+    @classmethod
+    def in_subtree(cls, location_id: int) -> ColumnElement[bool]:
+        """`location_id` and every location under it, served by the GIN index on `ancestors`."""
+        return or_(cls.id == location_id, cls.ancestors.contains([location_id]))
+
+    @classmethod
+    def is_ancestor_of(cls, location_id: int) -> ColumnElement[bool]:
+        child = aliased(cls)
+        return cls.id.in_(select(func.unnest(child.ancestors)).where(child.id == location_id))
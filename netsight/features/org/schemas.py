@@ -130,10 +130,13 @@ class LocationQuery(QueryParams):
     status: list[LocationStatus] | None = Field(Query(default=[]))
     site_id: list[int] | None = Field(Query(default=[]))
     parent_id: list[int] | None = Field(Query(default=[]))
+    subtree_of: int | None = Query(default=None, description="The location and every location under it")
+    ancestors_of: int | None = Query(default=None, description="Every location above the location")
 
 
 class LocationTree(LocationBase):
     id: int
+    depth: int
     children: list["LocationTree"] | None = None
 
 
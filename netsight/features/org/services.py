@@ -1,12 +1,22 @@
-from collections.abc import Sequence
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import or_, select, update
+from sqlalchemy import ColumnElement, Integer, Select, cast, func, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 
+from netsight.core.errors import err_codes
+from netsight.core.errors.exception_handlers import GenerError
 from netsight.core.repositories import BaseRepository
 from netsight.core.utils.context import locale_ctx
+from netsight.core.utils.validators import list_to_tree
 from netsight.features.circuit.models import Circuit
-from netsight.features.consts import CircuitStatus, DeviceStatus, PrefixStatus, SiteStatus, VLANStatus
+from netsight.features.consts import (
+    LOCATION_MAX_DEPTH,
+    CircuitStatus,
+    DeviceStatus,
+    PrefixStatus,
+    SiteStatus,
+    VLANStatus,
+)
 from netsight.features.dcim.models import Device
 from netsight.features.ipam.models import VLAN, Prefix
 from netsight.features.org import schemas
@@ -82,16 +92,112 @@ class SiteService(BaseRepository[Site, schemas.SiteCreate, schemas.SiteUpdate, s
             )
         return await super().update(session, db_obj, obj_in, excludes, commit)
 
-    async def get_site_locations(self, session: "AsyncSession", site_id: int) -> Sequence[Location]:
-        location_service = LocationService(Location)
-        stmt = location_service._get_base_stmt().where(Location.site_id == site_id)  # noqa: SLF001
-        return (await session.scalars(stmt)).all()
+    async def get_site_locations(self, session: "AsyncSession", site_id: int) -> list[dict[str, Any]]:
+        return await location_service.get_tree(session, Location.site_id == site_id)
 
 
 class LocationService(BaseRepository[Location, schemas.LocationCreate, schemas.LocationUpdate, schemas.LocationQuery]):
     async def get_location_site_id(self, session: "AsyncSession", location_id: int) -> int:
         return (await session.scalars(select(Location.site_id).where(Location.id == location_id))).one()
 
+    def _apply_list(
+        self, stmt: Select[tuple[Location]], query: schemas.LocationQuery, excludes: set[str] | None = None
+    ) -> Select[tuple[Location]]:
+        stmt = super()._apply_list(stmt, query, {"subtree_of", "ancestors_of"} | (excludes or set()))
+        if query.subtree_of is not None:
+            stmt = stmt.where(Location.in_subtree(query.subtree_of))
+        if query.ancestors_of is not None:
+            stmt = stmt.where(Location.is_ancestor_of(query.ancestors_of))
+        return stmt
+
+    async def get_tree(self, session: "AsyncSession", *where: ColumnElement[bool]) -> list[dict[str, Any]]:
+        """Load the matching locations with one query and nest them, locations whose parent
+        is not part of the result become roots.
+        """
+        stmt = (
+            select(
+                Location.id,
+                Location.name,
+                Location.location_type,
+                Location.status,
+                Location.description,
+                Location.parent_id,
+                Location.depth,
+            )
+            .where(*where)
+            .order_by(Location.depth, Location.name)
+        )
+        nodes = [dict(row) for row in (await session.execute(stmt)).mappings()]
+        ids = {node["id"] for node in nodes}
+        for node in nodes:
+            if node["parent_id"] not in ids:
+                node["parent_id"] = None
+        return list_to_tree(nodes)
+
+    async def get_ancestors(self, session: "AsyncSession", parent_id: int | None, site_id: int) -> list[int]:
+        """Ancestors of a location placed under `parent_id`, the parent has to be in the same site."""
+        if parent_id is None:
+            return []
+        parent = await self.get_one_or_404(session, parent_id)
+        if parent.site_id != site_id:
+            raise GenerError(err_codes.ERR_20002, {"parent_id": parent_id})
+        return [*parent.ancestors, parent.id]
+
+    @staticmethod
+    def check_depth(depth: int) -> None:
+        if depth > LOCATION_MAX_DEPTH:
+            raise GenerError(err_codes.ERR_20001, {"max_depth": LOCATION_MAX_DEPTH})
+
+    async def create(
+        self,
+        session: "AsyncSession",
+        obj_in: schemas.LocationCreate,
+        excludes: set[str] | None = None,
+        exclude_unset: bool = False,
+        exclude_none: bool = False,
+        commit: bool | None = True,
+    ) -> Location:
+        ancestors = await self.get_ancestors(session, obj_in.parent_id, obj_in.site_id)
+        self.check_depth(len(ancestors) + 1)
+        new_location = await super().create(session, obj_in, excludes, exclude_unset, exclude_none, commit=False)
+        new_location.ancestors = ancestors
+        if commit:
+            return await self.commit(session, new_location)
+        return new_location
+
+    async def update(
+        self,
+        session: "AsyncSession",
+        db_obj: Location,
+        obj_in: schemas.LocationUpdate,
+        excludes: set[str] | None = None,
+        commit: bool | None = True,
+    ) -> Location:
+        if "parent_id" in obj_in.model_fields_set and obj_in.parent_id != db_obj.parent_id:
+            await self.move(session, db_obj, obj_in.parent_id)
+        return await super().update(session, db_obj, obj_in, excludes, commit)
+
+    async def move(self, session: "AsyncSession", location: Location, parent_id: int | None) -> None:
+        """Rebase `location` and its subtree under `parent_id` with one UPDATE of the descendants."""
+        ancestors = await self.get_ancestors(session, parent_id, location.site_id)
+        if location.id in ancestors:
+            raise GenerError(err_codes.ERR_20002, {"parent_id": parent_id})
+        deepest = await session.scalar(select(func.max(Location.depth)).where(Location.in_subtree(location.id)))
+        self.check_depth(len(ancestors) + 1 + (deepest or location.depth) - location.depth)
+        # descendants keep everything from `location.id` on and get the new ancestors as prefix
+        old_prefix = len(location.ancestors)
+        await session.execute(
+            update(Location)
+            .where(Location.ancestors.contains([location.id]))
+            .values(
+                ancestors=func.array_cat(
+                    cast(ancestors, ARRAY(Integer)), Location.ancestors[old_prefix + 1 : LOCATION_MAX_DEPTH]
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        location.ancestors = ancestors
+
 
 site_group_service = SiteGroupService(SiteGroup)
 site_service = SiteService(Site)
@@ -1,4 +1,4 @@
-from pydantic import IPvAnyAddress, IPvAnyNetwork
+from pydantic import IPvAnyAddress, IPvAnyInterface, IPvAnyNetwork
 
 from netsight.features._types import BaseModel, I18nField
 
@@ -32,7 +32,7 @@ class PrefixBrief(BaseModel):
 
 class IPAddressBrief(BaseModel):
     id: int
-    address: IPvAnyAddress
+    address: IPvAnyInterface
 
 
 class IPRangeBrief(BaseModel):
@@ -0,0 +1,56 @@
+"""Free space of an address range given the ranges already allocated in it.
+
+Addresses are plain integers, so IPv4 and IPv6 share the code. `used` is consumed lazily in
+address order and the search stops as soon as enough space is found: with the children streamed
+from an index-ordered scan the cost is the index seek plus the allocated ranges in front of the
+free space, the rest of the parent is never read.
+"""
+
+from collections.abc import AsyncIterable, AsyncIterator
+
+__all__ = ("allocate_addresses", "allocate_blocks", "free_ranges")
+
+
+async def free_ranges(first: int, last: int, used: AsyncIterable[tuple[int, int]]) -> AsyncIterator[tuple[int, int]]:
+    """Yield the (first, last) ranges of [first, last] not covered by `used`.
+
+    `used` must be sorted by start, ranges may overlap or be nested in each other.
+    """
+    cursor = first
+    async for start, end in used:
+        if start > last:
+            break
+        if end < cursor:
+            continue
+        if start > cursor:
+            yield cursor, start - 1
+        cursor = end + 1
+        if cursor > last:
+            return
+    if cursor <= last:
+        yield cursor, last
+
+
+async def allocate_blocks(
+    first: int, last: int, used: AsyncIterable[tuple[int, int]], size: int, count: int
+) -> list[int]:
+    """First addresses of the lowest `count` free blocks of `size` addresses aligned on their size."""
+    starts: list[int] = []
+    async for low, high in free_ranges(first, last, used):
+        start = -(-low // size) * size
+        while start + size - 1 <= high:
+            starts.append(start)
+            if len(starts) == count:
+                return starts
+            start += size
+    return starts
+
+
+async def allocate_addresses(first: int, last: int, used: AsyncIterable[tuple[int, int]], count: int) -> list[int]:
+    """The lowest `count` free addresses."""
+    addresses: list[int] = []
+    async for low, high in free_ranges(first, last, used):
+        addresses.extend(range(low, min(high, low + count - len(addresses) - 1) + 1))
+        if len(addresses) == count:
+            break
+    return addresses
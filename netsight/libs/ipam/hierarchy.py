@@ -0,0 +1,66 @@
+"""Prefix hierarchy computed with one sorted sweep.
+
+Sorted by (vrf, family, first address, prefix length) a supernet always comes right before its
+subnets, so walking the list with a stack of the currently open prefixes gives every prefix its
+closest containing prefix (the top of the stack) and its depth (the stack size) in O(n log n),
+instead of checking every pair.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from ipaddress import IPv4Network, IPv6Network
+from typing import NamedTuple
+
+__all__ = ("Placement", "PrefixNode", "build_hierarchy")
+
+
+class PrefixNode(NamedTuple):
+    id: int
+    vrf_id: int | None
+    prefix: IPv4Network | IPv6Network
+
+
+class Placement(NamedTuple):
+    parent_id: int | None
+    depth: int
+    children_count: int
+
+
+def build_hierarchy(nodes: Iterable[PrefixNode]) -> dict[int, Placement]:
+    """Place every prefix under the most specific prefix containing it in the same VRF.
+
+    `children_count` counts direct children only. Prefixes of the global table (vrf_id None) form
+    their own hierarchy like any other VRF. Duplicates, in a VRF not enforcing unique space, nest by
+    id: each is placed under its twin with the next lower id.
+    """
+    ranges = []
+    for node in nodes:
+        first = int(node.prefix.network_address)
+        last = int(node.prefix.broadcast_address)
+        ranges.append((node.vrf_id is not None, node.vrf_id or 0, node.prefix.version, first, -last, node.id))
+    ranges.sort()
+
+    parents: dict[int, int | None] = {}
+    depths: dict[int, int] = {}
+    counts: defaultdict[int, int] = defaultdict(int)
+    stack: list[tuple[int, int]] = []  # (last address, id) of the open prefixes
+    scope: tuple[bool, int, int] | None = None
+    for has_vrf, vrf_id, version, _, neg_last, prefix_id in ranges:
+        if (has_vrf, vrf_id, version) != scope:
+            scope = (has_vrf, vrf_id, version)
+            stack.clear()
+        # every prefix on the stack starts at or before this one, it contains it unless it ends before it,
+        # a twin sorts before it by id and stays open
+        while stack and stack[-1][0] < -neg_last:
+            stack.pop()
+        parent_id = stack[-1][1] if stack else None
+        if parent_id is not None:
+            counts[parent_id] += 1
+        parents[prefix_id] = parent_id
+        depths[prefix_id] = len(stack)
+        stack.append((-neg_last, prefix_id))
+
+    return {
+        prefix_id: Placement(parent_id, depths[prefix_id], counts[prefix_id])
+        for prefix_id, parent_id in parents.items()
+    }
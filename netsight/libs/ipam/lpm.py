@@ -0,0 +1,256 @@
+"""Longest prefix match of whole batches of addresses with sorted disjoint intervals.
+
+The prefixes of a VRF are flattened into disjoint intervals, each one owned by the most specific
+prefix covering it. Looking up a batch of addresses is then one `np.searchsorted` over the
+interval starts and a check of the interval ends, instead of a query or a trie walk per address.
+Keys carry the VRF (0 for the global table) in their high bits, `vrf << 32 | address` for IPv4 and
+20 bytes of big endian vrf, high and low words for IPv6, bytes compare much faster than records
+in `np.searchsorted`. One sorted array holds every VRF and a VRF is a contiguous slice of it
+that can be replaced on its own.
+
+An index is saved as .npy files in a snapshot directory. Worker processes open it with
+`np.load(mmap_mode="r")` and share its pages through the page cache, `PrefixIndexStore` swaps
+snapshots atomically.
+"""
+
+import json
+import os
+import shutil
+import time
+from collections.abc import Collection, Iterable
+from pathlib import Path
+from typing import NamedTuple, Self
+
+import numpy as np
+
+from netsight.libs.ipam.utilization import from_keys, to_keys
+
+__all__ = ("PREFIX_ROW", "PrefixGroup", "PrefixIndex", "PrefixIndexStore")
+
+PREFIX_ROW = np.dtype(
+    [("id", np.int64), ("vrf_id", np.int64), ("vlan_id", np.int64), ("site_id", np.int64), ("role_id", np.int64)]
+)
+_IPV6_VRF_KEY = np.dtype([("vrf", ">u4"), ("high", ">u8"), ("low", ">u8")])
+_IPV4 = 4
+_VERSIONS = (4, 6)
+_CURRENT = "CURRENT"
+
+
+class PrefixGroup(NamedTuple):
+    """The prefixes of one family of one VRF, NULL ids as 0."""
+
+    vrf_id: int
+    version: int
+    ids: np.ndarray
+    firsts: np.ndarray  # keys, see netsight.libs.ipam.utilization
+    lasts: np.ndarray
+    vlan_ids: np.ndarray
+    site_ids: np.ndarray
+    role_ids: np.ndarray
+
+
+class _Intervals(NamedTuple):
+    starts: np.ndarray
+    ends: np.ndarray
+    rows: np.ndarray
+
+
+def _flatten(firsts: list[int], lasts: list[int]) -> tuple[list[int], list[int], list[int]]:
+    """Disjoint intervals of nested prefixes and the position of the most specific prefix of each.
+
+    Sorted by first address then widest first, every prefix on the stack contains the next one
+    until it ends, the gaps a prefix leaves between its subnets belong to it. Of duplicates the
+    last one wins.
+    """
+    starts: list[int] = []
+    ends: list[int] = []
+    owners: list[int] = []
+    stack: list[tuple[int, int]] = []  # (last address, position) of the open prefixes
+    cursor = 0
+
+    def close(until: int) -> None:
+        nonlocal cursor
+        while stack and stack[-1][0] < until:
+            last, position = stack.pop()
+            if cursor <= last:
+                starts.append(cursor)
+                ends.append(last)
+                owners.append(position)
+                cursor = last + 1
+
+    for position in sorted(range(len(firsts)), key=lambda i: (firsts[i], -lasts[i])):
+        first = firsts[position]
+        close(first)
+        if stack and cursor < first:
+            starts.append(cursor)
+            ends.append(first - 1)
+            owners.append(stack[-1][1])
+        stack.append((lasts[position], position))
+        cursor = first
+    close(1 << 128)
+    return starts, ends, owners
+
+
+def _keys(vrf_ids: np.ndarray | int, addresses: np.ndarray, version: int) -> np.ndarray:
+    if version == _IPV4:
+        return np.asarray(vrf_ids, dtype=np.uint64) << np.uint64(32) | addresses.astype(np.uint64)
+    keys = np.empty(len(addresses), dtype=_IPV6_VRF_KEY)
+    keys["vrf"], keys["high"], keys["low"] = vrf_ids, addresses["high"], addresses["low"]
+    return keys.view(f"S{_IPV6_VRF_KEY.itemsize}")
+
+
+def _vrfs(keys: np.ndarray) -> np.ndarray:
+    if keys.dtype.kind == "S":
+        return keys.view(_IPV6_VRF_KEY)["vrf"].astype(np.uint64)
+    return keys >> np.uint64(32)
+
+
+class PrefixIndex:
+    """Most specific prefix of addresses, for all VRFs at once.
+
+    `rows` are the matched prefixes, row 0 is all zeros and stands for no match. `mark` is the
+    position in the change log the index is up to date with, `built_at` when it was last built
+    from scratch.
+    """
+
+    def __init__(self, rows: np.ndarray, families: dict[int, _Intervals], mark: int, built_at: float) -> None:
+        self.rows = rows
+        self.families = families
+        self.mark = mark
+        self.built_at = built_at
+
+    @classmethod
+    def build(cls, groups: Iterable[PrefixGroup], mark: int) -> Self:
+        empty = cls(np.zeros(1, dtype=PREFIX_ROW), {}, mark, time.time())
+        return empty.replace(groups, (), mark, built_at=empty.built_at)
+
+    def replace(
+        self, groups: Iterable[PrefixGroup], vrf_ids: Collection[int], mark: int, built_at: float | None = None
+    ) -> Self:
+        """A new index with the prefixes of `vrf_ids` replaced by `groups`, the other VRFs are kept."""
+        tables = [self.rows]
+        offset = len(self.rows)
+        added: dict[int, list[_Intervals]] = {version: [] for version in _VERSIONS}
+        for group in groups:
+            starts, ends, owners = _flatten(from_keys(group.firsts), from_keys(group.lasts))
+            table = np.empty(len(group.ids), dtype=PREFIX_ROW)
+            table["id"], table["vrf_id"] = group.ids, group.vrf_id
+            table["vlan_id"], table["site_id"], table["role_id"] = group.vlan_ids, group.site_ids, group.role_ids
+            tables.append(table)
+            added[group.version].append(
+                _Intervals(
+                    _keys(group.vrf_id, to_keys(starts, group.version), group.version),
+                    _keys(group.vrf_id, to_keys(ends, group.version), group.version),
+                    np.asarray(owners, dtype=np.int64) + offset,
+                )
+            )
+            offset += len(table)
+
+        families = {}
+        for version in _VERSIONS:
+            parts = added[version]
+            if version in self.families:
+                kept = self.families[version]
+                keep = ~np.isin(_vrfs(kept.starts), np.fromiter(vrf_ids, dtype=np.uint64))
+                parts = [_Intervals(kept.starts[keep], kept.ends[keep], kept.rows[keep]), *parts]
+            if not parts:
+                continue
+            starts = np.concatenate([part.starts for part in parts])
+            order = np.argsort(starts, kind="stable")
+            families[version] = _Intervals(
+                starts[order],
+                np.concatenate([part.ends for part in parts])[order],
+                np.concatenate([part.rows for part in parts])[order],
+            )
+
+        # drop the rows of replaced and fully shadowed prefixes, row 0 stays first
+        rows = np.concatenate(tables)
+        used, inverse = np.unique(
+            np.concatenate([[0], *(intervals.rows for intervals in families.values())]), return_inverse=True
+        )
+        bounds = np.cumsum([1, *(len(intervals.rows) for intervals in families.values())])
+        families = {
+            version: intervals._replace(rows=inverse[start:stop])
+            for (version, intervals), start, stop in zip(families.items(), bounds[:-1], bounds[1:], strict=True)
+        }
+        return type(self)(rows[used], families, mark, self.built_at if built_at is None else built_at)
+
+    def lookup(self, addresses: np.ndarray, version: int, vrf_ids: np.ndarray | int = 0) -> np.ndarray:
+        """Rows of the most specific prefix of each address, row 0 when none contains it.
+
+        `addresses` are keys of one family, see `netsight.libs.ipam.utilization.to_keys` and
+        `from_packed`, `vrf_ids` one VRF for all of them or one per address, 0 for the global table.
+        """
+        intervals = self.families.get(version)
+        if intervals is None or not len(intervals.starts):
+            return self.rows[np.zeros(len(addresses), dtype=np.int64)]
+        keys = _keys(vrf_ids, addresses, version)
+        # the last interval starting at or before an address is the only one that can contain it
+        positions = np.searchsorted(intervals.starts, keys, side="right") - 1
+        hit = (positions >= 0) & (intervals.ends[positions] >= keys)
+        return self.rows[np.where(hit, intervals.rows[positions], 0)]
+
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True)
+        np.save(directory / "rows.npy", self.rows)
+        for version, intervals in self.families.items():
+            for name, array in intervals._asdict().items():
+                np.save(directory / f"v{version}_{name}.npy", array)
+        (directory / "meta.json").write_text(json.dumps({"mark": self.mark, "built_at": self.built_at}))
+
+    @classmethod
+    def open(cls, directory: Path) -> Self:
+        """Memory map a saved index read only."""
+        meta = json.loads((directory / "meta.json").read_text())
+        families = {
+            version: _Intervals(
+                *(np.load(directory / f"v{version}_{name}.npy", mmap_mode="r") for name in _Intervals._fields)
+            )
+            for version in _VERSIONS
+            if (directory / f"v{version}_starts.npy").exists()
+        }
+        return cls(np.load(directory / "rows.npy", mmap_mode="r"), families, meta["mark"], meta["built_at"])
+
+
+class PrefixIndexStore:
+    """Snapshots of a `PrefixIndex` shared by the processes of a host.
+
+    `publish` writes a new snapshot directory and then points the CURRENT file at it, readers see
+    either the old or the new snapshot. `current` reopens the index when CURRENT changed, checking
+    at most every `check_interval` seconds. Replaced snapshots stay mapped by the processes still
+    using them until they reopen, the files are unlinked but not freed before.
+    """
+
+    def __init__(self, directory: str | Path, keep: int = 2, check_interval: float = 1.0) -> None:
+        self.directory = Path(directory)
+        self.keep = keep
+        self.check_interval = check_interval
+        self._index: PrefixIndex | None = None
+        self._generation: str | None = None
+        self._checked_at = float("-inf")
+
+    def publish(self, index: PrefixIndex) -> None:
+        generation = str(time.time_ns())
+        index.save(self.directory / generation)
+        pointer = self.directory / f"{_CURRENT}.{os.getpid()}"
+        pointer.write_text(generation)
+        pointer.replace(self.directory / _CURRENT)
+        snapshots = sorted(
+            (path for path in self.directory.iterdir() if path.is_dir() and path.name.isdigit()),
+            key=lambda path: int(path.name),
+        )
+        for path in snapshots[: -self.keep]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def current(self) -> PrefixIndex | None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._index
+        self._checked_at = now
+        try:
+            generation = (self.directory / _CURRENT).read_text()
+        except FileNotFoundError:
+            return self._index
+        if generation != self._generation:
+            self._index, self._generation = PrefixIndex.open(self.directory / generation), generation
+        return self._index
@@ -0,0 +1,147 @@
+"""Numbered resource pools (VLAN IDs, AS numbers) as bitsets.
+
+A pool is a bitset with one bit per number, set when the number is taken or not part of the pool.
+`BitmapPool` keeps the bitsets in redis: finding and taking free numbers is one script, atomic
+between API workers, and reads one bit per number instead of fetching every row. The database
+stays the source of truth, a missing or expired bitset is rebuilt from it and unique constraints
+reject a number a stale bitset handed out, the caller then invalidates the bitset and retries.
+Numbers taken but not used are given back the same way, a rebuilt bitset only has the rows.
+Without redis, `find_free` gives the same answer from a bitset built by the caller.
+"""
+
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+
+import numpy as np
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+from netsight.libs.redis import session
+from netsight.libs.redis.session import CacheNamespace
+
+__all__ = ("BitmapPool", "find_free", "to_bitmap")
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] bitset, ARGV: size, count, contiguous (0/1), take (0/1).
+# Returns false when the bitset is missing, the offsets found, nothing when there are not enough.
+# BITPOS in BIT mode (redis >= 7) skips whole runs of taken or free numbers per call.
+RESERVE_LUA = """
+local key = KEYS[1]
+local last = tonumber(ARGV[1]) - 1
+local count = tonumber(ARGV[2])
+local contiguous = ARGV[3] == '1'
+if redis.call('EXISTS', key) == 0 then
+    return false
+end
+local found = {}
+local pos = 0
+while #found < count and pos <= last do
+    local free = redis.call('BITPOS', key, 0, pos, last, 'BIT')
+    if free < 0 then
+        break
+    end
+    if not contiguous then
+        found[#found + 1] = free
+        pos = free + 1
+    else
+        if free + count - 1 > last then
+            break
+        end
+        local taken = redis.call('BITPOS', key, 1, free, free + count - 1, 'BIT')
+        if taken < 0 then
+            for offset = free, free + count - 1 do
+                found[#found + 1] = offset
+            end
+        else
+            pos = taken + 1
+        end
+    end
+end
+if #found < count then
+    return {}
+end
+if ARGV[4] == '1' then
+    for _, offset in ipairs(found) do
+        redis.call('SETBIT', key, offset, 1)
+    end
+end
+return found
+"""
+
+
+def to_bitmap(taken: Iterable[int], size: int) -> np.ndarray:
+    """Bitset of `size` numbers with the `taken` offsets set, the offsets outside are ignored."""
+    offsets = np.fromiter(taken, dtype=np.int64)
+    bits = np.zeros(size, dtype=bool)
+    bits[offsets[(offsets >= 0) & (offsets < size)]] = True
+    return bits
+
+
+def find_free(bits: np.ndarray, count: int, contiguous: bool = False) -> list[int]:
+    """The lowest `count` free offsets of `bits`, or the first run of `count` free ones, [] if none."""
+    if not contiguous:
+        free = np.flatnonzero(~bits)[:count]
+        return free.tolist() if len(free) == count else []
+    # starts and ends of the runs of free offsets
+    edges = np.flatnonzero(np.diff(np.concatenate(([True], bits, [True])).astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+    fits = np.flatnonzero(ends - starts >= count)
+    if not len(fits):
+        return []
+    return list(range(int(starts[fits[0]]), int(starts[fits[0]]) + count))
+
+
+class BitmapPool:
+    """Bitsets of numbered resources in redis, expiring after `expire` seconds."""
+
+    def __init__(self, expire: int, namespace: CacheNamespace = CacheNamespace.RESOURCE_POOL) -> None:
+        self.expire = expire
+        self.namespace = namespace
+        self._script: AsyncScript | None = None
+
+    def _get_script(self) -> AsyncScript:
+        client = session.redis_client
+        if self._script is None or self._script.registered_client is not client:
+            self._script = client.register_script(RESERVE_LUA)
+        return self._script
+
+    async def reserve(
+        self,
+        key: str,
+        size: int,
+        count: int,
+        load: Callable[[], Awaitable[np.ndarray]],
+        *,
+        contiguous: bool = False,
+        take: bool = True,
+    ) -> list[int] | None:
+        """Find `count` free offsets of the bitset `key` and take them unless `take` is false.
+
+        `load` builds the bitset from the database when redis has none. Returns [] when there
+        are not enough free offsets and None when redis is unavailable, the caller falls back to
+        `find_free` and serializes the allocations itself.
+        """
+        if session.redis_client is None:
+            return None
+        args = [size, count, int(contiguous), int(take)]
+        try:
+            found = await self._get_script()(keys=[self.namespace + key], args=args)
+            if found is None:
+                bits = np.packbits(await load()).tobytes()
+                # a concurrent rebuild may have won, its bitset is as good as this one
+                await session.redis_client.set(self.namespace + key, bits, ex=self.expire, nx=True)
+                found = await self._get_script()(keys=[self.namespace + key], args=args)
+        except RedisError as e:
+            logger.warning("Resource pool bitset unavailable, falling back to the database: %s", e)
+            return None
+        return [int(offset) for offset in found or []]
+
+    async def invalidate(self, *keys: str) -> None:
+        """Drop bitsets that no longer match the database, they are rebuilt by the next `reserve`."""
+        if session.redis_client is None or not keys:
+            return
+        try:
+            await session.redis_client.delete(*(self.namespace + key for key in keys))
+        except RedisError as e:
+            logger.warning("Failed to invalidate resource pool bitsets %s: %s", keys, e)
@@ -0,0 +1,94 @@
+"""Prefix and block utilization with sorted numpy arrays.
+
+Addresses become sortable keys: one uint64 per IPv4 address, a (high, low) pair of uint64 words
+per IPv6 address, built from Python integers or straight from packed network order bytes. Once
+the addresses of a VRF are sorted, the number of them inside every prefix is the difference of
+two `np.searchsorted` calls, so a whole VRF is counted in O((n + m) log n) without comparing
+every address against every prefix.
+"""
+
+from collections.abc import Iterable
+
+import numpy as np
+
+__all__ = (
+    "count_in_ranges",
+    "covered_size",
+    "from_keys",
+    "from_packed",
+    "outermost",
+    "sort_keys",
+    "to_keys",
+    "usable_sizes",
+)
+
+IPV6_KEY = np.dtype([("high", np.uint64), ("low", np.uint64)])
+_PACKED = {4: np.dtype(">u4"), 6: np.dtype([("high", ">u8"), ("low", ">u8")])}
+_LOW_WORD = (1 << 64) - 1
+_IPV4 = 4
+
+
+def to_keys(values: Iterable[int], version: int) -> np.ndarray:
+    """Integer addresses of one family as keys ordered like the addresses."""
+    if version == _IPV4:
+        return np.fromiter(values, dtype=np.uint64)
+    return np.fromiter(((value >> 64, value & _LOW_WORD) for value in values), dtype=IPV6_KEY)
+
+
+def from_keys(keys: np.ndarray) -> list[int]:
+    if keys.dtype != IPV6_KEY:
+        return keys.tolist()
+    return [high << 64 | low for high, low in keys.tolist()]
+
+
+def from_packed(buffer: bytes | None, version: int) -> np.ndarray:
+    """Keys of addresses concatenated in network byte order, 4 or 16 bytes each."""
+    packed = np.frombuffer(buffer or b"", dtype=_PACKED[version])
+    return packed.astype(np.uint64 if version == _IPV4 else IPV6_KEY)
+
+
+def sort_keys(keys: np.ndarray) -> np.ndarray:
+    if keys.dtype != IPV6_KEY:
+        return np.sort(keys)
+    # lexsort on the two words is much faster than sorting the records field by field
+    return keys[np.lexsort((keys["low"], keys["high"]))]
+
+
+def count_in_ranges(sorted_keys: np.ndarray, firsts: np.ndarray, lasts: np.ndarray) -> np.ndarray:
+    """How many of `sorted_keys` fall in each [first, last] range, the ranges may overlap."""
+    return np.searchsorted(sorted_keys, lasts, side="right") - np.searchsorted(sorted_keys, firsts, side="left")
+
+
+def outermost(firsts: np.ndarray, lasts: np.ndarray) -> np.ndarray:
+    """Mask of the distinct prefixes not inside another one of them.
+
+    Sorted by first address then widest first, a prefix is nested when one of the prefixes before
+    it ends at or after its last address. Addresses are replaced by their ranks so the running
+    maximum works on IPv6 keys too.
+    """
+    first_ranks = np.searchsorted(sort_keys(firsts), firsts)
+    last_ranks = np.searchsorted(sort_keys(lasts), lasts)
+    order = np.lexsort((-last_ranks, first_ranks))
+    ends = last_ranks[order]
+    reach = np.maximum.accumulate(np.concatenate(([-1], ends[:-1])))
+    mask = np.empty(len(order), dtype=bool)
+    mask[order] = reach < ends
+    return mask
+
+
+def covered_size(lengths: np.ndarray, max_prefixlen: int) -> int:
+    """Exact number of addresses of disjoint prefixes with `lengths`, IPv6 sizes overflow uint64."""
+    counts = np.bincount(lengths, minlength=max_prefixlen + 1)
+    return sum(int(count) << (max_prefixlen - length) for length, count in enumerate(counts) if count)
+
+
+def usable_sizes(lengths: np.ndarray, version: int) -> np.ndarray:
+    """Assignable addresses of prefixes, like the allocator.
+
+    The network and broadcast addresses of IPv4 and the subnet-router anycast address of IPv6 are
+    left out, except in point to point /31 and /127 and in host prefixes.
+    """
+    max_prefixlen = 32 if version == _IPV4 else 128
+    sizes = np.exp2(max_prefixlen - lengths.astype(np.float64))
+    reserved = 2 if version == _IPV4 else 1
+    return np.where(lengths < max_prefixlen - 1, sizes - reserved, sizes)
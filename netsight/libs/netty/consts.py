@@ -13,6 +13,21 @@ class NetmikoDriver(StrEnum):
     ARUBA = "aruba_os"
 
 
+# the routing table, the platform's routes template parses the output
+ROUTE_COMMANDS = {
+    NetmikoDriver.IOS: "show ip route",
+    NetmikoDriver.IOSXE: "show ip route",
+    NetmikoDriver.NXOS: "show ip route vrf all",
+    NetmikoDriver.IOSXR: "show route",
+    NetmikoDriver.HUAWEI: "display ip routing-table",
+    NetmikoDriver.HUAWEI_VRP: "display ip routing-table",
+    NetmikoDriver.HUAWEI_VRPV8: "display ip routing-table",
+    NetmikoDriver.HP_COMWARE: "display ip routing-table",
+    NetmikoDriver.ARUBA: "show ip route",
+}
+STREAM_READ_INTERVAL = 0.05  # seconds between reads of the channel while it has nothing
+
+
 PING_SOURCE = ""
 PING_SOURCE_INTERFACE = ""
 PING_TTL = 255
@@ -0,0 +1,177 @@
+"""Collect from many devices at once with the blocking `NettyFactory` getters.
+
+netmiko is blocking, so every device runs in a thread of a bounded pool while asyncio schedules
+them: a device only takes a thread once it is under the global, its site's and its platform's
+limits. A thread can't be interrupted, a device that times out keeps its slot until its thread
+returns, netmiko's own timeouts bound that. Results are yielded as devices finish, at most
+`max_pending` devices are scheduled at a time however many targets are given.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from typing import Any, NamedTuple
+
+from netsight.libs.netty.exceptions import NettyConnectionError, NettyTimeoutError
+from netsight.libs.netty.factory import NettySshFactory
+from netsight.libs.netty.scheduling import as_finished
+
+__all__ = ("CollectionEngine", "CollectionResult", "CollectionTarget")
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (NettyConnectionError, NettyTimeoutError, OSError, EOFError)
+
+
+class CollectionTarget(NamedTuple):
+    device_id: int
+    ip_address: str
+    platform: str
+    username: str
+    password: str
+    port: int = 22
+    secret: str | None = None
+    site_id: int | None = None
+
+
+class CollectionResult(NamedTuple):
+    """The getters' results by getter name, or the error of the last attempt."""
+
+    target: CollectionTarget
+    data: dict[str, Any] | None
+    error: BaseException | None
+    attempts: int
+    elapsed: float
+
+
+def ssh_factory(target: CollectionTarget, timeout: int) -> NettySshFactory:
+    return NettySshFactory(
+        target.ip_address,
+        target.port,
+        target.username,
+        target.password,
+        target.platform,
+        secret=target.secret,
+        timeout=timeout,
+    )
+
+
+class CollectionEngine:
+    """Run getters against devices with bounded concurrency, per-device timeouts and retries.
+
+    `concurrency` is the number of threads, `per_site` and `per_platform` the devices of one site
+    or platform collected at a time, targets without a site only count towards the others.
+    `timeout` bounds one attempt at one device, failed attempts are retried `retries` times
+    after an exponential backoff with jitter starting at `backoff` seconds. `factory` builds the
+    device session, a context manager with the getters.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 256,
+        *,
+        per_site: int = 32,
+        per_platform: int = 128,
+        timeout: float = 120,
+        retries: int = 2,
+        backoff: float = 5,
+        max_backoff: float = 60,
+        max_pending: int | None = None,
+        factory: Callable[[CollectionTarget, int], Any] = ssh_factory,
+    ) -> None:
+        self.concurrency = concurrency
+        self.per_site = per_site
+        self.per_platform = per_platform
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_pending = max_pending or concurrency * 4
+        self.factory = factory
+
+    async def collect(
+        self, targets: Iterable[CollectionTarget], getters: Sequence[str]
+    ) -> AsyncIterator[CollectionResult]:
+        """Yield the result of every target in the order they finish."""
+        slots = asyncio.Semaphore(self.concurrency)
+        sites: defaultdict[int, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_site))
+        platforms: defaultdict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_platform))
+        # not waiting for the threads of timed out devices on shutdown, they would block the loop
+        executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix="netty")
+
+        def start(target: CollectionTarget) -> Coroutine[Any, Any, CollectionResult]:
+            limits = [platforms[target.platform], slots]
+            if target.site_id is not None:
+                limits.insert(0, sites[target.site_id])
+            return self._collect(executor, limits, target, getters)
+
+        try:
+            async with aclosing(as_finished(targets, start, lambda: self.max_pending)) as results:
+                async for result in results:
+                    yield result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _collect(
+        self,
+        executor: ThreadPoolExecutor,
+        limits: list[asyncio.Semaphore],
+        target: CollectionTarget,
+        getters: Sequence[str],
+    ) -> CollectionResult:
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                data = await self._attempt(executor, limits, target, getters)
+            except RETRYABLE_ERRORS as e:
+                if attempt > self.retries:
+                    return CollectionResult(target, None, e, attempt, time.monotonic() - started)
+                logger.debug("Collecting from %s failed, attempt %d: %r", target.ip_address, attempt, e)
+            except Exception as e:  # noqa: BLE001
+                return CollectionResult(target, None, e, attempt, time.monotonic() - started)
+            else:
+                return CollectionResult(target, data, None, attempt, time.monotonic() - started)
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+            await asyncio.sleep(delay * random.uniform(0.5, 1))  # noqa: S311
+
+    async def _attempt(
+        self,
+        executor: ThreadPoolExecutor,
+        limits: list[asyncio.Semaphore],
+        target: CollectionTarget,
+        getters: Sequence[str],
+    ) -> dict[str, Any]:
+        # always acquired site, platform, global, a device never holds a slot waiting for another
+        acquired: list[asyncio.Semaphore] = []
+        try:
+            for limit in limits:
+                await limit.acquire()
+                acquired.append(limit)
+            future = asyncio.get_running_loop().run_in_executor(executor, self._run, target, getters)
+        except BaseException:
+            for limit in acquired:
+                limit.release()
+            raise
+
+        def release(_: asyncio.Future) -> None:
+            for limit in limits:
+                limit.release()
+
+        # the limits are held until the thread returns, not until the timeout
+        future.add_done_callback(release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except TimeoutError as e:
+            msg = f"Collecting from {target.ip_address} timed out after {self.timeout}s."
+            raise NettyTimeoutError(msg) from e
+
+    def _run(self, target: CollectionTarget, getters: Sequence[str]) -> dict[str, Any]:
+        with self.factory(target, int(self.timeout)) as device:
+            return {getter: getattr(device, getter)() for getter in getters}
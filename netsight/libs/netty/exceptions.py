@@ -0,0 +1,18 @@
+class NettyError(Exception):
+    """Base error of netty."""
+
+
+class NettyConnectionError(NettyError):
+    """The device is unreachable or closed the connection, retrying later may succeed."""
+
+
+class NettyAuthenticationError(NettyError):
+    """The device rejected the credentials, retrying with the same ones will not succeed."""
+
+
+class NettyTimeoutError(NettyError):
+    """Collecting from the device took longer than allowed."""
+
+
+class NettySnmpError(NettyError):
+    """The agent answered with an error or a message that can't be decoded or authenticated."""
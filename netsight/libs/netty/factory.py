@@ -1,6 +1,18 @@
-from typing import Protocol, TypeVar
-
-from netmiko import BaseConnection, ConnectHandler, ConnectionException
+import re
+import time
+from collections.abc import Iterator, Sequence
+from typing import Any, Protocol, Self, TypeVar
+
+from netmiko import (
+    BaseConnection,
+    ConnectHandler,
+    ConnectionException,
+    NetmikoAuthenticationException,
+    NetmikoTimeoutException,
+)
+
+from netsight.libs.netty.consts import ROUTE_COMMANDS, STREAM_READ_INTERVAL
+from netsight.libs.netty.exceptions import NettyAuthenticationError, NettyConnectionError, NettyTimeoutError
 
 SessionT = TypeVar("SessionT")
 
@@ -16,17 +28,22 @@ class NettyFactory(Protocol):
 
     def get_device_type(self) -> str: ...
 
-    def get_modules(self) -> list[str]: ...
+    # components are dicts of the columns of their dcim model, reconciled by natural key
+    def get_modules(self) -> list[dict[str, Any]]: ...
+
+    def get_stacks(self) -> list[dict[str, Any]]: ...
 
-    def get_stacks(self) -> list[str]: ...
+    def get_interfaces(self) -> list[dict[str, Any]]: ...
 
-    def get_interfaces(self) -> list[str]: ...
+    def get_equipments(self) -> list[dict[str, Any]]: ...
 
-    def get_lldp_neighbors(self) -> list[str]: ...
+    # neighbors are dicts of the local interface, the neighbor's device name and its interface
+    def get_lldp_neighbors(self) -> list[dict[str, Any]]: ...
 
-    def get_arp_table(self) -> list[str]: ...
+    # table entries are dicts of the columns of their snapshot store, all required
+    def get_arp_table(self) -> list[dict[str, Any]]: ...
 
-    def get_mac_table(self) -> list[str]: ...
+    def get_mac_table(self) -> list[dict[str, Any]]: ...
 
     def get_ospf_neighbors(self) -> list[str]: ...
 
@@ -38,7 +55,8 @@ class NettyFactory(Protocol):
 
     def get_interfaces_vlans(self) -> list[str]: ...
 
-    def get_routing_table(self) -> list[str]: ...
+    # the output as it is read, in pieces split anywhere, parsed with the platform's routes template
+    def get_routing_table(self) -> Iterator[str]: ...
 
 
 class NettySshFactory(NettyFactory):
@@ -53,6 +71,7 @@ class NettySshFactory(NettyFactory):
         platform: str,
         secret: str | None = None,
         timeout: int = 15,
+        keepalive: int = 0,
     ) -> None:
         self.ip_address = ip_address
         self.port = port
@@ -60,9 +79,10 @@ class NettySshFactory(NettyFactory):
         self.password = password
         self.secret = secret
         self.timeout = timeout
+        self.keepalive = keepalive  # seconds between SSH keepalives, 0 for none
         self.device_type = platform
 
-    def __enter__(self) -> None:
+    def connect(self) -> None:
         if self.session is not None:
             return
         try:
@@ -74,19 +94,77 @@ class NettySshFactory(NettyFactory):
                 secret=self.secret,
                 port=self.port,
                 timeout=self.timeout,
+                keepalive=self.keepalive,
             )
-        except ConnectionException as e:
-            raise ValueError("Unable to connect to device.") from e  # replace with custom exception
+        except NetmikoAuthenticationException as e:
+            raise NettyAuthenticationError("Authentication to device failed.") from e
+        except (ConnectionException, NetmikoTimeoutException) as e:
+            raise NettyConnectionError("Unable to connect to device.") from e
         self.session = session
-        return
 
-    def __exit__(self, exc_type, exc_val, exc_tb) -> None:  # noqa: ANN001
+    def disconnect(self) -> None:
         """Close the session if it's open"""
         if self.session is None:
             return
         self.session.disconnect()
         self.session = None
-        return
+
+    def is_alive(self) -> bool:
+        return self.session is not None and self.session.is_alive()
+
+    def __enter__(self) -> Self:
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:  # noqa: ANN001
+        self.disconnect()
+
+    def send_commands(self, commands: Sequence[str]) -> dict[str, str]:
+        """Outputs of show commands run one after another over the session's channel.
+
+        Paging was disabled once when the session was prepared, not before each command.
+        """
+        if self.session is None:
+            msg = "Device session is not connected."
+            raise NettyConnectionError(msg)
+        return {command: self.session.send_command(command) for command in commands}
+
+    def stream_command(self, command: str) -> Iterator[str]:
+        """Output of a show command in pieces of whole lines as it is read, without the echo and the prompt.
+
+        The command may run for minutes on a full table, `timeout` only bounds the silences.
+        """
+        if self.session is None:
+            msg = "Device session is not connected."
+            raise NettyConnectionError(msg)
+        prompt = re.compile(rf"{re.escape(self.session.base_prompt)}\S*\s*$")
+        self.session.clear_buffer()
+        self.session.write_channel(self.session.normalize_cmd(command))
+        pending, echoed = "", False
+        read_at = time.monotonic()
+        while True:
+            data = self.session.read_channel()
+            if not data:
+                if time.monotonic() - read_at > self.timeout:
+                    msg = f"No output of {command!r} for {self.timeout}s."
+                    raise NettyTimeoutError(msg)
+                time.sleep(STREAM_READ_INTERVAL)
+                continue
+            read_at = time.monotonic()
+            pending += data
+            if not echoed:
+                if "\n" not in pending:
+                    continue
+                pending, echoed = pending.split("\n", 1)[1], True
+            # a line break split between two reads is normalized once both halves are here
+            lines, _, pending = pending.rpartition("\n")
+            if lines:
+                yield self.session.normalize_linefeeds(lines + "\n")
+            if prompt.match(pending.strip("\r")):
+                return
+
+    def get_routing_table(self) -> Iterator[str]:
+        return self.stream_command(ROUTE_COMMANDS[self.device_type])
 
     def ping(self) -> None: ...
 
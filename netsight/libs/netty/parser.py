@@ -0,0 +1,191 @@
+"""Parse CLI output with TextFSM templates compiled once, large outputs across worker processes.
+
+Compiling a template parses its text and every rule's regex, `compile_template` keeps the last
+`MAX_TEMPLATES` compiled by key in each process. TextFSM is pure Python and holds the GIL, a
+full routing table or a 100k entries MAC table parsed on the event loop stalls every request.
+`TextFsmParser` parses small outputs inline and splits larger ones at record boundaries into
+chunks parsed by a process pool, `parse_stream` does so while the output is still being read.
+Rows are tuples in the order of `header`, not dicts.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterable, AsyncIterator, Hashable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+import textfsm
+
+__all__ = ("ParsedTable", "TextFsmParser", "compile_template", "parse_text", "split_records")
+
+MAX_TEMPLATES = 256
+
+_compiled: OrderedDict[Hashable, tuple[threading.Lock, textfsm.TextFSM]] = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+class ParsedTable(NamedTuple):
+    """Rows as tuples of `header` values, a `List` value is a list."""
+
+    header: tuple[str, ...]
+    rows: list[tuple[Any, ...]]
+
+    def columns(self) -> dict[str, tuple[Any, ...]]:
+        """The values by column name, for building arrays or COPY rows column-wise."""
+        columns = list(zip(*self.rows, strict=True)) or [()] * len(self.header)
+        return dict(zip(self.header, columns, strict=True))
+
+
+def compile_template(key: Hashable, template: str) -> tuple[threading.Lock, textfsm.TextFSM]:
+    """The compiled `template` cached by `key`, which has to change whenever the template does.
+
+    A TextFSM keeps its parse state, the lock serializes the threads parsing with it.
+    """
+    with _compiled_lock:
+        entry = _compiled.get(key)
+        if entry is not None:
+            _compiled.move_to_end(key)
+            return entry
+    entry = threading.Lock(), textfsm.TextFSM(io.StringIO(template))
+    with _compiled_lock:
+        _compiled[key] = entry
+        while len(_compiled) > MAX_TEMPLATES:
+            _compiled.popitem(last=False)
+    return entry
+
+
+def parse_text(key: Hashable, template: str, output: str) -> ParsedTable:
+    """Parse `output` in the calling thread."""
+    lock, fsm = compile_template(key, template)
+    with lock:
+        fsm.Reset()
+        rows = [tuple(row) for row in fsm.ParseText(output)]
+        fsm.Reset()
+        return ParsedTable(tuple(fsm.header), rows)
+
+
+def _parse_rows(key: Hashable, template: str, output: str) -> list[tuple[Any, ...]]:
+    return parse_text(key, template, output).rows
+
+
+def _carries_values(fsm: textfsm.TextFSM) -> bool:
+    # Filldown and Fillup values copy values between records, a chunk would miss them
+    return any({"Filldown", "Fillup"} & set(value.OptionNames()) for value in fsm.values)
+
+
+def split_records(output: str, split_at: re.Pattern[str], chunk_lines: int) -> list[str]:
+    """Split `output` before lines matching `split_at` into chunks of about `chunk_lines` lines.
+
+    The lines before the first match, the table header, are repeated at the top of every chunk
+    so each chunk goes through the template's states like the whole output does.
+    """
+    lines = output.splitlines()
+    starts = [number for number, line in enumerate(lines) if split_at.match(line)]
+    if not starts:
+        return [output]
+    header = lines[: starts[0]]
+    chunks = []
+    begin = starts[0]
+    for start in starts[1:]:
+        if start - begin >= chunk_lines:
+            chunks.append("\n".join(header + lines[begin:start]))
+            begin = start
+    chunks.append("\n".join(header + lines[begin:]))
+    return chunks
+
+
+class TextFsmParser:
+    """Parse with compiled templates, outputs over `inline_lines` lines in `workers` processes.
+
+    An output is only split when the caller gives `split_at`, the pattern of the first line of
+    a record, and the template carries no value from one record to the next. In a daemonic
+    process, a Celery prefork child, processes can't be started and chunks go to threads.
+    """
+
+    def __init__(self, workers: int | None = None, inline_lines: int = 2000, chunk_lines: int = 20_000) -> None:
+        self.workers = workers
+        self.inline_lines = inline_lines
+        self.chunk_lines = chunk_lines
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if multiprocessing.current_process().daemon:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="textfsm")
+                else:
+                    # not forking a process running an event loop and threads
+                    context = multiprocessing.get_context("spawn")
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+            return self._executor
+
+    async def parse(
+        self, key: Hashable, template: str, output: str, split_at: str | re.Pattern[str] | None = None
+    ) -> ParsedTable:
+        if output.count("\n") < self.inline_lines:
+            return parse_text(key, template, output)
+        _, fsm = compile_template(key, template)
+        header = tuple(fsm.header)
+        if split_at is None or _carries_values(fsm):
+            chunks = [output]
+        else:
+            chunks = split_records(output, re.compile(split_at), self.chunk_lines)
+        loop = asyncio.get_running_loop()
+        parsed = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, _parse_rows, key, template, chunk) for chunk in chunks)
+        )
+        return ParsedTable(header, [row for rows in parsed for row in rows])
+
+    async def parse_stream(
+        self, key: Hashable, template: str, output: AsyncIterable[str], split_at: str | re.Pattern[str]
+    ) -> AsyncIterator[ParsedTable]:
+        """Parse `output`, pieces of text split anywhere, into tables of about `chunk_lines` rows.
+
+        Chunks are cut before a line matching `split_at` as soon as they are read and parsed in
+        order, at most two per worker at a time, a full routing table is never held as a whole.
+        """
+        _, fsm = compile_template(key, template)
+        header = tuple(fsm.header)
+        if _carries_values(fsm):
+            yield await self.parse(key, template, "".join([piece async for piece in output]))
+            return
+        pattern = re.compile(split_at)
+        loop = asyncio.get_running_loop()
+        parsing: deque[asyncio.Future[list[tuple[Any, ...]]]] = deque()
+        in_flight = 2 * (self.workers or os.cpu_count() or 1)
+        preamble: list[str] | None = None  # the lines before the first record
+        lines: list[str] = []
+        partial = ""
+        async for piece in output:
+            *complete, partial = (partial + piece).split("\n")
+            for line in complete:
+                if preamble is None:
+                    if pattern.match(line):
+                        preamble, lines = lines, []
+                elif len(lines) >= self.chunk_lines and pattern.match(line):
+                    chunk = "\n".join(preamble + lines)
+                    parsing.append(loop.run_in_executor(self.executor, _parse_rows, key, template, chunk))
+                    lines = []
+                lines.append(line)
+            while len(parsing) >= in_flight or (parsing and parsing[0].done()):
+                yield ParsedTable(header, await parsing.popleft())
+        chunk = "\n".join([*(preamble or []), *lines, partial])
+        if not parsing and len(lines) < self.inline_lines:
+            yield parse_text(key, template, chunk)
+            return
+        parsing.append(loop.run_in_executor(self.executor, _parse_rows, key, template, chunk))
+        while parsing:
+            yield ParsedTable(header, await parsing.popleft())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
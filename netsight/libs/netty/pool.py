@@ -0,0 +1,130 @@
+"""Logged in SSH sessions kept by device between getters.
+
+Logging in and detecting the prompt cost more than most show commands, more so against AAA
+backed devices. `SshSessionPool` keeps one session per device: the getters of a sync borrow it
+one after another, a session unused for `idle` seconds is logged out. SSH keepalives stop
+firewalls from dropping idle sessions, a session found dead is logged in again.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from netsight.libs.netty.engine import CollectionTarget
+from netsight.libs.netty.exceptions import NettyError
+from netsight.libs.netty.factory import NettySshFactory
+
+__all__ = ("SshSessionPool",)
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry(NamedTuple):
+    lock: threading.Lock
+    device: NettySshFactory
+    target: CollectionTarget
+
+
+class SshSessionPool:
+    """One SSH session per device, borrowed by one thread at a time.
+
+    `session` has the signature of a `CollectionEngine` factory, `CollectionEngine(factory=pool.session)`
+    runs every getter of a device over the same login. Sessions are keyed by device id, changed
+    credentials or platform log in again.
+    """
+
+    def __init__(
+        self,
+        idle: float = 300,
+        keepalive: int = 30,
+        factory: Callable[..., NettySshFactory] = NettySshFactory,
+    ) -> None:
+        self.idle = idle
+        self.keepalive = keepalive
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._entries: dict[int, _Entry] = {}
+        self._used_at: dict[int, float] = {}
+        self._evicted_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry(self, target: CollectionTarget, timeout: int) -> _Entry:
+        stale = None
+        with self._lock:
+            entry = self._entries.get(target.device_id)
+            if entry is None or entry.target != target:
+                device = self.factory(
+                    target.ip_address,
+                    target.port,
+                    target.username,
+                    target.password,
+                    target.platform,
+                    secret=target.secret,
+                    timeout=timeout,
+                    keepalive=self.keepalive,
+                )
+                stale, entry = entry, _Entry(threading.Lock(), device, target)
+                self._entries[target.device_id] = entry
+            self._used_at[target.device_id] = time.monotonic()
+        if stale is not None:
+            self._close(stale)
+        return entry
+
+    @contextmanager
+    def session(self, target: CollectionTarget, timeout: int = 15) -> Iterator[NettySshFactory]:
+        """Borrow the device's session, logging in when it has none or it died."""
+        self.evict_idle()
+        entry = self._entry(target, timeout)
+        with entry.lock:
+            device = entry.device
+            if device.session is not None and not device.is_alive():
+                logger.debug("SSH session to %s died, logging in again", target.ip_address)
+                device.disconnect()
+            try:
+                device.connect()
+                yield device
+            except (NettyError, OSError, EOFError):
+                # the channel may be left mid output, the next borrower logs in again
+                device.disconnect()
+                raise
+            finally:
+                self._used_at[target.device_id] = time.monotonic()
+
+    def evict_idle(self) -> None:
+        """Log out of the sessions unused for `idle` seconds, scanning at most every `idle / 10` seconds."""
+        now = time.monotonic()
+        if now - self._evicted_at < self.idle / 10:
+            return
+        self._evicted_at = now
+        with self._lock:
+            idle = [
+                device_id
+                for device_id, used_at in self._used_at.items()
+                if now - used_at >= self.idle and not self._entries[device_id].lock.locked()
+            ]
+            entries = [self._entries.pop(device_id) for device_id in idle]
+            for device_id in idle:
+                del self._used_at[device_id]
+        for entry in entries:
+            self._close(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._used_at.clear()
+        for entry in entries:
+            self._close(entry)
+
+    @staticmethod
+    def _close(entry: _Entry) -> None:
+        with entry.lock:
+            try:
+                entry.device.disconnect()
+            except Exception:
+                logger.debug("Failed to log out of %s", entry.target.ip_address, exc_info=True)
@@ -0,0 +1,42 @@
+"""Run a coroutine per item, a bounded number of them pending, and get the results as they finish.
+
+The items are taken only once there is room for them, an iterator of any size is never
+materialized and no more tasks than the bound exist at a time.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterable
+from itertools import islice
+from typing import Any, TypeVar
+
+__all__ = ("as_finished",)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def as_finished(
+    items: Iterable[T], start: Callable[[T], Coroutine[Any, Any, R]], limit: Callable[[], int]
+) -> AsyncIterator[R]:
+    """Yield the result of `start(item)` for every item in the order they finish.
+
+    At most `limit()` are pending, it is read again after every result so the caller can resize the
+    bound as it goes. The tasks still pending when the generator is closed early are cancelled.
+    """
+    finished: asyncio.Queue[asyncio.Task[R]] = asyncio.Queue()
+    running: set[asyncio.Task[R]] = set()
+    remaining = iter(items)
+    try:
+        while True:
+            for item in islice(remaining, max(0, limit() - len(running))):
+                task = asyncio.create_task(start(item))
+                task.add_done_callback(finished.put_nowait)
+                running.add(task)
+            if not running:
+                return
+            task = await finished.get()
+            running.discard(task)
+            yield task.result()
+    finally:
+        for task in running:
+            task.cancel()
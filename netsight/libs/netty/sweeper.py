@@ -0,0 +1,233 @@
+"""Sweep many addresses for reachability, yielding every host's latency, jitter and loss as it finishes.
+
+A fixed number of hosts probed at a time is either too few, an unreachable host keeps its slot
+for the whole timeout, or too many, the probes queue in the local stack and the upstream
+firewalls and replies get lost or late. `Sweeper` probes as many hosts as an adaptive window
+allows: it grows while the answering hosts answer every probe in time, and shrinks when the
+smoothed RTT climbs above `rtt_tolerance` times the lowest seen or the smoothed partial loss goes
+above `loss_tolerance`. A token bucket keeps the probes under `packets_per_second` whatever
+the window.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import aclosing
+from typing import NamedTuple
+
+from icmplib import NameLookupError, SocketPermissionError, async_ping
+
+from netsight.libs.netty.scheduling import as_finished
+
+__all__ = ("AdaptiveWindow", "ProbeResult", "Sweeper", "TokenBucket", "icmp_probe", "tcp_probe")
+
+logger = logging.getLogger(__name__)
+
+
+class ProbeResult(NamedTuple):
+    """The round trip times in milliseconds of the probes answered out of `sent`."""
+
+    address: str
+    sent: int
+    rtts: tuple[float, ...]
+
+    @property
+    def is_alive(self) -> bool:
+        return bool(self.rtts)
+
+    @property
+    def latency(self) -> float | None:
+        return sum(self.rtts) / len(self.rtts) if self.rtts else None
+
+    @property
+    def jitter(self) -> float | None:
+        """Mean difference between consecutive round trip times, as icmplib computes it."""
+        if not self.rtts:
+            return None
+        if len(self.rtts) == 1:
+            return 0.0
+        return sum(abs(b - a) for a, b in zip(self.rtts, self.rtts[1:], strict=False)) / (len(self.rtts) - 1)
+
+    @property
+    def packet_loss(self) -> float:
+        return 1 - len(self.rtts) / self.sent if self.sent else 1.0
+
+
+# address, count, interval, seconds to wait for each answer
+Probe = Callable[[str, int, float, float], Awaitable[ProbeResult]]
+
+
+def icmp_probe(*, privileged: bool = False) -> Probe:
+    """Probe with ICMP echo requests, unprivileged needs `net.ipv4.ping_group_range` to cover the user."""
+
+    async def probe(address: str, count: int, interval: float, wait: float) -> ProbeResult:
+        try:
+            host = await async_ping(address, count=count, interval=interval, timeout=wait, privileged=privileged)
+        except NameLookupError:
+            logger.debug("Failed to resolve %s", address)
+            return ProbeResult(address, count, ())
+        return ProbeResult(address, count, tuple(host.rtts))
+
+    return probe
+
+
+def tcp_probe(port: int = 22) -> Probe:
+    """Probe by connecting to `port`, a refused connection is lost like a timed out one."""
+
+    async def probe(address: str, count: int, interval: float, wait: float) -> ProbeResult:
+        rtts = []
+        for sequence in range(count):
+            if sequence:
+                await asyncio.sleep(interval)
+            started = time.perf_counter()
+            try:
+                async with asyncio.timeout(wait):
+                    _, writer = await asyncio.open_connection(address, port)
+            except (OSError, TimeoutError):
+                continue
+            rtts.append((time.perf_counter() - started) * 1000)
+            writer.close()
+        return ProbeResult(address, count, tuple(rtts))
+
+    return probe
+
+
+class TokenBucket:
+    """`rate` tokens a second, at most `burst` saved up.
+
+    A caller takes its tokens at once and sleeps off the debt, so callers are let through in
+    the order they came and taking more than `burst` tokens never blocks forever.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate / 10)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    async def acquire(self, tokens: float = 1) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate) - tokens
+        self._updated = now
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+class AdaptiveWindow:
+    """Additive increase, multiplicative decrease of the hosts probed at a time.
+
+    The window doubles every round until the first congestion, then grows by one host a round.
+    A round is as many answered hosts as the window, congestion shrinks the window by
+    `decrease` at most once a round. Unreachable hosts are no signal either way.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        *,
+        rtt_tolerance: float = 2.0,
+        loss_tolerance: float = 0.1,
+        decrease: float = 0.7,
+        smoothing: float = 0.125,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.rtt_tolerance = rtt_tolerance
+        self.loss_tolerance = loss_tolerance
+        self.decrease = decrease
+        self.smoothing = smoothing
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.threshold = float(maximum)
+        self.rtt: float | None = None
+        self.base_rtt = math.inf
+        self.loss = 0.0
+        self._hold = 0
+
+    @property
+    def congested(self) -> bool:
+        return self.loss > self.loss_tolerance or (
+            self.rtt is not None and self.rtt > self.base_rtt * self.rtt_tolerance
+        )
+
+    def update(self, result: ProbeResult) -> None:
+        if not result.is_alive:
+            return
+        rtt = min(result.rtts)
+        self.rtt = rtt if self.rtt is None else self.rtt + self.smoothing * (rtt - self.rtt)
+        # a floor of 1ms, sub-millisecond RTTs double from scheduling noise alone
+        self.base_rtt = min(self.base_rtt, max(self.rtt, 1.0))
+        self.loss += self.smoothing * (result.packet_loss - self.loss)
+        if self._hold:
+            self._hold -= 1
+        elif self.congested:
+            self.limit = self.threshold = max(self.minimum, self.limit * self.decrease)
+            self._hold = int(self.limit)
+            return
+        step = 1.0 if self.limit < self.threshold else 1 / self.limit
+        self.limit = min(self.maximum, self.limit + step)
+
+
+class Sweeper:
+    """Probe addresses `count` times each, `interval` seconds apart, `timeout` seconds for each answer.
+
+    `probe` defaults to unprivileged ICMP echo, `tcp_probe` suits hosts behind ICMP filters.
+    `window` is the window of the latest sweep.
+    """
+
+    def __init__(
+        self,
+        probe: Probe | None = None,
+        *,
+        count: int = 3,
+        interval: float = 0.2,
+        timeout: float = 1.0,
+        packets_per_second: float = 2000,
+        concurrency: int = 64,
+        min_concurrency: int = 8,
+        max_concurrency: int = 1024,
+        rtt_tolerance: float = 2.0,
+        loss_tolerance: float = 0.1,
+    ) -> None:
+        self.probe = probe or icmp_probe()
+        self.count = count
+        self.interval = interval
+        self.timeout = timeout
+        self.packets_per_second = packets_per_second
+        self.concurrency = concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.rtt_tolerance = rtt_tolerance
+        self.loss_tolerance = loss_tolerance
+        self.window: AdaptiveWindow | None = None
+
+    async def sweep(self, addresses: Iterable[str]) -> AsyncIterator[ProbeResult]:
+        """Yield the result of every address in the order they finish."""
+        window = self.window = AdaptiveWindow(
+            self.concurrency,
+            self.min_concurrency,
+            self.max_concurrency,
+            rtt_tolerance=self.rtt_tolerance,
+            loss_tolerance=self.loss_tolerance,
+        )
+        bucket = TokenBucket(self.packets_per_second)
+        probes = as_finished(addresses, lambda address: self._probe(bucket, address), lambda: int(window.limit))
+        async with aclosing(probes) as results:
+            async for result in results:
+                window.update(result)
+                yield result
+
+    async def _probe(self, bucket: TokenBucket, address: str) -> ProbeResult:
+        await bucket.acquire(self.count)
+        try:
+            return await self.probe(address, self.count, self.interval, self.timeout)
+        except SocketPermissionError:
+            # every probe fails alike, not a host to report lost
+            raise
+        except Exception:
+            # one host failing, e.g. an address the stack refuses to route, mustn't end the sweep
+            logger.warning("Probing %s failed", address, exc_info=True)
+            return ProbeResult(address, self.count, ())
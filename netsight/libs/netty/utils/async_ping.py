@@ -1,5 +1,7 @@
-from icmplib import Host, async_multiping, async_ping
-from tcppinglib import TCPHost, async_multi_tcpping, async_tcpping
+from icmplib import async_ping
+from tcppinglib import async_tcpping
+
+from netsight.libs.netty.sweeper import Sweeper, icmp_probe, tcp_probe
 
 
 async def ping_alive(address: str) -> bool:
@@ -8,10 +10,8 @@ async def ping_alive(address: str) -> bool:
 
 
 async def multi_ping_alive(addresses: list[str]) -> dict[str, bool]:
-    results: list[Host] = await async_multiping(
-        addresses=addresses, count=2, interval=0.2, timeout=2, concurrent_tasks=30, privileged=False
-    )
-    return {result.address: result.is_alive for result in results}
+    sweeper = Sweeper(icmp_probe(), count=2, interval=0.2, timeout=2)
+    return {result.address: result.is_alive async for result in sweeper.sweep(addresses)}
 
 
 async def ssh_alive(address: str, port: int = 22) -> bool:
@@ -20,7 +20,5 @@ async def ssh_alive(address: str, port: int = 22) -> bool:
 
 
 async def multi_ssh_alive(addresses: list[str], port: int = 22) -> dict[str, bool]:
-    results: list[TCPHost] = await async_multi_tcpping(
-        addresses=addresses, port=port, count=2, interval=0.2, concurrent_tasks=30
-    )
-    return {result.ip_address: result.is_alive for result in results}
+    sweeper = Sweeper(tcp_probe(port), count=2, interval=0.2, timeout=2)
+    return {result.address: result.is_alive async for result in sweeper.sweep(addresses)}
@@ -0,0 +1,696 @@
+"""SNMP v2c/v3 client polling thousands of agents at once from one UDP socket per address family.
+
+Every request is a datagram tagged with a request id (the msgID for v3), the replies of all
+agents arrive on the same socket and are matched back to their request by id and address. A
+request is retransmitted by a timer when no reply came within `timeout`. Tables are walked with
+GETBULK, several columns per request. The max-repetitions of an agent adapts: it is halved when
+a reply is too big or does not arrive, large replies are the ones lost to fragmentation, and
+grows back a quarter at a time while replies arrive.
+
+v3 supports the user based security model with HMAC-MD5/SHA authentication (RFC 3414, RFC 7860)
+and AES-128 privacy (RFC 3826), agents' engine ids and clocks are discovered and cached.
+
+OIDs are tuples of ints, `parse_oid` reads the dotted form. Values are decoded to int, bytes
+(OCTET STRING, Opaque), tuple (OBJECT IDENTIFIER), str (IpAddress), None (NULL) or `NoValue`.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import itertools
+import logging
+import os
+import socket
+import struct
+import time
+from collections.abc import Callable, Iterable, Sequence
+from enum import IntEnum
+from functools import lru_cache
+from typing import Any, NamedTuple, Self
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from netsight.libs.netty.exceptions import NettySnmpError, NettyTimeoutError
+
+__all__ = (
+    "NoValue",
+    "SnmpClient",
+    "SnmpTarget",
+    "UsmUser",
+    "format_oid",
+    "parse_oid",
+)
+
+logger = logging.getLogger(__name__)
+
+Oid = tuple[int, ...]
+
+# BER tags
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIME_TICKS = 0x43
+OPAQUE = 0x44
+COUNTER64 = 0x46
+# PDUs
+GET = 0xA0
+GET_NEXT = 0xA1
+RESPONSE = 0xA2
+GET_BULK = 0xA5
+REPORT = 0xA8
+
+TOO_BIG = 1
+SNMP_V2C = 1
+SNMP_V3 = 3
+USM = 3
+MAX_MESSAGE_SIZE = 65507
+FLAG_AUTH, FLAG_PRIV, FLAG_REPORTABLE = 0x01, 0x02, 0x04
+USM_STATS_NOT_IN_TIME_WINDOWS = (1, 3, 6, 1, 6, 3, 15, 1, 1, 2, 0)
+
+# hash and length of the truncated HMAC of the authentication protocols
+AUTH_PROTOCOLS = {
+    "MD5": ("md5", 12),
+    "SHA": ("sha1", 12),
+    "SHA224": ("sha224", 16),
+    "SHA256": ("sha256", 24),
+    "SHA384": ("sha384", 32),
+    "SHA512": ("sha512", 48),
+}
+PRIV_PROTOCOLS = {"AES"}  # AES-128-CFB
+
+_UNSIGNED = frozenset((COUNTER32, GAUGE32, TIME_TICKS, COUNTER64))
+_HIGH_BIT = 0x80  # long form of BER lengths, continuation of OID arcs
+
+
+class NoValue(IntEnum):
+    NO_SUCH_OBJECT = 0x80
+    NO_SUCH_INSTANCE = 0x81
+    END_OF_MIB_VIEW = 0x82
+
+
+class UsmUser(NamedTuple):
+    username: str
+    auth_protocol: str | None = None  # one of AUTH_PROTOCOLS, None for noAuthNoPriv
+    auth_password: str | None = None
+    priv_protocol: str | None = None  # AES or None for no privacy
+    priv_password: str | None = None
+
+
+class SnmpTarget(NamedTuple):
+    """An agent, polled with v3 when it has a `user`, else with v2c and the `community`."""
+
+    host: str  # IP address
+    community: str = "public"
+    user: UsmUser | None = None
+    port: int = 161
+    context: str = ""
+
+
+class Pdu(NamedTuple):
+    tag: int
+    request_id: int
+    error_status: int  # non-repeaters of a GETBULK request
+    error_index: int  # max-repetitions of a GETBULK request
+    varbinds: list[tuple[Oid, Any]]
+
+
+class Engine(NamedTuple):
+    """An agent's authoritative engine and its clock when it was learned."""
+
+    engine_id: bytes
+    boots: int
+    time: int
+    learned_at: float
+
+    def now(self) -> int:
+        return self.time + int(time.monotonic() - self.learned_at)
+
+
+class V3Message(NamedTuple):
+    msg_id: int
+    flags: int
+    engine_id: bytes
+    boots: int
+    time: int
+    username: bytes
+    auth_params: bytes
+    auth_offset: int  # of auth_params in the message
+    priv_params: bytes
+    data_tag: int  # SEQUENCE for a plain scoped PDU, OCTET STRING for an encrypted one
+    data: bytes
+
+
+def parse_oid(oid: str | Oid) -> Oid:
+    if isinstance(oid, tuple):
+        return oid
+    return tuple(int(arc) for arc in oid.strip(".").split("."))
+
+
+def format_oid(oid: Oid) -> str:
+    return ".".join(map(str, oid))
+
+
+# ---------- BER ----------------
+
+
+def _length(length: int) -> bytes:
+    if length < _HIGH_BIT:
+        return bytes((length,))
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes((_HIGH_BIT | len(encoded),)) + encoded
+
+
+def _tlv(tag: int, content: bytes) -> bytes:
+    return bytes((tag,)) + _length(len(content)) + content
+
+
+def _integer(value: int, tag: int = INTEGER) -> bytes:
+    # minimal two's complement, one more byte than the bits of the magnitude for the sign
+    return _tlv(tag, value.to_bytes((value + (value < 0)).bit_length() // 8 + 1, "big", signed=True))
+
+
+def _octets(value: bytes) -> bytes:
+    return _tlv(OCTET_STRING, value)
+
+
+def encode_oid(oid: Oid) -> bytes:
+    content = bytearray()
+    for arc in (oid[0] * 40 + oid[1], *oid[2:]):
+        if arc < _HIGH_BIT:
+            content.append(arc)
+            continue
+        groups = []
+        rest = arc
+        while rest:
+            groups.append(rest & 0x7F)
+            rest >>= 7
+        content.extend(group | 0x80 for group in reversed(groups[1:]))
+        content.append(groups[0])
+    return _tlv(OBJECT_IDENTIFIER, bytes(content))
+
+
+def encode_value(tag: int, value: Any = None) -> bytes:
+    """A varbind value of type `tag`."""
+    if tag == INTEGER or tag in _UNSIGNED:
+        return _integer(value, tag)
+    if tag in (OCTET_STRING, OPAQUE):
+        return _tlv(tag, value)
+    if tag == OBJECT_IDENTIFIER:
+        return encode_oid(value)
+    if tag == IP_ADDRESS:
+        return _tlv(tag, socket.inet_aton(value))
+    return _tlv(tag, b"")  # NULL and NoValue
+
+
+def encode_pdu(tag: int, request_id: int, first: int, second: int, varbinds: Iterable[tuple[Oid, bytes]]) -> bytes:
+    """A PDU of varbinds with encoded values, `first` and `second` are the error status and index
+    or, for GETBULK, non-repeaters and max-repetitions."""
+    encoded = b"".join(_tlv(SEQUENCE, encode_oid(oid) + value) for oid, value in varbinds)
+    return _tlv(tag, _integer(request_id) + _integer(first) + _integer(second) + _tlv(SEQUENCE, encoded))
+
+
+def _header(data: bytes, pos: int) -> tuple[int, int, int]:
+    """Tag, start and end of the content of the TLV at `pos`."""
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[pos : pos + size], "big")
+        pos += size
+    end = pos + length
+    if end > len(data):
+        msg = "Truncated BER value."
+        raise NettySnmpError(msg)
+    return tag, pos, end
+
+
+def _decode_oid(data: bytes, start: int, end: int) -> Oid:
+    arcs = []
+    arc = 0
+    for byte in data[start:end]:
+        arc = arc << 7 | byte & 0x7F
+        if not byte & 0x80:
+            arcs.append(arc)
+            arc = 0
+    first = min(arcs[0] // 40, 2)
+    return (first, arcs[0] - first * 40, *arcs[1:])
+
+
+def _decode_value(data: bytes, tag: int, start: int, end: int) -> Any:  # noqa: PLR0911
+    if tag == INTEGER:
+        return int.from_bytes(data[start:end], "big", signed=True)
+    if tag in _UNSIGNED:
+        return int.from_bytes(data[start:end], "big")
+    if tag in (OCTET_STRING, OPAQUE):
+        return data[start:end]
+    if tag == OBJECT_IDENTIFIER:
+        return _decode_oid(data, start, end)
+    if tag == IP_ADDRESS:
+        return socket.inet_ntoa(data[start:end])
+    if tag == NULL:
+        return None
+    return NoValue(tag)
+
+
+def _decode_int(data: bytes, pos: int) -> tuple[int, int]:
+    _, start, end = _header(data, pos)
+    return int.from_bytes(data[start:end], "big", signed=True), end
+
+
+def _decode_octets(data: bytes, pos: int) -> tuple[bytes, int]:
+    _, start, end = _header(data, pos)
+    return data[start:end], end
+
+
+def decode_pdu(data: bytes, pos: int = 0) -> Pdu:
+    tag, pos, _ = _header(data, pos)
+    request_id, pos = _decode_int(data, pos)
+    first, pos = _decode_int(data, pos)
+    second, pos = _decode_int(data, pos)
+    _, pos, end = _header(data, pos)
+    varbinds = []
+    while pos < end:
+        _, pos, varbind_end = _header(data, pos)
+        _, oid_start, oid_end = _header(data, pos)
+        value_tag, value_start, value_end = _header(data, oid_end)
+        varbinds.append((_decode_oid(data, oid_start, oid_end), _decode_value(data, value_tag, value_start, value_end)))
+        pos = varbind_end
+    return Pdu(tag, request_id, first, second, varbinds)
+
+
+# ---------- messages ----------------
+
+
+def encode_v2c(community: bytes, pdu: bytes) -> bytes:
+    return _tlv(SEQUENCE, _integer(SNMP_V2C) + _octets(community) + pdu)
+
+
+def decode_v2c(data: bytes) -> tuple[bytes, Pdu]:
+    _, pos, _ = _header(data, 0)
+    _, pos = _decode_int(data, pos)
+    community, pos = _decode_octets(data, pos)
+    return community, decode_pdu(data, pos)
+
+
+def message_version(data: bytes) -> int:
+    _, pos, _ = _header(data, 0)
+    return _decode_int(data, pos)[0]
+
+
+def encode_scoped_pdu(context_engine_id: bytes, context_name: bytes, pdu: bytes) -> bytes:
+    return _octets(context_engine_id) + _octets(context_name) + pdu
+
+
+def message_id(data: bytes) -> int:
+    """The request id of a v2c message or the msgID of a v3 one."""
+    _, pos, _ = _header(data, 0)
+    version, pos = _decode_int(data, pos)
+    if version == SNMP_V3:
+        _, pos, _ = _header(data, pos)
+        return _decode_int(data, pos)[0]
+    _, pos = _decode_octets(data, pos)
+    _, pos, _ = _header(data, pos)
+    return _decode_int(data, pos)[0]
+
+
+@lru_cache(maxsize=4096)
+def localize_key(password: str, engine_id: bytes, hash_name: str) -> bytes:
+    """RFC 3414 A.2, the key of a password hashed over 1MB and localized to an engine."""
+    if not password:
+        return b""
+    data = password.encode()
+    digest = hashlib.new(hash_name, (data * (1048576 // len(data) + 1))[:1048576]).digest()
+    return hashlib.new(hash_name, digest + engine_id + digest).digest()
+
+
+class _Keys(NamedTuple):
+    hash_name: str | None
+    auth_length: int
+    auth_key: bytes
+    priv_key: bytes
+
+
+def user_keys(user: UsmUser | None, engine_id: bytes) -> _Keys:
+    if user is None or user.auth_protocol is None:
+        return _Keys(None, 0, b"", b"")
+    hash_name, auth_length = AUTH_PROTOCOLS[user.auth_protocol]
+    priv_key = b""
+    if user.priv_protocol is not None:
+        priv_key = localize_key(user.priv_password or "", engine_id, hash_name)[:16]
+    return _Keys(hash_name, auth_length, localize_key(user.auth_password or "", engine_id, hash_name), priv_key)
+
+
+def _aes(key: bytes, boots: int, engine_time: int, salt: bytes) -> Cipher:
+    return Cipher(algorithms.AES(key), modes.CFB(struct.pack(">II", boots, engine_time) + salt))
+
+
+def encode_v3(
+    msg_id: int,
+    flags: int,
+    engine: Engine | None,
+    username: bytes,
+    keys: _Keys,
+    scoped_pdu: bytes,
+    salt: bytes = b"",
+) -> bytes:
+    """A v3 message, authenticated when `flags` has FLAG_AUTH and encrypted with FLAG_PRIV."""
+    engine_id, boots, engine_time = (engine.engine_id, engine.boots, engine.now()) if engine else (b"", 0, 0)
+    data, priv_params = _tlv(SEQUENCE, scoped_pdu), b""
+    if flags & FLAG_PRIV:
+        encryptor = _aes(keys.priv_key, boots, engine_time, salt).encryptor()
+        data, priv_params = _octets(encryptor.update(data) + encryptor.finalize()), salt
+    placeholder = _octets(bytes(keys.auth_length if flags & FLAG_AUTH else 0))
+    before_auth = _octets(engine_id) + _integer(boots) + _integer(engine_time) + _octets(username)
+    inner = before_auth + placeholder + _octets(priv_params)
+    params = _octets(_tlv(SEQUENCE, inner))
+    head = _integer(SNMP_V3) + _tlv(
+        SEQUENCE, _integer(msg_id) + _integer(MAX_MESSAGE_SIZE) + _octets(bytes((flags,))) + _integer(USM)
+    )
+    body = head + params + data
+    message = _tlv(SEQUENCE, body)
+    if not flags & FLAG_AUTH:
+        return message
+    # the HMAC is computed over the message with zeros in place of itself, after the headers of
+    # the message, the OCTET STRING and SEQUENCE of the parameters and the placeholder
+    offset = len(message) - len(body) + len(head) + len(params) - len(inner) + len(before_auth) + 2
+    mac = hmac.new(keys.auth_key, message, keys.hash_name).digest()[: keys.auth_length]
+    return message[:offset] + mac + message[offset + keys.auth_length :]
+
+
+def decode_v3(data: bytes) -> V3Message:
+    _, pos, _ = _header(data, 0)
+    _, pos = _decode_int(data, pos)
+    _, pos, _ = _header(data, pos)
+    msg_id, pos = _decode_int(data, pos)
+    _, pos = _decode_int(data, pos)
+    flags, pos = _decode_octets(data, pos)
+    _, pos = _decode_int(data, pos)
+    _, params_start, params_end = _header(data, pos)
+    _, pos, _ = _header(data, params_start)
+    engine_id, pos = _decode_octets(data, pos)
+    boots, pos = _decode_int(data, pos)
+    engine_time, pos = _decode_int(data, pos)
+    username, pos = _decode_octets(data, pos)
+    _, auth_offset, pos = _header(data, pos)
+    priv_params, _ = _decode_octets(data, pos)
+    data_tag, data_start, data_end = _header(data, params_end)
+    return V3Message(
+        msg_id,
+        flags[0] if flags else 0,
+        engine_id,
+        boots,
+        engine_time,
+        username,
+        data[auth_offset:pos],
+        auth_offset,
+        priv_params,
+        data_tag,
+        data[data_start:data_end] if data_tag == OCTET_STRING else data[params_end:data_end],
+    )
+
+
+def open_v3(data: bytes, message: V3Message, keys: _Keys) -> tuple[bytes, bytes, Pdu]:
+    """Check the HMAC of a v3 message, decrypt it, and return its context engine id, name and PDU."""
+    if message.flags & FLAG_AUTH:
+        if not keys.hash_name:
+            msg = "Authenticated message for a user without authentication."
+            raise NettySnmpError(msg)
+        end = message.auth_offset + len(message.auth_params)
+        zeroed = data[: message.auth_offset] + bytes(len(message.auth_params)) + data[end:]
+        expected = hmac.new(keys.auth_key, zeroed, keys.hash_name).digest()[: keys.auth_length]
+        if not hmac.compare_digest(expected, message.auth_params):
+            msg = "Wrong SNMPv3 message digest."
+            raise NettySnmpError(msg)
+    scoped = message.data
+    if message.flags & FLAG_PRIV:
+        decryptor = _aes(keys.priv_key, message.boots, message.time, message.priv_params).decryptor()
+        scoped = decryptor.update(scoped) + decryptor.finalize()
+    _, pos, _ = _header(scoped, 0)
+    context_engine_id, pos = _decode_octets(scoped, pos)
+    context_name, pos = _decode_octets(scoped, pos)
+    return context_engine_id, context_name, decode_pdu(scoped, pos)
+
+
+# ---------- client ----------------
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, client: "SnmpClient") -> None:
+        self.client = client
+
+    def datagram_received(self, data: bytes, addr: tuple[str | Any, int]) -> None:
+        self.client._received(data, addr)  # noqa: SLF001
+
+    def error_received(self, exc: OSError) -> None:
+        # ICMP errors of an unconnected socket can't be told apart, the request times out
+        logger.debug("SNMP socket error: %s", exc)
+
+
+def _expire(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_exception(TimeoutError())
+
+
+class SnmpClient:
+    """Poll many agents concurrently, use as an async context manager.
+
+    A request is sent `retries` more times after `timeout` seconds without a reply. At most
+    `max_inflight` requests are outstanding, the rest wait, so bursts don't overflow the socket
+    buffers. `max_repetitions` is the largest GETBULK max-repetitions used.
+    """
+
+    def __init__(
+        self, timeout: float = 1.0, retries: int = 3, max_repetitions: int = 50, max_inflight: int = 4096
+    ) -> None:
+        self.timeout = timeout
+        self.retries = retries
+        self.max_repetitions = max_repetitions
+        self.max_inflight = max_inflight
+        self._transports: dict[int, asyncio.DatagramTransport] = {}
+        self._pending: dict[int, tuple[tuple[str, int], asyncio.Future[bytes]]] = {}
+        self._request_ids = itertools.count(int.from_bytes(os.urandom(3), "big"))
+        self._salts = itertools.count(int.from_bytes(os.urandom(7), "big"))
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self._engines: dict[tuple[str, int], Engine] = {}
+        self._repetitions: dict[tuple[str, int], int] = {}
+
+    def repetitions(self, target: SnmpTarget) -> int:
+        """The GETBULK max-repetitions the agent is currently polled with."""
+        return self._repetitions.get((str(ipaddress.ip_address(target.host)), target.port), self.max_repetitions)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+        for _, future in self._pending.values():
+            if not future.done():
+                future.set_exception(NettySnmpError("SNMP client closed."))
+        self._pending.clear()
+
+    async def _transport(self, family: int) -> asyncio.DatagramTransport:
+        transport = self._transports.get(family)
+        if transport is None:
+            transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: _Protocol(self), family=family
+            )
+            sock = transport.get_extra_info("socket")
+            for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+                sock.setsockopt(socket.SOL_SOCKET, option, 4 << 20)
+            self._transports[family] = transport
+        return transport
+
+    def _received(self, data: bytes, addr: tuple[str | Any, int]) -> None:
+        try:
+            request_id = message_id(data)
+        except (NettySnmpError, IndexError):
+            return
+        pending = self._pending.get(request_id)
+        if pending is None or pending[0] != (addr[0], addr[1]):
+            return
+        if not pending[1].done():
+            pending[1].set_result(data)
+
+    def _next_id(self) -> int:
+        while (request_id := next(self._request_ids) & 0x7FFFFFFF) in self._pending:
+            pass
+        return request_id
+
+    async def _exchange(self, address: tuple[str, int], build: Callable[[int], bytes], retries: int) -> bytes:
+        """Send a request and wait for its reply, retransmitting it on timeouts."""
+        family = socket.AF_INET6 if ":" in address[0] else socket.AF_INET
+        transport = await self._transport(family)
+        loop = asyncio.get_running_loop()
+        request_id = self._next_id()
+        message = build(request_id)
+        async with self._inflight:
+            try:
+                for _ in range(retries + 1):
+                    future = loop.create_future()
+                    self._pending[request_id] = (address, future)
+                    transport.sendto(message, address)
+                    timer = loop.call_later(self.timeout, _expire, future)
+                    try:
+                        return await future
+                    except TimeoutError:
+                        continue
+                    finally:
+                        timer.cancel()
+            finally:
+                self._pending.pop(request_id, None)
+        msg = f"No SNMP reply from {address[0]} after {retries + 1} attempts."
+        raise NettyTimeoutError(msg)
+
+    async def request(
+        self,
+        target: SnmpTarget,
+        tag: int,
+        oids: Sequence[Oid],
+        first: int = 0,
+        second: int = 0,
+        retries: int | None = None,
+    ) -> Pdu:
+        """Send one PDU with NULL values for `oids` and return the response PDU."""
+        retries = self.retries if retries is None else retries
+        address = (str(ipaddress.ip_address(target.host)), target.port)
+        varbinds = [(oid, encode_value(NULL)) for oid in oids]
+        if target.user is None:
+            community = target.community.encode()
+            data = await self._exchange(
+                address, lambda rid: encode_v2c(community, encode_pdu(tag, rid, first, second, varbinds)), retries
+            )
+            _, pdu = decode_v2c(data)
+        else:
+            pdu = await self._request_v3(target, address, tag, first, second, varbinds, retries)
+        if pdu.tag == REPORT:
+            msg = f"SNMP report from {target.host}: {format_oid(pdu.varbinds[0][0]) if pdu.varbinds else 'empty'}"
+            raise NettySnmpError(msg)
+        return pdu
+
+    async def _discover(self, address: tuple[str, int], retries: int) -> Engine:
+        """Learn the agent's engine id, boots and time from the report to an empty request."""
+        scoped = encode_scoped_pdu(b"", b"", encode_pdu(GET, 0, 0, 0, []))
+        data = await self._exchange(
+            address,
+            lambda rid: encode_v3(rid, FLAG_REPORTABLE, None, b"", _Keys(None, 0, b"", b""), scoped),
+            retries,
+        )
+        message = decode_v3(data)
+        engine = Engine(message.engine_id, message.boots, message.time, time.monotonic())
+        self._engines[address] = engine
+        return engine
+
+    async def _request_v3(
+        self,
+        target: SnmpTarget,
+        address: tuple[str, int],
+        tag: int,
+        first: int,
+        second: int,
+        varbinds: list[tuple[Oid, bytes]],
+        retries: int,
+    ) -> Pdu:
+        user = target.user
+        if user.priv_protocol is not None and user.priv_protocol not in PRIV_PROTOCOLS:
+            msg = f"Unsupported SNMPv3 privacy protocol {user.priv_protocol}."
+            raise NettySnmpError(msg)
+        flags = FLAG_REPORTABLE
+        if user.auth_protocol is not None:
+            flags |= FLAG_AUTH
+            if user.priv_protocol is not None:
+                flags |= FLAG_PRIV
+        context = target.context.encode()
+        engine = self._engines.get(address) or await self._discover(address, retries)
+        for _ in range(2):
+            keys = user_keys(user, engine.engine_id)
+
+            def build(rid: int, engine: Engine = engine, keys: _Keys = keys) -> bytes:
+                salt = struct.pack(">Q", next(self._salts) & 0xFFFFFFFFFFFFFFFF)
+                scoped = encode_scoped_pdu(engine.engine_id, context, encode_pdu(tag, rid, first, second, varbinds))
+                return encode_v3(rid, flags, engine, user.username.encode(), keys, scoped, salt)
+
+            data = await self._exchange(address, build, retries)
+            message = decode_v3(data)
+            if message.flags & FLAG_AUTH:
+                _, _, pdu = open_v3(data, message, keys)
+            else:
+                # unauthenticated reports only, the agent couldn't check the request
+                _, _, pdu = open_v3(data, message._replace(flags=0), keys)
+                if pdu.tag != REPORT:
+                    msg = f"Unauthenticated SNMPv3 response from {target.host}."
+                    raise NettySnmpError(msg)
+            if pdu.tag == REPORT and pdu.varbinds and pdu.varbinds[0][0] == USM_STATS_NOT_IN_TIME_WINDOWS:
+                engine = Engine(message.engine_id, message.boots, message.time, time.monotonic())
+                self._engines[address] = engine
+                continue
+            return pdu
+        msg = f"SNMPv3 agent {target.host} keeps reporting its clock out of the time window."
+        raise NettySnmpError(msg)
+
+    async def get(self, target: SnmpTarget, oids: Sequence[str | Oid]) -> dict[Oid, Any]:
+        pdu = await self.request(target, GET, [parse_oid(oid) for oid in oids])
+        if pdu.error_status:
+            msg = f"SNMP error {pdu.error_status} at varbind {pdu.error_index} from {target.host}."
+            raise NettySnmpError(msg)
+        return dict(pdu.varbinds)
+
+    async def _bulk(self, target: SnmpTarget, oids: list[Oid]) -> list[tuple[Oid, Any]]:
+        """One GETBULK with the agent's max-repetitions, halving it on timeouts and tooBig errors."""
+        key = (str(ipaddress.ip_address(target.host)), target.port)
+        repetitions = self._repetitions.get(key, self.max_repetitions)
+        failures = 0
+        while True:
+            try:
+                pdu = await self.request(target, GET_BULK, oids, 0, repetitions, retries=0)
+            except NettyTimeoutError:
+                failures += 1
+                if failures > self.retries:
+                    raise
+                repetitions = max(1, repetitions // 2)
+                continue
+            if pdu.error_status == TOO_BIG and repetitions > 1:
+                failures += 1
+                repetitions //= 2
+                continue
+            if pdu.error_status:
+                msg = f"SNMP error {pdu.error_status} at varbind {pdu.error_index} from {target.host}."
+                raise NettySnmpError(msg)
+            break
+        if not failures:
+            repetitions = min(self.max_repetitions, repetitions + max(1, repetitions // 4))
+        self._repetitions[key] = repetitions
+        return pdu.varbinds
+
+    async def walk(self, target: SnmpTarget, roots: Sequence[str | Oid]) -> dict[Oid, list[tuple[Oid, Any]]]:
+        """The varbinds under each of `roots`, e.g. the columns of a table, walked side by side."""
+        parsed = [parse_oid(root) for root in roots]
+        results: dict[Oid, list[tuple[Oid, Any]]] = {root: [] for root in parsed}
+        cursors = {root: root for root in parsed}
+        while cursors:
+            active = list(cursors)
+            varbinds = await self._bulk(target, [cursors[root] for root in active])
+            if not varbinds:
+                break
+            for position, (oid, value) in enumerate(varbinds):
+                root = active[position % len(active)]
+                if root not in cursors:
+                    continue
+                # out of the subtree, at the end of the MIB or not increasing ends the column
+                if value is NoValue.END_OF_MIB_VIEW or oid[: len(root)] != root or oid <= cursors[root]:
+                    del cursors[root]
+                    continue
+                results[root].append((oid, value))
+                cursors[root] = oid
+        return results
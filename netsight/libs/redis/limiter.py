@@ -0,0 +1,73 @@
+import logging
+import uuid
+from typing import NamedTuple
+
+from netsight.libs.redis import session
+from netsight.libs.redis.session import CacheNamespace
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Sliding window log: one sorted-set member per accepted request scored by its timestamp in ms.
+# Trimming, counting and admitting run atomically in redis, so concurrent workers can't overshoot
+# the limit. Time comes from the redis server to avoid clock skew between API workers.
+# Returns {allowed, retry_after_ms}.
+SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local member = ARGV[3]
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+local count = redis.call('ZCARD', key)
+if count < limit then
+    redis.call('ZADD', key, now, member)
+    redis.call('PEXPIRE', key, window)
+    return {1, 0}
+end
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+local retry_after = window
+if oldest[2] then
+    retry_after = tonumber(oldest[2]) + window - now
+end
+return {0, retry_after}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    retry_after: float
+
+
+class SlidingWindowLimiter:
+    """Allow at most `times` requests per `seconds` for a key, backed by redis."""
+
+    def __init__(self, times: int, seconds: int, namespace: CacheNamespace = CacheNamespace.RATE_LIMIT) -> None:
+        self.times = times
+        self.window_ms = seconds * 1000
+        self.namespace = namespace
+        self._script: AsyncScript | None = None
+
+    def _get_script(self) -> AsyncScript:
+        client = session.redis_client
+        if self._script is None or self._script.registered_client is not client:
+            self._script = client.register_script(SLIDING_WINDOW_LUA)
+        return self._script
+
+    async def hit(self, key: str) -> RateLimitResult:
+        """Record a request for `key`. Fails open when redis is unavailable, losing the limit
+        is preferable to rejecting every request while redis is down.
+        """
+        if session.redis_client is None:
+            return RateLimitResult(True, 0)
+        try:
+            allowed, retry_after_ms = await self._get_script()(
+                keys=[self.namespace + key], args=[self.times, self.window_ms, uuid.uuid4().hex]
+            )
+        except RedisError as e:
+            logger.warning("Rate limiter unavailable, request admitted: %s", e)
+            return RateLimitResult(True, 0)
+        return RateLimitResult(bool(allowed), max(int(retry_after_ms), 0) / 1000)
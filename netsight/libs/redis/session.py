@@ -1,5 +1,6 @@
 import json
 import logging
+import time
 from collections.abc import Mapping
 from datetime import datetime
 from enum import IntEnum, StrEnum
@@ -15,6 +16,7 @@ from sqlalchemy.orm import Session
 
 import redis.asyncio as redis
 from redis import Redis
+from netsight.core.metrics import CACHE_REQUESTS, REDIS_COMMAND_LATENCY
 from netsight.features.admin.models import User
 
 P = ParamSpec("P")
@@ -39,6 +41,8 @@ class CacheNamespace(StrEnum):
     API_CACHE = "api_"
     NORMAL_CACHE = "nc_"
     ROLE_CACHE = "role_"
+    RATE_LIMIT = "rl_"
+    RESOURCE_POOL = "rp_"
 
 
 class RedisStatus(IntEnum):
@@ -69,6 +73,13 @@ class FastapiCache(redis.Redis):
     response_header: str = DEFAULT_CACHE_HEADER
     ignore_arg_types: list[ArgType] = ALWAYS_IGNORE_ARG_TYPES
 
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_LATENCY.labels(str(args[0]).upper()).observe(time.perf_counter() - start)
+
     async def set_ex(self, name: str, value: Any, expire: int = 1800, namespace: CacheNamespace | None = None) -> Any:
         key = name
         if namespace:
@@ -86,6 +97,7 @@ class FastapiCache(redis.Redis):
         if namespace:
             key = namespace + name
         result = await self.get(name=key)
+        CACHE_REQUESTS.labels(namespace or "", "hit" if result else "miss").inc()
         if result:
             return json.loads(result)
         return None
@@ -125,7 +137,10 @@ class FastapiCache(redis.Redis):
     async def check_cache(self, name: str) -> tuple[int, str]:
         pipe = self.pipeline()
         pipe.ttl(CacheNamespace.API_CACHE + name).get(CacheNamespace.API_CACHE + name)
+        start = time.perf_counter()
         ttl, in_cache = await pipe.execute()
+        REDIS_COMMAND_LATENCY.labels("PIPELINE").observe(time.perf_counter() - start)
+        CACHE_REQUESTS.labels(CacheNamespace.API_CACHE, "hit" if in_cache else "miss").inc()
         return ttl, json.loads(in_cache) if in_cache else None
 
     def set_response_headers(self, response: Response, cache_hit: bool, ttl: int | None = None) -> None:
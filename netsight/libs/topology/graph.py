@@ -0,0 +1,255 @@
+"""Device topology as an undirected graph in compressed sparse row form.
+
+LLDP neighbors are links a device reports towards another one, `TopologyGraph` keeps them as
+counts of `(source, target)` device pairs so the links of a device are replaced on its own as
+discovery reports them. Queries run on a CSR adjacency built from those counts: nodes are the
+positions of the sorted device ids and `indices[indptr[i]:indptr[i + 1]]` the neighbors of node
+`i`. Breadth first searches expand a whole frontier per level with numpy, components are found by
+hooking labels along all edges at once. A change only drops the CSR, the next query builds it.
+"""
+
+from collections import defaultdict
+from collections.abc import Collection, Iterable
+from itertools import chain
+from typing import NamedTuple
+
+import numpy as np
+
+__all__ = ("TopologyGraph",)
+
+_UNSEEN = -1
+_BLOCKED = -2
+
+
+class _Csr(NamedTuple):
+    nodes: np.ndarray  # sorted device ids
+    indptr: np.ndarray
+    indices: np.ndarray
+    sources: np.ndarray  # the node of every entry of indices
+
+
+class TopologyGraph:
+    def __init__(self, nodes: Iterable[int] = (), links: Iterable[tuple[int, int]] = ()) -> None:
+        self._nodes: set[int] = set(nodes)
+        self._links: defaultdict[int, dict[int, int]] = defaultdict(dict)
+        self._csr: _Csr | None = None
+        self._articulation_points: list[int] | None = None
+        self.add_links(links)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: int) -> bool:
+        return node in self._nodes
+
+    def _changed(self) -> None:
+        self._csr = None
+        self._articulation_points = None
+
+    def add_nodes(self, nodes: Iterable[int]) -> None:
+        self._nodes.update(nodes)
+        self._changed()
+
+    def remove_nodes(self, nodes: Collection[int]) -> None:
+        """Remove devices with their links in both directions."""
+        self._nodes.difference_update(nodes)
+        for node in nodes:
+            self._links.pop(node, None)
+        for targets in self._links.values():
+            for node in nodes:
+                targets.pop(node, None)
+        self._changed()
+
+    def add_links(self, links: Iterable[tuple[int, int]]) -> None:
+        reported = self._links
+        for source, target in links:
+            if source != target:
+                targets = reported[source]
+                targets[target] = targets.get(target, 0) + 1
+                self._nodes.add(source)
+                self._nodes.add(target)
+        self._changed()
+
+    def remove_links(self, links: Iterable[tuple[int, int]]) -> None:
+        for source, target in links:
+            targets = self._links.get(source)
+            if targets and target in targets:
+                targets[target] -= 1
+                if not targets[target]:
+                    del targets[target]
+        self._changed()
+
+    def replace_links(self, source: int, targets: Iterable[int]) -> None:
+        """Make the links reported by `source` those to `targets`, a rediscovered device."""
+        self._links.pop(source, None)
+        self.add_links((source, target) for target in targets)
+
+    @property
+    def csr(self) -> _Csr:
+        if self._csr is None:
+            self._csr = self._build()
+        return self._csr
+
+    def _build(self) -> _Csr:
+        nodes = np.array(sorted(self._nodes), dtype=np.int64)
+        count = len(nodes)
+        reporters = np.fromiter(self._links, dtype=np.int64, count=len(self._links))
+        lengths = np.fromiter(map(len, self._links.values()), dtype=np.int64, count=len(self._links))
+        first = np.repeat(np.searchsorted(nodes, reporters), lengths)
+        second = np.searchsorted(nodes, np.fromiter(chain.from_iterable(self._links.values()), dtype=np.int64))
+        # both directions of every link once, sorted by node then neighbor
+        entries = np.sort(np.concatenate([first * count + second, second * count + first]))
+        entries = entries[np.concatenate([[True], entries[1:] != entries[:-1]])] if entries.size else entries
+        sources, indices = np.divmod(entries, count) if count else (entries, entries)
+        indptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=count), out=indptr[1:])
+        return _Csr(nodes, indptr, indices, sources)
+
+    def _positions(self, nodes: Iterable[int]) -> np.ndarray:
+        wanted = np.fromiter(nodes, dtype=np.int64)
+        positions = np.searchsorted(self.csr.nodes, wanted)
+        if not len(self):
+            missing = np.ones(len(wanted), dtype=bool)
+        else:
+            missing = self.csr.nodes[np.minimum(positions, len(self) - 1)] != wanted
+        if missing.any():
+            msg = f"Devices not in the topology: {wanted[missing].tolist()}"
+            raise KeyError(msg)
+        return positions
+
+    def _expand(self, frontier: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """The neighbors of every node of `frontier` and the node each one was reached from."""
+        indptr = self.csr.indptr
+        starts = indptr[frontier]
+        lengths = indptr[frontier + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.csr.indices[offsets + np.arange(lengths.sum())], np.repeat(frontier, lengths)
+
+    def _bfs(
+        self,
+        sources: np.ndarray,
+        blocked: np.ndarray | None = None,
+        max_depth: int | None = None,
+        target: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Hops from the nearest source, -1 when unreached, and the node each node was reached from."""
+        depths = np.full(len(self), _UNSEEN, dtype=np.int64)
+        parents = np.full(len(self), _UNSEEN, dtype=np.int64)
+        if blocked is not None:
+            depths[blocked] = _BLOCKED
+        depths[sources] = 0
+        frontier = np.unique(sources)
+        level = 0
+        while frontier.size and (max_depth is None or level < max_depth):
+            if target is not None and depths[target] >= 0:
+                break
+            level += 1
+            neighbors, origins = self._expand(frontier)
+            unseen = depths[neighbors] == _UNSEEN
+            frontier, first = np.unique(neighbors[unseen], return_index=True)
+            depths[frontier] = level
+            parents[frontier] = origins[unseen][first]
+        depths[depths == _BLOCKED] = _UNSEEN
+        return depths, parents
+
+    def neighbors(self, node: int) -> list[int]:
+        (position,) = self._positions([node])
+        indptr = self.csr.indptr
+        return self.csr.nodes[self.csr.indices[indptr[position] : indptr[position + 1]]].tolist()
+
+    def bfs(self, source: int, max_depth: int | None = None) -> dict[int, int]:
+        """The devices reachable from `source` within `max_depth` hops, and their hops."""
+        depths, _ = self._bfs(self._positions([source]), max_depth=max_depth)
+        reached = np.flatnonzero(depths >= 0)
+        return dict(zip(self.csr.nodes[reached].tolist(), depths[reached].tolist(), strict=True))
+
+    def shortest_path(self, source: int, target: int) -> list[int] | None:
+        """The devices of a path with the fewest hops from `source` to `target`, None without one."""
+        sources, (end,) = self._positions([source]), self._positions([target])
+        depths, parents = self._bfs(sources, target=end)
+        if depths[end] < 0:
+            return None
+        path = [end]
+        while depths[path[-1]]:
+            path.append(parents[path[-1]])
+        return self.csr.nodes[path[::-1]].tolist()
+
+    def blast_radius(self, node: int, roots: Iterable[int] = ()) -> list[int]:
+        """The devices cut off from every root when `node` fails, what is downstream of it.
+
+        Without roots that is every other device of its component.
+        """
+        (position,) = self._positions([node])
+        component, _ = self._bfs(np.array([position]))
+        starts = self._positions(roots)
+        starts = starts[starts != position]
+        reachable = np.zeros(len(self), dtype=bool)
+        if starts.size:
+            reachable = self._bfs(starts, blocked=np.array([position]))[0] >= 0
+        cut = (component >= 0) & ~reachable
+        cut[position] = False
+        return self.csr.nodes[cut].tolist()
+
+    def component_labels(self) -> np.ndarray:
+        """The smallest node position of the component of every node."""
+        csr = self.csr
+        labels = np.arange(len(self))
+        while True:
+            low, high = labels[csr.sources], labels[csr.indices]
+            if (low == high).all():
+                return labels
+            # hook the root of the higher label under the lower one, then flatten the trees
+            np.minimum.at(labels, np.maximum(low, high), np.minimum(low, high))
+            while not np.array_equal(parents := labels[labels], labels):
+                labels = parents
+
+    def connected_components(self) -> list[list[int]]:
+        """The devices of every component, largest first."""
+        labels = self.component_labels()
+        order = np.argsort(labels, kind="stable")
+        _, starts, sizes = np.unique(labels[order], return_index=True, return_counts=True)
+        nodes = self.csr.nodes[order]
+        components = [nodes[start : start + size].tolist() for start, size in zip(starts, sizes, strict=True)]
+        return sorted(components, key=len, reverse=True)
+
+    def articulation_points(self) -> list[int]:
+        """The devices whose failure splits their component, cached until the graph changes."""
+        if self._articulation_points is None:
+            self._articulation_points = self.csr.nodes[sorted(self._cut_vertices())].tolist()
+        return self._articulation_points
+
+    def _cut_vertices(self) -> set[int]:
+        # Tarjan's low links with an explicit stack, Python lists index faster than numpy scalars
+        indptr, indices = self.csr.indptr.tolist(), self.csr.indices.tolist()
+        discovered = [_UNSEEN] * len(self)
+        low = [0] * len(self)
+        cut: set[int] = set()
+        clock = 0
+        for root in range(len(self)):
+            if discovered[root] != _UNSEEN:
+                continue
+            discovered[root] = low[root] = clock
+            clock += 1
+            children = 0
+            stack = [(root, _UNSEEN, indptr[root])]
+            while stack:
+                node, parent, edge = stack[-1]
+                if edge < indptr[node + 1]:
+                    stack[-1] = (node, parent, edge + 1)
+                    neighbor = indices[edge]
+                    if discovered[neighbor] == _UNSEEN:
+                        discovered[neighbor] = low[neighbor] = clock
+                        clock += 1
+                        children += node == root
+                        stack.append((neighbor, node, indptr[neighbor]))
+                    elif neighbor != parent:
+                        low[node] = min(low[node], discovered[neighbor])
+                    continue
+                stack.pop()
+                if parent != _UNSEEN:
+                    low[parent] = min(low[parent], low[node])
+                    if parent != root and low[node] >= discovered[parent]:
+                        cut.add(parent)
+            if children > 1:
+                cut.add(root)
+        return cut
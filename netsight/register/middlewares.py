@@ -4,12 +4,17 @@ import uuid
 from dataclasses import dataclass
 from datetime import UTC, datetime
 
+from starlette import status
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.requests import Request
-from starlette.responses import Response, StreamingResponse
+from starlette.responses import JSONResponse, Response, StreamingResponse
 from starlette.types import ASGIApp
 
+from netsight.core.database.session import is_pool_saturated
+from netsight.core.errors import err_codes
+from netsight.core.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT, REQUESTS_SHED
 from netsight.core.utils.context import locale_ctx, request_id_ctx
+from netsight.core.utils.i18n import _
 from netsight.core.utils.processors import export_csv
 
 
@@ -64,3 +69,69 @@ class RequestMiddleware(BaseHTTPMiddleware):
         async for chunk in response.body_iterator:
             body += chunk
         return body.decode()
+
+
+@dataclass
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Record request latency labeled by the matched route's operation_id.
+
+    operation_id is used instead of the raw path so that path parameters do not
+    explode label cardinality, unmatched requests are labeled as `unknown`.
+    """
+
+    app: ASGIApp
+    exclude_paths: tuple[str, ...] = ("/metrics",)
+
+    async def dispatch_func(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        if request.url.path in self.exclude_paths:
+            return await call_next(request)
+        method = request.method
+        status_code = 500
+        REQUESTS_IN_FLIGHT.labels(method).inc()
+        start_time = time.perf_counter()
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            REQUESTS_IN_FLIGHT.labels(method).dec()
+            route = request.scope.get("route")
+            operation_id = getattr(route, "operation_id", None) or "unknown"
+            REQUEST_LATENCY.labels(operation_id, method, status_code).observe(time.perf_counter() - start_time)
+        return response
+
+
+@dataclass
+class AdmissionControlMiddleware(BaseHTTPMiddleware):
+    """Per worker load shedding, reject early with 503 instead of queueing on an exhausted worker.
+
+    A request is shed when the worker already serves `max_concurrency` requests, or when the
+    database pool is exhausted and checkouts wait longer than `pool_wait_threshold` seconds.
+    """
+
+    app: ASGIApp
+    max_concurrency: int | None = None
+    pool_wait_threshold: float = 1.0
+    retry_after: int = 1
+    exclude_paths: tuple[str, ...] = ("/metrics", "/api/admin/health")
+    in_flight: int = 0
+
+    async def dispatch_func(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        if request.url.path in self.exclude_paths:
+            return await call_next(request)
+        if self.max_concurrency is not None and self.in_flight >= self.max_concurrency:
+            return self._shed("concurrency")
+        if is_pool_saturated(self.pool_wait_threshold):
+            return self._shed("db_pool")
+        self.in_flight += 1
+        try:
+            return await call_next(request)
+        finally:
+            self.in_flight -= 1
+
+    def _shed(self, reason: str) -> Response:
+        REQUESTS_SHED.labels(reason).inc()
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"error": err_codes.ERR_503.error, "message": _(err_codes.ERR_503.message)},
+            headers={"Retry-After": str(self.retry_after)},
+        )
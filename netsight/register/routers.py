@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 
 from netsight.features.admin.api import router as auth_router
+from netsight.features.assurance.topology.api import router as topology_router
 from netsight.features.circuit.api import router as circuit_router
+from netsight.features.dashboard.api import router as dashboard_router
 from netsight.features.dcim.api import router as dcim_router
 from netsight.features.intend.api import router as intend_router
 from netsight.features.ipam.api import router as ipam_router
@@ -16,6 +18,8 @@ def register_router() -> APIRouter:
     root_router.include_router(dcim_router, prefix="/dcim", tags=["DCIM"])
     root_router.include_router(ipam_router, prefix="/ipam", tags=["IPAM"])
     root_router.include_router(circuit_router, prefix="/circuit", tags=["Circuit"])
+    root_router.include_router(dashboard_router, prefix="/dashboard", tags=["Dashboard"])
+    root_router.include_router(topology_router, prefix="/assurance", tags=["Assurance"])
     return root_router
 
 
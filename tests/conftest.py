@@ -1,14 +1,18 @@
 import asyncio
 import gc
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
+from contextlib import AbstractContextManager
 from typing import TYPE_CHECKING
 
 import pytest
+from fakeredis import FakeAsyncRedis
 from httpx import AsyncClient
 
 from netsight.app import app
 from netsight.core.config import settings
+from netsight.core.database.query_counter import QueryCounter, assert_query_budget
 from netsight.core.database.session import async_session
+from netsight.libs.redis import session as redis_session
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
@@ -42,3 +46,17 @@ async def client(admin_token: dict[str, str]) -> AsyncGenerator[AsyncClient, Non
 async def session() -> AsyncGenerator["AsyncSession", None]:
     async with async_session() as session:
         yield session
+
+
+@pytest.fixture()
+def query_budget() -> Callable[..., AbstractContextManager[QueryCounter]]:
+    """Usage: `with query_budget(5): await client.get(...)`, fails on overrun or repeated statement shapes."""
+    return assert_query_budget
+
+
+@pytest.fixture
+def redis(monkeypatch: pytest.MonkeyPatch) -> FakeAsyncRedis:
+    """An in-memory redis, with lua, standing in for the client connected at startup."""
+    client = FakeAsyncRedis()
+    monkeypatch.setattr(redis_session, "redis_client", client)
+    return client
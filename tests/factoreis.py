@@ -42,6 +42,10 @@ class MenuFactory(SQLAlchemyFactory[Menu]):
 
 class SiteCreateFactory(ModelFactory[org_schemas.SiteCreate]):
     __model__ = org_schemas.SiteCreate
+    site_group_id = None
+    asn = None
+    it_contact_id = None
+    network_contact_id = None
 
 
 class SiteGroupCreateFactory(ModelFactory[org_schemas.SiteGroupCreate]):
@@ -0,0 +1,237 @@
+"""Tests of the asyncio SNMP client against simulated agents."""
+
+import asyncio
+import bisect
+import time
+from collections.abc import AsyncGenerator, Callable
+from typing import Any
+
+import pytest
+
+from netsight.libs.netty.exceptions import NettySnmpError, NettyTimeoutError
+from netsight.libs.netty.utils import async_snmp as snmp
+from netsight.libs.netty.utils.async_snmp import NoValue, SnmpClient, SnmpTarget, UsmUser, parse_oid
+
+IF_TABLE = (1, 3, 6, 1, 2, 1, 2, 2, 1)
+IF_DESCR, IF_TYPE, IF_SPEED, IF_OPER_STATUS = ((*IF_TABLE, column) for column in (2, 3, 5, 8))
+IF_HC_IN_OCTETS = (1, 3, 6, 1, 2, 1, 31, 1, 1, 1, 6)
+SYS_NAME = (1, 3, 6, 1, 2, 1, 1, 5, 0)
+USER = UsmUser("netsight", "SHA", "authpassword", "AES", "privpassword")
+USM_STATS_WRONG_DIGESTS = (1, 3, 6, 1, 6, 3, 15, 1, 1, 5, 0)
+USM_STATS_UNKNOWN_ENGINE_IDS = (1, 3, 6, 1, 6, 3, 15, 1, 1, 4, 0)
+
+
+def if_mib(interfaces: int) -> dict[snmp.Oid, tuple[int, Any]]:
+    mib: dict[snmp.Oid, tuple[int, Any]] = {SYS_NAME: (snmp.OCTET_STRING, b"sim-agent")}
+    for index in range(1, interfaces + 1):
+        mib[(*IF_DESCR, index)] = (snmp.OCTET_STRING, f"GigabitEthernet1/0/{index}".encode())
+        mib[(*IF_TYPE, index)] = (snmp.INTEGER, 6)
+        mib[(*IF_SPEED, index)] = (snmp.GAUGE32, 1_000_000_000)
+        mib[(*IF_OPER_STATUS, index)] = (snmp.INTEGER, 1 if index % 3 else 2)
+        mib[(*IF_HC_IN_OCTETS, index)] = (snmp.COUNTER64, index << 40)
+    return mib
+
+
+class SimulatedAgent(asyncio.DatagramProtocol):
+    """An agent answering GET, GETNEXT and GETBULK from a fixed MIB.
+
+    v2c requests need `community`, v3 ones `user` with its authentication and privacy. Replies
+    larger than `drop_above` bytes and the first `drop_first` requests are dropped, as lost
+    fragments and packets would be.
+    """
+
+    def __init__(
+        self,
+        mib: dict[snmp.Oid, tuple[int, Any]],
+        community: str = "public",
+        user: UsmUser | None = None,
+        drop_above: int | None = None,
+        drop_first: int = 0,
+    ) -> None:
+        self.oids = sorted(mib)
+        self.values = [snmp.encode_value(*mib[oid]) for oid in self.oids]
+        self.community = community.encode()
+        self.user = user
+        self.engine = snmp.Engine(b"\x80\x00\x1f\x88\x04sim-agent", 1, 100, time.monotonic())
+        self.drop_above = drop_above
+        self.drop_first = drop_first
+        self.requests = 0
+        self.repetitions: list[int] = []
+        self.transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:  # type: ignore[override]
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self.requests += 1
+        if self.requests <= self.drop_first:
+            return
+        reply = self.reply(data)
+        if reply is not None and (self.drop_above is None or len(reply) <= self.drop_above):
+            self.transport.sendto(reply, addr)
+
+    def _next(self, oid: snmp.Oid) -> tuple[snmp.Oid, bytes]:
+        position = bisect.bisect_right(self.oids, oid)
+        if position == len(self.oids):
+            return oid, snmp.encode_value(NoValue.END_OF_MIB_VIEW)
+        return self.oids[position], self.values[position]
+
+    def answer(self, pdu: snmp.Pdu) -> bytes:
+        oids = [oid for oid, _ in pdu.varbinds]
+        if pdu.tag == snmp.GET:
+            varbinds = []
+            for oid in oids:
+                position = bisect.bisect_left(self.oids, oid)
+                found = position < len(self.oids) and self.oids[position] == oid
+                varbinds.append((oid, self.values[position] if found else snmp.encode_value(NoValue.NO_SUCH_INSTANCE)))
+        elif pdu.tag == snmp.GET_NEXT:
+            varbinds = [self._next(oid) for oid in oids]
+        else:
+            non_repeaters, repetitions = pdu.error_status, pdu.error_index
+            self.repetitions.append(repetitions)
+            varbinds = [self._next(oid) for oid in oids[:non_repeaters]]
+            cursors = oids[non_repeaters:]
+            for _ in range(repetitions):
+                row = [self._next(oid) for oid in cursors]
+                varbinds.extend(row)
+                cursors = [oid for oid, _ in row]
+        return snmp.encode_pdu(snmp.RESPONSE, pdu.request_id, 0, 0, varbinds)
+
+    def reply(self, data: bytes) -> bytes | None:
+        if snmp.message_version(data) == snmp.SNMP_V2C:
+            community, pdu = snmp.decode_v2c(data)
+            return snmp.encode_v2c(community, self.answer(pdu)) if community == self.community else None
+        message = snmp.decode_v3(data)
+        keys = snmp.user_keys(self.user, self.engine.engine_id)
+        no_keys = snmp.user_keys(None, b"")
+
+        def report(oid: snmp.Oid, flags: int = 0, request_id: int = 0) -> bytes:
+            pdu = snmp.encode_pdu(snmp.REPORT, request_id, 0, 0, [(oid, snmp.encode_value(snmp.COUNTER32, 1))])
+            scoped = snmp.encode_scoped_pdu(self.engine.engine_id, b"", pdu)
+            username = message.username if flags else b""
+            return snmp.encode_v3(
+                message.msg_id, flags, self.engine, username, keys if flags else no_keys, scoped, message.priv_params
+            )
+
+        if not message.engine_id:
+            return report(USM_STATS_UNKNOWN_ENGINE_IDS)
+        try:
+            _, context, pdu = snmp.open_v3(data, message, keys)
+        except NettySnmpError:
+            return report(USM_STATS_WRONG_DIGESTS)
+        flags = message.flags & (snmp.FLAG_AUTH | snmp.FLAG_PRIV)
+        if message.boots != self.engine.boots or abs(message.time - self.engine.now()) > 150:
+            return report(snmp.USM_STATS_NOT_IN_TIME_WINDOWS, flags, pdu.request_id)
+        scoped = snmp.encode_scoped_pdu(self.engine.engine_id, context, self.answer(pdu))
+        return snmp.encode_v3(message.msg_id, flags, self.engine, message.username, keys, scoped, message.priv_params)
+
+
+async def start_agents(count: int, make: Callable[[], SimulatedAgent]) -> list[tuple[SimulatedAgent, int]]:
+    loop = asyncio.get_running_loop()
+    agents = []
+    for _ in range(count):
+        transport, agent = await loop.create_datagram_endpoint(make, local_addr=("127.0.0.1", 0))
+        agents.append((agent, transport.get_extra_info("sockname")[1]))
+    return agents
+
+
+@pytest.fixture
+async def client() -> AsyncGenerator[SnmpClient, None]:
+    async with SnmpClient(timeout=0.2, retries=2, max_repetitions=40) as client:
+        yield client
+
+
+def test_localized_keys() -> None:
+    # RFC 3414 A.3
+    engine_id = bytes.fromhex("000000000000000000000002")
+    assert snmp.localize_key("maplesyrup", engine_id, "md5").hex() == "526f5eed9fcce26f8964c2930787d82b"
+    assert snmp.localize_key("maplesyrup", engine_id, "sha1").hex() == "6695febc9288e36282235fc7151f128497b38f3f"
+
+
+def test_ber_roundtrip() -> None:
+    varbinds = [
+        (parse_oid("1.3.6.1.2.1.1.5.0"), snmp.encode_value(snmp.OCTET_STRING, b"router")),
+        ((1, 3, 6, 1, 4, 1, 2636, 300), snmp.encode_value(snmp.INTEGER, -129)),
+        ((2, 999, 1), snmp.encode_value(snmp.COUNTER64, 2**64 - 1)),
+        ((1, 3, 6, 1), snmp.encode_value(snmp.IP_ADDRESS, "192.0.2.1")),
+        ((1, 3, 6, 2), snmp.encode_value(snmp.OBJECT_IDENTIFIER, (1, 3, 6, 1, 4, 1, 9))),
+        ((1, 3, 6, 3), snmp.encode_value(NoValue.END_OF_MIB_VIEW)),
+    ]
+    pdu = snmp.decode_pdu(snmp.encode_pdu(snmp.RESPONSE, 2**31 - 1, 0, 0, varbinds * 100))
+    assert pdu.request_id == 2**31 - 1
+    assert pdu.varbinds[:6] == [
+        ((1, 3, 6, 1, 2, 1, 1, 5, 0), b"router"),
+        ((1, 3, 6, 1, 4, 1, 2636, 300), -129),
+        ((2, 999, 1), 2**64 - 1),
+        ((1, 3, 6, 1), "192.0.2.1"),
+        ((1, 3, 6, 2), (1, 3, 6, 1, 4, 1, 9)),
+        ((1, 3, 6, 3), NoValue.END_OF_MIB_VIEW),
+    ]
+    assert len(pdu.varbinds) == 600
+
+
+async def test_get_and_walk_v2c(client: SnmpClient) -> None:
+    [(agent, port)] = await start_agents(1, lambda: SimulatedAgent(if_mib(100)))
+    target = SnmpTarget("127.0.0.1", port=port)
+
+    assert await client.get(target, ["1.3.6.1.2.1.1.5.0", (*IF_DESCR, 101)]) == {
+        SYS_NAME: b"sim-agent",
+        (*IF_DESCR, 101): NoValue.NO_SUCH_INSTANCE,
+    }
+    walked = await client.walk(target, [IF_DESCR, IF_OPER_STATUS, IF_HC_IN_OCTETS])
+    assert walked[IF_DESCR][:2] == [
+        ((*IF_DESCR, 1), b"GigabitEthernet1/0/1"),
+        ((*IF_DESCR, 2), b"GigabitEthernet1/0/2"),
+    ]
+    assert [len(column) for column in walked.values()] == [100, 100, 100]
+    assert walked[IF_HC_IN_OCTETS][-1] == ((*IF_HC_IN_OCTETS, 100), 100 << 40)
+    # the last column of the MIB ends at endOfMibView, the repetitions grew while replies arrived
+    assert agent.repetitions[0] == client.max_repetitions
+    assert await client.walk(target, ["1.3.6.1.6"]) == {(1, 3, 6, 1, 6): []}
+
+    with pytest.raises(NettyTimeoutError):
+        await client.get(target._replace(community="wrong"), [SYS_NAME])
+
+
+async def test_walk_v3(client: SnmpClient) -> None:
+    [(agent, port)] = await start_agents(1, lambda: SimulatedAgent(if_mib(50), community="", user=USER))
+    target = SnmpTarget("127.0.0.1", port=port, user=USER)
+
+    walked = await client.walk(target, [IF_DESCR, IF_SPEED])
+    assert [len(column) for column in walked.values()] == [50, 50]
+    assert walked[IF_SPEED][0] == ((*IF_SPEED, 1), 1_000_000_000)
+
+    # a rebooted agent reports the request out of its time window, the client learns its clock
+    agent.engine = agent.engine._replace(boots=2, time=5)
+    assert await client.get(target, [SYS_NAME]) == {SYS_NAME: b"sim-agent"}
+
+    wrong = USER._replace(auth_password="wrongpassword")  # noqa: S106
+    with pytest.raises(NettySnmpError, match=snmp.format_oid(USM_STATS_WRONG_DIGESTS)):
+        await client.get(target._replace(user=wrong), [SYS_NAME])
+
+
+async def test_adaptive_repetitions_and_retransmits(client: SnmpClient) -> None:
+    # replies over 1200 bytes are lost, as fragmented datagrams often are
+    [(agent, port)] = await start_agents(1, lambda: SimulatedAgent(if_mib(300), drop_above=1200, drop_first=1))
+    target = SnmpTarget("127.0.0.1", port=port)
+
+    walked = await client.walk(target, [IF_DESCR, IF_SPEED])
+    assert [len(column) for column in walked.values()] == [300, 300]
+    # the lost first request was sent again with half the repetitions, they grew back until replies got lost
+    assert agent.repetitions[0] == client.max_repetitions // 2
+    assert any(later < earlier for earlier, later in zip(agent.repetitions, agent.repetitions[1:], strict=False))
+    assert client.repetitions(target) < client.max_repetitions
+
+    with pytest.raises(NettyTimeoutError):
+        await client.get(SnmpTarget("127.0.0.1", port=9), [SYS_NAME])
+
+
+async def test_many_agents() -> None:
+    agents = await start_agents(200, lambda: SimulatedAgent(if_mib(20)))
+    targets = [SnmpTarget("127.0.0.1", port=port) for _, port in agents]
+
+    # the agents share the client's event loop, replies wait for them longer than for remote ones
+    async with SnmpClient(timeout=5, max_repetitions=40) as client:
+        results = await asyncio.gather(*(client.walk(target, [IF_DESCR, IF_OPER_STATUS]) for target in targets))
+    assert all(len(walked[IF_DESCR]) == len(walked[IF_OPER_STATUS]) == 20 for walked in results)
+    assert all(agent.requests == 1 for agent, _ in agents)
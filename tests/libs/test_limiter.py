@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from fakeredis.commands_mixins import server_mixin
+
+from netsight.libs.redis import session as redis_session
+from netsight.libs.redis.limiter import RateLimitResult, SlidingWindowLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """The time the fake redis server's TIME answers, set by the test."""
+    now = [1000.0]
+    monkeypatch.setattr(server_mixin, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+async def test_sliding_window(redis: FakeAsyncRedis, clock: list[float]) -> None:
+    limiter = SlidingWindowLimiter(2, 10)
+    assert await limiter.hit("user") == RateLimitResult(True, 0)
+    clock[0] = 1004.0
+    assert await limiter.hit("user") == RateLimitResult(True, 0)
+    # full until the first hit leaves the window, 10s after it
+    clock[0] = 1006.0
+    assert await limiter.hit("user") == RateLimitResult(False, 4.0)
+    assert await limiter.hit("other") == RateLimitResult(True, 0)
+    # a rejected hit isn't counted
+    assert await redis.zcard("rl_user") == 2
+    assert 0 < await redis.pttl("rl_user") <= 10_000
+
+    clock[0] = 1010.0
+    assert await limiter.hit("user") == RateLimitResult(True, 0)
+    clock[0] = 1010.5
+    assert await limiter.hit("user") == RateLimitResult(False, 3.5)
+
+
+async def test_sliding_window_fails_open(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter = SlidingWindowLimiter(1, 10)
+    monkeypatch.setattr(redis_session, "redis_client", None)
+    assert await limiter.hit("user") == RateLimitResult(True, 0)
+
+    server = FakeServer()
+    server.connected = False
+    monkeypatch.setattr(redis_session, "redis_client", FakeAsyncRedis(server=server))
+    assert await limiter.hit("user") == RateLimitResult(True, 0)
+    assert await limiter.hit("user") == RateLimitResult(True, 0)
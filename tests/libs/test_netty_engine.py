@@ -0,0 +1,315 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from collections.abc import AsyncGenerator, Generator
+from typing import TYPE_CHECKING, Any, Self
+
+import paramiko
+import pytest
+from sqlalchemy import delete, select
+
+from netsight.features.consts import DeviceStatus
+from netsight.features.dcim import services as dcim_services
+from netsight.features.dcim.models import Device, Route, RouteHistory
+from netsight.features.dcim.services import ROUTE_TEMPLATE, DeviceScrapeService
+from netsight.features.netconfig.models import AuthCredential, TextFsmTemplate
+from netsight.libs.netty.engine import CollectionEngine, CollectionResult, CollectionTarget, ssh_factory
+from netsight.libs.netty.exceptions import NettyAuthenticationError, NettyConnectionError, NettyTimeoutError
+from netsight.libs.netty.factory import NettySshFactory
+from netsight.libs.netty.pool import SshSessionPool
+from tests.test_routes import ROUTE_TEMPLATE_TEXT, show_ip_route
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+HOST_KEY = paramiko.RSAKey.generate(1024)
+OUTPUTS = {"show version": "Cisco IOS Software, Version 15.2(4)M7", "show clock": "*10:00:00.000 UTC Mon Oct 19 2026"}
+LOGINS: list[str] = []
+ROUTES = 2000
+
+
+class _MockServer(paramiko.ServerInterface):
+    def check_auth_password(self, username: str, password: str) -> int:
+        if password != "secret":  # noqa: S105
+            return paramiko.AUTH_FAILED
+        LOGINS.append(username)
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username: str) -> str:  # noqa: ARG002
+        return "password"
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:  # noqa: ARG002
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, *args: Any) -> bool:  # noqa: ARG002
+        return True
+
+    def check_channel_shell_request(self, channel: paramiko.Channel) -> bool:  # noqa: ARG002
+        return True
+
+
+def _serve_shell(client: socket.socket) -> None:
+    """A Cisco like CLI echoing the commands, `OUTPUTS` or nothing and the prompt after each.
+
+    Long outputs are sent in pieces, as a device writes a large table.
+    """
+    with paramiko.Transport(client) as transport:
+        transport.add_server_key(HOST_KEY)
+        transport.start_server(server=_MockServer())
+        channel = transport.accept(10)
+        if channel is None:
+            return
+        channel.sendall(b"\r\nmock-router#")
+        line = b""
+        while data := channel.recv(1024):
+            for char in data.replace(b"\x00", b""):
+                if char in b"\r\n":
+                    command = line.decode().strip()
+                    output = OUTPUTS.get(command, "")
+                    reply = f"{command}\r\n{output}\r\nmock-router#".encode()
+                    for start in range(0, len(reply), 8192):
+                        channel.sendall(reply[start : start + 8192])
+                        time.sleep(0.02)
+                    line = b""
+                else:
+                    line += bytes([char])
+
+
+@pytest.fixture(scope="module")
+def ssh_port() -> Generator[int, None, None]:
+    server = socket.create_server(("127.0.0.1", 0))
+    server.settimeout(0.2)
+    stop = threading.Event()
+
+    def accept() -> None:
+        while not stop.is_set():
+            try:
+                client, _ = server.accept()
+            except TimeoutError:
+                continue
+            threading.Thread(target=_serve_shell, args=(client,), daemon=True).start()
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    yield server.getsockname()[1]
+    stop.set()
+    thread.join()
+    server.close()
+
+
+class _VersionFactory(NettySshFactory):
+    def get_hostname(self) -> str:
+        return self.session.base_prompt
+
+    def get_software_version(self) -> str:
+        return self.session.send_command("show version")
+
+
+def _target(device_id: int, port: int = 22, password: str = "secret", username: str = "admin") -> CollectionTarget:  # noqa: S107
+    return CollectionTarget(device_id, "127.0.0.1", "cisco_ios", username, password, port=port)
+
+
+async def _collect(
+    engine: CollectionEngine, targets: list[CollectionTarget], getters: list[str]
+) -> list[CollectionResult]:
+    return sorted([result async for result in engine.collect(targets, getters)], key=lambda r: r.target.device_id)
+
+
+async def test_collect_over_ssh(ssh_port: int) -> None:
+    def factory(target: CollectionTarget, timeout: int) -> NettySshFactory:
+        session = ssh_factory(target, timeout)
+        return _VersionFactory(session.ip_address, session.port, session.username, session.password, target.platform)
+
+    with socket.create_server(("127.0.0.1", 0)) as closed:
+        closed_port = closed.getsockname()[1]
+    engine = CollectionEngine(concurrency=4, timeout=30, retries=1, backoff=0, factory=factory)
+    targets = [_target(i, ssh_port) for i in range(3)]
+    targets += [_target(3, ssh_port, password="wrong"), _target(4, closed_port)]  # noqa: S106
+    results = await _collect(engine, targets, ["get_hostname", "get_software_version"])
+
+    assert [r.data for r in results[:3]] == [
+        {"get_hostname": "mock-router", "get_software_version": OUTPUTS["show version"]}
+    ] * 3
+    # a wrong password is not retried, an unreachable device is
+    assert (type(results[3].error), results[3].attempts) == (NettyAuthenticationError, 1)
+    assert (type(results[4].error), results[4].attempts) == (NettyConnectionError, 2)
+
+
+def test_session_pool(ssh_port: int) -> None:
+    pool = SshSessionPool(idle=0.5, keepalive=0, factory=_VersionFactory)
+    target = _target(1, ssh_port, username="pooled")
+
+    with pool.session(target) as device:
+        assert device.send_commands(["show version", "show clock"]) == {
+            "show version": OUTPUTS["show version"],
+            "show clock": OUTPUTS["show clock"],
+        }
+    with pool.session(target) as reused:
+        assert reused is device
+        assert reused.get_hostname() == "mock-router"
+    assert LOGINS.count("pooled") == 1
+
+    # changed credentials log in again, idle sessions are logged out
+    with pool.session(target._replace(username="rotated")) as device:
+        assert device.get_software_version() == OUTPUTS["show version"]
+    assert (LOGINS.count("rotated"), len(pool)) == (1, 1)
+    time.sleep(0.5)
+    pool.evict_idle()
+    assert len(pool) == 0
+    assert not device.is_alive()
+
+
+async def test_engine_over_pool(ssh_port: int) -> None:
+    pool = SshSessionPool(factory=_VersionFactory)
+    engine = CollectionEngine(concurrency=2, timeout=30, factory=pool.session)
+    targets = [_target(i, ssh_port, username=f"sync-{i}") for i in range(3)]
+
+    # the getters of a sync cycle share one login per device
+    for getter in ("get_hostname", "get_software_version"):
+        results = await _collect(engine, targets, [getter])
+        assert all(r.error is None for r in results)
+    assert sorted(name for name in LOGINS if name.startswith("sync-")) == ["sync-0", "sync-1", "sync-2"]
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_stream_command(monkeypatch: pytest.MonkeyPatch, ssh_port: int) -> None:
+    output = show_ip_route(ROUTES)
+    monkeypatch.setitem(OUTPUTS, "show ip route", output)
+    pool = SshSessionPool(factory=_VersionFactory)
+    with pool.session(_target(1, ssh_port, username="streamed")) as device:
+        pieces = list(device.get_routing_table())
+        # the session is left at the prompt for the next command
+        assert device.get_software_version() == OUTPUTS["show version"]
+    pool.close()
+    assert len(pieces) > 1
+    assert all(piece.endswith("\n") for piece in pieces)
+    assert "".join(pieces) == output + "\n"
+
+
+@pytest.fixture
+async def routed_device(
+    monkeypatch: pytest.MonkeyPatch, session: "AsyncSession", ssh_port: int
+) -> AsyncGenerator[int, None]:
+    stmt = select(Device).where(Device.status == DeviceStatus.Active).order_by(Device.id).limit(1)
+    device = (await session.scalars(stmt)).first()
+    if device is None:
+        pytest.skip("needs an active device")
+    template = TextFsmTemplate(name=ROUTE_TEMPLATE, template=ROUTE_TEMPLATE_TEXT, platform_id=device.platform_id)
+    credential = AuthCredential(device_id=device.id, cli=json.dumps({"username": "routes", "password": "secret"}))
+    session.add_all([template, credential])
+    await session.commit()
+    # whatever its management address, the device is the mock router
+    pool = SshSessionPool(
+        factory=lambda _ip, _port, *args, **kwargs: NettySshFactory("127.0.0.1", ssh_port, *args, **kwargs)
+    )
+    monkeypatch.setattr(dcim_services, "ssh_sessions", pool)
+    monkeypatch.setitem(OUTPUTS, "show ip route", show_ip_route(ROUTES))
+    yield device.id
+    pool.close()
+    for model in (Route, RouteHistory):
+        await session.execute(delete(model).where(model.device_id == device.id))
+    await session.execute(delete(TextFsmTemplate).where(TextFsmTemplate.id == template.id))
+    await session.execute(delete(AuthCredential).where(AuthCredential.id == credential.id))
+    await session.commit()
+
+
+async def test_load_routes_over_ssh(session: "AsyncSession", routed_device: int) -> None:
+    scrape = DeviceScrapeService(routed_device, session)
+    assert await scrape.load_routes() == (ROUTES + 4, 0)
+    assert await scrape.load_routes() == (0, 0)
+    assert LOGINS.count("routes") == 1
+
+
+class _FakeDevice:
+    """A session taking the tracker's delay, failing until the tracker's failures were made."""
+
+    def __init__(self, target: CollectionTarget, tracker: "_Tracker") -> None:
+        self.target = target
+        self.tracker = tracker
+
+    def __enter__(self) -> Self:
+        self.tracker.enter(self.target)
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.tracker.exit(self.target)
+
+    def get_hostname(self) -> str:
+        time.sleep(self.tracker.delay.get(self.target.device_id, 0.02))
+        if self.tracker.attempts[self.target.device_id] <= self.tracker.failures.get(self.target.device_id, 0):
+            raise NettyConnectionError("refused")
+        return f"device-{self.target.device_id}"
+
+
+class _Tracker:
+    def __init__(self, delay: dict[int, float] | None = None, failures: dict[int, int] | None = None) -> None:
+        self.delay = delay or {}
+        self.failures = failures or {}
+        self.lock = threading.Lock()
+        self.attempts: dict[int, int] = {}
+        self.running: dict[object, int] = {}
+        self.peaks: dict[object, int] = {}
+
+    def _keys(self, target: CollectionTarget) -> list[object]:
+        return ["all", ("site", target.site_id), ("platform", target.platform)]
+
+    def enter(self, target: CollectionTarget) -> None:
+        with self.lock:
+            self.attempts[target.device_id] = self.attempts.get(target.device_id, 0) + 1
+            for key in self._keys(target):
+                self.running[key] = self.running.get(key, 0) + 1
+                self.peaks[key] = max(self.peaks.get(key, 0), self.running[key])
+
+    def exit(self, target: CollectionTarget) -> None:
+        with self.lock:
+            for key in self._keys(target):
+                self.running[key] -= 1
+
+    def factory(self, target: CollectionTarget, timeout: int) -> _FakeDevice:  # noqa: ARG002
+        return _FakeDevice(target, self)
+
+
+async def test_concurrency_limits() -> None:
+    tracker = _Tracker()
+    engine = CollectionEngine(concurrency=8, per_site=2, per_platform=5, max_pending=10, factory=tracker.factory)
+    targets = [
+        CollectionTarget(i, "192.0.2.1", ["ios", "vrp"][i % 2], "u", "p", site_id=i % 3 if i < 30 else None)
+        for i in range(60)
+    ]
+    results = await _collect(engine, targets, ["get_hostname"])
+
+    assert [r.data["get_hostname"] for r in results] == [f"device-{i}" for i in range(60)]
+    assert 2 < tracker.peaks["all"] <= 8
+    assert max(tracker.peaks[("site", site)] for site in range(3)) <= 2
+    assert max(tracker.peaks[("platform", platform)] for platform in ("ios", "vrp")) <= 5
+
+
+async def test_timeouts_and_retries() -> None:
+    tracker = _Tracker(delay={1: 0.5}, failures={0: 2, 2: 5})
+    engine = CollectionEngine(concurrency=1, timeout=0.1, retries=2, backoff=0.01, factory=tracker.factory)
+    targets = [
+        CollectionTarget(0, "192.0.2.1", "ios", "u", "p"),
+        CollectionTarget(1, "192.0.2.2", "ios", "u", "p"),
+        CollectionTarget(2, "192.0.2.3", "ios", "u", "p"),
+    ]
+    results = await _collect(engine, targets, ["get_hostname"])
+
+    assert (results[0].data, results[0].attempts) == ({"get_hostname": "device-0"}, 3)
+    assert (type(results[1].error), results[1].attempts) == (NettyTimeoutError, 3)
+    assert (type(results[2].error), results[2].attempts) == (NettyConnectionError, 3)
+    # a timed out device kept the only thread until it returned
+    assert tracker.peaks["all"] == 1
+
+
+async def test_stop_early() -> None:
+    tracker = _Tracker()
+    engine = CollectionEngine(concurrency=2, factory=tracker.factory)
+    targets = (CollectionTarget(i, "192.0.2.1", "ios", "u", "p") for i in range(1000))
+    async for _ in engine.collect(targets, ["get_hostname"]):
+        break
+    await asyncio.sleep(0.1)
+    # only the first scheduled batch was started
+    assert len(tracker.attempts) <= engine.max_pending
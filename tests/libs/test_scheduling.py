@@ -0,0 +1,55 @@
+import asyncio
+from collections.abc import Iterator
+
+from netsight.libs.netty.scheduling import as_finished
+
+
+async def test_as_finished() -> None:
+    pending, peaks, taken = set(), [], []
+    limit = [4]
+
+    def items() -> Iterator[int]:
+        for i in range(20):
+            taken.append(i)
+            yield i
+
+    async def start(i: int) -> int:
+        pending.add(i)
+        peaks.append(len(pending))
+        await asyncio.sleep(0.01 * (i % 3))
+        pending.discard(i)
+        return i
+
+    results = []
+    async for result in as_finished(items(), start, lambda: limit[0]):
+        results.append(result)
+        # items are taken as there is room, never ahead
+        assert len(taken) <= len(results) + limit[0]
+        if len(results) == 8:
+            limit[0] = 2
+
+    assert sorted(results) == list(range(20))
+    assert max(peaks) == 4
+    assert max(peaks[12:]) <= 2
+
+
+async def test_as_finished_cancels_on_close() -> None:
+    started, cancelled = [], []
+
+    async def start(i: int) -> int:
+        started.append(i)
+        try:
+            await asyncio.sleep(i and 10)
+        except asyncio.CancelledError:
+            cancelled.append(i)
+            raise
+        return i
+
+    results = as_finished(range(100), start, lambda: 5)
+    assert await anext(results) == 0
+    await results.aclose()
+    await asyncio.sleep(0)
+
+    # nothing started after the last result taken
+    assert sorted(started) == list(range(5))
+    assert sorted(cancelled) == list(range(1, 5))
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from collections.abc import AsyncGenerator
+
+import pytest
+from icmplib import SocketPermissionError
+
+from netsight.libs.netty.sweeper import AdaptiveWindow, ProbeResult, Sweeper, icmp_probe, tcp_probe
+
+
+@pytest.fixture()
+async def tcp_port() -> AsyncGenerator[int, None]:
+    async def accept(_: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.close()
+
+    server = await asyncio.start_server(accept, "127.0.0.1", 0)
+    yield server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+
+
+def test_probe_result() -> None:
+    result = ProbeResult("192.0.2.1", 4, (1.0, 3.0, 2.0))
+    assert (result.is_alive, result.latency, result.jitter, result.packet_loss) == (True, 2.0, 1.5, 0.25)
+    assert ProbeResult("192.0.2.1", 1, (5.0,)).jitter == 0.0
+    dead = ProbeResult("192.0.2.1", 3, ())
+    assert (dead.is_alive, dead.latency, dead.jitter, dead.packet_loss) == (False, None, None, 1.0)
+
+
+async def test_tcp_sweep_over_loopback(tcp_port: int) -> None:
+    # only 127.0.0.1 listens, the other loopback addresses refuse the connection
+    addresses = [f"127.0.0.{i}" for i in range(1, 51)]
+    sweeper = Sweeper(tcp_probe(tcp_port), count=2, interval=0.01, timeout=1, concurrency=8)
+    results = {result.address: result async for result in sweeper.sweep(addresses)}
+
+    assert set(results) == set(addresses)
+    assert results["127.0.0.1"].is_alive
+    assert results["127.0.0.1"].packet_loss == 0
+    assert not any(results[address].is_alive for address in addresses[1:])
+
+
+async def test_icmp_sweep_over_loopback() -> None:
+    sweeper = Sweeper(icmp_probe(privileged=True), count=2, interval=0.01, timeout=1)
+    try:
+        results = [result async for result in sweeper.sweep(["127.0.0.1", "127.0.0.2"])]
+    except SocketPermissionError:
+        pytest.skip("raw ICMP sockets need root")
+    assert all(result.is_alive and result.packet_loss == 0 for result in results)
+
+
+class _Link:
+    """A fake path that queues past `capacity` probes in flight and drops past twice that."""
+
+    def __init__(self, capacity: int, dead: set[str] | None = None, delay: dict[str, float] | None = None) -> None:
+        self.capacity = capacity
+        self.dead = dead or set()
+        self.delay = delay or {}
+        self.in_flight = 0
+        self.peak = 0
+        self.started: list[float] = []
+
+    async def probe(self, address: str, count: int, interval: float, wait: float) -> ProbeResult:  # noqa: ARG002
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        self.started.append(time.monotonic())
+        try:
+            if address in self.dead:
+                await asyncio.sleep(wait)
+                return ProbeResult(address, count, ())
+            load = self.in_flight / self.capacity
+            rtt = 0.005 * max(1.0, load)
+            await asyncio.sleep(self.delay.get(address, rtt))
+            answered = count if load <= 2 else count - 1
+            return ProbeResult(address, count, (rtt * 1000,) * answered)
+        finally:
+            self.in_flight -= 1
+
+
+async def test_window_grows_without_congestion() -> None:
+    link = _Link(capacity=10_000)
+    sweeper = Sweeper(link.probe, count=1, packets_per_second=1_000_000, concurrency=8, max_concurrency=256)
+    results = [result async for result in sweeper.sweep(f"10.0.{i // 256}.{i % 256}" for i in range(2000))]
+
+    assert len(results) == 2000
+    assert sweeper.window.limit == 256
+    assert 128 < link.peak <= 256
+
+
+async def test_window_backs_off_on_rtt_and_loss() -> None:
+    link = _Link(capacity=50)
+    sweeper = Sweeper(link.probe, count=4, packets_per_second=1_000_000, concurrency=8, max_concurrency=1024)
+    results = [result async for result in sweeper.sweep(f"10.0.{i // 256}.{i % 256}" for i in range(2000))]
+
+    assert len(results) == 2000
+    # the window settles around the point the RTT starts to climb, well under its maximum
+    assert sweeper.window.limit < 200
+    assert sum(result.packet_loss > 0 for result in results) < 600
+
+
+async def test_dead_hosts_do_not_shrink_the_window() -> None:
+    link = _Link(capacity=10_000, dead={f"10.1.0.{i}" for i in range(100)})
+    addresses = [f"10.1.0.{i}" for i in range(200)]
+    sweeper = Sweeper(link.probe, timeout=0.05, packets_per_second=1_000_000, concurrency=16)
+    results = [result async for result in sweeper.sweep(addresses)]
+
+    assert sum(result.is_alive for result in results) == 100
+    assert sweeper.window.limit > 16
+
+
+async def test_packets_per_second_budget() -> None:
+    link = _Link(capacity=10_000)
+    sweeper = Sweeper(link.probe, count=2, packets_per_second=2000, concurrency=256)
+    started = time.monotonic()
+    results = [result async for result in sweeper.sweep(f"10.2.0.{i}" for i in range(250))]
+
+    # 500 packets at 2000/s past a burst of 200
+    assert len(results) == 250
+    assert time.monotonic() - started >= 0.14
+
+
+async def test_results_stream_as_hosts_finish() -> None:
+    link = _Link(capacity=10_000, delay={"10.3.0.1": 0.3})
+    sweeper = Sweeper(link.probe, count=1, packets_per_second=1_000_000, concurrency=8)
+    started = time.monotonic()
+    stream = sweeper.sweep(["10.3.0.1", *(f"10.3.0.{i}" for i in range(2, 50))])
+
+    first = await anext(stream)
+    assert first.address != "10.3.0.1"
+    assert time.monotonic() - started < 0.2
+    rest = [result.address async for result in stream]
+    assert rest[-1] == "10.3.0.1"
+
+
+async def test_failing_host_is_lost() -> None:
+    link = _Link(capacity=10_000)
+
+    async def probe(address: str, count: int, interval: float, wait: float) -> ProbeResult:
+        if address == "10.4.0.1":
+            raise OSError("Network is unreachable")
+        return await link.probe(address, count, interval, wait)
+
+    sweeper = Sweeper(probe, count=2, packets_per_second=1_000_000)
+    results = {result.address: result async for result in sweeper.sweep(f"10.4.0.{i}" for i in range(1, 11))}
+
+    assert len(results) == 10
+    assert results["10.4.0.1"] == ProbeResult("10.4.0.1", 2, ())
+    assert all(results[f"10.4.0.{i}"].is_alive for i in range(2, 11))
+
+
+def test_adaptive_window_bounds() -> None:
+    window = AdaptiveWindow(4, 8, 64)
+    assert window.limit < 9
+    for _ in range(200):
+        window.update(ProbeResult("192.0.2.1", 3, (1.0, 1.0, 1.0)))
+    assert window.limit == 64
+    for _ in range(200):
+        window.update(ProbeResult("192.0.2.1", 3, (50.0,)))
+    assert window.limit < 9
@@ -0,0 +1,138 @@
+import asyncio
+import re
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+
+import pytest
+
+from netsight.libs.netty import parser
+from netsight.libs.netty.parser import TextFsmParser, compile_template, parse_text, split_records
+
+MAC_TEMPLATE = r"""Value VLAN (\d+)
+Value MAC (\S+)
+Value TYPE (\S+)
+Value PORT (\S+)
+
+Start
+  ^Vlan\s+Mac -> Table
+
+Table
+  ^\s*${VLAN}\s+${MAC}\s+${TYPE}\s+${PORT}\s*$$ -> Record
+"""
+MAC_RECORD = re.compile(r"^\s*\d+\s")
+
+# the VLAN of a group is filled down into its rows, groups can't be parsed apart
+GROUPED_TEMPLATE = r"""Value Filldown VLAN (\d+)
+Value MAC (\S+)
+Value PORT (\S+)
+
+Start
+  ^Vlan\s+${VLAN}
+  ^\s+${MAC}\s+${PORT} -> Record
+"""
+
+
+def mac_table(entries: int) -> str:
+    lines = [
+        "          Mac Address Table",
+        "-------------------------------------------",
+        "Vlan    Mac Address       Type        Ports",
+        "----    -----------       --------    -----",
+    ]
+    lines += [
+        f" {100 + i % 50:<6} {i >> 32 & 0xFFFF:04x}.{i >> 16 & 0xFFFF:04x}.{i & 0xFFFF:04x}    DYNAMIC     Gi{i % 4}/0/{i % 48}"
+        for i in range(entries)
+    ]
+    lines.append(f"Total Mac Addresses for this criterion: {entries}")
+    return "\n".join(lines)
+
+
+def grouped_table(entries: int) -> str:
+    lines = []
+    for i in range(entries):
+        if i % 100 == 0:
+            lines.append(f"Vlan {i // 100}")
+        lines.append(f"   {i:012x}   Gi1/0/{i % 48}")
+    return "\n".join(lines)
+
+
+def test_parse_text() -> None:
+    table = parse_text(("mac", 1), MAC_TEMPLATE, mac_table(3))
+
+    assert table.header == ("VLAN", "MAC", "TYPE", "PORT")
+    assert table.rows == [
+        ("100", "0000.0000.0000", "DYNAMIC", "Gi0/0/0"),
+        ("101", "0000.0000.0001", "DYNAMIC", "Gi1/0/1"),
+        ("102", "0000.0000.0002", "DYNAMIC", "Gi2/0/2"),
+    ]
+    assert table.columns()["VLAN"] == ("100", "101", "102")
+    assert parse_text(("mac", 1), MAC_TEMPLATE, "").columns() == dict.fromkeys(table.header, ())
+
+
+def test_compiled_templates_are_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(parser, "MAX_TEMPLATES", 2)
+    updated_at = datetime(2026, 10, 19, tzinfo=UTC)
+    first = compile_template((1, "mac", updated_at), MAC_TEMPLATE)
+
+    assert compile_template((1, "mac", updated_at), MAC_TEMPLATE) is first
+    # an edited template has a new updated_at, so a new key
+    assert compile_template((1, "mac", datetime.now(UTC)), MAC_TEMPLATE) is not first
+    compile_template((2, "mac", updated_at), MAC_TEMPLATE)
+    assert compile_template((1, "mac", updated_at), MAC_TEMPLATE) is not first
+
+
+def test_split_records() -> None:
+    chunks = split_records(mac_table(2500), MAC_RECORD, 1000)
+
+    assert [chunk.count("\n") + 1 for chunk in chunks] == [1004, 1004, 505]
+    assert all(chunk.startswith("          Mac Address Table") for chunk in chunks)
+    assert split_records("no records", MAC_RECORD, 1000) == ["no records"]
+
+
+async def test_parse_across_processes() -> None:
+    mac_parser = TextFsmParser(workers=2, inline_lines=100, chunk_lines=1000)
+    output, grouped_output = mac_table(5000), grouped_table(5000)
+    try:
+        table = await mac_parser.parse(("mac", 1), MAC_TEMPLATE, output, split_at=MAC_RECORD)
+        grouped = await mac_parser.parse(("grouped", 1), GROUPED_TEMPLATE, grouped_output, split_at=r"^\s+\S")
+    finally:
+        mac_parser.close()
+
+    assert len(table.rows) == 5000
+    assert table == parse_text(("mac", 1), MAC_TEMPLATE, output)
+    # filled down values are parsed in one piece
+    assert grouped == parse_text(("grouped", 1), GROUPED_TEMPLATE, grouped_output)
+    assert {vlan for vlan, mac, _ in grouped.rows if mac} == {str(vlan) for vlan in range(50)}
+
+
+async def pieces(output: str, size: int) -> AsyncIterator[str]:
+    # read from a socket: pieces split anywhere, inside lines too
+    for start in range(0, len(output), size):
+        yield output[start : start + size]
+        await asyncio.sleep(0)
+
+
+async def test_parse_stream() -> None:
+    mac_parser = TextFsmParser(workers=2, inline_lines=100, chunk_lines=1000)
+    output, grouped_output = mac_table(5000), grouped_table(500)
+    try:
+        tables = [
+            table async for table in mac_parser.parse_stream(("mac", 1), MAC_TEMPLATE, pieces(output, 997), MAC_RECORD)
+        ]
+        small = [
+            table
+            async for table in mac_parser.parse_stream(("mac", 1), MAC_TEMPLATE, pieces(mac_table(3), 7), MAC_RECORD)
+        ]
+        grouped = [
+            table
+            async for table in mac_parser.parse_stream(
+                ("grouped", 1), GROUPED_TEMPLATE, pieces(grouped_output, 101), r"^\s+\S"
+            )
+        ]
+    finally:
+        mac_parser.close()
+
+    assert len(tables) == 5
+    assert [row for table in tables for row in table.rows] == parse_text(("mac", 1), MAC_TEMPLATE, output).rows
+    assert small == [parse_text(("mac", 1), MAC_TEMPLATE, mac_table(3))]
+    assert grouped == [parse_text(("grouped", 1), GROUPED_TEMPLATE, grouped_output)]
@@ -0,0 +1,105 @@
+import random
+from collections import deque
+from itertools import pairwise
+
+import pytest
+
+from netsight.libs.topology.graph import TopologyGraph
+
+
+def random_graph(seed: int, nodes: int = 40, links: int = 45) -> tuple[list[int], list[tuple[int, int]]]:
+    rng = random.Random(seed)  # noqa: S311
+    # sparse ids like device ids, links reported from both ends sometimes
+    ids = sorted(rng.sample(range(1, 1000), nodes))
+    pairs = [tuple(rng.sample(ids, 2)) for _ in range(links)]
+    return ids, pairs + [(target, source) for source, target in pairs[::3]]
+
+
+def adjacency(ids: list[int], links: list[tuple[int, int]], without: int | None = None) -> dict[int, set[int]]:
+    neighbors: dict[int, set[int]] = {node: set() for node in ids if node != without}
+    for source, target in links:
+        if without not in (source, target):
+            neighbors[source].add(target)
+            neighbors[target].add(source)
+    return neighbors
+
+
+def hops(neighbors: dict[int, set[int]], sources: list[int]) -> dict[int, int]:
+    seen = dict.fromkeys(sources, 0)
+    queue = deque(sources)
+    while queue:
+        node = queue.popleft()
+        for neighbor in neighbors[node]:
+            if neighbor not in seen:
+                seen[neighbor] = seen[node] + 1
+                queue.append(neighbor)
+    return seen
+
+
+def component_count(neighbors: dict[int, set[int]]) -> int:
+    seen: set[int] = set()
+    count = 0
+    for node in neighbors:
+        if node not in seen:
+            seen.update(hops(neighbors, [node]))
+            count += 1
+    return count
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_queries_match_brute_force(seed: int) -> None:
+    ids, links = random_graph(seed)
+    graph = TopologyGraph(ids, links)
+    neighbors = adjacency(ids, links)
+    source, target, root = ids[0], ids[-1], ids[len(ids) // 2]
+
+    assert graph.bfs(source) == hops(neighbors, [source])
+    assert graph.bfs(source, max_depth=2) == {node: hop for node, hop in hops(neighbors, [source]).items() if hop <= 2}
+    path = graph.shortest_path(source, target)
+    expected = hops(neighbors, [source]).get(target)
+    if expected is None:
+        assert path is None
+    else:
+        assert len(path) == expected + 1
+        assert all(b in neighbors[a] for a, b in pairwise(path))
+
+    components = graph.connected_components()
+    assert len(components) == component_count(neighbors)
+    assert sorted(node for component in components for node in component) == ids
+    assert set(components[0]) == set(hops(neighbors, [components[0][0]]))
+
+    splitting = [node for node in ids if component_count(adjacency(ids, links, node)) > component_count(neighbors)]
+    # a device alone in its component leaves one component less, it isn't a cut
+    splitting = [node for node in splitting if neighbors[node]]
+    assert graph.articulation_points() == splitting
+
+    for node in ids:
+        if node == root:
+            continue
+        component = set(hops(neighbors, [node])) - {node}
+        reachable = set(hops(adjacency(ids, links, node), [root]))
+        assert graph.blast_radius(node, [root]) == sorted(component - reachable)
+
+
+def test_incremental_changes() -> None:
+    graph = TopologyGraph([1, 2, 3, 4], [(1, 2), (2, 3), (3, 4), (4, 3)])
+    assert graph.articulation_points() == [2, 3]
+    assert graph.blast_radius(2, [1]) == [3, 4]
+
+    # 3 rediscovered its neighbors: it lost 4 and got 1, 4 still reports 3
+    graph.replace_links(3, [1])
+    assert graph.neighbors(3) == [1, 2, 4]
+    assert graph.articulation_points() == [3]
+    graph.remove_links([(4, 3)])
+    assert graph.neighbors(4) == []
+    graph.add_links([(4, 3)])
+    graph.remove_nodes([3])
+    assert graph.connected_components() == [[1, 2], [4]]
+    assert graph.shortest_path(2, 4) is None
+    assert graph.blast_radius(1) == [2]
+
+    graph.add_links([(4, 5)])
+    assert graph.bfs(5) == {4: 1, 5: 0}
+    with pytest.raises(KeyError):
+        graph.bfs(3)
+    assert TopologyGraph().connected_components() == []
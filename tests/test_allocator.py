@@ -0,0 +1,170 @@
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable
+from ipaddress import ip_network
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from fastapi import status
+from sqlalchemy import delete, insert, select
+
+from netsight.core.errors import err_codes
+from netsight.features.consts import IPAddressStatus, PrefixStatus
+from netsight.features.ipam import schemas
+from netsight.features.ipam.models import Block, IPAddress, Prefix
+from netsight.features.ipam.services import IPAddressService, prefix_service
+from netsight.libs.ipam.allocator import allocate_addresses, allocate_blocks
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def _used(*networks: str) -> AsyncIterator[tuple[int, int]]:
+    for network in map(ip_network, networks):
+        yield int(network.network_address), int(network.broadcast_address)
+
+
+def _range(network: str) -> tuple[int, int]:
+    parent = ip_network(network)
+    return int(parent.network_address), int(parent.broadcast_address)
+
+
+def _networks(starts: Iterable[int], prefix_length: int, version: int = 4) -> list[str]:
+    cls = type(ip_network("0.0.0.0/0" if version == 4 else "::/0"))
+    return [str(cls((start, prefix_length))) for start in starts]
+
+
+async def test_allocate_blocks_skips_used_and_aligns() -> None:
+    used = _used("10.0.0.0/31", "10.0.0.4/30", "10.0.0.4/31")  # nested ranges count once
+    starts = await allocate_blocks(*_range("10.0.0.0/28"), used, 2, 3)
+
+    assert _networks(starts, 31) == ["10.0.0.2/31", "10.0.0.8/31", "10.0.0.10/31"]
+    assert _networks(await allocate_blocks(*_range("10.0.0.0/28"), _used("10.0.0.2/31"), 4, 2), 30) == [
+        "10.0.0.4/30",
+        "10.0.0.8/30",
+    ]
+
+
+async def test_allocate_blocks_ipv6_and_large_parents() -> None:
+    starts = await allocate_blocks(*_range("2001:db8::/32"), _used("2001:db8::/64"), 1 << 64, 1)
+    assert _networks(starts, 64, 6) == ["2001:db8:0:1::/64"]
+
+    starts = await allocate_blocks(*_range("10.0.0.0/8"), _used("10.0.0.0/9"), 2, 1)
+    assert _networks(starts, 31) == ["10.128.0.0/31"]
+
+    assert await allocate_blocks(*_range("10.0.0.0/30"), _used("10.0.0.0/30"), 2, 1) == []
+
+
+async def test_allocate_addresses() -> None:
+    first, last = _range("192.0.2.0/29")
+    used = _used("192.0.2.1/32", "192.0.2.3/32")
+
+    assert await allocate_addresses(first + 1, last - 1, used, 3) == [first + 2, first + 4, first + 5]
+
+
+@pytest.fixture
+async def parent(session: "AsyncSession") -> AsyncGenerator[Prefix, None]:
+    networks = ["192.0.2.0/24", "192.0.2.0/31", "192.0.2.4/30"]
+    created = [
+        await prefix_service.create(
+            session, schemas.PrefixCreate(prefix=ip_network(n), status=PrefixStatus.Available), commit=False
+        )
+        for n in networks
+    ]
+    await session.commit()
+    yield created[0]
+    await session.execute(delete(IPAddress).where(IPAddress.address.op("<<=")(ip_network("192.0.2.0/24"))))
+    await session.execute(delete(Prefix).where(Prefix.prefix.op("<<=")(ip_network("192.0.2.0/24"))))
+    await session.commit()
+
+
+async def test_allocate_prefixes(client: "AsyncClient", parent: Prefix) -> None:
+    url = f"/api/ipam/prefixes/{parent.id}/available-prefixes"
+    response = await client.get(url, params={"prefix_length": 31, "count": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == ["192.0.2.2/31", "192.0.2.8/31"]
+
+    # concurrent allocations serialize on the hierarchy lock of the VRF and never overlap
+    responses = await asyncio.gather(*(client.post(url, json={"prefix_length": 31, "count": 2}) for _ in range(3)))
+    assert all(r.status_code == status.HTTP_200_OK for r in responses), [r.text for r in responses]
+    allocated = {p["prefix"] for r in responses for p in r.json()}
+    assert allocated == {f"192.0.2.{i}/31" for i in (2, 8, 10, 12, 14, 16)}
+
+    response = await client.post(url, json={"prefix_length": 26, "count": 4})
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["error"] == err_codes.ERR_30001.error
+
+    response = await client.get(url, params={"prefix_length": 24})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_allocate_ips(client: "AsyncClient", parent: Prefix) -> None:
+    url = f"/api/ipam/prefixes/{parent.id}/available-ips"
+    response = await client.post(url, json={"count": 2})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert [a["address"] for a in response.json()] == ["192.0.2.1/24", "192.0.2.2/24"]
+
+    response = await client.get(url, params={"count": 1})
+    assert response.json() == ["192.0.2.3/24"]
+
+
+async def test_allocate_ips_among_mixed_masks(client: "AsyncClient", session: "AsyncSession", parent: Prefix) -> None:
+    # by inet order .2/24 comes before .1/32, the scan must follow the addresses
+    await session.execute(
+        insert(IPAddress),
+        [{"address": a, "version": 4, "status": IPAddressStatus.Active} for a in ("192.0.2.2/24", "192.0.2.1/32")],
+    )
+    await session.commit()
+    response = await client.get(f"/api/ipam/prefixes/{parent.id}/available-ips", params={"count": 2})
+    assert response.json() == ["192.0.2.3/24", "192.0.2.4/24"]
+
+
+async def test_allocate_ips_in_nested_prefixes(
+    monkeypatch: pytest.MonkeyPatch, client: "AsyncClient", session: "AsyncSession", parent: Prefix
+) -> None:
+    available_ips = IPAddressService.available_ips
+
+    async def slow_available_ips(*args: Any) -> list[Any]:
+        # widen the window between reading the free addresses and writing them
+        addresses = await available_ips(*args)
+        await asyncio.sleep(0.2)
+        return addresses
+
+    monkeypatch.setattr(IPAddressService, "available_ips", slow_available_ips)
+    nested = await session.scalar(select(Prefix.id).where(Prefix.prefix == ip_network("192.0.2.4/30")))
+    urls = [f"/api/ipam/prefixes/{prefix_id}/available-ips" for prefix_id in (parent.id, nested)]
+    # the /24 allocation takes the addresses of the /30, both serialize on the lock of the VRF
+    for _ in range(2):
+        responses = await asyncio.gather(
+            client.post(urls[0], json={"count": 6}), client.post(urls[1], json={"count": 2})
+        )
+        # the /30 found full, never a duplicate address refused by the unique space of the VRF
+        refused = [r for r in responses if r.status_code != status.HTTP_200_OK]
+        assert all(r.json()["error"] == err_codes.ERR_30001.error for r in refused), [r.text for r in refused]
+        hosts = [a["address"].split("/")[0] for r in responses if r.status_code == status.HTTP_200_OK for a in r.json()]
+        assert len(set(hosts)) == len(hosts)
+        await session.execute(delete(IPAddress).where(IPAddress.address.op("<<=")(ip_network("192.0.2.0/24"))))
+        await session.commit()
+
+
+@pytest.fixture
+async def block(session: "AsyncSession") -> AsyncGenerator[int, None]:
+    block_id = await session.scalar(
+        insert(Block)
+        .returning(Block.id)
+        .values(name="allocator", block="192.0.2.0/24", size=256, range="192.0.2.0-192.0.2.255", is_private=False)
+    )
+    await session.commit()
+    yield block_id
+    await session.execute(delete(Block).where(Block.id == block_id))
+    await session.commit()
+
+
+async def test_allocate_prefixes_in_block_and_prefix(client: "AsyncClient", parent: Prefix, block: int) -> None:
+    requests = [f"/api/ipam/blocks/{block}/available-prefixes", f"/api/ipam/prefixes/{parent.id}/available-prefixes"]
+    responses = await asyncio.gather(
+        *(client.post(url, json={"prefix_length": 30, "count": 2}) for url in requests * 3)
+    )
+    assert all(r.status_code == status.HTTP_200_OK for r in responses), [r.text for r in responses]
+    allocated = [p["prefix"] for r in responses for p in r.json()]
+    assert len(set(allocated)) == len(allocated) == 12
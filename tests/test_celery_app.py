@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from celery.signals import worker_init
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from netsight.core import celery_app as celery_module
+from netsight.core.celery_app import WorkerLoop, async_task, celery_app
+from netsight.core.config import settings
+
+
+async def backend(engine: AsyncEngine) -> tuple[int, int]:
+    async with engine.connect() as connection:
+        pid = await connection.scalar(text("SELECT pg_backend_pid()"))
+    return id(asyncio.get_running_loop()), pid
+
+
+def test_worker_loop_reuses_connections(monkeypatch: pytest.MonkeyPatch) -> None:
+    engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI, pool_size=1)
+    worker_loop = WorkerLoop(engine)
+    monkeypatch.setattr(celery_module, "worker_loop", worker_loop)
+    monkeypatch.setattr(settings, "CELERY_ASYNC_WORKER", True)
+    try:
+        first = async_task(backend)(engine)
+        assert async_task(backend)(engine) == first
+    finally:
+        worker_loop.close()
+    # closed with its connections, a later task starts it again
+    _, pid = worker_loop.portal.call(backend, engine)
+    assert pid != first[1]
+    worker_loop.close()
+
+
+class Worker:
+    # what the worker_init handler reads of a WorkController
+    app = celery_app
+    prefetch_multiplier = 1
+
+
+def test_queue_prefetch(monkeypatch: pytest.MonkeyPatch) -> None:
+    worker = Worker()
+    worker_init.send(sender=worker)
+    assert worker.prefetch_multiplier == 1
+
+    monkeypatch.setattr(settings, "CELERY_QUEUE_PREFETCH", {celery_app.conf.task_default_queue: 8, "ssh": 1})
+    worker_init.send(sender=worker)
+    assert worker.prefetch_multiplier == 8
@@ -0,0 +1,96 @@
+from collections.abc import AsyncGenerator
+
+import pytest
+from sqlalchemy import Column, Connection, ForeignKey, Integer, MetaData, Table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from netsight.core.database.counters import CounterSource, install_counter_triggers, iter_counters, reconcile_counter
+from netsight.core.database.session import async_engine
+
+metadata = MetaData()
+hub = Table(
+    "test_counter_hub",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column(
+        "link_count",
+        Integer,
+        nullable=False,
+        server_default="0",
+        info={"counter": CounterSource("test_counter_link", ("hub_a_id", "hub_z_id"))},
+    ),
+)
+link = Table(
+    "test_counter_link",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("hub_a_id", ForeignKey("test_counter_hub.id", ondelete="CASCADE"), nullable=False),
+    Column("hub_z_id", ForeignKey("test_counter_hub.id", ondelete="CASCADE")),
+)
+
+
+def _setup(connection: Connection) -> None:
+    metadata.drop_all(connection)
+    metadata.create_all(connection)
+    install_counter_triggers(connection, metadata)
+
+
+@pytest.fixture()
+async def connection() -> AsyncGenerator[AsyncConnection, None]:
+    async with async_engine.connect() as connection:
+        await connection.run_sync(_setup)
+        await connection.commit()
+        yield connection
+        await connection.rollback()
+        await connection.run_sync(metadata.drop_all)
+        await connection.commit()
+
+
+async def _counts(connection: AsyncConnection) -> dict[int, int]:
+    return dict((await connection.execute(text("SELECT id, link_count FROM test_counter_hub ORDER BY id"))).all())
+
+
+async def test_counters_follow_writes(connection: AsyncConnection) -> None:
+    await connection.execute(hub.insert(), [{"id": 1}, {"id": 2}, {"id": 3}])
+    await connection.execute(
+        link.insert(),
+        [
+            {"id": 1, "hub_a_id": 1, "hub_z_id": 2},
+            {"id": 2, "hub_a_id": 1, "hub_z_id": 1},  # both ends in one hub count once
+            {"id": 3, "hub_a_id": 2, "hub_z_id": None},
+        ],
+    )
+    assert await _counts(connection) == {1: 2, 2: 2, 3: 0}
+
+    await connection.execute(link.update().where(link.c.id == 1).values(hub_z_id=3))
+    await connection.execute(link.update().values(hub_a_id=link.c.hub_a_id))  # no change, no drift
+    assert await _counts(connection) == {1: 2, 2: 1, 3: 1}
+
+    await connection.execute(link.delete().where(link.c.hub_a_id == 1))
+    assert await _counts(connection) == {1: 0, 2: 1, 3: 0}
+
+
+async def test_reconcile_fixes_drift(connection: AsyncConnection) -> None:
+    await connection.execute(hub.insert(), [{"id": 1}, {"id": 2}])
+    await connection.execute(link.insert(), [{"id": 1, "hub_a_id": 1, "hub_z_id": 2}])
+    await connection.execute(text("UPDATE test_counter_hub SET link_count = 42 WHERE id = 2"))
+
+    (counter,) = iter_counters(metadata)
+    fixed = await connection.run_sync(reconcile_counter, counter)
+
+    assert fixed == 1
+    assert await _counts(connection) == {1: 1, 2: 1}
+
+
+def test_model_counters_registered() -> None:
+    names = {counter.name for counter in iter_counters()}
+
+    assert {
+        "site.device_count",
+        "site.circuit_count",
+        "device_role.device_count",
+        "platform.device_count",
+        "device_type.device_count",
+        "manufacturer.device_count",
+        "group.user_count",
+    } <= names
@@ -0,0 +1,24 @@
+from typing import TYPE_CHECKING
+
+from fastapi import status
+from sqlalchemy import func, select
+
+from netsight.features.dashboard.services import refresh_views
+from netsight.features.dcim.models import Device
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def test_device_stats_match_tables(client: "AsyncClient", session: "AsyncSession") -> None:
+    refreshed = await refresh_views()
+
+    response = await client.get("/api/dashboard/stats/devices", params={"group_by": "status"})
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+
+    expected = dict((await session.execute(select(Device.status, func.count()).group_by(Device.status))).all())
+    assert {r["key"]: r["count"] for r in body["results"]} == {str(k): v for k, v in expected.items()}
+    assert body["refreshed_at"] is not None
+    assert "dashboard_device_stats" in refreshed
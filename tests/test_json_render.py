@@ -0,0 +1,145 @@
+import json
+from collections.abc import AsyncGenerator
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from fastapi import status
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import selectinload
+
+from netsight.core.repositories.json_render import render_select
+from netsight.features._types import list_response
+from netsight.features.admin.models import User
+from netsight.features.consts import DeviceStatus, PrefixStatus, VLANStatus
+from netsight.features.dcim import schemas as dcim_schemas
+from netsight.features.dcim.models import Device
+from netsight.features.intend.models import DeviceRole, DeviceType, IPRole, Manufacturer, Platform
+from netsight.features.ipam import schemas as ipam_schemas
+from netsight.features.ipam.models import VLAN, VRF, Prefix
+from netsight.features.org.models import Location, Site
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# The ORM path the SQL rendered endpoints replaced, their output must stay byte for byte equivalent.
+ORM_PATHS: list[tuple[str, dict[str, Any], Any, Any, tuple]] = [
+    (
+        "/api/dcim/devices",
+        {},
+        Device,
+        dcim_schemas.DeviceList,
+        (
+            selectinload(Device.device_type).load_only(DeviceType.id, DeviceType.name),
+            selectinload(Device.platform).load_only(Platform.id, Platform.name, Platform.netmiko_driver),
+            selectinload(Device.manufacturer).load_only(Manufacturer.id, Manufacturer.name),
+            selectinload(Device.device_role).load_only(DeviceRole.id, DeviceRole.name),
+            selectinload(Device.location).load_only(Location.id, Location.name),
+            selectinload(Device.site).load_only(Site.id, Site.name, Site.site_code),
+        ),
+    ),
+    (
+        "/api/ipam/prefixes",
+        {"status": "Available", "is_dhcp_pool": True, "is_full": False},
+        Prefix,
+        ipam_schemas.Prefix,
+        (
+            selectinload(Prefix.site).load_only(Site.id, Site.name, Site.site_code),
+            selectinload(Prefix.vrf).load_only(VRF.id, VRF.name, VRF.rd),
+            selectinload(Prefix.role).load_only(IPRole.id, IPRole.name),
+            selectinload(Prefix.vlan).load_only(VLAN.id, VLAN.name, VLAN.vid),
+        ),
+    ),
+]
+
+
+@pytest.fixture
+async def seeded(session: "AsyncSession") -> AsyncGenerator[None, None]:
+    """Devices and prefixes alongside the sample ones, with and without their relationships set.
+
+    Text with quotes, backslashes and non ASCII characters has to be escaped the same by both paths.
+    """
+    device = (await session.scalars(select(Device).order_by(Device.id).limit(1))).one()
+    location = await session.scalar(select(Location.id).where(Location.site_id == device.site_id))
+    role = await session.scalar(select(IPRole.id).order_by(IPRole.id))
+    audit = dict.fromkeys(("created_by_fk", "updated_by_fk"), await session.scalar(select(User.id)))
+    device_rows = [
+        {
+            "name": f"render{i}",
+            "management_ip": f"192.0.2.{i + 1}",
+            "oob_ip": f"198.51.100.{i + 1}" if i % 2 else None,
+            "status": DeviceStatus.Active,
+            "asset_tag": f'AT"{i}\\',
+            "latency": 0.1 * i if i % 2 else None,
+            "comments": "机房 A\n排 3" if i % 2 else None,
+            "device_type_id": device.device_type_id,
+            "device_role_id": device.device_role_id,
+            "platform_id": device.platform_id,
+            "manufacturer_id": device.manufacturer_id,
+            "site_id": device.site_id,
+            "location_id": location if i % 2 else None,
+        }
+        for i in range(4)
+    ]
+    device_ids = (await session.scalars(insert(Device).returning(Device.id), device_rows)).all()
+    vrf = await session.scalar(insert(VRF).returning(VRF.id), [audit | {"name": "render", "rd": "65000:998"}])
+    vlan = await session.scalar(
+        insert(VLAN).returning(VLAN.id),
+        [audit | {"name": "render", "vid": 3100, "status": VLANStatus.Active, "site_id": device.site_id}],
+    )
+    prefix_rows = [
+        audit
+        | {
+            "prefix": f"198.18.{i}.0/24",
+            "status": PrefixStatus.Available,
+            "site_id": device.site_id if i % 2 else None,
+            "role_id": role if i % 2 else None,
+            "vrf_id": vrf if i % 2 else None,
+            "vlan_id": vlan if i % 2 else None,
+        }
+        for i in range(4)
+    ]
+    prefix_ids = (await session.scalars(insert(Prefix).returning(Prefix.id), prefix_rows)).all()
+    await session.commit()
+    yield
+    await session.execute(delete(Prefix).where(Prefix.id.in_(prefix_ids)))
+    await session.execute(delete(VLAN).where(VLAN.id == vlan))
+    await session.execute(delete(VRF).where(VRF.id == vrf))
+    await session.execute(delete(Device).where(Device.id.in_(device_ids)))
+    await session.commit()
+
+
+@pytest.mark.usefixtures("seeded")
+@pytest.mark.parametrize(("path", "params", "model", "schema", "options"), ORM_PATHS)
+async def test_json_list_matches_orm(
+    client: "AsyncClient",
+    session: "AsyncSession",
+    path: str,
+    params: dict[str, Any],
+    model: Any,
+    schema: Any,
+    options: tuple,
+) -> None:
+    response = await client.get(path, params={"limit": 100, **params})
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["results"]
+
+    ids = [r["id"] for r in body["results"]]
+    rows = (await session.scalars(select(model).where(model.id.in_(ids)).options(*options))).all()
+    rows = sorted(rows, key=lambda r: ids.index(r.id))
+    expected = json.loads(list_response(body["count"], rows, schema).body)
+
+    assert body == expected
+
+
+def test_render_select_single_statement() -> None:
+    stmt = render_select(select(Prefix).where(Prefix.site_id == 1).limit(20), Prefix, ipam_schemas.Prefix)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert sql.count("LEFT OUTER JOIN LATERAL") == 4
+    assert "'id', prefix.id" in sql
+    assert "'children_count', prefix.children_count" in sql
+    assert "host(" not in sql
+    assert "LIMIT" in sql
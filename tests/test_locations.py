@@ -0,0 +1,96 @@
+from collections.abc import AsyncGenerator
+from typing import TYPE_CHECKING
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+from sqlalchemy import delete
+
+from netsight.core.errors import err_codes
+from netsight.features.org.models import Location
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+SITE_ID = 1
+
+
+def _name(prefix: str) -> str:
+    # NameChineseStr only accepts two characters
+    return f"{prefix}{uuid4().hex[0]}"
+
+
+async def _create(client: "AsyncClient", prefix: str, location_type: str, parent_id: int | None = None) -> int:
+    body = {
+        "name": _name(prefix),
+        "location_type": location_type,
+        "status": "Active",
+        "site_id": SITE_ID,
+        "parent_id": parent_id,
+    }
+    response = await client.post("/api/org/locations", json=body)
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return response.json()["id"]
+
+
+@pytest.fixture()
+async def building(client: "AsyncClient", session: "AsyncSession") -> AsyncGenerator[dict[str, int], None]:
+    building = await _create(client, "B", "Building")
+    floor = await _create(client, "F", "Floor", building)
+    room = await _create(client, "S", "ServerRoom", floor)
+    other = await _create(client, "O", "Building")
+    yield {"building": building, "floor": floor, "room": room, "other": other}
+    await session.execute(delete(Location).where(Location.id.in_([room, floor, building, other])))
+    await session.commit()
+
+
+async def _ids(client: "AsyncClient", **params: int) -> set[int]:
+    response = await client.get("/api/org/locations", params={"limit": 100, **params})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return {r["id"] for r in response.json()["results"]}
+
+
+async def test_subtree_and_ancestor_filters(client: "AsyncClient", building: dict[str, int]) -> None:
+    assert await _ids(client, subtree_of=building["building"]) == {
+        building["building"],
+        building["floor"],
+        building["room"],
+    }
+    assert await _ids(client, subtree_of=building["floor"]) == {building["floor"], building["room"]}
+    assert await _ids(client, ancestors_of=building["room"]) == {building["building"], building["floor"]}
+
+
+async def test_tree_endpoint(client: "AsyncClient", building: dict[str, int]) -> None:
+    response = await client.get(f"/api/org/locations/{building['building']}/tree")
+    assert response.status_code == status.HTTP_200_OK
+    root = response.json()
+
+    assert (root["id"], root["depth"]) == (building["building"], 1)
+    (floor,) = root["children"]
+    assert (floor["id"], floor["depth"]) == (building["floor"], 2)
+    assert [(r["id"], r["depth"]) for r in floor["children"]] == [(building["room"], 3)]
+
+
+async def test_depth_limit(client: "AsyncClient", building: dict[str, int]) -> None:
+    body = {
+        "name": _name("R"),
+        "location_type": "ServerRoom",
+        "status": "Active",
+        "site_id": SITE_ID,
+        "parent_id": building["room"],
+    }
+    response = await client.post("/api/org/locations", json=body)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["error"] == err_codes.ERR_20001.error
+
+
+async def test_move_rebases_subtree(client: "AsyncClient", building: dict[str, int]) -> None:
+    response = await client.put(f"/api/org/locations/{building['floor']}", json={"parent_id": building["other"]})
+    assert response.status_code == status.HTTP_200_OK, response.text
+
+    assert await _ids(client, ancestors_of=building["room"]) == {building["other"], building["floor"]}
+    assert await _ids(client, subtree_of=building["building"]) == {building["building"]}
+
+    response = await client.put(f"/api/org/locations/{building['building']}", json={"parent_id": building["room"]})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
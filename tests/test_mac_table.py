@@ -0,0 +1,126 @@
+import asyncio
+from collections.abc import AsyncGenerator, Callable
+from contextlib import AbstractContextManager
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from sqlalchemy import delete, select
+
+from netsight.core.database.query_counter import QueryCounter
+from netsight.core.database.session import async_session
+from netsight.core.errors import err_codes
+from netsight.core.errors.exception_handlers import GenerError
+from netsight.features.dcim import schemas
+from netsight.features.dcim.models import ArpEntry, Device, MacAddressEntry
+from netsight.features.dcim.services import DeviceScrapeService, endpoint_service, table_stores
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+ENTRIES = 20_000
+
+QueryBudget = Callable[..., AbstractContextManager[QueryCounter]]
+
+
+def mac_table(entries: int, start: int = 0) -> list[dict[str, Any]]:
+    # an access switch: hosts on the edge ports, everything on the uplink too
+    return [
+        {
+            "interface": f"GigabitEthernet1/0/{i % 47 + 1}",
+            "vlan": 100 + i % 10,
+            "mac_address": f"0050.56{i >> 16 & 0xFF:02x}.{i & 0xFFFF:04x}",
+        }
+        for i in range(start, start + entries)
+    ]
+
+
+@pytest.fixture
+async def device_ids(session: "AsyncSession") -> AsyncGenerator[list[int], None]:
+    ids = list((await session.scalars(select(Device.id).order_by(Device.id).limit(2))).all())
+    if len(ids) < 2:
+        pytest.skip("needs two devices")
+    yield ids
+    for model in (MacAddressEntry, ArpEntry):
+        await session.execute(delete(model).where(model.device_id.in_(ids)))
+    await session.commit()
+
+
+async def test_load_snapshots(session: "AsyncSession", device_ids: list[int], query_budget: QueryBudget) -> None:
+    store = table_stores["get_mac_table"]
+    access, _ = device_ids
+    with query_budget(7):
+        assert await store.load(session, {access: mac_table(ENTRIES)}) == (ENTRIES, 0)
+    first_seen = await session.scalar(select(MacAddressEntry.first_seen).where(MacAddressEntry.device_id == access))
+
+    # 100 hosts left and 100 new ones came, a duplicate row and one without a port are ignored
+    snapshot = mac_table(ENTRIES - 100, start=100) + mac_table(100, start=ENTRIES) + mac_table(1, start=200)
+    snapshot.append({"vlan": 1, "mac_address": "0050.5600.0000"})
+    assert await store.load(session, {access: snapshot}) == (100, 100)
+    assert await store.load(session, {access: snapshot}) == (0, 0)
+
+    stmt = select(MacAddressEntry.first_seen).where(
+        MacAddressEntry.device_id == access, MacAddressEntry.mac_address == "00:50:56:00:01:00"
+    )
+    assert await session.scalar(stmt) == first_seen
+    assert await store.load(session, {access: []}) == (0, ENTRIES)
+
+
+async def test_concurrent_loads(device_ids: list[int]) -> None:
+    store = table_stores["get_mac_table"]
+    access, _ = device_ids
+    async with async_session() as first, async_session() as second:
+        diffs = await asyncio.gather(
+            store.load(first, {access: mac_table(1000)}), store.load(second, {access: mac_table(1000)})
+        )
+    # the second load waited and found the rows the first one added
+    assert sorted(diffs) == [(0, 0), (1000, 0)]
+
+
+async def test_locate_endpoints(session: "AsyncSession", device_ids: list[int]) -> None:
+    access, distribution = device_ids
+    uplink = [{**entry, "interface": "TenGigabitEthernet1/1/1"} for entry in mac_table(200)]
+    await table_stores["get_mac_table"].load(session, {access: mac_table(200), distribution: uplink})
+    arp = [{"interface": "Vlan100", "ip_address": "10.100.0.10", "mac_address": "00:50:56:00:00:0a"}]
+    await table_stores["get_arp_table"].load(session, {distribution: arp})
+
+    (endpoint,) = await endpoint_service.locate(session, schemas.EndpointQuery(ip_address="10.100.0.10"))
+    assert endpoint.mac_address == "00:50:56:00:00:0a"
+    assert [str(ip) for ip in endpoint.ip_addresses] == ["10.100.0.10"]
+    # the edge port learned 5 MACs, the uplink 100, the limit
+    edge, trunk = endpoint.locations
+    assert (edge.device_id, edge.interface, edge.vlan, edge.port_mac_count) == (access, "GigabitEthernet1/0/11", 100, 5)
+    assert (trunk.device_id, trunk.port_mac_count) == (distribution, 100)
+
+    (endpoint,) = await endpoint_service.locate(session, schemas.EndpointQuery(mac_address="0050.5600.000b"))
+    assert endpoint.ip_addresses == []
+    assert len(endpoint.locations) == 2
+    assert await endpoint_service.locate(session, schemas.EndpointQuery(ip_address="10.100.0.11")) == []
+    assert await endpoint_service.locate(session, schemas.EndpointQuery(mac_address="0050.56ff.ffff")) == []
+
+
+async def test_load_tables_refuses_missing_tables(
+    monkeypatch: pytest.MonkeyPatch, session: "AsyncSession", device_ids: list[int]
+) -> None:
+    access, _ = device_ids
+    await table_stores["get_mac_table"].load(session, {access: mac_table(10)})
+    tables: dict[str, Any] = {"get_mac_table": mac_table(5), "get_arp_table": None}
+
+    async def collect(_self: DeviceScrapeService, getters: list[str]) -> dict[str, Any]:
+        return {getter: tables[getter] for getter in getters}
+
+    monkeypatch.setattr(DeviceScrapeService, "collect", collect)
+    scrape = DeviceScrapeService(access, session)
+    # a getter not implemented for the platform, the MAC table isn't loaded either
+    with pytest.raises(GenerError) as e:
+        await scrape.load_tables()
+    assert e.value.error == err_codes.ERR_40003
+    stored = select(MacAddressEntry.mac_address).where(MacAddressEntry.device_id == access)
+    assert len((await session.scalars(stored)).all()) == 10
+
+    tables["get_arp_table"] = []
+    with pytest.raises(GenerError) as e:
+        await scrape.load_tables()
+    assert e.value.error == err_codes.ERR_40004
+    diffs = await scrape.load_tables(allow_empty=True)
+    assert (diffs["get_mac_table"], diffs["get_arp_table"]) == ((0, 5), (0, 0))
+
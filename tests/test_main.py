@@ -2,6 +2,10 @@ from typing import TYPE_CHECKING
 
 import pytest
 from fastapi import status
+from fastapi.routing import APIRoute
+from prometheus_client.parser import text_string_to_metric_families
+
+from netsight.app import app
 
 if TYPE_CHECKING:
     from httpx import AsyncClient
@@ -9,8 +13,38 @@ if TYPE_CHECKING:
 
 @pytest.mark.parametrize(
     "path",
-    ["/api/docs", "/api/redoc", "/api/openapi.json", "/api/admin/health", "/api/admin/version", "/api/elements"],
+    [
+        "/api/docs",
+        "/api/redoc",
+        "/api/openapi.json",
+        "/api/admin/health",
+        "/api/admin/version",
+        "/api/elements",
+        "/metrics",
+    ],
 )
 async def test_main(client: "AsyncClient", path: str) -> None:
     response = await client.get(path)
     assert response.status_code == status.HTTP_200_OK
+
+
+async def request_counts(client: "AsyncClient") -> dict[tuple[str, str, str], float]:
+    """The requests `/metrics` reports by (operation_id, method, status), checking the families it exposes."""
+    response = await client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    families = {family.name: family for family in text_string_to_metric_families(response.text)}
+    assert families["netsight_db_pool_checked_out"].type == "gauge"
+    return {
+        (sample.labels["operation_id"], sample.labels["method"], sample.labels["status"]): sample.value
+        for sample in families["netsight_http_request_duration_seconds"].samples
+        if sample.name == "netsight_http_request_duration_seconds_count"
+    }
+
+
+async def test_metrics(client: "AsyncClient") -> None:
+    route = next(route for route in app.routes if isinstance(route, APIRoute) and route.path == "/api/admin/version")
+    key = (route.operation_id, "GET", "200")
+    before = (await request_counts(client)).get(key, 0)
+    response = await client.get("/api/admin/version")
+    assert response.status_code == status.HTTP_200_OK
+    assert (await request_counts(client))[key] == before + 1
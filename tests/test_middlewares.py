@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, status
+from httpx import AsyncClient
+
+from netsight.core.config import settings
+from netsight.features import deps
+from netsight.libs.redis.limiter import SlidingWindowLimiter
+from netsight.register.middlewares import AdmissionControlMiddleware
+
+
+async def test_admission_control_sheds_over_concurrency() -> None:
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/slow")
+    async def slow() -> dict[str, str]:
+        await release.wait()
+        return {"status": "ok"}
+
+    app.add_middleware(AdmissionControlMiddleware, max_concurrency=1, retry_after=2)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first = asyncio.create_task(client.get("/slow"))
+        await asyncio.sleep(0.1)
+        shed = await client.get("/slow")
+        release.set()
+        admitted = await first
+
+    assert shed.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert shed.headers["Retry-After"] == "2"
+    assert admitted.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.usefixtures("redis")
+async def test_rate_limit_rejects_with_retry_after(monkeypatch: pytest.MonkeyPatch, client: AsyncClient) -> None:
+    monkeypatch.setattr(settings, "ENABLE_LIMIT", True)
+    monkeypatch.setattr(deps, "rate_limiter", SlidingWindowLimiter(2, 10))
+
+    responses = [await client.get("/api/org/sites") for _ in range(3)]
+
+    assert [response.status_code for response in responses[:2]] == [status.HTTP_200_OK] * 2
+    assert responses[2].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    # the first request leaves the window in just under 10 seconds, rounded up
+    assert responses[2].headers["Retry-After"] == "10"
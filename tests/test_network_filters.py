@@ -0,0 +1,71 @@
+from collections.abc import AsyncGenerator
+from ipaddress import ip_network
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql
+
+from netsight.features.consts import PrefixStatus
+from netsight.features.ipam import schemas
+from netsight.features.ipam.models import Prefix
+from netsight.features.ipam.services import prefix_service
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+PREFIXES = ["198.51.100.0/24", "198.51.100.0/25", "198.51.100.128/26", "2001:db8::/48"]
+
+
+@pytest.fixture()
+async def prefixes(session: "AsyncSession") -> AsyncGenerator[None, None]:
+    await session.execute(
+        insert(Prefix), [{"prefix": ip_network(p), "status": PrefixStatus.Available} for p in PREFIXES]
+    )
+    await session.commit()
+    yield
+    await session.execute(delete(Prefix).where(Prefix.prefix.in_([ip_network(p) for p in PREFIXES])))
+    await session.commit()
+
+
+async def _prefixes(session: "AsyncSession", **filters: Any) -> set[str]:
+    # model_construct only marks the given filters as set, the others are left out of the WHERE clause
+    query = schemas.PrefixQuery.model_construct(**filters)
+    stmt = prefix_service._apply_list(select(Prefix.prefix), query)  # noqa: SLF001
+    return {str(p) for p in (await session.scalars(stmt)).all()} & set(PREFIXES)
+
+
+@pytest.mark.usefixtures("prefixes")
+async def test_prefix_operators(session: "AsyncSession") -> None:
+    assert await _prefixes(session, prefix__within=ip_network("198.51.100.0/24")) == {
+        "198.51.100.0/25",
+        "198.51.100.128/26",
+    }
+    assert await _prefixes(session, prefix__within_or_eq=ip_network("198.51.100.0/24")) == {
+        "198.51.100.0/24",
+        "198.51.100.0/25",
+        "198.51.100.128/26",
+    }
+    assert await _prefixes(session, prefix__contains="198.51.100.130") == {"198.51.100.0/24", "198.51.100.128/26"}
+    assert await _prefixes(session, prefix__overlaps=ip_network("198.51.100.0/23")) == {
+        "198.51.100.0/24",
+        "198.51.100.0/25",
+        "198.51.100.128/26",
+    }
+    assert await _prefixes(session, prefix__family=6) == {"2001:db8::/48"}
+
+
+def test_unset_operator_is_ignored() -> None:
+    query = schemas.PrefixQuery.model_construct(prefix__within=None)
+    stmt = prefix_service._apply_list(select(Prefix.id), query)  # noqa: SLF001
+
+    assert stmt.whereclause is None
+
+
+def test_operator_sql() -> None:
+    query = schemas.PrefixQuery.model_construct(prefix__within=ip_network("10.0.0.0/8"), prefix__family=4)
+    stmt = prefix_service._apply_list(select(Prefix.id), query)  # noqa: SLF001
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "prefix.prefix << %(param_1)s" in sql
+    assert "family(prefix.prefix) = %(family_1)s" in sql
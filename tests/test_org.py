@@ -20,9 +20,10 @@ class TestSiteGroup:
     async def test_create_site_group(self, client, sites):
         new_site_group = factoreis.SiteGroupCreateFactory.build()
         new_site_group.site = []
-        response = await client.post("/api/dcim/site-groups", json=new_site_group.model_dump())
+        response = await client.post("/api/org/site-groups", json=new_site_group.model_dump())
         assert response.status_code == 200
 
+        new_site_group = factoreis.SiteGroupCreateFactory.build()
         new_site_group.site = [site.id for site in sites]
-        response = await client.post("/api/dcim/site-groups", json=new_site_group.model_dump())
+        response = await client.post("/api/org/site-groups", json=new_site_group.model_dump())
         assert response.status_code == 200
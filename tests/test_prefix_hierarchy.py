@@ -0,0 +1,164 @@
+import random
+from collections.abc import AsyncGenerator
+from ipaddress import ip_network
+from typing import TYPE_CHECKING
+
+import pytest
+from fastapi import status
+from sqlalchemy import delete, insert, select
+
+from netsight.features.consts import PrefixStatus
+from netsight.features.ipam import schemas
+from netsight.features.ipam.models import VRF, Prefix
+from netsight.features.ipam.services import prefix_service
+from netsight.libs.ipam.hierarchy import Placement, PrefixNode, build_hierarchy
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+PREFIXES = [
+    "203.0.113.0/24",
+    "203.0.113.0/25",
+    "203.0.113.0/26",
+    "203.0.113.64/26",
+    "203.0.113.128/25",
+    "203.0.113.192/27",
+    "2001:db8:100::/48",
+    "2001:db8:100:1::/64",
+]
+
+
+def test_build_hierarchy() -> None:
+    nodes = [PrefixNode(i, None, ip_network(p)) for i, p in enumerate(PREFIXES)]
+    nodes.append(PrefixNode(100, 1, ip_network("203.0.113.0/26")))  # other VRF, own tree
+    # duplicates, in a VRF not enforcing unique space
+    nodes += [PrefixNode(i, 2, ip_network(p)) for i, p in ((202, "198.51.100.0/24"), (200, "198.51.100.0/24"))]
+    nodes.append(PrefixNode(201, 2, ip_network("198.51.100.0/25")))
+    random.shuffle(nodes)
+
+    placements = build_hierarchy(nodes)
+
+    assert placements[0] == Placement(None, 0, 2)
+    assert placements[1] == Placement(0, 1, 2)
+    assert placements[2] == Placement(1, 2, 0)
+    assert placements[3] == Placement(1, 2, 0)
+    assert placements[4] == Placement(0, 1, 1)
+    assert placements[5] == Placement(4, 2, 0)
+    assert placements[6] == Placement(None, 0, 1)
+    assert placements[7] == Placement(6, 1, 0)
+    assert placements[100] == Placement(None, 0, 0)
+    assert placements[200] == Placement(None, 0, 1)
+    assert placements[202] == Placement(200, 1, 1)
+    assert placements[201] == Placement(202, 2, 0)
+
+
+async def _check(session: "AsyncSession", ids: dict[str, int]) -> dict[int, Placement]:
+    """Compare the incrementally maintained hierarchy of `ids` with a full sweep."""
+    rows = (
+        await session.execute(
+            select(Prefix.id, Prefix.vrf_id, Prefix.prefix, Prefix.parent_id, Prefix.depth, Prefix.children_count)
+        )
+    ).all()
+    expected = build_hierarchy(PrefixNode(row.id, row.vrf_id, row.prefix) for row in rows)
+    stored = {row.id: Placement(row.parent_id, row.depth, row.children_count) for row in rows}
+    assert {i: stored[i] for i in ids.values()} == {i: expected[i] for i in ids.values()}
+    return stored
+
+
+@pytest.fixture()
+async def prefixes(session: "AsyncSession") -> AsyncGenerator[dict[str, int], None]:
+    await prefix_service.rebuild_hierarchy(session)
+    ids, loaded = {}, []
+    # subnets first: every create adopts prefixes created before, the hierarchy of those still
+    # loaded in the session goes stale, later writes must not trust it
+    for prefix in sorted(PREFIXES, key=lambda p: ip_network(p).prefixlen, reverse=True):
+        new = await prefix_service.create(
+            session, schemas.PrefixCreate(prefix=ip_network(prefix), status=PrefixStatus.Available)
+        )
+        ids[prefix] = new.id
+        loaded.append(new)
+    yield ids
+    loaded.clear()
+    await session.execute(delete(Prefix).where(Prefix.id.in_(ids.values())))
+    await session.commit()
+    await prefix_service.rebuild_hierarchy(session)
+
+
+async def test_writes_keep_hierarchy(session: "AsyncSession", prefixes: dict[str, int]) -> None:
+    await _check(session, prefixes)
+
+    db_prefix = await prefix_service.get_one_or_404(session, prefixes["203.0.113.0/25"])
+    await prefix_service.update(session, db_prefix, schemas.PrefixUpdate(prefix=ip_network("203.0.113.0/27")))
+    stored = await _check(session, prefixes)
+    assert stored[prefixes["203.0.113.0/25"]].parent_id == prefixes["203.0.113.0/26"]
+    assert stored[prefixes["203.0.113.0/26"]].children_count == 1
+
+    # what PrefixService.delete does, without the audit log of the deleted row
+    db_prefix = await prefix_service.get_one_or_404(session, prefixes.pop("203.0.113.0/24"))
+    await prefix_service._detach(session, db_prefix)  # noqa: SLF001
+    await session.execute(delete(Prefix).where(Prefix.id == db_prefix.id))
+    await session.commit()
+    await _check(session, prefixes)
+    assert await prefix_service.rebuild_hierarchy(session) == 0
+
+
+async def test_duplicates_keep_hierarchy(session: "AsyncSession") -> None:
+    vrf_id = await session.scalar(
+        insert(VRF).returning(VRF.id), [{"name": "duplicates", "rd": "65000:997", "enforce_unique": False}]
+    )
+    await session.commit()
+    ids: dict[str, int] = {}
+    try:
+        for name, prefix in (
+            ("inner", "198.51.100.0/25"),
+            ("first", "198.51.100.0/24"),
+            ("second", "198.51.100.0/24"),
+            ("outer", "198.51.100.0/23"),
+        ):
+            new = await prefix_service.create(
+                session, schemas.PrefixCreate(prefix=ip_network(prefix), vrf_id=vrf_id, status=PrefixStatus.Available)
+            )
+            ids[name] = new.id
+        stored = await _check(session, ids)
+        assert stored[ids["second"]].parent_id == ids["first"]
+        assert stored[ids["inner"]] == Placement(ids["second"], 3, 0)
+
+        # moved away and back the first twin contains the second again, they nest by id not by write order
+        for prefix in ("198.51.101.0/24", "198.51.100.0/24"):
+            db_prefix = await prefix_service.get_one_or_404(session, ids["first"])
+            await prefix_service.update(session, db_prefix, schemas.PrefixUpdate(prefix=ip_network(prefix)))
+            stored = await _check(session, ids)
+        assert stored[ids["second"]].parent_id == ids["first"]
+        tree = await prefix_service.get_tree(session, await prefix_service.get_one_or_404(session, ids["second"]), 1)
+        assert [child["id"] for child in tree["children"]] == [ids["inner"]]
+
+        db_prefix = await prefix_service.get_one_or_404(session, ids.pop("second"))
+        await prefix_service._detach(session, db_prefix)  # noqa: SLF001
+        await session.execute(delete(Prefix).where(Prefix.id == db_prefix.id))
+        await session.commit()
+        stored = await _check(session, ids)
+        assert stored[ids["inner"]] == Placement(ids["first"], 2, 0)
+
+        assert await prefix_service.rebuild_hierarchy(session) == 0
+    finally:
+        await session.execute(delete(Prefix).where(Prefix.vrf_id == vrf_id))
+        await session.execute(delete(VRF).where(VRF.id == vrf_id))
+        await session.commit()
+
+
+async def test_children_and_tree(client: "AsyncClient", prefixes: dict[str, int]) -> None:
+    response = await client.get(f"/api/ipam/prefixes/{prefixes['203.0.113.0/24']}/children")
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["count"] == 2
+    assert [r["prefix"] for r in body["results"]] == ["203.0.113.0/25", "203.0.113.128/25"]
+
+    response = await client.get(f"/api/ipam/prefixes/{prefixes['203.0.113.0/24']}/tree", params={"levels": 1})
+    assert response.status_code == status.HTTP_200_OK
+    tree = response.json()
+    assert (tree["prefix"], tree["depth"], tree["children_count"]) == ("203.0.113.0/24", 0, 2)
+    assert [(c["prefix"], c["children"]) for c in tree["children"]] == [
+        ("203.0.113.0/25", None),
+        ("203.0.113.128/25", None),
+    ]
@@ -0,0 +1,117 @@
+from collections.abc import AsyncGenerator
+from ipaddress import ip_address, ip_network
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+from sqlalchemy import delete, insert
+
+from netsight.features.consts import PrefixStatus
+from netsight.features.ipam import schemas
+from netsight.features.ipam.models import VRF, Prefix
+from netsight.features.ipam.services import prefix_service
+from netsight.libs.ipam.lpm import PrefixGroup, PrefixIndex, PrefixIndexStore
+from netsight.libs.ipam.utilization import to_keys
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+PREFIXES = ["100.64.0.0/16", "100.64.1.0/24", "100.64.1.128/25", "2001:db8:40::/48", "2001:db8:40:1::/64"]
+
+
+def _group(vrf_id: int, networks: list[str], first_id: int) -> PrefixGroup:
+    parsed = [ip_network(n) for n in networks]
+    version = parsed[0].version
+    ids = np.arange(first_id, first_id + len(parsed))
+    return PrefixGroup(
+        vrf_id,
+        version,
+        ids,
+        to_keys([int(n.network_address) for n in parsed], version),
+        to_keys([int(n.broadcast_address) for n in parsed], version),
+        ids * 10,
+        np.zeros_like(ids),
+        np.zeros_like(ids),
+    )
+
+
+def _keys(*addresses: str) -> np.ndarray:
+    return to_keys([int(ip_address(a)) for a in addresses], ip_address(addresses[0]).version)
+
+
+def test_most_specific_prefix() -> None:
+    index = PrefixIndex.build(
+        [
+            _group(0, ["10.0.0.0/8", "10.1.0.0/16", "10.1.2.0/24", "10.1.2.0/24"], 1),
+            _group(5, ["10.0.0.0/16"], 10),
+            _group(0, ["::/0", "2001:db8::/32", "2001:db8:1::/48"], 20),
+        ],
+        mark=1,
+    )
+    addresses = _keys("10.1.2.3", "10.1.3.3", "10.200.0.1", "11.0.0.1", "10.0.0.1")
+
+    # the gaps between subnets belong to the parent, of duplicates the last one wins
+    assert index.lookup(addresses, 4)["id"].tolist() == [4, 2, 1, 0, 1]
+    assert index.lookup(addresses, 4, np.array([0, 0, 5, 5, 5]))["id"].tolist() == [4, 2, 0, 0, 10]
+    assert index.lookup(addresses, 4, 5)["vlan_id"].tolist() == [0, 0, 0, 0, 100]
+    assert index.lookup(_keys("2001:db8:1::5", "2001:db8:2::", "fe80::1"), 6)["id"].tolist() == [22, 21, 20]
+    assert index.lookup(_keys("2001:db8:1::5"), 6, 5)["id"].tolist() == [0]
+
+
+def test_replace_and_share(tmp_path: Path) -> None:
+    index = PrefixIndex.build([_group(0, ["10.0.0.0/8"], 1), _group(5, ["10.0.0.0/16"], 10)], mark=1)
+    replaced = index.replace([_group(5, ["10.0.0.0/24"], 30)], [5, 9], mark=2)
+    addresses = _keys("10.0.0.1", "10.0.1.1")
+
+    assert replaced.lookup(addresses, 4, 5)["id"].tolist() == [30, 0]
+    assert replaced.lookup(addresses, 4)["id"].tolist() == [1, 1]
+    assert replaced.rows["id"].tolist() == [0, 1, 30]
+
+    store = PrefixIndexStore(tmp_path, check_interval=0)
+    assert store.current() is None
+    for published in (index, replaced, replaced):
+        store.publish(published)
+    shared = store.current()
+    assert isinstance(shared.rows, np.memmap)
+    assert (shared.mark, shared.lookup(addresses, 4, 5)["id"].tolist()) == (2, [30, 0])
+    assert len([path for path in tmp_path.iterdir() if path.is_dir()]) == store.keep
+
+
+@pytest.fixture
+async def prefixes(session: "AsyncSession") -> AsyncGenerator[dict[str, Prefix], None]:
+    created = {
+        n: await prefix_service.create(
+            session, schemas.PrefixCreate(prefix=ip_network(n), status=PrefixStatus.Available), commit=False
+        )
+        for n in PREFIXES
+    }
+    await session.commit()
+    yield created
+    await session.execute(delete(Prefix).where(Prefix.id.in_([p.id for p in created.values()])))
+    await session.execute(delete(VRF).where(VRF.name == "PI"))
+    await session.commit()
+
+
+async def test_refresh_index(session: "AsyncSession", prefixes: dict[str, Prefix], tmp_path: Path) -> None:
+    store = PrefixIndexStore(tmp_path, check_interval=0)
+    assert await prefix_service.refresh_index(session, store) == -1
+    assert await prefix_service.refresh_index(session, store) == 0
+
+    addresses = _keys("100.64.1.200", "100.64.2.1")
+    assert store.current().lookup(addresses, 4)["id"].tolist() == [
+        prefixes["100.64.1.128/25"].id,
+        prefixes["100.64.0.0/16"].id,
+    ]
+    assert store.current().lookup(_keys("2001:db8:40:1::1"), 6)["id"].tolist() == [prefixes["2001:db8:40:1::/64"].id]
+
+    # moving a prefix to a VRF updates the global table and the VRF
+    vrf_id = await session.scalar(insert(VRF).returning(VRF.id).values(name="PI", rd="65000:903"))
+    await session.commit()
+    moved = prefixes["100.64.1.128/25"]
+    await prefix_service.update(session, moved, schemas.PrefixUpdate(vrf_id=vrf_id))
+    assert await prefix_service.refresh_index(session, store) == 2
+
+    index = store.current()
+    assert index.lookup(addresses, 4)["id"].tolist() == [prefixes["100.64.1.0/24"].id, prefixes["100.64.0.0/16"].id]
+    assert index.lookup(addresses, 4, vrf_id)["id"].tolist() == [moved.id, 0]
@@ -0,0 +1,234 @@
+from collections.abc import AsyncGenerator
+from typing import TYPE_CHECKING
+
+import pytest
+from fastapi import status
+from sqlalchemy import delete, insert, select
+
+from netsight.core.database.query_counter import QueryCounter, normalize_statement
+from netsight.features.admin.models import User
+from netsight.features.circuit.models import ISP, ISPASN, Circuit
+from netsight.features.consts import (
+    CircuitStatus,
+    InterfaceAdminStatus,
+    IPAddressStatus,
+    IPRangeStatus,
+    PrefixStatus,
+    SiteStatus,
+    VLANStatus,
+)
+from netsight.features.dcim.models import Device, Interface
+from netsight.features.intend.models import CircuitType, IPRole
+from netsight.features.ipam.models import ASN, VLAN, VRF, Block, IPAddress, IPRange, Prefix, SiteASN
+from netsight.features.org.models import Site
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# Every request pays 2 queries for `auth` (user + role selectinload). List endpoints add 1 count
+# query, 1 page query and 1 query per selectinload option, detail endpoints 1 query plus 1 per option.
+# Devices and prefixes are rendered as JSON by Postgres (`list_and_count_json`): count + page only.
+# A budget overrun means a relationship option was dropped or a lazy load slipped in.
+LIST_DETAIL_BUDGETS = [
+    # (list path, list budget, detail path, detail budget)
+    ("/api/dcim/devices", 4, "/api/dcim/devices/{id}", 11),
+    ("/api/ipam/blocks", 4, "/api/ipam/blocks/{id}", 3),
+    ("/api/ipam/prefixes", 4, "/api/ipam/prefixes/{id}", 7),
+    ("/api/ipam/asn", 4, "/api/ipam/asn/{id}", 5),
+    ("/api/ipam/ip-ranges", 5, "/api/ipam/ip-ranges/{id}", 4),
+    ("/api/ipam/ip-addresses", 8, "/api/ipam/ip-addresses/{id}", 7),
+    ("/api/ipam/vlans", 6, "/api/ipam/vlans/{id}", 5),
+    ("/api/org/site-groups", 6, "/api/org/site-groups/{id}", 6),
+    ("/api/org/sites", 10, "/api/org/sites/{id}", 9),
+    ("/api/circuit/isps", 4, "/api/circuit/isp/{id}", 4),
+    ("/api/circuit/circuits", 14, "/api/circuit/circuits/{id}", 13),
+    ("/api/intend/circuit-types", 4, "/api/intend/circuit-types/{id}", 3),
+    ("/api/intend/device-roles", 4, "/api/intend/device-roles/{id}", 3),
+    ("/api/intend/ip-roles", 4, "/api/intend/ip-roles/{id}", 3),
+    ("/api/intend/platforms", 4, "/api/intend/platforms/{id}", 3),
+    ("/api/intend/manufacturers", 4, "/api/intend/manufacturers/{id}", 3),
+    ("/api/intend/device-types", 6, "/api/intend/device-types/{id}", 5),
+]
+# relationships to one table loaded by a selectinload each, the same statement shape but no N+1:
+# the audit users of a site, its IT and its network contact
+SAME_TABLE_LOADS = {"/api/org/sites": 4}
+SEEDED = 5
+
+
+@pytest.fixture(scope="module")
+async def seeded(session: "AsyncSession") -> AsyncGenerator[None, None]:
+    """`SEEDED` rows in every listed table the sample data leaves empty, their relationships set.
+
+    With rows pointing at different sites, roles and users a lazy load repeats past the N+1 threshold.
+    """
+    admin = await session.scalar(select(User.id).where(User.name == "admin"))
+    roles = (await session.scalars(select(IPRole.id).order_by(IPRole.id).limit(SEEDED))).all()
+    circuit_type = await session.scalar(select(CircuitType.id).order_by(CircuitType.id))
+    devices = (await session.scalars(select(Device.id).order_by(Device.id).limit(2))).all()
+    if len(roles) < SEEDED or circuit_type is None or len(devices) < 2:
+        pytest.skip("needs the sample ip roles, circuit types and two devices")
+    seeded = range(SEEDED)
+    audit = {"created_by_fk": admin, "updated_by_fk": admin}
+
+    async def add(model: type, rows: list[dict]) -> list[int]:
+        return list((await session.scalars(insert(model).returning(model.id), [audit | row for row in rows])).all())
+
+    sites = await add(
+        Site,
+        [
+            {
+                "name": f"budget{i}",
+                "site_code": f"BUDGET{i}",
+                "status": SiteStatus.Active,
+                "address": "",
+                "latitude": 0,
+                "longitude": 0,
+            }
+            for i in seeded
+        ],
+    )
+    vrf = (await add(VRF, [{"name": "budget", "rd": "65000:999"}]))[0]
+    blocks = await add(
+        Block,
+        [
+            {"name": f"budget{i}", "block": f"198.18.{i}.0/24", "size": 256, "range": "", "is_private": False}
+            for i in seeded
+        ],
+    )
+    vlans = await add(
+        VLAN,
+        [
+            {
+                "name": f"budget{i}",
+                "vid": 3000 + i,
+                "status": VLANStatus.Active,
+                "site_id": sites[i],
+                "role_id": roles[i],
+            }
+            for i in seeded
+        ],
+    )
+    prefixes = await add(
+        Prefix,
+        [
+            {
+                "prefix": f"203.0.113.{i * 16}/28",
+                "status": PrefixStatus.Available,
+                "site_id": sites[i],
+                "role_id": roles[i],
+                "vrf_id": vrf,
+                "vlan_id": vlans[i],
+            }
+            for i in seeded
+        ],
+    )
+    ip_ranges = await add(
+        IPRange,
+        [
+            {
+                "start_address": f"203.0.113.{i * 16 + 1}/28",
+                "end_address": f"203.0.113.{i * 16 + 8}/28",
+                "status": IPRangeStatus.Available,
+                "vrf_id": vrf,
+            }
+            for i in seeded
+        ],
+    )
+    interface_rows = [
+        {
+            "device_id": devices[i % 2],
+            "name": f"Budget{i}",
+            "mode": "access",
+            "admin_status": InterfaceAdminStatus.Enabled,
+        }
+        for i in seeded
+    ]
+    interfaces = list((await session.scalars(insert(Interface).returning(Interface.id), interface_rows)).all())
+    ip_addresses = await add(
+        IPAddress,
+        [
+            {
+                "address": f"203.0.113.{i * 16 + 9}/28",
+                "version": 4,
+                "status": IPAddressStatus.Active,
+                "vrf_id": vrf,
+                "interface_id": interfaces[i],
+            }
+            for i in seeded
+        ],
+    )
+    asns = await add(ASN, [{"asn": 4_200_000_000 + i} for i in seeded])
+    await session.execute(insert(SiteASN), [{"site_id": sites[i], "asn_id": asns[i]} for i in seeded])
+    isps = await add(ISP, [{"name": {"en": f"budget{i}", "zh": f"budget{i}"}, "slug": f"budget{i}"} for i in seeded])
+    await session.execute(insert(ISPASN), [{"isp_id": isps[i], "asn_id": asns[i]} for i in seeded])
+    circuits = await add(
+        Circuit,
+        [
+            {
+                "name": f"budget{i}",
+                "slug": f"budget{i}",
+                "status": CircuitStatus.Active,
+                "bandwidth": 100,
+                "isp_id": isps[i],
+                "circuit_type_id": circuit_type,
+                "site_a_id": sites[i],
+                "device_a_id": devices[i % 2],
+                "interface_a_id": interfaces[i],
+                "site_z_id": sites[-1 - i],
+                "device_z_id": devices[(i + 1) % 2],
+                "interface_z_id": interfaces[-1 - i],
+            }
+            for i in seeded
+        ],
+    )
+    await session.commit()
+    yield
+    await session.execute(delete(Circuit).where(Circuit.id.in_(circuits)))
+    await session.execute(delete(ISPASN).where(ISPASN.isp_id.in_(isps)))
+    await session.execute(delete(ISP).where(ISP.id.in_(isps)))
+    await session.execute(delete(SiteASN).where(SiteASN.asn_id.in_(asns)))
+    await session.execute(delete(ASN).where(ASN.id.in_(asns)))
+    await session.execute(delete(IPAddress).where(IPAddress.id.in_(ip_addresses)))
+    await session.execute(delete(Interface).where(Interface.id.in_(interfaces)))
+    await session.execute(delete(IPRange).where(IPRange.id.in_(ip_ranges)))
+    await session.execute(delete(Prefix).where(Prefix.id.in_(prefixes)))
+    await session.execute(delete(VLAN).where(VLAN.id.in_(vlans)))
+    await session.execute(delete(Block).where(Block.id.in_(blocks)))
+    await session.execute(delete(VRF).where(VRF.id == vrf))
+    await session.execute(delete(Site).where(Site.id.in_(sites)))
+    await session.commit()
+
+
+@pytest.mark.usefixtures("seeded")
+@pytest.mark.parametrize(("list_path", "list_budget", "detail_path", "detail_budget"), LIST_DETAIL_BUDGETS)
+async def test_query_budget(
+    client: "AsyncClient", query_budget, list_path: str, list_budget: int, detail_path: str, detail_budget: int
+) -> None:
+    n_plus_one_threshold = SAME_TABLE_LOADS.get(list_path, 2) + 1
+    with query_budget(list_budget, n_plus_one_threshold):
+        response = await client.get(list_path, params={"limit": 100})
+    assert response.status_code == status.HTTP_200_OK
+
+    results = response.json()["results"]
+    assert results
+    with query_budget(detail_budget, n_plus_one_threshold):
+        response = await client.get(detail_path.format(id=results[0]["id"]))
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_repeated_statement_shapes() -> None:
+    counter = QueryCounter()
+    for statement in (
+        "SELECT site.id FROM site WHERE site.id = $1",
+        "SELECT site.id FROM site WHERE site.id = $2",
+        "SELECT site.id FROM site WHERE site.id = $3",
+        "SELECT site.id FROM site WHERE site.id = $4",
+        "SELECT site.id FROM site WHERE site.id = $5",
+    ):
+        counter.record(statement)
+    counter.record("SELECT device.id FROM device WHERE device.site_id IN ($1, $2, $3)")
+
+    assert counter.count == 6
+    assert counter.repeated(threshold=3) == {"SELECT site.id FROM site WHERE site.id = ?": 5}
+    assert normalize_statement("SELECT 1 FROM a WHERE a.id IN ($1, $2)") == "SELECT ? FROM a WHERE a.id IN (?)"
@@ -0,0 +1,106 @@
+from collections.abc import AsyncGenerator
+from typing import TYPE_CHECKING
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import delete, insert, select
+
+from netsight.features.consts import DeviceStatus
+from netsight.features.dcim.models import Device
+from netsight.features.intend.models import DeviceRole
+from netsight.features.monitor.consts import DeviceOperationalStatus
+from netsight.features.monitor.services import reachability_service
+from netsight.libs.netty.sweeper import ProbeResult, Sweeper
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def labels(group: tuple[str, str]) -> dict[str, str]:
+    return dict(zip(("site_id", "role"), group, strict=True))
+
+
+def latency_count(group: tuple[str, str]) -> float:
+    return REGISTRY.get_sample_value("netsight_device_probe_latency_seconds_count", labels(group)) or 0.0
+
+
+@pytest.fixture
+async def active_devices(session: "AsyncSession") -> AsyncGenerator[None, None]:
+    """Six more active devices, in two device roles, alongside the sample ones."""
+    template = (await session.execute(select(Device).limit(1))).scalar_one()
+    roles = (await session.scalars(select(DeviceRole.id).order_by(DeviceRole.id).limit(2))).all()
+    rows = [
+        {
+            "name": f"probe{i}",
+            "management_ip": f"192.0.2.{i + 1}",
+            "status": DeviceStatus.Active,
+            "device_type_id": template.device_type_id,
+            "device_role_id": roles[i % 2],
+            "platform_id": template.platform_id,
+            "manufacturer_id": template.manufacturer_id,
+            "site_id": template.site_id,
+        }
+        for i in range(6)
+    ]
+    device_ids = (await session.scalars(insert(Device).returning(Device.id), rows)).all()
+    await session.commit()
+    yield
+    await session.execute(delete(Device).where(Device.id.in_(device_ids)))
+    await session.commit()
+
+
+@pytest.mark.usefixtures("active_devices")
+async def test_sweep_writes_operational_status(session: "AsyncSession") -> None:
+    devices = (
+        await session.execute(
+            select(Device.id, Device.management_ip, Device.updated_at, Device.site_id, DeviceRole.slug)
+            .join(DeviceRole, Device.device_role_id == DeviceRole.id)
+            .where(Device.status == DeviceStatus.Active)
+        )
+    ).all()
+    assert len(devices) >= 6
+    online = {str(address) for _, address, *_ in devices[::2]}
+    groups = {row.id: (str(row.site_id), row.slug) for row in devices}
+    answered = {group: latency_count(group) for group in groups.values()}
+
+    # whether the session held a transaction open while probing
+    in_transaction = []
+
+    async def probe(address: str, count: int, interval: float, wait: float) -> ProbeResult:  # noqa: ARG001
+        in_transaction.append(session.in_transaction())
+        return ProbeResult(address, count, (1.0, 3.0) if address in online else ())
+
+    sweeper = Sweeper(probe, count=2)
+    await reachability_service.sweep(session, sweeper, batch_size=1)
+    # a second sweep of the same results changes nothing
+    assert await reachability_service.sweep(session, sweeper) == 0
+    assert not any(in_transaction)
+
+    session.expire_all()
+    rows = (
+        await session.execute(
+            select(
+                Device.id,
+                Device.management_ip,
+                Device.operational_status,
+                Device.updated_at,
+                Device.latency,
+                Device.jitter,
+                Device.packet_loss,
+            ).where(Device.status == DeviceStatus.Active)
+        )
+    ).all()
+    alive_count: dict[tuple[str, str], int] = dict.fromkeys(answered, 0)
+    for device_id, address, operational_status, updated_at, latency, jitter, packet_loss in rows:
+        alive = str(address) in online
+        expected = DeviceOperationalStatus.ONLINE if alive else DeviceOperationalStatus.OFFLINE
+        assert operational_status == expected
+        assert updated_at == next(row.updated_at for row in devices if row.id == device_id)
+        assert packet_loss == (0.0 if alive else 1.0)
+        assert (latency, jitter) == ((2.0, 2.0) if alive else (None, None))
+        alive_count[groups[device_id]] += alive
+    # metrics are by site and device role, not by device
+    for group, count in alive_count.items():
+        assert latency_count(group) - answered[group] == 2 * count
+        unreachable = sum(1 for device_id in groups if groups[device_id] == group) - count
+        assert REGISTRY.get_sample_value("netsight_devices_unreachable", labels(group)) == unreachable
@@ -0,0 +1,177 @@
+from collections.abc import AsyncGenerator, Callable
+from contextlib import AbstractContextManager
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from fastapi import status
+from pydantic import ValidationError
+from sqlalchemy import delete, func, insert, literal, select, update
+
+from netsight.core.database.query_counter import QueryCounter
+from netsight.core.errors import err_codes
+from netsight.core.errors.err_codes import ErrorCode
+from netsight.core.errors.exception_handlers import GenerError
+from netsight.features.consts import DeviceStatus, InterfaceAdminStatus
+from netsight.features.dcim.models import Device, DeviceModule, Interface
+from netsight.features.dcim.services import DeviceScrapeService, component_reconcilers
+from netsight.features.netconfig.models import AuthCredential
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+DEVICES = 1000
+INTERFACES = 100
+
+QueryBudget = Callable[..., AbstractContextManager[QueryCounter]]
+
+
+@pytest.fixture(scope="module")
+async def device_ids(session: "AsyncSession") -> AsyncGenerator[list[int], None]:
+    """`DEVICES` staged copies of an existing device, removed with their components afterwards."""
+    template = await session.scalar(select(Device.id).order_by(Device.id).limit(1))
+    if template is None:
+        pytest.skip("needs a device to copy")
+    numbers = func.generate_series(1, DEVICES).table_valued("n").render_derived()
+    columns = ["device_type_id", "device_role_id", "platform_id", "manufacturer_id", "site_id"]
+    copies = (
+        select(
+            ("reconcile-" + numbers.c.n.cast(Device.name.type)).label("name"),
+            func.inet("198.18.0.0") + numbers.c.n,
+            literal(DeviceStatus.Staged.value),
+            *(Device.__table__.c[column] for column in columns),
+        )
+        .select_from(Device.__table__)
+        .join(numbers, Device.id == template)
+    )
+    stmt = insert(Device.__table__).from_select(["name", "management_ip", "status", *columns], copies)
+    ids = (await session.scalars(stmt.returning(Device.id))).all()
+    await session.commit()
+    yield sorted(ids)
+    await session.execute(delete(Device).where(Device.id.in_(ids)))
+    await session.commit()
+
+
+def interfaces(device_id: int, speed: int = 1000) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": f"GigabitEthernet0/{i}",
+            "description": f"uplink of {device_id}" if i == 0 else None,
+            "if_index": i + 1,
+            "speed": speed,
+            "mode": "access",
+            "mtu": 1500,
+            "admin_status": InterfaceAdminStatus.Enabled,
+        }
+        for i in range(INTERFACES)
+    ]
+
+
+async def test_reconcile_interfaces(session: "AsyncSession", device_ids: list[int], query_budget: QueryBudget) -> None:
+    reconciler = component_reconcilers["get_interfaces"]
+    collected = {device_id: interfaces(device_id) for device_id in device_ids}
+    with query_budget(4):
+        result = await reconciler.reconcile(session, collected)
+    assert result == (DEVICES * INTERFACES, 0, 0)
+
+    stmt = select(Interface.device_id, Interface.name, Interface.id).where(Interface.device_id.in_(device_ids))
+    ids = {(device_id, name): row_id for device_id, name, row_id in (await session.execute(stmt)).all()}
+    assert len(ids) == DEVICES * INTERFACES
+
+    # one device upgraded its links, another lost an interface and got a new one
+    first, second = device_ids[:2]
+    collected[first] = interfaces(first, speed=10_000)
+    collected[second] = [*interfaces(second)[1:], {**interfaces(second)[0], "name": "TenGigabitEthernet1/1"}]
+    with query_budget(4):
+        result = await reconciler.reconcile(session, collected)
+    assert result == (1, INTERFACES, 1)
+
+    # unchanged interfaces kept their ids, those of the changed ones too
+    session.expire_all()
+    after = {(device_id, name): row_id for device_id, name, row_id in (await session.execute(stmt)).all()}
+    assert (second, "GigabitEthernet0/0") not in after
+    assert {key: ids[key] for key in after if key in ids} == {key: after[key] for key in after if key in ids}
+    speeds = select(Interface.speed).where(Interface.device_id == first).distinct()
+    assert (await session.scalars(speeds)).all() == [10_000]
+
+    with query_budget(1):
+        assert await reconciler.reconcile(session, collected) == (0, 0, 0)
+
+
+async def test_reconcile_modules_by_serial(session: "AsyncSession", device_ids: list[int]) -> None:
+    reconciler = component_reconcilers["get_modules"]
+    first, second = device_ids[:2]
+    supervisor = {"name": "Slot 1", "serial_number": "FOC-RECONCILE-1", "part_number": "WS-X45-SUP8-E"}
+    fan = {"name": "Fan 1", "description": "fan tray without a serial number"}
+
+    assert await reconciler.reconcile(session, {first: [supervisor, fan], second: []}) == (2, 0, 0)
+    module_id = await session.scalar(select(DeviceModule.id).where(DeviceModule.serial_number == "FOC-RECONCILE-1"))
+
+    # the supervisor moved to the second device, it is the same row
+    result = await reconciler.reconcile(session, {second: [{**supervisor, "name": "Slot 2"}]})
+    assert result == (0, 1, 0)
+    session.expire_all()
+    moved = await session.get(DeviceModule, module_id)
+    assert (moved.device_id, moved.name) == (second, "Slot 2")
+
+    assert await reconciler.reconcile(session, {first: [], second: []}) == (0, 0, 2)
+
+
+@pytest.mark.parametrize(
+    ("output", "error"),
+    [(None, err_codes.ERR_40003), ("% Invalid input detected", err_codes.ERR_40003), ([], err_codes.ERR_40004)],
+)
+async def test_sync_refuses_output_without_rows(
+    monkeypatch: pytest.MonkeyPatch, session: "AsyncSession", device_ids: list[int], output: Any, error: ErrorCode
+) -> None:
+    device_id = device_ids[0]
+    await component_reconcilers["get_interfaces"].reconcile(session, {device_id: interfaces(device_id)})
+
+    async def collect(_self: DeviceScrapeService, getters: list[str]) -> dict[str, Any]:
+        return dict.fromkeys(getters, output)
+
+    monkeypatch.setattr(DeviceScrapeService, "collect", collect)
+    scrape = DeviceScrapeService(device_id, session)
+    with pytest.raises(GenerError) as e:
+        await scrape.sync("get_interfaces")
+    assert e.value.error == error
+    stored = select(func.count()).where(Interface.device_id == device_id)
+    assert await session.scalar(stored) == INTERFACES
+
+    if output == []:
+        assert await scrape.sync("get_interfaces", allow_empty=True) == (0, 0, INTERFACES)
+
+
+@pytest.fixture
+async def active_device(session: "AsyncSession") -> AsyncGenerator[int, None]:
+    device_id = await session.scalar(select(Device.id).where(Device.status == DeviceStatus.Active).limit(1))
+    if device_id is None:
+        pytest.skip("needs an active device")
+    yield device_id
+    await session.execute(delete(AuthCredential).where(AuthCredential.device_id == device_id))
+    await session.execute(update(Device).where(Device.id == device_id).values(status=DeviceStatus.Active))
+    await session.commit()
+
+
+@pytest.mark.parametrize("cli", ["admin:secret", '{"username": "admin"}'])
+async def test_sync_refuses_invalid_credential(
+    client: "AsyncClient", session: "AsyncSession", active_device: int, cli: str
+) -> None:
+    # written before the format was checked, by core statements the model's validation doesn't see
+    await session.execute(insert(AuthCredential).values(device_id=active_device, cli=cli))
+    await session.commit()
+    response = await client.post(f"/api/dcim/devices/{active_device}/interfaces")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["error"] == err_codes.ERR_40005.error
+    assert "secret" not in response.text
+
+    with pytest.raises(ValidationError):
+        AuthCredential(device_id=active_device, cli=cli)
+
+
+async def test_sync_refuses_inactive_device(client: "AsyncClient", session: "AsyncSession", active_device: int) -> None:
+    await session.execute(update(Device).where(Device.id == active_device).values(status=DeviceStatus.Offline))
+    await session.commit()
+    response = await client.post(f"/api/dcim/devices/{active_device}/interfaces")
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["error"] == err_codes.ERR_40006.error
@@ -0,0 +1,186 @@
+from collections.abc import AsyncGenerator
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+from fakeredis import FakeAsyncRedis
+from fastapi import status
+from sqlalchemy import delete, insert, select
+
+from netsight.core.errors import err_codes
+from netsight.features.consts import SiteStatus, VLANStatus
+from netsight.features.ipam.models import ASN, VLAN, ASNPool, SiteASN, VLANPool
+from netsight.features.ipam.services import ASNPoolService
+from netsight.features.org.models import Site, SiteGroup
+from netsight.libs.ipam.pools import BitmapPool, find_free, to_bitmap
+from netsight.libs.redis import session as redis_session
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def test_find_free() -> None:
+    bits = to_bitmap([0, 2, 3, 7, 42], 10)
+
+    assert find_free(bits, 3) == [1, 4, 5]
+    assert find_free(bits, 3, contiguous=True) == [4, 5, 6]
+    assert find_free(bits, 2, contiguous=True) == [4, 5]
+    assert find_free(bits, 2, contiguous=True) == find_free(bits[:7], 2, contiguous=True)
+    assert find_free(bits, 4, contiguous=True) == []
+    assert find_free(bits, 7) == []
+    assert find_free(np.zeros(4, dtype=bool), 4, contiguous=True) == [0, 1, 2, 3]
+
+
+@pytest.fixture
+async def site(session: "AsyncSession") -> AsyncGenerator[int, None]:
+    group_id = await session.scalar(insert(SiteGroup).returning(SiteGroup.id).values(name="pool-group"))
+    site_id = await session.scalar(
+        insert(Site)
+        .returning(Site.id)
+        .values(
+            name="pool-site",
+            site_code="POOL01",
+            status=SiteStatus.Active,
+            address="",
+            latitude=0,
+            longitude=0,
+            site_group_id=group_id,
+        )
+    )
+    await session.execute(
+        insert(VLANPool),
+        [
+            {"name": "group", "min_vid": 100, "max_vid": 110, "site_group_id": group_id},
+            {"name": "site", "min_vid": 200, "max_vid": 203, "site_id": site_id},
+        ],
+    )
+    await session.execute(
+        insert(VLAN).values(name="taken", vid=101, status=VLANStatus.Active, ip_address="", site_id=site_id)
+    )
+    await session.commit()
+    yield site_id
+    await session.execute(delete(Site).where(Site.id == site_id))
+    await session.execute(delete(SiteGroup).where(SiteGroup.id == group_id))
+    await session.commit()
+
+
+async def test_allocate_vlans(client: "AsyncClient", session: "AsyncSession", site: int) -> None:
+    url = f"/api/ipam/sites/{site}/available-vlans"
+    response = await client.get(url, params={"count": 3})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == [100, 102, 103]
+
+    response = await client.post(url, json={"count": 4, "contiguous": True})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert [(v["vid"], v["name"]) for v in response.json()] == [(vid, f"VLAN{vid}") for vid in range(102, 106)]
+
+    response = await client.post(url, json={"count": 3})
+    assert [v["vid"] for v in response.json()] == [100, 106, 107]
+    # 108-110 and 200-203 are left, both pools count
+    response = await client.post(url, json={"count": 4, "contiguous": True})
+    assert [v["vid"] for v in response.json()] == [200, 201, 202, 203]
+
+    response = await client.post(url, json={"count": 4})
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["error"] == err_codes.ERR_30004.error
+    assert await session.scalar(select(VLAN.vid).where(VLAN.site_id == site).order_by(VLAN.vid.desc())) == 203
+
+
+@pytest.fixture
+async def asn_pool(session: "AsyncSession") -> AsyncGenerator[int, None]:
+    pool_id = await session.scalar(
+        insert(ASNPool).returning(ASNPool.id).values(name="pool", min_asn=4200000000, max_asn=4200000007)
+    )
+    await session.execute(insert(ASN).values(asn=4200000001))
+    await session.commit()
+    yield pool_id
+    asn_ids = select(ASN.id).where(ASN.asn.between(4200000000, 4200000007))
+    await session.execute(delete(SiteASN).where(SiteASN.asn_id.in_(asn_ids)))
+    await session.execute(delete(ASN).where(ASN.asn.between(4200000000, 4200000007)))
+    await session.execute(delete(ASNPool).where(ASNPool.id == pool_id))
+    await session.commit()
+
+
+async def test_allocate_asns(client: "AsyncClient", asn_pool: int) -> None:
+    url = f"/api/ipam/asn-pools/{asn_pool}/available-asns"
+    response = await client.get(url, params={"count": 2})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert response.json() == [4200000000, 4200000002]
+
+    response = await client.post(url, json={"count": 3, "contiguous": True, "description": "new sites"})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert [a["asn"] for a in response.json()] == [4200000002, 4200000003, 4200000004]
+
+    response = await client.post(url, json={"count": 5})
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["error"] == err_codes.ERR_30004.error
+
+
+async def test_reserve(redis: FakeAsyncRedis) -> None:
+    pool = BitmapPool(60)
+    loads = []
+
+    async def load() -> np.ndarray:
+        loads.append(1)
+        return to_bitmap([0, 2, 3, 7], 12)
+
+    # a missing bitset is built, looking does not take
+    assert await pool.reserve("k", 12, 3, load, take=False) == [1, 4, 5]
+    assert await pool.reserve("k", 12, 3, load, contiguous=True) == [4, 5, 6]
+    assert await pool.reserve("k", 12, 3, load) == [1, 8, 9]
+    assert await pool.reserve("k", 12, 2, load, contiguous=True) == [10, 11]
+    assert await pool.reserve("k", 12, 1, load) == []
+    assert len(loads) == 1
+    assert 0 < await redis.ttl(pool.namespace + "k") <= 60
+
+    await pool.invalidate("k")
+    assert await pool.reserve("k", 12, 1, load) == [1]
+    assert len(loads) == 2
+
+    async def raced() -> np.ndarray:
+        # another worker rebuilt the bitset while this one was reading the database
+        await redis.set(pool.namespace + "raced", np.packbits(to_bitmap([0, 1], 12)).tobytes())
+        return to_bitmap([], 12)
+
+    assert await pool.reserve("raced", 12, 1, raced) == [2]
+
+
+async def test_reserve_without_redis() -> None:
+    async def load() -> np.ndarray:
+        raise AssertionError
+
+    assert redis_session.redis_client is None
+    assert await BitmapPool(60).reserve("k", 12, 1, load) is None
+
+
+async def test_allocate_asns_behind_stale_bitset(
+    client: "AsyncClient", session: "AsyncSession", redis: FakeAsyncRedis, site: int, asn_pool: int
+) -> None:
+    url = f"/api/ipam/asn-pools/{asn_pool}/available-asns"
+    response = await client.get(url)
+    assert response.json() == [4200000000]
+    # created past the bitset, the first allocation hits the unique constraint and is retried
+    await session.execute(insert(ASN).values(asn=4200000000))
+    await session.commit()
+
+    response = await client.post(url, json={"count": 1, "site": [site]})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    assert [a["asn"] for a in response.json()] == [4200000002]
+    linked = select(ASN.asn).join(SiteASN, SiteASN.asn_id == ASN.id).where(SiteASN.site_id == site)
+    assert (await session.scalars(linked)).all() == [4200000002]
+    assert await redis.getbit(f"rp_asn:{asn_pool}", 2) == 1
+
+
+async def test_allocate_asns_conflicts_twice(
+    monkeypatch: pytest.MonkeyPatch, client: "AsyncClient", redis: FakeAsyncRedis, asn_pool: int
+) -> None:
+    async def stale(_session: "AsyncSession", min_asn: int, max_asn: int) -> np.ndarray:
+        return to_bitmap([], max_asn - min_asn + 1)
+
+    monkeypatch.setattr(ASNPoolService, "_taken", staticmethod(stale))
+    response = await client.post(f"/api/ipam/asn-pools/{asn_pool}/available-asns", json={"count": 2})
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["error"] == err_codes.ERR_30004.error
+    # the bitset taken by the failed allocation is dropped
+    assert not await redis.exists(f"rp_asn:{asn_pool}")
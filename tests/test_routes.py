@@ -0,0 +1,147 @@
+from collections.abc import AsyncGenerator, AsyncIterator
+from datetime import UTC, datetime, timedelta
+from ipaddress import ip_address, ip_network
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from sqlalchemy import delete, func, select, update
+
+from netsight.core.config import settings
+from netsight.features.dcim import schemas
+from netsight.features.dcim.models import Device, Route, RouteHistory
+from netsight.features.dcim.services import ROUTE_RECORD, ROUTE_TEMPLATE, route_rows, route_service, route_store
+from netsight.features.dcim.tasks import prune_route_history
+from netsight.features.netconfig.models import TextFsmTemplate
+from netsight.features.netconfig.services import textfsm_service
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+ROUTES = 5000
+
+ROUTE_TEMPLATE_TEXT = r"""Value VRF (\S+)
+Value PROTOCOL (\S+(?:\s\S+)?)
+Value PREFIX ([0-9a-fA-F.:]+/\d+)
+Value DISTANCE (\d+)
+Value METRIC (\d+)
+Value List NEXT_HOP ([0-9a-fA-F.:]+)
+Value List INTERFACE (\S*)
+
+Start
+  ^Routing Table: ${VRF}
+  ^Gateway -> Routes
+
+Routes
+  ^\S -> Continue.Record
+  ^${PROTOCOL}\s+${PREFIX}\s+\[${DISTANCE}/${METRIC}\]\s+via\s+${NEXT_HOP},\s+\S+(?:,\s+${INTERFACE})?\s*$$
+  ^${PROTOCOL}\s+${PREFIX}\s+is\s+directly\s+connected,\s+${INTERFACE}\s*$$
+  ^\s+\[\d+/\d+\]\s+via\s+${NEXT_HOP},\s+\S+(?:,\s+${INTERFACE})?\s*$$
+"""
+
+
+def show_ip_route(routes: int, start: int = 0) -> str:
+    # a border router: a default route, one connected uplink, an ECMP OSPF route and BGP prefixes
+    lines = [
+        "Codes: L - local, C - connected, S - static, R - RIP, M - mobile, B - BGP",
+        "       D - EIGRP, EX - EIGRP external, O - OSPF, IA - OSPF inter area",
+        "",
+        "Gateway of last resort is 203.0.113.1 to network 0.0.0.0",
+        "",
+        "B*    0.0.0.0/0 [20/0] via 203.0.113.1, 1w2d",
+        "C     203.0.113.0/30 is directly connected, TenGigabitEthernet0/0/0",
+        "O IA  10.1.0.0/16 [110/20] via 10.0.0.1, 2d, TenGigabitEthernet0/1/0",
+        "                  [110/20] via 10.0.0.5, 2d, TenGigabitEthernet0/1/1",
+    ]
+    lines += [
+        f"B     {i >> 16 & 0xFF | 64}.{i >> 8 & 0xFF}.{i & 0xFF}.0/24 [20/0] via 203.0.113.1, 1w2d"
+        for i in range(start, start + routes)
+    ]
+    return "\n".join(lines)
+
+
+def route_query(**fields: Any) -> schemas.RouteQuery:
+    # the Query defaults are filled in by FastAPI
+    defaults = {"limit": 100, "offset": 0, "vrf": None, "protocol": [], "within": None, "address": None, "at": None}
+    return schemas.RouteQuery(**defaults | fields)
+
+
+async def pieces(output: str, size: int = 4093) -> AsyncIterator[str]:
+    for start in range(0, len(output), size):
+        yield output[start : start + size]
+
+
+@pytest.fixture
+async def device_id(session: "AsyncSession") -> AsyncGenerator[tuple[int, int], None]:
+    device = (await session.scalars(select(Device).order_by(Device.id).limit(1))).first()
+    if device is None:
+        pytest.skip("needs a device")
+    template = TextFsmTemplate(name=ROUTE_TEMPLATE, template=ROUTE_TEMPLATE_TEXT, platform_id=device.platform_id)
+    session.add(template)
+    await session.commit()
+    yield device.id, device.platform_id
+    for model in (Route, RouteHistory):
+        await session.execute(delete(model).where(model.device_id == device.id))
+    await session.execute(delete(TextFsmTemplate).where(TextFsmTemplate.id == template.id))
+    await session.commit()
+
+
+async def load(session: "AsyncSession", device: tuple[int, int], output: str) -> tuple[int, int]:
+    device_id, platform_id = device
+    tables = await textfsm_service.parse_stream(session, platform_id, ROUTE_TEMPLATE, pieces(output), ROUTE_RECORD)
+    return await route_store.load(session, {device_id: route_rows(tables)})
+
+
+async def test_load_routes(session: "AsyncSession", device_id: tuple[int, int]) -> None:
+    # the ECMP route is a route per next hop
+    assert await load(session, device_id, show_ip_route(ROUTES)) == (ROUTES + 4, 0)
+    routes = await route_service.routes(session, device_id[0], route_query(limit=10000))
+    assert len(routes) == ROUTES + 4
+    loaded = {(route.protocol, str(route.prefix)): route for route in routes}
+    connected = loaded["C", "203.0.113.0/30"]
+    assert (str(connected.next_hop), connected.interface) == ("0.0.0.0", "TenGigabitEthernet0/0/0")  # noqa: S104
+    ospf = [route for route in routes if route.protocol == "O IA"]
+    assert [(str(route.next_hop), route.interface, route.distance, route.metric) for route in ospf] == [
+        ("10.0.0.1", "TenGigabitEthernet0/1/0", 110, 20),
+        ("10.0.0.5", "TenGigabitEthernet0/1/1", 110, 20),
+    ]
+    first_seen = connected.first_seen
+
+    # 100 prefixes withdrawn and 100 announced
+    assert await load(session, device_id, show_ip_route(ROUTES, start=100)) == (100, 100)
+    assert await load(session, device_id, show_ip_route(ROUTES, start=100)) == (0, 0)
+
+    query = route_query(address=ip_address("64.0.200.1"))
+    assert [str(route.prefix) for route in await route_service.routes(session, device_id[0], query)] == [
+        "64.0.200.0/24",
+        "0.0.0.0/0",
+    ]
+    query = route_query(address=ip_address("64.0.0.1"), at=first_seen)
+    assert [str(route.prefix) for route in await route_service.routes(session, device_id[0], query)] == [
+        "64.0.0.0/24",
+        "0.0.0.0/0",
+    ]
+    assert len(await route_service.routes(session, device_id[0], route_query(address=ip_address("64.0.0.1")))) == 1
+    query = route_query(within=ip_network("64.0.0.0/16"), protocol=["B"], limit=10000)
+    assert len(await route_service.routes(session, device_id[0], query)) == 256 - 100
+    assert len(await route_service.routes(session, device_id[0], query.model_copy(update={"at": first_seen}))) == 256
+
+
+async def test_prune_route_history(session: "AsyncSession", device_id: tuple[int, int]) -> None:
+    await load(session, device_id, show_ip_route(ROUTES))
+    await load(session, device_id, show_ip_route(ROUTES, start=100))
+    history = select(func.count()).select_from(RouteHistory).where(RouteHistory.device_id == device_id[0])
+    assert await session.scalar(history) == 100
+    # 60 of the withdrawn routes removed past the retention
+    expired = datetime.now(tz=UTC) - timedelta(seconds=settings.ROUTE_HISTORY_RETENTION, days=1)
+    prefixes = select(RouteHistory.prefix).where(RouteHistory.device_id == device_id[0])
+    backdated = prefixes.order_by(RouteHistory.prefix).limit(60).scalar_subquery()
+    await session.execute(
+        update(RouteHistory)
+        .where(RouteHistory.device_id == device_id[0], RouteHistory.prefix.in_(backdated))
+        .values(removed_at=expired)
+    )
+    await session.commit()
+
+    assert await prune_route_history() == 60
+    assert await session.scalar(history) == 40
+    assert await prune_route_history() == 0
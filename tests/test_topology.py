@@ -0,0 +1,79 @@
+from collections.abc import AsyncGenerator
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from netsight.features.assurance.topology.services import TopologyService
+from netsight.features.consts import InterfaceAdminStatus
+from netsight.features.dcim import services as dcim_services
+from netsight.features.dcim.models import Device, Interface, LldpNeighbor
+from netsight.features.dcim.services import DeviceScrapeService
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@pytest.fixture
+async def devices(session: "AsyncSession") -> AsyncGenerator[list[tuple[int, str]], None]:
+    """Two devices with interfaces Gi0/1 and Gi0/2, their ids and names."""
+    devices = (await session.execute(select(Device.id, Device.name).order_by(Device.id).limit(2))).tuples().all()
+    if len(devices) < 2:
+        pytest.skip("needs two devices")
+    rows = [
+        {"device_id": device_id, "name": name, "mode": "trunk", "admin_status": InterfaceAdminStatus.Enabled}
+        for device_id, _ in devices
+        for name in ("Gi0/1", "Gi0/2")
+    ]
+    interface_ids = (await session.scalars(insert(Interface).returning(Interface.id), rows)).all()
+    await session.commit()
+    yield list(devices)
+    await session.execute(delete(Interface).where(Interface.id.in_(interface_ids)))
+    await session.commit()
+
+
+def scraped(monkeypatch: pytest.MonkeyPatch, neighbors: list[dict[str, Any]], service: TopologyService) -> None:
+    async def collect(_self: DeviceScrapeService, getters: list[str]) -> dict[str, Any]:
+        return dict.fromkeys(getters, neighbors)
+
+    monkeypatch.setattr(DeviceScrapeService, "collect", collect)
+    monkeypatch.setattr(dcim_services, "topology_service", service)
+
+
+async def test_sync_topology(
+    monkeypatch: pytest.MonkeyPatch, session: "AsyncSession", devices: list[tuple[int, str]]
+) -> None:
+    (first, first_name), (second, second_name) = devices
+    # two processes, neither reloading on its own while the test runs
+    here, there = TopologyService(3600), TopologyService(3600)
+    graph, other_graph = await here.graph(session), await there.graph(session)
+    assert graph.neighbors(first) == other_graph.neighbors(first) == []
+
+    # a neighbor of a device not known is left out
+    neighbors = [
+        {"interface": "Gi0/1", "neighbor": second_name, "neighbor_interface": "Gi0/1"},
+        {"interface": "Gi0/2", "neighbor": "unknown", "neighbor_interface": "Gi0/1"},
+    ]
+    scraped(monkeypatch, neighbors, here)
+    assert await DeviceScrapeService(first, session).sync_topology() == (1, 0, 0)
+    stored = select(LldpNeighbor.source_device_id, LldpNeighbor.target_device_id)
+    assert (await session.execute(stored)).tuples().all() == [(first, second)]
+    # applied in place where it was synced, loaded again by the other process
+    assert await here.graph(session) is graph
+    assert graph.neighbors(first) == [second]
+    assert await there.graph(session) is not other_graph
+    other_graph = await there.graph(session)
+    assert other_graph.neighbors(first) == [second]
+
+    # the other process syncs the second device, this one missed it and loads it
+    scraped(monkeypatch, [{"interface": "Gi0/2", "neighbor": first_name, "neighbor_interface": "Gi0/2"}], there)
+    assert await DeviceScrapeService(second, session).sync_topology() == (1, 0, 0)
+    assert await there.graph(session) is other_graph
+    assert await here.graph(session) is not graph
+
+    # a device without neighbors loses its links only when said so
+    scraped(monkeypatch, [], here)
+    assert await DeviceScrapeService(first, session).sync_topology(allow_empty=True) == (0, 0, 1)
+    graph = await here.graph(session)
+    assert await there.graph(session) is not other_graph
+    assert (await session.execute(stored)).tuples().all() == [(second, first)]
@@ -0,0 +1,28 @@
+import json
+from datetime import UTC, datetime
+from ipaddress import IPv4Network
+from types import SimpleNamespace
+
+from netsight.features._types import ListT, list_response
+from netsight.features.ipam.schemas import Block
+
+
+def test_list_response_matches_list_model() -> None:
+    rows = [
+        SimpleNamespace(
+            id=i,
+            name=f"block-{i}",
+            block=IPv4Network(f"10.{i}.0.0/16"),
+            is_private=True,
+            description=None,
+            created_at=datetime(2024, 1, 1, tzinfo=UTC),
+            updated_at=None,
+        )
+        for i in range(3)
+    ]
+
+    response = list_response(len(rows), rows, Block)
+    expected = ListT[Block](count=len(rows), results=[Block.model_validate(r) for r in rows])
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == json.loads(expected.model_dump_json())
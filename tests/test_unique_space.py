@@ -0,0 +1,129 @@
+from collections.abc import AsyncGenerator
+from ipaddress import ip_interface, ip_network
+from typing import TYPE_CHECKING
+
+import pytest
+from fastapi import status
+from sqlalchemy import delete, insert, or_
+
+from netsight.core.errors import err_codes
+from netsight.core.errors.exception_handlers import GenerError
+from netsight.features.consts import IPRangeStatus, PrefixStatus
+from netsight.features.ipam import schemas
+from netsight.features.ipam.models import VRF, IPAddress, IPRange, Prefix
+from netsight.features.ipam.services import vrf_service
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+SPACE = ip_network("198.18.0.0/24")
+
+
+@pytest.fixture
+async def vrfs(session: "AsyncSession") -> AsyncGenerator[dict[str, int], None]:
+    ids = await session.scalars(
+        insert(VRF).returning(VRF.id),
+        [
+            {"name": "US", "rd": "65000:901", "enforce_unique": True},
+            {"name": "UF", "rd": "65000:902", "enforce_unique": False},
+        ],
+    )
+    unique, shared = ids.all()
+    await session.commit()
+    yield {"unique": unique, "shared": shared}
+    await session.execute(delete(IPAddress).where(IPAddress.address.op("<<=")(SPACE)))
+    await session.execute(delete(IPRange).where(IPRange.start_address.op("<<=")(SPACE)))
+    await session.execute(delete(Prefix).where(Prefix.prefix.op("<<=")(SPACE)))
+    await session.execute(delete(VRF).where(or_(VRF.id == unique, VRF.id == shared)))
+    await session.commit()
+
+
+async def _post(client: "AsyncClient", url: str, body: dict) -> int:
+    response = await client.post(url, json=body)
+    if response.status_code == status.HTTP_409_CONFLICT:
+        assert response.json()["error"] == err_codes.ERR_30003.error
+    return response.status_code
+
+
+async def test_duplicate_addresses(client: "AsyncClient", vrfs: dict[str, int]) -> None:
+    url = "/api/ipam/ip-addresses"
+    body = {"address": "198.18.0.10/24", "status": "Reserved"}
+
+    assert await _post(client, url, {**body, "vrf_id": vrfs["unique"]}) == status.HTTP_200_OK
+    # the same host with another mask is a duplicate
+    assert (
+        await _post(client, url, {**body, "address": "198.18.0.10/25", "vrf_id": vrfs["unique"]})
+        == status.HTTP_409_CONFLICT
+    )
+    assert await _post(client, url, body) == status.HTTP_200_OK
+    assert await _post(client, url, body) == status.HTTP_409_CONFLICT
+    assert await _post(client, url, {**body, "vrf_id": vrfs["shared"]}) == status.HTTP_200_OK
+    assert await _post(client, url, {**body, "vrf_id": vrfs["shared"]}) == status.HTTP_200_OK
+
+
+async def test_duplicate_prefixes(client: "AsyncClient", vrfs: dict[str, int]) -> None:
+    url = "/api/ipam/prefixes"
+    body = {"prefix": "198.18.0.0/26", "status": PrefixStatus.Available}
+
+    assert await _post(client, url, body) == status.HTTP_200_OK
+    assert await _post(client, url, body) == status.HTTP_409_CONFLICT
+    # the same prefix in another VRF is not a duplicate
+    assert await _post(client, url, {**body, "vrf_id": vrfs["unique"]}) == status.HTTP_200_OK
+
+
+async def test_overlapping_ranges(client: "AsyncClient", vrfs: dict[str, int]) -> None:  # noqa: ARG001
+    url = "/api/ipam/ip-ranges"
+    first = {"start_address": "198.18.0.10/24", "end_address": "198.18.0.20/24", "status": IPRangeStatus.Reserved}
+    second = {**first, "start_address": "198.18.0.20/24", "end_address": "198.18.0.30/24"}
+    third = {**first, "start_address": "198.18.0.21/24", "end_address": "198.18.0.30/24"}
+
+    assert await _post(client, url, first) == status.HTTP_200_OK
+    assert await _post(client, url, second) == status.HTTP_409_CONFLICT
+    assert await _post(client, url, third) == status.HTTP_200_OK
+
+
+async def test_conflict_report_and_enforcing(
+    client: "AsyncClient", session: "AsyncSession", vrfs: dict[str, int]
+) -> None:
+    shared = vrfs["shared"]
+    await session.execute(
+        insert(IPAddress),
+        [
+            {"address": ip_interface(a), "version": 4, "status": IPRangeStatus.Reserved, "vrf_id": shared}
+            for a in ("198.18.0.1/24", "198.18.0.1/32", "198.18.0.2/24")
+        ],
+    )
+    ranges = await session.scalars(
+        insert(IPRange).returning(IPRange.id),
+        [
+            {
+                "start_address": ip_interface(f"198.18.0.{start}/24"),
+                "end_address": ip_interface(f"198.18.0.{end}/24"),
+                "status": IPRangeStatus.Reserved,
+                "vrf_id": shared,
+            }
+            # 100-110 and 120-130 only overlap through 105-125, 140-150 overlaps nothing
+            for start, end in ((100, 110), (120, 130), (105, 125), (140, 150))
+        ],
+    )
+    range_ids = ranges.all()
+    await session.commit()
+
+    response = await client.get("/api/ipam/address-conflicts")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    conflicts = [c for c in response.json() if c["vrf_id"] == shared]
+    assert sorted((c["object_type"], c["value"], c["enforced"], len(c["ids"])) for c in conflicts) == [
+        ("IPAddress", "198.18.0.1", False, 2),
+        ("IPRange", "198.18.0.100-198.18.0.130", False, 3),
+    ]
+    assert next(c for c in conflicts if c["object_type"] == "IPRange")["ids"] == [
+        range_ids[0],
+        range_ids[2],
+        range_ids[1],
+    ]
+
+    vrf = await vrf_service.get_one_or_404(session, shared)
+    with pytest.raises(GenerError) as raised:
+        await vrf_service.update(session, vrf, schemas.VRFUpdate(enforce_unique=True))
+    assert raised.value.error == err_codes.ERR_30003
@@ -0,0 +1,120 @@
+from collections.abc import AsyncGenerator
+from ipaddress import ip_interface, ip_network
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+from fastapi import status
+from sqlalchemy import delete, insert, select
+
+from netsight.features.consts import IPAddressStatus, PrefixStatus
+from netsight.features.ipam.models import Block, IPAddress, Prefix
+from netsight.features.ipam.services import prefix_service
+from netsight.libs.ipam.utilization import count_in_ranges, covered_size, outermost, sort_keys, to_keys, usable_sizes
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+PREFIXES = ["198.51.100.0/24", "198.51.100.0/30", "198.51.100.64/26", "198.51.101.0/25", "2001:db8:1::/126"]
+ADDRESSES = ["198.51.100.1/30", "198.51.100.2/30", "198.51.100.70/26", "2001:db8:1::1/126"]
+BLOCK = "198.51.100.0/23"
+
+
+def test_count_in_ranges() -> None:
+    keys = sort_keys(to_keys([7, 1, 5, 3], 4))
+    counts = count_in_ranges(keys, to_keys([0, 2, 8], 4), to_keys([3, 5, 9], 4))
+
+    assert counts.tolist() == [2, 2, 0]
+
+
+def test_ipv6_keys_compare_both_words() -> None:
+    low, high = (1 << 64) - 1, 1 << 64
+    keys = sort_keys(to_keys([high + 1, low, high], 6))
+    counts = count_in_ranges(keys, to_keys([0, high], 6), to_keys([low, (1 << 128) - 1], 6))
+
+    assert counts.tolist() == [1, 2]
+
+
+def test_outermost_and_covered_size() -> None:
+    networks = [ip_network(n) for n in ("10.0.0.0/24", "10.0.0.0/30", "10.0.1.0/25", "10.0.1.64/26")]
+    firsts = to_keys([int(n.network_address) for n in networks], 4)
+    lasts = to_keys([int(n.broadcast_address) for n in networks], 4)
+    mask = outermost(firsts, lasts)
+
+    assert mask.tolist() == [True, False, True, False]
+    assert covered_size(np.array([24, 25]), 32) == 384
+    assert covered_size(np.array([1, 1]), 128) == 1 << 128
+    assert usable_sizes(np.array([24, 31, 32]), 4).tolist() == [254, 2, 1]
+
+
+@pytest.fixture
+async def addresses(session: "AsyncSession") -> AsyncGenerator[dict[str, int], None]:
+    ids = await session.scalars(
+        insert(Prefix).returning(Prefix.id),
+        [{"prefix": ip_network(p), "status": PrefixStatus.Available} for p in PREFIXES],
+    )
+    prefixes = dict(zip(PREFIXES, ids.all(), strict=True))
+    await session.execute(
+        insert(IPAddress),
+        [
+            {"address": ip_interface(a), "version": ip_interface(a).version, "status": IPAddressStatus.Active}
+            for a in ADDRESSES
+        ],
+    )
+    await session.execute(
+        insert(Block).values(name="TN", block=ip_network(BLOCK), size=512, range=BLOCK, is_private=False)
+    )
+    await session.commit()
+    yield prefixes
+    await session.execute(delete(Block).where(Block.block == ip_network(BLOCK)))
+    await session.execute(delete(IPAddress).where(IPAddress.address.in_([ip_interface(a) for a in ADDRESSES])))
+    await session.execute(delete(Prefix).where(Prefix.id.in_(prefixes.values())))
+    await session.commit()
+
+
+async def test_prefix_utilization(client: "AsyncClient", session: "AsyncSession", addresses: dict[str, int]) -> None:
+    response = await client.get("/api/ipam/prefix-utilization")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    results = {r["prefix"]: r for r in response.json() if r["prefix"] in addresses}
+
+    assert {p: (r["used"], r["utilization"], r["is_full"]) for p, r in results.items()} == {
+        "198.51.100.0/24": (3, 1.18, False),
+        "198.51.100.0/30": (2, 100.0, True),
+        "198.51.100.64/26": (1, 1.61, False),
+        "198.51.101.0/25": (0, 0.0, False),
+        "2001:db8:1::/126": (1, 33.33, False),
+    }
+
+    assert await prefix_service.refresh_utilization(session) >= 1
+    full = await session.scalars(select(Prefix.prefix).where(Prefix.id.in_(addresses.values()), Prefix.is_full))
+    assert [str(p) for p in full] == ["198.51.100.0/30"]
+    assert await prefix_service.refresh_utilization(session) == 0
+
+
+async def test_block_utilization(client: "AsyncClient", addresses: dict[str, int]) -> None:  # noqa: ARG001
+    response = await client.get("/api/ipam/block-utilization")
+    assert response.status_code == status.HTTP_200_OK, response.text
+    (block,) = (r for r in response.json() if r["block"] == BLOCK)
+
+    # the /24 and the /25, the /30 and the /26 are inside the /24
+    assert (block["used"], block["utilization"]) == (384, 75.0)
+
+
+async def test_utilization_of_mixed_mask_addresses(session: "AsyncSession") -> None:
+    # inet orders by network then mask length: the /24 addresses would come before 198.18.0.3/32
+    prefix_id = await session.scalar(
+        insert(Prefix).returning(Prefix.id).values(prefix=ip_network("198.18.0.0/30"), status=PrefixStatus.Available)
+    )
+    mixed = [ip_interface(a) for a in ("198.18.0.5/24", "198.18.0.3/32", "198.18.0.4/24")]
+    await session.execute(
+        insert(IPAddress), [{"address": a, "version": a.version, "status": IPAddressStatus.Active} for a in mixed]
+    )
+    await session.commit()
+    try:
+        (result,) = (r for r in await prefix_service.utilization(session, None) if r["id"] == prefix_id)
+        assert result["used"] == 1
+    finally:
+        await session.execute(delete(IPAddress).where(IPAddress.address.in_(mixed)))
+        await session.execute(delete(Prefix).where(Prefix.id == prefix_id))
+        await session.commit()